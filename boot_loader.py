@@ -16,7 +16,6 @@ from gui.holiday_manager import HolidayManager
 from gui.event_manager import EventManager
 # --- ENDE KORREKTUR ---
 
-from gui.shift_plan_data_manager import ShiftPlanDataManager
 from database.db_shifts import get_all_shift_types
 
 # --- NEUE IMPORTE FÜR GLOBALEN CACHE (JETZT KORRIGIERT) ---
@@ -27,28 +26,27 @@ from database.db_requests import get_pending_wunschfrei_requests, get_pending_va
 from database.db_reports import get_open_bug_reports_count
 # --- ENDE NEUE IMPORTE ---
 
-# Fenster
-from gui.login_window import LoginWindow
-from gui.main_admin_window import MainAdminWindow
-from gui.main_user_window import MainUserWindow
-# --- NEU (Zuteilungs-Fenster): Import für das Zuteilungsfenster ---
-from gui.main_zuteilung_window import MainZuteilungWindow
-
+# --- NEU (Warm-Start): Lokaler Stammdaten-Snapshot (Regel 2) ---
+from gui.warm_start_cache import WarmStartCache
+from database.db_version_stamps import CONFIG_STAMP_PREFIX
 # --- ENDE NEU ---
 
-# --- NEU: Import für Schiffsbewachungs-Fenster (Annahme des Klassennamens) ---
-try:
-    from gui.main_schiffsbewachung_window import MainSchiffsbewachungWindow
-except ImportError:
-    print("[WARNUNG] main_schiffsbewachung_window.py nicht gefunden. Bitte erstellen Sie die Datei.")
-    MainSchiffsbewachungWindow = None  # Fallback
-# --- ENDE NEU ---
-
-# --- NEU (P1-P4): Import des neuen Preloading-Managers (Regel 4) ---
-from gui.preloading_manager import PreloadingManager
-
+# Fenster
+from gui.login_window import LoginWindow
 
-# --- ENDE NEU ---
+# --- KORREKTUR (Startzeit): Hauptfenster, ShiftPlanDataManager und PreloadingManager
+# werden erst bei Bedarf importiert (Regel 2). Die Hauptfenster ziehen sämtliche
+# Tabs, den Generator und den Renderer nach sich und werden vor dem Login nicht gebraucht.
+from utils.lazy_import import LazyClassRef
+from utils.import_profiler import ImportProfiler
+
+MainAdminWindow = LazyClassRef("gui.main_admin_window", "MainAdminWindow")
+MainUserWindow = LazyClassRef("gui.main_user_window", "MainUserWindow")
+# --- NEU (Zuteilungs-Fenster) ---
+MainZuteilungWindow = LazyClassRef("gui.main_zuteilung_window", "MainZuteilungWindow")
+# --- NEU: Schiffsbewachungs-Fenster (Import-Fehler wird erst beim Laden behandelt) ---
+MainSchiffsbewachungWindow = LazyClassRef("gui.main_schiffsbewachung_window", "MainSchiffsbewachungWindow")
+# --- ENDE KORREKTUR ---
 
 
 # --- MODIFIZIERT (M): Erbt nicht mehr von tk.Tk ---
@@ -304,6 +302,48 @@ class Application:
 
     # --- ENDE NEUE FUNKTION ---
 
+    # --- NEU (Warm-Start): Hilfsfunktionen für den lokalen Stammdaten-Snapshot ---
+    def _get_warm_start_config_keys(self):
+        """ Config-Keys (config_storage), die im Warm-Start-Snapshot landen. """
+        return [db_core.MIN_STAFFING_RULES_CONFIG_KEY, HolidayManager.CONFIG_KEY, EventManager.CONFIG_KEY]
+
+    def _apply_warm_start_snapshot(self):
+        """
+        Lädt den lokalen Snapshot und füllt damit die Caches, ohne auf die DB zu warten.
+        Gibt den Snapshot zurück (oder None beim Kaltstart).
+        """
+        snapshot = WarmStartCache.load()
+        if snapshot is None:
+            return None
+        try:
+            WarmStartCache.prime_caches(snapshot)
+            sections = snapshot.get('sections', {})
+            if sections.get('shift_types'):
+                self.load_shift_types(force_reload=True)
+            if sections.get(CONFIG_STAMP_PREFIX + db_core.MIN_STAFFING_RULES_CONFIG_KEY):
+                self.load_staffing_rules(force_reload=True)
+            if sections.get('users'):
+                self.global_user_cache = sections['users']
+            print("[Boot Loader] Warm-Start-Snapshot angewendet.")
+            return snapshot
+        except Exception as e:
+            # (Regel 1) Snapshot verwerfen, normaler Kaltstart
+            print(f"[Boot Loader] Warm-Start-Snapshot unbrauchbar ({e}). Verwerfe ihn.")
+            WarmStartCache.discard()
+            return None
+
+    def _collect_warm_start_sections(self, config_keys):
+        """ Sammelt die aktuellen Stammdaten für den Snapshot (aus den bereits gefüllten Caches). """
+        sections = {
+            'shift_types': get_all_shift_types(),
+            'users': self.global_user_cache,
+        }
+        for key in config_keys:
+            sections[CONFIG_STAMP_PREFIX + key] = db_core.load_config_json(key)
+        return sections
+
+    # --- ENDE NEU ---
+
     def preload_common_data(self):
         # ... (unverändert) ...
         """
@@ -314,6 +354,10 @@ class Application:
         print("[Preload Thread] Starte Daten-Caching (P1a + P3)...")
         start_time = time.time()
 
+        # --- NEU (Warm-Start): Snapshot anwenden, BEVOR die DB bereit ist ---
+        warm_snapshot = self._apply_warm_start_snapshot()
+        # --- ENDE NEU ---
+
         while not db_core.is_db_initialized():
             if self.prewarm_thread and not self.prewarm_thread.is_alive():
                 print("[FEHLER im Preload] DB-Thread ist tot, aber DB nicht initialisiert. Breche Preload ab.")
@@ -321,7 +365,20 @@ class Application:
             time.sleep(0.1)
 
         try:
+            # --- NEU (Warm-Start): Nur veraltete Bereiche neu laden ---
+            config_keys = self._get_warm_start_config_keys()
+            stale_sections, stamps = WarmStartCache.fetch_stale_sections(warm_snapshot, config_keys)
+            WarmStartCache.invalidate_sections(stale_sections)
+            if CONFIG_STAMP_PREFIX + HolidayManager.CONFIG_KEY in stale_sections:
+                HolidayManager.clear_cache()
+            if CONFIG_STAMP_PREFIX + EventManager.CONFIG_KEY in stale_sections:
+                EventManager.clear_cache()
+            print(f"[Preload Thread] Warm-Start: {len(stale_sections)} veraltete Bereiche: "
+                  f"{sorted(stale_sections) if stale_sections else '-'}")
+            # --- ENDE NEU ---
+
             print("[Preload Thread] Lade Schichtarten...")
+            # (Warm-Start) Bei aktuellem Snapshot kommt dies aus dem vorbefüllten Cache
             self.load_shift_types(force_reload=True)
 
             print("[Preload Thread] Lade Mindestbesetzung...")
@@ -347,6 +404,8 @@ class Application:
 
             if self.data_manager is None:
                 print("[Preload Thread] Instanziiere ShiftPlanDataManager (P5-Cache)...")
+                # KORREKTUR (Startzeit): Import erst hier (im Preload-Thread, nach dem Splash)
+                from gui.shift_plan_data_manager import ShiftPlanDataManager
                 self.data_manager = ShiftPlanDataManager(self)
 
             # --- KORREKTUR: Lade den ZIELMONAT (nächster Monat) (P1a) ---
@@ -358,8 +417,11 @@ class Application:
 
             # --- NEU: Globale Daten für andere Tabs vorladen (P3) (JETZT KORRIGIERT) ---
             print("[Preload Thread] Lade globale Benutzerliste (P3)...")
-            self.global_user_cache = get_all_users()  # KORRIGIERT (verwendet get_all_users)
-            print(f"[Preload Thread] {len(self.global_user_cache)} Benutzer geladen.")
+            if 'users' in stale_sections or not self.global_user_cache:
+                self.global_user_cache = get_all_users()  # KORRIGIERT (verwendet get_all_users)
+                print(f"[Preload Thread] {len(self.global_user_cache)} Benutzer geladen.")
+            else:
+                print(f"[Preload Thread] {len(self.global_user_cache)} Benutzer aus Warm-Start-Cache übernommen.")
 
             print("[Preload Thread] Lade globale Diensthundeliste (P3)...")
             self.global_dog_cache = get_all_dogs()
@@ -378,6 +440,20 @@ class Application:
             print(f"[Preload Thread] {self.global_open_bugs_count} offene Bugs gezählt.")
             # --- ENDE NEU (P3) ---
 
+            # --- NEU (Regel 2): Engpass-Index laden (nur wenn veraltet: Neuaufbau) ---
+            print("[Preload Thread] Lade Engpass-Index...")
+            try:
+                self.data_manager.criticality_index.ensure_fresh()
+            except Exception as criticality_err:
+                # (Regel 1) Der Index ist optional; der Generator rechnet dann selbst
+                print(f"[Preload Thread] Engpass-Index nicht verfügbar: {criticality_err}")
+            # --- ENDE NEU ---
+
+            # --- NEU (Warm-Start): Snapshot aktualisieren (nur wenn sich etwas geändert hat) ---
+            if stale_sections and stamps:
+                WarmStartCache.save(self._collect_warm_start_sections(config_keys), stamps)
+            # --- ENDE NEU ---
+
         except Exception as e:
             # Fängt Fehler ab (z.B. den 'year_int'-Fehler, falls er erneut auftritt)
             print(f"[FEHLER] Preload des Schichtplans ODER der Stammdaten fehlgeschlagen: {e}")
@@ -417,7 +493,9 @@ class Application:
                 user_data['main_window'] = window_name  # Sicherstellen, dass es für den Rest der App da ist
 
             # 3. Fensterklasse aus Mapping (in __init__ definiert) holen
-            TargetWindow = self.window_class_map.get(window_name)
+            # KORREKTUR (Startzeit): Das Modul wird erst jetzt importiert (LazyClassRef)
+            window_ref = self.window_class_map.get(window_name)
+            TargetWindow = window_ref.try_resolve() if window_ref else None
 
             # 4. Fenster instanziieren
             if TargetWindow:
@@ -429,7 +507,7 @@ class Application:
                 # ODER wenn der Import (z.B. für MainSchiffsbewachungWindow) fehlschlug
                 print(
                     f"[WARNUNG] Unbekanntes Hauptfenster '{window_name}' in DB oder Import fehlgeschlagen! Führe Fallback auf 'main_user_window' aus.")
-                self.main_window = MainUserWindow(self.root, user_data, self)
+                self.main_window = MainUserWindow.resolve()(self.root, user_data, self)
             # --- ENDE ANPASSUNG ---
 
             self.main_window.wait_visibility()
@@ -442,6 +520,7 @@ class Application:
 
             # --- NEU (P1b + P2): Starte den Post-Login PreloadingManager ---
             print("[Boot Loader] Initialisiere Post-Login PreloadingManager (P1b, P2)...")
+            from gui.preloading_manager import PreloadingManager  # KORREKTUR (Startzeit): verzögert
             self.preloading_manager = PreloadingManager(
                 app=self,
                 data_manager=self.data_manager,
@@ -455,6 +534,8 @@ class Application:
             self.main_window.after(500, self.preloading_manager.process_ui_queue)
             # --- ENDE NEU ---
 
+            ImportProfiler.report(f"Import-Profil Hauptfenster ({window_name})")
+
         except Exception as e:
             print(f"[FEHLER] Kritisches Laden des Hauptfensters fehlgeschlagen: {e}")
             import traceback
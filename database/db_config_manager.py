@@ -3,6 +3,10 @@ import json
 import mysql.connector
 # KORREKTUR: Import von der neuen Verbindungsdatei
 from .db_connection import create_connection
+# NEU (Regel 2): Leveled Logging (Cache-Treffer nur auf DEBUG-Stufe)
+from utils.instrumentation import get_logger
+
+_log = get_logger("config")
 
 # --- INNOVATION 2: Cache für Konfigurationen ---
 _config_cache = {}
@@ -44,7 +48,7 @@ def load_config_json(key):
     global _config_cache
     # 1. Prüfe den Cache
     if key in _config_cache:
-        print(f"[DEBUG] Lade '{key}' aus dem Cache.")
+        _log.debug("Lade '%s' aus dem Cache.", key)
         return _config_cache[key]
 
     # 2. Lade aus DB
@@ -70,6 +74,16 @@ def load_config_json(key):
         if conn and conn.is_connected(): cursor.close(); conn.close()
 
 
+def prime_config_cache(key, data):
+    """
+    Füllt den Konfigurations-Cache mit bereits bekannten Daten
+    (z.B. aus dem lokalen Warm-Start-Cache), ohne die DB abzufragen.
+    """
+    if data is None:
+        return
+    _config_cache[key] = data
+
+
 def clear_config_cache(config_key=None):
     """
     Leert den Konfigurations-Cache.
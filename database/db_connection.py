@@ -2,14 +2,23 @@
 # NEUE DATEI: Isoliert die Verbindungslogik, um zirkuläre Imports zu verhindern.
 
 import mysql.connector
-from mysql.connector import pooling
 import json
 import sys
 import os
 import threading
+import time
+import atexit
 
 # Importiert die Schema-Logik
 from . import db_schema
+# NEU (Regel 2): Optionaler Abfrage-Profiler (DHF_QUERY_PROFILE=1 / --query-profile)
+from .db_query_profiler import QueryProfiler
+# NEU (Regel 2): Eigener Pool (interaktiv/Hintergrund, Warteschlange, Leerlauf-Prüfung)
+from .db_pool_manager import PoolManager
+
+if QueryProfiler.is_requested():
+    QueryProfiler.enable()
+    atexit.register(QueryProfiler.dump_at_exit)
 
 # ==============================================================================
 # 💥 DATENBANK-KONFIGURATION WIRD JETZT AUS 'db_config.json' GELADEN 💥
@@ -81,6 +90,8 @@ def load_db_config():
 
 try:
     DB_CONFIG = load_db_config()
+    # Optionaler Abschnitt "pool" (Größen/Timeouts) gehört nicht zu den Verbindungsparametern
+    POOL_SETTINGS = DB_CONFIG.pop("pool", None) or {}
 except Exception as e:
     DB_CONFIG = None
     raise
@@ -97,6 +108,25 @@ _db_initialized = False  # Flag, um initialize_db() nur einmal auszuführen
 # --- POOL- UND VERBINDUNGS-LOGIK (LAZY LOADING) ---
 # ==============================================================================
 
+def _get_pooled_connection():
+    """
+    Holt eine Verbindung aus dem Pool des aktuellen Threads (interaktiv oder
+    Hintergrund, siehe db_pool_manager). Ist der Pool erschöpft, wird
+    begrenzt gewartet, bevor ein PoolError kommt. Bei aktivem QueryProfiler
+    wird die Wartezeit gemessen und die Verbindung zur Messung eingehüllt.
+    """
+    if not QueryProfiler.enabled:
+        return db_pool.get_connection()
+
+    start = time.perf_counter()
+    try:
+        conn = db_pool.get_connection()
+    except mysql.connector.errors.PoolError:
+        QueryProfiler.record_pool_exhausted()
+        raise
+    return QueryProfiler.wrap_connection(conn, time.perf_counter() - start)
+
+
 def create_connection():
     """
     Stellt eine Verbindung aus dem Pool her.
@@ -109,7 +139,7 @@ def create_connection():
     # 1. Schnelle Prüfung (ohne Lock)
     if db_pool is not None:
         try:
-            return db_pool.get_connection()
+            return _get_pooled_connection()
         except mysql.connector.Error as err:
             print(f"❌ Fehler beim Abrufen einer Verbindung aus dem Pool: {err}")
             return None
@@ -123,7 +153,7 @@ def create_connection():
         # 3. Erneute Prüfung (Double-Checked Locking)
         if db_pool is not None:
             try:
-                return db_pool.get_connection()
+                return _get_pooled_connection()
             except mysql.connector.Error as err:
                 print(f"❌ Fehler beim Abrufen einer Verbindung aus dem Pool (nach Lock): {err}")
                 return None
@@ -134,9 +164,9 @@ def create_connection():
             if DB_CONFIG is None:
                 raise ConnectionError("DB_CONFIG wurde aufgrund eines Fehlers nicht geladen.")
 
-            db_pool = pooling.MySQLConnectionPool(pool_name="dhf_pool",
-                                                  pool_size=10,
-                                                  **DB_CONFIG)
+            # KORREKTUR (Regel 2): Statt MySQLConnectionPool(pool_size=10), der bei
+            # Erschöpfung sofort scheitert, zwei getrennte Pools mit Warteschlange.
+            db_pool = PoolManager(DB_CONFIG, POOL_SETTINGS)
             print("✅ Datenbank-Connection-Pool erfolgreich erstellt.")
 
             # 5. Datenbank-Schema (Tabellen) initialisieren
@@ -160,7 +190,7 @@ def create_connection():
                         conn.close()
 
             # 6. Finale Verbindung zurückgeben
-            return db_pool.get_connection()
+            return _get_pooled_connection()
 
         except mysql.connector.Error as err:
             print(f"❌ KRITISCHER FEHLER beim Erstellen des Connection-Pools: {err}")
@@ -189,6 +219,10 @@ def prewarm_connection_pool():
         conn = create_connection()
         if conn:
             print("[DB Connection] Pre-Warming erfolgreich. Pool und Schema sind jetzt initialisiert.")
+            # NEU (Regel 2): Ein paar interaktive Verbindungen vorab öffnen (erster Klick wartet nicht)
+            conn.close()
+            conn = None
+            db_pool.prefill()
         else:
             print("[DB Connection] Pre-Warming fehlgeschlagen (create_connection gab None zurück).")
     except Exception as e:
@@ -199,7 +233,16 @@ def prewarm_connection_pool():
 
 
 def close_pool():
-    print("Der Datenbank-Connection-Pool wird bei Programmende verwaltet.")
+    """ Schließt die unbenutzten Pool-Verbindungen (ausgeliehene bei ihrer Rückgabe). """
+    if db_pool is not None:
+        db_pool.close()
+    print("Datenbank-Connection-Pool geschlossen.")
+
+
+def get_pool_stats():
+    """ Kennzahlen der Pools (Auslastung, Wartezeit, Timeouts) oder [] vor der Initialisierung. """
+    pool = db_pool
+    return pool.get_stats() if pool is not None else []
 
 
 def initialize_db():
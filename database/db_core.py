@@ -73,36 +73,46 @@ try:
 except ImportError as e:
     print(f"FEHLER beim Re-Import von db_config_manager: {e}")
 
-# --- Aus db_meta_manager ---
-try:
-    from .db_meta_manager import (
-        save_shift_frequency,
-        load_shift_frequency,
-        reset_shift_frequency,
-        save_special_appointment,
-        delete_special_appointment,
-        get_special_appointments
-    )
-except ImportError as e:
-    print(f"FEHLER beim Re-Import von db_meta_manager: {e}")
+# --- KORREKTUR (Startzeit): Selten genutzte Module werden verzögert re-exportiert ---
+# db_meta_manager und db_migration_fixes werden erst beim ersten Zugriff auf einen
+# ihrer Namen importiert (PEP 562, Modul-__getattr__). 'from database.db_core import X'
+# und 'db_core.X' funktionieren unverändert (Regel 1).
+_LAZY_EXPORTS = {
+    # --- Aus db_meta_manager ---
+    'save_shift_frequency': 'db_meta_manager',
+    'load_shift_frequency': 'db_meta_manager',
+    'reset_shift_frequency': 'db_meta_manager',
+    'save_special_appointment': 'db_meta_manager',
+    'delete_special_appointment': 'db_meta_manager',
+    'get_special_appointments': 'db_meta_manager',
 
-# --- Aus db_migration_fixes ---
-try:
-    from .db_migration_fixes import (
-        run_db_fix_approve_all_users,
-        run_db_update_is_approved,
-        run_db_update_v1,
-        run_db_update_add_is_archived,
-        run_db_update_add_archived_date,
-        run_db_update_activation_date,
-        run_db_migration_add_role_permissions,  # (aus vorherigem Schritt)
-
-        # --- NEUER EXPORT (Regel 4) ---
-        run_db_migration_add_role_window_type,
-
-        # --- INNOVATION (Regel 2 & 4): Export für Farb-Migration ---
-        run_db_migration_add_role_color
-        # --- ENDE INNOVATION ---
-    )
-except ImportError as e:
-    print(f"FEHLER beim Re-Import von db_migration_fixes: {e}")
\ No newline at end of file
+    # --- Aus db_migration_fixes ---
+    'run_db_fix_approve_all_users': 'db_migration_fixes',
+    'run_db_update_is_approved': 'db_migration_fixes',
+    'run_db_update_v1': 'db_migration_fixes',
+    'run_db_update_add_is_archived': 'db_migration_fixes',
+    'run_db_update_add_archived_date': 'db_migration_fixes',
+    'run_db_update_activation_date': 'db_migration_fixes',
+    'run_db_migration_add_role_permissions': 'db_migration_fixes',
+    'run_db_migration_add_role_window_type': 'db_migration_fixes',
+    'run_db_migration_add_role_color': 'db_migration_fixes',
+}
+
+
+def __getattr__(name):
+    """Lädt verzögert re-exportierte Funktionen beim ersten Zugriff nach."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+    try:
+        module = importlib.import_module(f".{module_name}", __package__)
+    except ImportError as e:
+        print(f"FEHLER beim Re-Import von {module_name}: {e}")
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from e
+
+    value = getattr(module, name)
+    globals()[name] = value  # Cache: beim nächsten Zugriff kein __getattr__ mehr
+    return value
+# --- ENDE KORREKTUR ---
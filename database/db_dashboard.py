@@ -0,0 +1,88 @@
+# database/db_dashboard.py
+# NEU: Gebündelte Admin-Zähler (Tab-Titel & Header-Benachrichtigungen, Regel 2)
+#
+# Alle Badge-Zähler werden mit EINER Abfrage über EINE Verbindung geholt
+# (skalare Unterabfragen, es werden nur Zahlen übertragen). Das Ergebnis
+# wird mit kurzer Lebensdauer (TTL) zwischengespeichert, damit
+# AdminNotificationManager und AdminTabManager sich einen Abruf teilen.
+
+import threading
+import time
+
+import mysql.connector
+from .db_connection import create_connection
+
+# Lebensdauer des Zähler-Caches in Sekunden (Checker laufen alle 60 Sek.)
+ADMIN_COUNTERS_TTL_SECONDS = 30
+
+# Gleiche Filter wie die Einzel-Funktionen (get_..._count / get_pending_wunschfrei_requests)
+_ADMIN_COUNTERS_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM wunschfrei_requests wr
+            JOIN users u ON wr.user_id = u.id
+            WHERE wr.status = 'Ausstehend') AS pending_wishes,
+        (SELECT COUNT(*) FROM vacation_requests
+            WHERE status = 'Ausstehend' AND archived = 0) AS pending_vacations,
+        (SELECT COUNT(*) FROM bug_reports
+            WHERE status NOT IN ('Erledigt', 'Geschlossen', 'Rückmeldung (Behoben)') AND archived = 0) AS open_bugs,
+        (SELECT COUNT(*) FROM bug_reports
+            WHERE status IN ('Rückmeldung (Offen)', 'Rückmeldung (Behoben)')) AS user_feedback,
+        (SELECT COUNT(*) FROM password_reset_requests) AS password_resets,
+        (SELECT COUNT(*) FROM tasks
+            WHERE status NOT IN ('Erledigt') AND archived = 0) AS open_tasks
+"""
+
+ADMIN_COUNTER_KEYS = ('pending_wishes', 'pending_vacations', 'open_bugs', 'user_feedback',
+                      'password_resets', 'open_tasks')
+
+# --- Cache (geteilt zwischen allen Admin-Managern) ---
+_counters_cache = {'data': None, 'loaded_at': 0.0}
+_counters_lock = threading.Lock()
+
+
+def get_admin_dashboard_counters(max_age=ADMIN_COUNTERS_TTL_SECONDS):
+    """
+    Gibt alle Admin-Zähler als Dict zurück (Schlüssel: ADMIN_COUNTER_KEYS).
+    Nutzt den Cache, solange er jünger als max_age Sekunden ist.
+    Bei einem DB-Fehler wird der letzte bekannte Stand (oder 0) geliefert.
+    Thread-sicher: Gleichzeitige Aufrufer warten auf EINEN Abruf.
+    """
+    with _counters_lock:
+        cached = _counters_cache['data']
+        if cached is not None and (time.monotonic() - _counters_cache['loaded_at']) < max_age:
+            return dict(cached)
+
+        counters = _query_admin_dashboard_counters()
+        if counters is None:
+            return dict(cached) if cached is not None else dict.fromkeys(ADMIN_COUNTER_KEYS, 0)
+
+        _counters_cache['data'] = counters
+        _counters_cache['loaded_at'] = time.monotonic()
+        return dict(counters)
+
+
+def invalidate_admin_dashboard_counters():
+    """ Erzwingt beim nächsten Aufruf einen neuen Abruf (z.B. nach Admin-Aktionen). """
+    with _counters_lock:
+        _counters_cache['loaded_at'] = 0.0
+
+
+def _query_admin_dashboard_counters():
+    """ Führt die gebündelte Zähler-Abfrage aus. Gibt None bei Fehlern zurück. """
+    conn = create_connection()
+    if conn is None:
+        return None
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(_ADMIN_COUNTERS_QUERY)
+        row = cursor.fetchone() or {}
+        return {key: int(row.get(key) or 0) for key in ADMIN_COUNTER_KEYS}
+    except mysql.connector.Error as e:
+        print(f"Fehler beim Abrufen der Admin-Zähler: {e}")
+        return None
+    finally:
+        if conn and conn.is_connected():
+            if cursor is not None:
+                cursor.close()
+            conn.close()
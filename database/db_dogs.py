@@ -1,6 +1,11 @@
 # database/db_dogs.py
 from .db_core import create_connection
 import mysql.connector
+import hashlib
+import io
+
+# Breite der Vorschaubilder (entspricht der Detailansicht im DogManagementTab)
+THUMBNAIL_WIDTH = 300
 
 
 def get_all_dogs():
@@ -34,42 +39,142 @@ def get_all_dogs():
             conn.close()
 
 
-def get_dog_details(dog_id):
+def get_dog_details(dog_id, known_image_hash=None):
     """
-    (NEUE FUNKTION) Holt alle Details für EINEN Hund, inkl. Bild-BLOB.
-    Wird vom Edit-Fenster und der Detailansicht genutzt (Lazy Loading). (Regel 1 & 4)
+    Holt die Details für EINEN Hund für die Detailansicht (Lazy Loading, Regel 2).
+    Liefert statt des Original-BLOBs nur das Vorschaubild ('image_thumb') und
+    dessen Inhalts-Hash ('image_hash'). Stimmt 'known_image_hash' mit dem Hash
+    in der DB überein (Bild liegt schon im lokalen Cache), wird auch das
+    Vorschaubild nicht übertragen ('image_thumb' = None).
+    Das Original-Bild holt get_dog_image() (nur beim expliziten Öffnen).
     """
     conn = create_connection()
     if conn is None: return None
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM dogs WHERE id = %s", (dog_id,))
-        return cursor.fetchone()
+        cursor.execute("""
+                       SELECT id,
+                              name,
+                              breed,
+                              birth_date,
+                              chip_number,
+                              acquisition_date,
+                              departure_date,
+                              last_dpo_date,
+                              vaccination_info,
+                              image_hash,
+                              image_blob IS NOT NULL AS has_image,
+                              CASE WHEN image_hash <=> %s THEN NULL ELSE image_thumb END AS image_thumb
+                       FROM dogs
+                       WHERE id = %s
+                       """, (known_image_hash, dog_id))
+        dog = cursor.fetchone()
+
+        # Altbestand (Bild vor Einführung der Vorschaubilder gespeichert): einmalig nachziehen
+        if dog and dog['has_image'] and not dog['image_hash']:
+            dog['image_thumb'], dog['image_hash'] = _backfill_dog_thumbnail(conn, dog_id)
+        return dog
     except Exception as e:
         print(f"Fehler in get_dog_details: {e}")
         return None
     finally:
         if conn and conn.is_connected():
-            cursor.close()
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+
+
+def get_dog_image(dog_id):
+    """
+    (NEU) Holt den Original-Bild-BLOB eines Hundes (volle Auflösung).
+    Nur aufrufen, wenn das Bild explizit geöffnet wird. Gibt None zurück, wenn keins vorhanden ist.
+    """
+    conn = create_connection()
+    if conn is None: return None
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT image_blob FROM dogs WHERE id = %s", (dog_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    except mysql.connector.Error as e:
+        print(f"Fehler in get_dog_image: {e}")
+        return None
+    finally:
+        if conn and conn.is_connected():
+            if cursor is not None:
+                cursor.close()
             conn.close()
 
 
+def _make_thumbnail(image_blob):
+    """
+    (NEU) Erzeugt (thumb_bytes, content_hash) für einen Bild-BLOB.
+    Das Vorschaubild wird auf THUMBNAIL_WIDTH Pixel Breite verkleinert (nie vergrößert).
+    Ohne Bild: (None, None). Kann das Bild nicht gelesen werden, bleibt nur der Hash.
+    """
+    if not image_blob:
+        return None, None
+    content_hash = hashlib.md5(image_blob).hexdigest()
+    try:
+        from PIL import Image  # Nur hier benötigt (Speichern/Nachziehen)
+
+        img = Image.open(io.BytesIO(image_blob))
+        if img.size[0] > THUMBNAIL_WIDTH:
+            h_size = max(1, int(img.size[1] * (THUMBNAIL_WIDTH / float(img.size[0]))))
+            img = img.resize((THUMBNAIL_WIDTH, h_size), Image.Resampling.LANCZOS)
+
+        buffer = io.BytesIO()
+        if img.mode in ("RGBA", "LA", "P"):
+            img.save(buffer, format="PNG", optimize=True)
+        else:
+            img.convert("RGB").save(buffer, format="JPEG", quality=85)
+        return buffer.getvalue(), content_hash
+    except Exception as e:
+        print(f"Vorschaubild konnte nicht erzeugt werden: {e}")
+        return None, content_hash
+
+
+def _backfill_dog_thumbnail(conn, dog_id):
+    """ (NEU) Erzeugt das fehlende Vorschaubild für einen Hund und speichert es. Gibt (thumb, hash) zurück. """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT image_blob FROM dogs WHERE id = %s", (dog_id,))
+        row = cursor.fetchone()
+        thumb, content_hash = _make_thumbnail(row[0] if row else None)
+        cursor.execute("UPDATE dogs SET image_thumb = %s, image_hash = %s WHERE id = %s",
+                       (thumb, content_hash, dog_id))
+        conn.commit()
+        print(f"[DB Dogs] Vorschaubild für Hund {dog_id} nachgezogen.")
+        return thumb, content_hash
+    except mysql.connector.Error as e:
+        print(f"Fehler beim Nachziehen des Vorschaubilds: {e}")
+        conn.rollback()
+        return None, None
+    finally:
+        cursor.close()
+
+
 def add_dog(data):
-    """Fügt einen neuen Hund hinzu (inkl. Bild-BLOB)."""
+    """Fügt einen neuen Hund hinzu (inkl. Bild-BLOB und Vorschaubild)."""
     conn = create_connection()
     if conn is None: return False
     try:
         cursor = conn.cursor()
         # --- KORREKTUR (Regel 1): image_blob hinzugefügt ---
+        # --- NEU (Regel 2): Vorschaubild + Hash beim Speichern erzeugen ---
+        image_blob = data.get('image_blob', None)  # .get() für Sicherheit
+        image_thumb, image_hash = _make_thumbnail(image_blob)
         query = """
                 INSERT INTO dogs (name, breed, birth_date, chip_number,
                                   acquisition_date, departure_date, last_dpo_date,
-                                  vaccination_info, image_blob)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) \
+                                  vaccination_info, image_blob, image_thumb, image_hash)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) \
                 """
         params = (data['name'], data['breed'], data['birth_date'], data['chip_number'], data['acquisition_date'],
                   data['departure_date'], data['last_dpo_date'], data['vaccination_info'],
-                  data.get('image_blob', None))  # .get() für Sicherheit
+                  image_blob, image_thumb, image_hash)
         # --- ENDE KORREKTUR ---
 
         cursor.execute(query, params)
@@ -85,12 +190,16 @@ def add_dog(data):
 
 
 def update_dog(dog_id, data):
-    """Aktualisiert die Daten eines Hundes (inkl. Bild-BLOB)."""
+    """
+    Aktualisiert die Daten eines Hundes.
+    Das Bild (BLOB, Vorschaubild, Hash) wird nur geschrieben, wenn 'image_blob'
+    in data enthalten ist (None = Bild entfernen). So muss das Edit-Fenster den
+    Original-BLOB nicht laden, wenn das Bild unverändert bleibt.
+    """
     conn = create_connection()
     if conn is None: return False
     try:
         cursor = conn.cursor()
-        # --- KORREKTUR (Regel 1): image_blob hinzugefügt ---
         query = """
                 UPDATE dogs \
                 SET name             = %s, \
@@ -100,17 +209,22 @@ def update_dog(dog_id, data):
                     acquisition_date = %s, \
                     departure_date   = %s, \
                     last_dpo_date    = %s, \
-                    vaccination_info = %s, \
-                    image_blob       = %s
-                WHERE id = %s \
+                    vaccination_info = %s \
                 """
-        params = (data['name'], data['breed'], data['birth_date'], data['chip_number'], data['acquisition_date'],
-                  data['departure_date'], data['last_dpo_date'], data['vaccination_info'],
-                  data.get('image_blob', None),  # .get() für Sicherheit
-                  dog_id)
-        # --- ENDE KORREKTUR ---
+        params = [data['name'], data['breed'], data['birth_date'], data['chip_number'], data['acquisition_date'],
+                  data['departure_date'], data['last_dpo_date'], data['vaccination_info']]
 
-        cursor.execute(query, params)
+        # --- NEU (Regel 2): Bild nur bei Änderung schreiben, Vorschaubild + Hash mitführen ---
+        if 'image_blob' in data:
+            image_thumb, image_hash = _make_thumbnail(data['image_blob'])
+            query += ", image_blob = %s, image_thumb = %s, image_hash = %s "
+            params += [data['image_blob'], image_thumb, image_hash]
+        # --- ENDE NEU ---
+
+        query += "WHERE id = %s"
+        params.append(dog_id)
+
+        cursor.execute(query, tuple(params))
         conn.commit()
         return True
     except mysql.connector.IntegrityError:
@@ -8,6 +8,10 @@ import mysql.connector
 import traceback
 # --- KORREKTUR: defaultdict importiert (wird für Locks benötigt) ---
 from collections import defaultdict
+# NEU (Regel 2): Leveled Logging statt Fortschritts-Prints pro Teilabfrage
+from utils.instrumentation import get_logger
+
+_log = get_logger("batch_load")
 
 
 # --- ENDE KORREKTUR ---
@@ -202,7 +206,7 @@ def get_all_data_for_plan_display(year, month, for_date):
         cursor = conn.cursor(dictionary=True)
 
         # === 1. Abfrage: Benutzer (Logik aus db_users.get_ordered_users_for_schedule) ===
-        print("[Batch Load] 1/7: Lade Benutzer...")
+        _log.debug("1/7: Lade Benutzer...")
         user_query = """
                      SELECT u.*, uo.sort_order, COALESCE(uo.is_visible, 1) as is_visible
                      FROM users u
@@ -224,7 +228,7 @@ def get_all_data_for_plan_display(year, month, for_date):
         result_data['users'] = cursor.fetchall()
 
         # === 2. Abfrage: Schichtsicherungen (Logik aus db_locks.get_locks_for_month) ===
-        print("[Batch Load] 2/7: Lade Schichtsicherungen...")
+        _log.debug("2/7: Lade Schichtsicherungen...")
         cursor.execute("""
                        SELECT user_id, shift_date, shift_abbrev
                        FROM shift_locks
@@ -256,7 +260,7 @@ def get_all_data_for_plan_display(year, month, for_date):
         # --- ENDE KORREKTUR ---
 
         # === 3. Abfrage: Schichtdaten (Logik aus get_consolidated_month_data) ===
-        print("[Batch Load] 3/7: Lade Schichtdaten (Haupt, Vor-, Folgemonat)...")
+        _log.debug("3/7: Lade Schichtdaten (Haupt, Vor-, Folgemonat)...")
         month_start_date = date(year, month, 1)
         month_last_day = date(year, month, calendar.monthrange(year, month)[1])
         prev_month_last_day = month_start_date - timedelta(days=1)
@@ -310,7 +314,7 @@ def get_all_data_for_plan_display(year, month, for_date):
             target_dict[user_id][date_str] = abbrev
 
         # === 4. Abfrage: Tageszählungen (Hauptmonat) ===
-        print("[Batch Load] 4/7: Lade Tageszählungen...")
+        _log.debug("4/7: Lade Tageszählungen...")
         cursor.execute(
             "SELECT ss.shift_date, ss.shift_abbrev, COUNT(ss.shift_abbrev) as count FROM shift_schedule ss LEFT JOIN user_order uo ON ss.user_id = uo.user_id WHERE ss.shift_date BETWEEN %s AND %s AND COALESCE (uo.is_visible, 1) = 1 GROUP BY ss.shift_date, ss.shift_abbrev",
             (start_date_str, end_date_str))
@@ -329,13 +333,13 @@ def get_all_data_for_plan_display(year, month, for_date):
             result_data['daily_counts'][shift_date_str_count][row['shift_abbrev']] = row['count']
 
         # === 5. Abfrage: Urlaub (Hauptmonat) ===
-        print("[Batch Load] 5/7: Lade Urlaub (Hauptmonat)...")
+        _log.debug("5/7: Lade Urlaub (Hauptmonat)...")
         cursor.execute("SELECT * FROM vacation_requests WHERE (start_date <= %s AND end_date >= %s) AND archived = 0",
                        (end_date_str, start_date_str))
         result_data['vacation_requests'] = cursor.fetchall()
 
         # === 6. Abfrage: Wunschfrei (Hauptmonat) ===
-        print("[Batch Load] 6/7: Lade Wunschfrei (Hauptmonat)...")
+        _log.debug("6/7: Lade Wunschfrei (Hauptmonat)...")
         cursor.execute(
             "SELECT user_id, request_date, status, requested_shift, requested_by FROM wunschfrei_requests WHERE request_date BETWEEN %s AND %s",
             (start_date_str, end_date_str))
@@ -357,7 +361,7 @@ def get_all_data_for_plan_display(year, month, for_date):
                                                                                  row['requested_by'], None)
 
         # === 7. Abfrage: Urlaub & Wunschfrei (Vormonat) ===
-        print("[Batch Load] 7/7: Lade Anträge (Vormonat)...")
+        _log.debug("7/7: Lade Anträge (Vormonat)...")
         cursor.execute("SELECT * FROM vacation_requests WHERE (start_date <= %s AND end_date >= %s) AND archived = 0",
                        (prev_end_str, prev_start_str))
         result_data['prev_month_vacations'] = cursor.fetchall()
@@ -382,7 +386,7 @@ def get_all_data_for_plan_display(year, month, for_date):
                                                                                    row['requested_shift'],
                                                                                    row['requested_by'], None)
 
-        print("[Batch Load] Alle 7 Abfragen über eine Verbindung abgeschlossen.")
+        _log.debug("Alle 7 Abfragen über eine Verbindung abgeschlossen.")
         return result_data
 
     except mysql.connector.Error as e:
@@ -0,0 +1,374 @@
+# database/db_pool_manager.py
+# NEU: Eigener Verbindungs-Pool mit Warteschlange statt MySQLConnectionPool (Regel 2)
+#
+# Der feste MySQLConnectionPool(pool_size=10) wirft bei Erschöpfung sofort
+# einen PoolError (create_connection gab dann None zurück), prüft Verbindungen
+# nach Standby/VPN-Abbruch nicht und pingt in jedem 'finally' per
+# is_connected() den Server an. Dieser Pool:
+#
+#   1. wartet bei Erschöpfung begrenzt (Timeout) und bedient Wartende fair
+#      in Ankunftsreihenfolge (FIFO), statt sofort zu scheitern,
+#   2. prüft Verbindungen NICHT bei jedem Ausleihen, sondern nur, wenn sie
+#      länger unbenutzt waren oder verdächtig sind (ping), und ersetzt sie
+#      nach einer Maximal-Lebensdauer,
+#   3. trennt einen kleinen "background"-Pool (Preloader, Warmstart) vom
+#      "interactive"-Pool, damit ein Vorladen nie ein Speichern blockiert,
+#   4. liefert Kennzahlen (Wartezeit, Auslastung, Timeouts) für das
+#      Leistungsprotokoll.
+#
+# Auswahl des Pools pro Thread:
+#     with background_pool(): ...             (für einzelne Abschnitte)
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+
+from utils.instrumentation import get_logger, Instrumentation
+
+_log = get_logger("db_pool")
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Standardwerte; überschreibbar über den optionalen Abschnitt "pool" in db_config.json:
+#   "pool": {"interactive_size": 6, "background_size": 4, "checkout_timeout": 10, ...}
+DEFAULT_SETTINGS = {
+    'interactive_size': 6,
+    'background_size': 4,
+    'checkout_timeout': 10.0,  # Sekunden, die ein Dialog maximal auf eine Verbindung wartet
+    'background_checkout_timeout': 30.0,
+    'idle_validate_after': 30.0,  # Nach so vielen Sekunden Leerlauf wird vor der Ausgabe gepingt
+    'max_lifetime': 1800.0,  # Verbindungen werden nach 30 Minuten ersetzt
+}
+
+# Wartezeiten ab diesem Wert landen als Zeitmessung "db.pool_wait" im Leistungsprotokoll
+SLOW_CHECKOUT_S = 0.05
+
+_thread_context = threading.local()
+
+
+@contextmanager
+def background_pool():
+    """ Verbindungen innerhalb des with-Blocks kommen aus dem Hintergrund-Pool. """
+    previous = getattr(_thread_context, 'pool_name', INTERACTIVE)
+    _thread_context.pool_name = BACKGROUND
+    try:
+        yield
+    finally:
+        _thread_context.pool_name = previous
+
+
+def current_pool_name():
+    return getattr(_thread_context, 'pool_name', INTERACTIVE)
+
+
+class _PoolEntry:
+    """ Eine physische Verbindung samt Zeitstempeln. """
+
+    __slots__ = ('raw', 'created_at', 'last_used', 'suspect')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.suspect = False
+
+
+class ManagedConnection:
+    """
+    Ausgeliehene Verbindung. Alles außer close/is_connected/rollback wird an
+    die echte Verbindung durchgereicht; close() gibt sie an den Pool zurück.
+    """
+
+    def __init__(self, pool, entry):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_entry', entry)
+        object.__setattr__(self, '_released', False)
+
+    def close(self):
+        if not self._released:
+            object.__setattr__(self, '_released', True)
+            self._pool._release(self._entry)
+
+    def is_connected(self):
+        # KORREKTUR (Regel 2): Kein Server-Ping mehr in jedem 'finally'.
+        # Defekte Verbindungen fallen beim Zurückgeben bzw. beim nächsten
+        # Ausleihen (Leerlauf-/Verdachtsprüfung) auf.
+        return not self._released
+
+    def rollback(self):
+        # Nach einem Rollback (meist im Fehlerpfad) wird die Verbindung vor
+        # der nächsten Ausgabe geprüft.
+        self._entry.suspect = True
+        return self._entry.raw.rollback()
+
+    def __getattr__(self, name):
+        if self._released:
+            raise mysql.connector.errors.OperationalError("Verbindung wurde bereits an den Pool zurückgegeben.")
+        return getattr(self._entry.raw, name)
+
+    def __setattr__(self, key, value):
+        setattr(self._entry.raw, key, value)
+
+
+class ManagedPool:
+    """
+    Pool fester Größe mit FIFO-Warteschlange. Verbindungen werden erst bei
+    Bedarf geöffnet; Öffnen und Prüfen passieren außerhalb des Locks.
+    """
+
+    def __init__(self, name, size, connect_kwargs, checkout_timeout, idle_validate_after, max_lifetime):
+        self.name = name
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.idle_validate_after = idle_validate_after
+        self.max_lifetime = max_lifetime
+        self._connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # _PoolEntry; zuletzt benutzte rechts (bleiben "warm")
+        self._waiters = deque()  # Tickets in Ankunftsreihenfolge
+        self._open = 0  # geöffnete + gerade im Aufbau befindliche Verbindungen
+        self._in_use = 0
+        self._closed = False
+
+        # Kennzahlen
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waited_checkouts = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+        self.max_in_use = 0
+        self.max_waiting = 0
+        self.created = 0
+        self.validations = 0
+        self.replaced = 0
+        self.discarded = 0
+
+    # --- Ausleihen ---
+
+    def get_connection(self, timeout=None):
+        """
+        Leiht eine Verbindung aus. Wartet höchstens 'timeout' Sekunden (FIFO)
+        und wirft danach mysql.connector.errors.PoolError.
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        ticket = object()
+        entry = None
+
+        with self._cond:
+            if self._closed:
+                raise mysql.connector.errors.PoolError(f"Pool '{self.name}' ist geschlossen.")
+            self._waiters.append(ticket)
+            self.max_waiting = max(self.max_waiting, len(self._waiters) - 1)
+            try:
+                while True:
+                    # Nur der Erste in der Schlange darf zugreifen (fair)
+                    if self._waiters[0] is ticket:
+                        if self._idle:
+                            entry = self._idle.pop()
+                            break
+                        if self._open < self.size:
+                            self._open += 1  # Platz reservieren, Verbindung wird unten geöffnet
+                            break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise mysql.connector.errors.PoolError(
+                            f"Pool '{self.name}' erschöpft: keine Verbindung innerhalb von {timeout:g}s frei "
+                            f"({self._in_use}/{self.size} in Benutzung, {len(self._waiters) - 1} weitere wartend).")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()  # Der Nächste in der Schlange prüft erneut
+
+            waited = time.monotonic() - start
+            self._in_use += 1
+            self.checkouts += 1
+            self.max_in_use = max(self.max_in_use, self._in_use)
+            self.wait_total_s += waited
+            self.wait_max_s = max(self.wait_max_s, waited)
+            if waited >= SLOW_CHECKOUT_S:
+                self.waited_checkouts += 1
+
+        if waited >= SLOW_CHECKOUT_S:
+            Instrumentation.record_span("db.pool_wait", waited, pool=self.name)
+            _log.debug("Pool '%s': %.0f ms auf Verbindung gewartet.", self.name, waited * 1000)
+
+        try:
+            if entry is None:
+                entry = self._open_entry()
+            else:
+                entry = self._validate(entry)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify_all()
+            raise
+        return ManagedConnection(self, entry)
+
+    def _open_entry(self):
+        entry = _PoolEntry(mysql.connector.connect(**self._connect_kwargs))
+        with self._cond:
+            self.created += 1
+        return entry
+
+    def _validate(self, entry):
+        """
+        Prüft eine Verbindung aus dem Leerlauf nur bei Bedarf:
+        zu alt -> ersetzen; lange unbenutzt oder verdächtig -> ping (mit Reconnect).
+        """
+        now = time.monotonic()
+        if now - entry.created_at > self.max_lifetime:
+            self._close_raw(entry.raw)
+            with self._cond:
+                self.replaced += 1
+            return self._open_entry()
+
+        if entry.suspect or now - entry.last_used > self.idle_validate_after:
+            with self._cond:
+                self.validations += 1
+            try:
+                entry.raw.ping(reconnect=True, attempts=1, delay=0)
+                entry.suspect = False
+            except mysql.connector.Error as err:
+                _log.info("Pool '%s': Verbindung nach Leerlauf nicht mehr gültig (%s), öffne neu.", self.name, err)
+                self._close_raw(entry.raw)
+                with self._cond:
+                    self.replaced += 1
+                return self._open_entry()
+        return entry
+
+    # --- Zurückgeben ---
+
+    def _release(self, entry):
+        """
+        Nimmt eine Verbindung zurück. Offene Ergebnisse werden verworfen und
+        eine offene Transaktion zurückgerollt (ersetzt das reset_session des
+        alten Pools); schlägt das fehl, wird die Verbindung verworfen.
+        """
+        keep = not self._closed
+        if keep:
+            try:
+                raw = entry.raw
+                if raw.unread_result:
+                    raw.consume_results()
+                if raw.in_transaction:
+                    raw.rollback()
+            except Exception as e:
+                _log.info("Pool '%s': Verbindung beim Zurückgeben defekt (%s), wird verworfen.", self.name, e)
+                keep = False
+
+        if not keep:
+            self._close_raw(entry.raw)
+
+        with self._cond:
+            self._in_use -= 1
+            if keep and not self._closed:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            else:
+                self._open -= 1
+                self.discarded += 1
+            self._cond.notify_all()
+
+    @staticmethod
+    def _close_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def prefill(self, count):
+        """ Öffnet bis zu 'count' Verbindungen im Voraus (z.B. beim Pre-Warming). """
+        opened = []
+        try:
+            for _ in range(count):
+                with self._cond:
+                    if self._open >= self.size or len(self._idle) + len(opened) >= count:
+                        break
+                    self._open += 1
+                try:
+                    opened.append(self._open_entry())
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                    raise
+        finally:
+            with self._cond:
+                self._idle.extend(opened)
+                self._cond.notify_all()
+        return len(opened)
+
+    def close_idle(self):
+        """ Schließt alle unbenutzten Verbindungen; ausgeliehene werden bei Rückgabe geschlossen. """
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_raw(entry.raw)
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                'name': self.name,
+                'size': self.size,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiting': len(self._waiters),
+                'max_in_use': self.max_in_use,
+                'max_waiting': self.max_waiting,
+                'checkouts': self.checkouts,
+                'waited_checkouts': self.waited_checkouts,
+                'wait_avg_ms': (self.wait_total_s / self.checkouts * 1000.0) if self.checkouts else 0.0,
+                'wait_max_ms': self.wait_max_s * 1000.0,
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'validations': self.validations,
+                'replaced': self.replaced,
+                'discarded': self.discarded,
+            }
+
+
+class PoolManager:
+    """
+    Hält den interaktiven und den Hintergrund-Pool. Ersetzt in db_connection
+    den bisherigen MySQLConnectionPool (gleiche get_connection()-Schnittstelle).
+    """
+
+    def __init__(self, connect_kwargs, settings=None):
+        merged = dict(DEFAULT_SETTINGS)
+        merged.update(settings or {})
+        self.settings = merged
+        self.pools = {
+            INTERACTIVE: ManagedPool(INTERACTIVE, int(merged['interactive_size']), connect_kwargs,
+                                     float(merged['checkout_timeout']), float(merged['idle_validate_after']),
+                                     float(merged['max_lifetime'])),
+            BACKGROUND: ManagedPool(BACKGROUND, int(merged['background_size']), connect_kwargs,
+                                    float(merged['background_checkout_timeout']),
+                                    float(merged['idle_validate_after']), float(merged['max_lifetime'])),
+        }
+
+    def get_connection(self, pool_name=None, timeout=None):
+        """ Leiht aus dem Pool des aktuellen Threads (oder dem explizit genannten) aus. """
+        return self.pools[pool_name or current_pool_name()].get_connection(timeout)
+
+    def prefill(self, interactive=2):
+        return self.pools[INTERACTIVE].prefill(interactive)
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close_idle()
+
+    def get_stats(self):
+        return [pool.get_stats() for pool in self.pools.values()]
@@ -0,0 +1,347 @@
+# database/db_query_profiler.py
+# NEU: Optionaler Abfrage-Profiler für alle Pool-Verbindungen (Regel 2)
+#
+# Aktivierung (auch in der PyInstaller-EXE):
+#   DHF_QUERY_PROFILE=1            (Umgebungsvariable, Bericht beim Beenden als Datei)
+#   DHF-Planer.exe --query-profile (Kommandozeilen-Argument)
+#   Admin: Einstellungen -> Leistungsprotokoll -> "DB-Abfragen" (zur Laufzeit)
+#
+# create_connection() hüllt die Pool-Verbindung nur bei aktivem Profiler
+# ein. Erfasst werden pro (aufrufende db_*-Funktion, Statement-Vorlage):
+# Anzahl, Gesamt-/Maximaldauer, gelieferte Zeilen und die maximale Anzahl
+# Ausführungen auf EINER Verbindung (N+1-Muster). Pro Aufrufer zusätzlich
+# die Wartezeit auf den Pool; global die Pool-Erschöpfungen.
+
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+ENV_VAR = "DHF_QUERY_PROFILE"
+CLI_FLAG = "--query-profile"
+DUMP_FILE_NAME = "query_profile.txt"
+
+# Ab so vielen Ausführungen derselben Vorlage auf EINER Verbindung gilt sie als N+1-Verdacht
+N_PLUS_ONE_THRESHOLD = 20
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+
+_INTERNAL_MODULES = ("database.db_connection", "database.db_query_profiler")
+
+
+def normalize_statement(statement):
+    """ Macht aus einem SQL-Statement eine Vorlage (Literale -> ?, IN-Listen zusammengefasst). """
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode("utf-8", errors="replace")
+    template = _WHITESPACE_RE.sub(" ", str(statement).replace("\\", " ")).strip()
+    template = _STRING_RE.sub("?", template)
+    template = _NUMBER_RE.sub("?", template)
+    template = _PLACEHOLDER_LIST_RE.sub("(%s, ...)", template)
+    return template
+
+
+def _find_caller():
+    """ Ermittelt die aufrufende Funktion außerhalb der Verbindungslogik ('modul.funktion'). """
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module not in _INTERNAL_MODULES and not module.startswith("mysql."):
+            name = f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+            if module.startswith("database."):
+                return name
+            if fallback is None:
+                fallback = name  # Direkter Aufruf aus der GUI (ohne db_*-Funktion)
+        frame = frame.f_back
+    return fallback or "?"
+
+
+class _StatementStats:
+    __slots__ = ('count', 'total_s', 'max_s', 'rows', 'max_per_connection')
+
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.rows = 0
+        self.max_per_connection = 0
+
+
+class _CallerStats:
+    __slots__ = ('connections', 'wait_total_s', 'wait_max_s')
+
+    def __init__(self):
+        self.connections = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+
+
+class ProfiledCursor:
+    """ Cursor-Hülle: misst execute/fetch und zählt gelieferte Zeilen. """
+
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self._conn = connection
+        self._key = None
+        self._rows_counted = False
+
+    def _record(self, statement, elapsed):
+        self._key = (self._conn.caller, normalize_statement(statement))
+        self._rows_counted = False
+        executions = self._conn.executions
+        executions[self._key] = executions.get(self._key, 0) + 1
+        QueryProfiler._record_statement(self._key, elapsed, executions[self._key])
+
+    def _timed_fetch(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        elapsed = time.perf_counter() - start
+        if self._key is not None:
+            if result is None:
+                rows = 0
+            elif isinstance(result, list):
+                rows = len(result)
+            else:
+                rows = 1
+            self._rows_counted = True
+            QueryProfiler._record_fetch(self._key, elapsed, rows)
+        return result
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._record(operation, time.perf_counter() - start)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._record(operation, time.perf_counter() - start)
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed_fetch(lambda: self._cursor.fetchmany(*args, **kwargs))
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        # DML ohne fetch: betroffene Zeilen (rowcount) als "Zeilen" werten
+        if self._key is not None and not self._rows_counted:
+            rowcount = getattr(self._cursor, "rowcount", -1) or 0
+            if rowcount > 0:
+                QueryProfiler._record_fetch(self._key, 0.0, rowcount)
+        return self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __getattr__(self, item):
+        return getattr(self._cursor, item)
+
+
+class ProfiledConnection:
+    """ Verbindungs-Hülle: liefert ProfiledCursor und merkt sich die aufrufende Funktion. """
+
+    def __init__(self, connection, caller):
+        object.__setattr__(self, "_conn", connection)
+        object.__setattr__(self, "caller", caller)
+        object.__setattr__(self, "executions", {})  # {key: anzahl auf dieser Verbindung}
+        object.__setattr__(self, "_closed", False)
+
+    def cursor(self, *args, **kwargs):
+        return ProfiledCursor(self._conn.cursor(*args, **kwargs), self)
+
+    def close(self):
+        if not self._closed:
+            object.__setattr__(self, "_closed", True)
+            QueryProfiler._connection_released()
+        return self._conn.close()
+
+    def __getattr__(self, item):
+        return getattr(self._conn, item)
+
+    def __setattr__(self, key, value):
+        setattr(self._conn, key, value)
+
+
+class QueryProfiler:
+    """
+    Sammelt die Abfrage-Statistik (statisch aufgerufen, ein Profiler pro Prozess).
+    """
+
+    enabled = False
+    _lock = threading.Lock()
+    _statements = {}  # {(caller, template): _StatementStats}
+    _callers = {}  # {caller: _CallerStats}
+    _pool_exhausted = 0
+    _checked_out = 0
+    _max_checked_out = 0
+    _started_at = None
+
+    @staticmethod
+    def is_requested():
+        """ Prüft, ob der Profiler per Umgebungsvariable oder Argument angefordert wurde. """
+        return os.environ.get(ENV_VAR, "").lower() in ("1", "true", "yes") or CLI_FLAG in sys.argv
+
+    @staticmethod
+    def enable():
+        if not QueryProfiler.enabled:
+            QueryProfiler._started_at = QueryProfiler._started_at or time.time()
+            QueryProfiler.enabled = True
+            print("[QueryProfiler] Aktiv. DB-Abfragen werden gemessen.")
+
+    @staticmethod
+    def disable():
+        QueryProfiler.enabled = False
+
+    @staticmethod
+    def reset():
+        with QueryProfiler._lock:
+            QueryProfiler._statements.clear()
+            QueryProfiler._callers.clear()
+            QueryProfiler._pool_exhausted = 0
+            QueryProfiler._max_checked_out = QueryProfiler._checked_out
+            QueryProfiler._started_at = time.time()
+
+    # --- Hooks (aus create_connection / den Hüllen) ---
+
+    @staticmethod
+    def wrap_connection(connection, pool_wait_s):
+        """ Hüllt eine frisch aus dem Pool geholte Verbindung ein und verbucht die Wartezeit. """
+        caller = _find_caller()
+        with QueryProfiler._lock:
+            stats = QueryProfiler._callers.get(caller)
+            if stats is None:
+                stats = QueryProfiler._callers[caller] = _CallerStats()
+            stats.connections += 1
+            stats.wait_total_s += pool_wait_s
+            stats.wait_max_s = max(stats.wait_max_s, pool_wait_s)
+            QueryProfiler._checked_out += 1
+            QueryProfiler._max_checked_out = max(QueryProfiler._max_checked_out, QueryProfiler._checked_out)
+        return ProfiledConnection(connection, caller)
+
+    @staticmethod
+    def record_pool_exhausted():
+        with QueryProfiler._lock:
+            QueryProfiler._pool_exhausted += 1
+        print(f"[QueryProfiler] Pool erschöpft (Aufrufer: {_find_caller()}).")
+
+    @staticmethod
+    def _connection_released():
+        with QueryProfiler._lock:
+            QueryProfiler._checked_out = max(0, QueryProfiler._checked_out - 1)
+
+    @staticmethod
+    def _record_statement(key, elapsed, executions_on_connection):
+        with QueryProfiler._lock:
+            stats = QueryProfiler._statements.get(key)
+            if stats is None:
+                stats = QueryProfiler._statements[key] = _StatementStats()
+            stats.count += 1
+            stats.total_s += elapsed
+            stats.max_s = max(stats.max_s, elapsed)
+            stats.max_per_connection = max(stats.max_per_connection, executions_on_connection)
+
+    @staticmethod
+    def _record_fetch(key, elapsed, rows):
+        with QueryProfiler._lock:
+            stats = QueryProfiler._statements.get(key)
+            if stats is not None:
+                stats.total_s += elapsed
+                stats.rows += rows
+
+    # --- Auswertung ---
+
+    @staticmethod
+    def top_statements(top_n=25, sort_by="total"):
+        """
+        Teuerste Statements: [{'caller', 'template', 'count', 'total_ms', 'avg_ms', 'max_ms', 'rows',
+        'max_per_connection', 'n_plus_one'}]. sort_by: 'total' | 'count' | 'max' | 'rows'.
+        """
+        with QueryProfiler._lock:
+            items = [(caller, template, s.count, s.total_s, s.max_s, s.rows, s.max_per_connection)
+                     for (caller, template), s in QueryProfiler._statements.items()]
+        rows = [{
+            'caller': caller, 'template': template, 'count': count,
+            'total_ms': total_s * 1000.0, 'avg_ms': (total_s / count * 1000.0) if count else 0.0,
+            'max_ms': max_s * 1000.0, 'rows': row_count, 'max_per_connection': per_conn,
+            'n_plus_one': per_conn >= N_PLUS_ONE_THRESHOLD,
+        } for caller, template, count, total_s, max_s, row_count, per_conn in items]
+        sort_key = {'total': 'total_ms', 'count': 'count', 'max': 'max_ms', 'rows': 'rows'}.get(sort_by, 'total_ms')
+        rows.sort(key=lambda r: r[sort_key], reverse=True)
+        return rows[:top_n] if top_n else rows
+
+    @staticmethod
+    def top_callers(top_n=25):
+        """ Aufrufer nach Pool-Wartezeit: [{'caller', 'connections', 'wait_total_ms', 'wait_max_ms'}]. """
+        with QueryProfiler._lock:
+            rows = [{'caller': caller, 'connections': s.connections,
+                     'wait_total_ms': s.wait_total_s * 1000.0, 'wait_max_ms': s.wait_max_s * 1000.0}
+                    for caller, s in QueryProfiler._callers.items()]
+        rows.sort(key=lambda r: (r['wait_total_ms'], r['connections']), reverse=True)
+        return rows[:top_n] if top_n else rows
+
+    @staticmethod
+    def pool_summary():
+        with QueryProfiler._lock:
+            return {'checked_out': QueryProfiler._checked_out,
+                    'max_checked_out': QueryProfiler._max_checked_out,
+                    'pool_exhausted': QueryProfiler._pool_exhausted}
+
+    @staticmethod
+    def format_report(top_n=25):
+        """ Text-Bericht (für Konsole und Dump-Datei). """
+        since = datetime.fromtimestamp(QueryProfiler._started_at).strftime("%Y-%m-%d %H:%M:%S") \
+            if QueryProfiler._started_at else "-"
+        pool = QueryProfiler.pool_summary()
+        lines = [f"=== DB-Abfrage-Profil (seit {since}) ===",
+                 f"Pool: max. gleichzeitig ausgeliehen: {pool['max_checked_out']}, "
+                 f"Erschöpfungen: {pool['pool_exhausted']}", "",
+                 f"--- Top {top_n} Statements (nach Gesamtzeit) ---",
+                 f"{'Anzahl':>7} {'ges. ms':>9} {'max ms':>8} {'Zeilen':>8} {'/Verb.':>6}  Aufrufer | Vorlage"]
+        for row in QueryProfiler.top_statements(top_n):
+            marker = " [N+1?]" if row['n_plus_one'] else ""
+            lines.append(f"{row['count']:7d} {row['total_ms']:9.1f} {row['max_ms']:8.1f} {row['rows']:8d} "
+                         f"{row['max_per_connection']:6d}  {row['caller']}{marker} | {row['template'][:160]}")
+        lines += ["", f"--- Top {top_n} Aufrufer (nach Pool-Wartezeit) ---",
+                  f"{'Verb.':>7} {'Warten ms':>10} {'max ms':>8}  Aufrufer"]
+        for row in QueryProfiler.top_callers(top_n):
+            lines.append(f"{row['connections']:7d} {row['wait_total_ms']:10.1f} {row['wait_max_ms']:8.1f}  "
+                         f"{row['caller']}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def dump_report(file_path=DUMP_FILE_NAME, top_n=50):
+        """ Schreibt den Bericht in eine Datei. Gibt den Pfad zurück. """
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(QueryProfiler.format_report(top_n) + "\n")
+        return file_path
+
+    @staticmethod
+    def dump_at_exit():
+        """ (atexit) Schreibt den Bericht, wenn Abfragen gemessen wurden. """
+        if not QueryProfiler._statements:
+            return
+        try:
+            path = QueryProfiler.dump_report(os.path.abspath(DUMP_FILE_NAME))
+            print(f"[QueryProfiler] Bericht gespeichert: {path}")
+        except OSError as e:
+            print(f"[QueryProfiler] Bericht konnte nicht gespeichert werden: {e}")
@@ -151,6 +151,68 @@ def get_all_bug_reports():
             conn.close()
 
 
+# --- NEU (Regel 2): Schlanke Liste + Details bei Bedarf (differenzielles Treeview) ---
+def get_bug_report_list(include_archived=False):
+    """
+    Holt nur die Listenspalten der Bug-Reports (ohne Beschreibung/Notizen)
+    plus 'updated_at' als Änderungsstempel. Archivierte nur auf Wunsch.
+    Sortiert wie get_all_bug_reports.
+    """
+    conn = create_connection()
+    if conn is None: return []
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        query = """
+                SELECT b.id, u.vorname, u.name, b.timestamp, b.title,
+                       b.status, b.category, b.archived, b.updated_at
+                FROM bug_reports b
+                         LEFT JOIN users u ON b.user_id = u.id
+                """
+        if not include_archived:
+            query += " WHERE b.archived = 0"
+        cursor.execute(query)
+        reports = cursor.fetchall()
+
+        reports.sort(key=lambda r: (
+            r.get('archived', 0),
+            -SEVERITY_ORDER.get(r.get('category'), 0),
+            r.get('timestamp')
+        ), reverse=False)
+
+        return reports
+    except mysql.connector.Error as e:
+        print(f"Fehler beim Abrufen der Bug-Report-Liste: {e}")
+        return None
+    finally:
+        if conn and conn.is_connected():
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+
+
+def get_bug_report_details(report_id):
+    """ Holt die Langtexte (Beschreibung, Notizen) eines Bug-Reports. """
+    conn = create_connection()
+    if conn is None: return None
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT id, description, admin_notes, user_notes, updated_at FROM bug_reports WHERE id = %s",
+            (report_id,))
+        return cursor.fetchone()
+    except mysql.connector.Error as e:
+        print(f"Fehler beim Abrufen der Bug-Report-Details ({report_id}): {e}")
+        return None
+    finally:
+        if conn and conn.is_connected():
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+# --- ENDE NEU ---
+
+
 def get_visible_bug_reports():
     """Holt alle sichtbaren (nicht archivierten) Bug-Reports."""
     conn = create_connection()
@@ -404,6 +404,30 @@ def get_all_vacation_requests_for_month(year, month):
             conn.close()
 
 
+# --- NEU (Regel 2): Zeitraum-Abfragen für den Engpass-Index (ein Abruf statt einer Abfrage je Monat) ---
+def get_approved_vacations_between(start_date, end_date):
+    """Holt alle genehmigten, nicht archivierten Urlaubsanträge, die den Zeitraum überschneiden."""
+    conn = create_connection()
+    if conn is None: return []
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT user_id, start_date, end_date, status FROM vacation_requests "
+            "WHERE start_date <= %s AND end_date >= %s AND archived = 0 AND status IN ('Approved', 'Genehmigt')",
+            (end_date.strftime('%Y-%m-%d'), start_date.strftime('%Y-%m-%d'))
+        )
+        return cursor.fetchall()
+    except mysql.connector.Error as e:
+        print(f"Fehler beim Abrufen der Urlaubsanträge {start_date} bis {end_date}: {e}")
+        return []
+    finally:
+        if conn and conn.is_connected():
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+
+
 def get_unnotified_vacation_requests_for_user(user_id):
     """Holt unbenachrichtigte Urlaubsanträge für einen Benutzer."""
     conn = create_connection()
@@ -806,6 +830,35 @@ def get_wunschfrei_requests_for_month(year, month):
             conn.close()
 
 
+def get_wunschfrei_requests_between(start_date, end_date):
+    """
+    NEU (Regel 2): Wie get_wunschfrei_requests_for_month, aber für einen
+    beliebigen Zeitraum (Engpass-Index über mehrere Monate).
+    """
+    conn = create_connection()
+    if conn is None: return {}
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT user_id, request_date, status, requested_shift, requested_by FROM wunschfrei_requests WHERE request_date BETWEEN %s AND %s",
+            (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+        )
+        requests = {}
+        for row in cursor.fetchall():
+            req_date_str = row['request_date'].strftime('%Y-%m-%d') if isinstance(row['request_date'], date) else str(row['request_date'])
+            requests.setdefault(str(row['user_id']), {})[req_date_str] = (row['status'], row['requested_shift'], row['requested_by'], None)
+        return requests
+    except mysql.connector.Error as e:
+        print(f"Fehler beim Abrufen der Wunschfrei-Anträge {start_date} bis {end_date}: {e}")
+        return {}
+    finally:
+        if conn and conn.is_connected():
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+
+
 def update_wunschfrei_status(request_id, new_status, reason=None):
     """Aktualisiert den Status eines Wunschfrei-Antrags (Admin-Aktion)."""
     conn = create_connection()
@@ -171,7 +171,9 @@ def _run_initialize_db(conn, db_config):
                            departure_date DATE,
                            last_dpo_date DATE,
                            vaccination_info TEXT,
-                           image_blob MEDIUMBLOB DEFAULT NULL
+                           image_blob MEDIUMBLOB DEFAULT NULL,
+                           image_thumb MEDIUMBLOB DEFAULT NULL,
+                           image_hash CHAR(32) DEFAULT NULL
                            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE =utf8mb4_unicode_ci;
                        """)
 
@@ -727,6 +729,11 @@ def _run_initialize_db(conn, db_config):
         _add_column_if_not_exists(cursor, db_name, "vacation_requests", "archived", "TINYINT(1) DEFAULT 0")
         _add_column_if_not_exists(cursor, db_name, "bug_reports", "user_notes", "TEXT")
         _add_column_if_not_exists(cursor, db_name, "bug_reports", "archived", "TINYINT(1) DEFAULT 0")
+        # NEU (Regel 2): Änderungsstempel für differenzielle Listen (Bug-Reports/Aufgaben)
+        _add_column_if_not_exists(cursor, db_name, "bug_reports", "updated_at",
+                                  "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+        _add_column_if_not_exists(cursor, db_name, "tasks", "updated_at",
+                                  "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
         _add_column_if_not_exists(cursor, db_name, "shift_types", "is_changeable", "TINYINT(1) DEFAULT 1")
         _add_column_if_not_exists(cursor, db_name, "shift_types", "affects_vacation", "TINYINT(1) DEFAULT 0")
         _add_column_if_not_exists(cursor, db_name, "shift_types", "counts_as_work", "TINYINT(1) DEFAULT 1")
@@ -734,6 +741,9 @@ def _run_initialize_db(conn, db_config):
                                   "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
         _add_column_if_not_exists(cursor, db_name, "requests", "created_at", "DATETIME DEFAULT CURRENT_TIMESTAMP")
         _add_column_if_not_exists(cursor, db_name, "dogs", "image_blob", "MEDIUMBLOB DEFAULT NULL")
+        # NEU (Regel 2): Vorschaubild + Inhalts-Hash (werden beim Speichern erzeugt)
+        _add_column_if_not_exists(cursor, db_name, "dogs", "image_thumb", "MEDIUMBLOB DEFAULT NULL")
+        _add_column_if_not_exists(cursor, db_name, "dogs", "image_hash", "CHAR(32) DEFAULT NULL")
 
         # Spalte 'main_window' zur 'roles'-Tabelle hinzufügen (falls sie schon existierte)
         _add_column_if_not_exists(cursor, db_name, "roles", "main_window", "VARCHAR(255) DEFAULT NULL")
@@ -20,6 +20,13 @@ def clear_shift_order_cache():
     _SHIFT_ORDER_CACHE = None
 
 
+def prime_shift_types_cache(shift_types_list):
+    """ Füllt den Schichtarten-Cache mit bereits bekannten Daten (Warm-Start-Cache). """
+    global _SHIFT_TYPES_CACHE
+    if shift_types_list:
+        _SHIFT_TYPES_CACHE = shift_types_list
+
+
 def get_all_shift_types():
     """ Holt alle definierten Schichtarten aus der Datenbank (mit Cache). """
     global _SHIFT_TYPES_CACHE
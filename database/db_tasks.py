@@ -100,6 +100,67 @@ def get_all_tasks():
             conn.close()
 
 
+# --- NEU (Regel 2): Schlanke Liste + Details bei Bedarf (differenzielles Treeview) ---
+def get_task_list(include_archived=False):
+    """
+    Holt nur die Listenspalten der Aufgaben (ohne Beschreibung/Notizen)
+    plus 'updated_at' als Änderungsstempel. Archivierte nur auf Wunsch.
+    Sortiert wie get_all_tasks.
+    """
+    conn = create_connection()
+    if conn is None: return []
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        query = """
+                SELECT t.id, t.creator_admin_id as user_id, u.vorname, u.name, t.timestamp,
+                       t.title, t.status, t.category, t.priority, t.archived, t.updated_at
+                FROM tasks t
+                         LEFT JOIN users u ON t.creator_admin_id = u.id
+                """
+        if not include_archived:
+            query += " WHERE t.archived = 0"
+        cursor.execute(query)
+        tasks = cursor.fetchall()
+
+        tasks.sort(key=lambda r: (
+            r.get('archived', 0),
+            1 if r.get('status') == 'Erledigt' else 0,
+            -TASK_PRIORITY_ORDER.get(r.get('priority'), 0),
+            r.get('timestamp')
+        ), reverse=False)
+
+        return tasks
+    except mysql.connector.Error as e:
+        print(f"Fehler beim Abrufen der Aufgabenliste: {e}")
+        return None
+    finally:
+        if conn and conn.is_connected():
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+
+
+def get_task_details(task_id):
+    """ Holt die Langtexte (Beschreibung, Notizen) einer Aufgabe. """
+    conn = create_connection()
+    if conn is None: return None
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT id, description, admin_notes, updated_at FROM tasks WHERE id = %s", (task_id,))
+        return cursor.fetchone()
+    except mysql.connector.Error as e:
+        print(f"Fehler beim Abrufen der Aufgaben-Details ({task_id}): {e}")
+        return None
+    finally:
+        if conn and conn.is_connected():
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+# --- ENDE NEU ---
+
+
 def get_open_tasks_count():
     """Gibt die Anzahl der offenen (nicht erledigten und nicht archivierten) Aufgaben zurück."""
     conn = create_connection()
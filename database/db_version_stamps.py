@@ -0,0 +1,84 @@
+# database/db_version_stamps.py
+# NEU: Versions-Stempel für Stammdaten (Warm-Start-Cache, Regel 2)
+#
+# Liefert pro Stammdaten-Bereich (Tabelle oder Config-Key) einen kompakten
+# Stempel, mit dem der lokale Warm-Start-Cache prüfen kann, ob sein
+# Snapshot noch aktuell ist. Alle Stempel werden über EINE Verbindung
+# geholt; es werden nur Prüfsummen übertragen, keine Nutzdaten.
+
+import mysql.connector
+from .db_connection import create_connection
+
+# Bereich -> (Tabelle, Spalten, die in den Stempel eingehen)
+# WICHTIG: Nur die Spalten, die der Client auch cached. Z.B. 'last_seen'
+# in 'users' ändert sich bei jedem Login und würde den Cache sonst
+# ständig (unnötig) invalidieren.
+TABLE_STAMP_COLUMNS = {
+    'shift_types': ('shift_types',
+                    "id, name, abbreviation, hours, description, color, start_time, end_time, "
+                    "check_for_understaffing"),
+    'users': ('users', "id, vorname, name, role, is_approved, is_archived, archived_date, activation_date"),
+}
+
+CONFIG_STAMP_PREFIX = "config:"
+
+
+def get_reference_version_stamps(config_keys=()):
+    """
+    Holt die Versions-Stempel für alle Stammdaten-Tabellen und die
+    angegebenen Config-Keys (config_storage).
+
+    Gibt ein Dict {bereich: stempel} zurück, z.B.
+    {'shift_types': '12:3498573', 'config:HOLIDAYS_NEW': 'a3f...'}.
+    Ein Stempel von None bedeutet "unbekannt" (Fehler oder Eintrag fehlt)
+    und muss vom Aufrufer als veraltet behandelt werden.
+    Gibt None zurück, wenn keine Verbindung möglich ist.
+    """
+    conn = create_connection()
+    if conn is None:
+        return None
+
+    stamps = {}
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+
+        # 1. Tabellen-Stempel (Anzahl + Summe der Zeilen-Prüfsummen)
+        for section, (table, columns) in TABLE_STAMP_COLUMNS.items():
+            try:
+                cursor.execute(
+                    f"SELECT COUNT(*) AS row_count, "
+                    f"COALESCE(SUM(CRC32(CONCAT_WS('|', {columns}))), 0) AS checksum "
+                    f"FROM {table}"
+                )
+                row = cursor.fetchone()
+                stamps[section] = f"{row['row_count']}:{row['checksum']}" if row else None
+            except mysql.connector.Error as e:
+                # (Regel 1) z.B. fehlende Spalte bei alter Migration -> Bereich gilt als veraltet
+                print(f"[DB Stamps] Stempel für '{section}' nicht ermittelbar: {e}")
+                stamps[section] = None
+
+        # 2. Config-Stempel (MD5 des gespeicherten JSON)
+        config_keys = list(config_keys)
+        for key in config_keys:
+            stamps[CONFIG_STAMP_PREFIX + key] = None
+        if config_keys:
+            placeholders = ', '.join(['%s'] * len(config_keys))
+            cursor.execute(
+                f"SELECT config_key, MD5(config_json) AS stamp FROM config_storage "
+                f"WHERE config_key IN ({placeholders})",
+                tuple(config_keys)
+            )
+            for row in cursor.fetchall():
+                stamps[CONFIG_STAMP_PREFIX + row['config_key']] = row['stamp']
+
+        return stamps
+
+    except mysql.connector.Error as e:
+        print(f"DB Error on get_reference_version_stamps: {e}")
+        return None
+    finally:
+        if conn and conn.is_connected():
+            if cursor:
+                cursor.close()
+            conn.close()
@@ -6,6 +6,9 @@
 # und 'delete_all_locks_for_month' wurden in Hintergrund-Threads ausgelagert.
 # Der Handler verwendet jetzt 'self.tab.show_progress_widgets', um die
 # UI-Latenz zu eliminieren und dem Benutzer Feedback zu geben.
+#
+# NEU (Regel 2): Fortschritt über den gemeinsamen Fortschrittskanal
+# (utils/progress.py) - mit Restzeit aus früheren Läufen.
 
 import tkinter as tk
 from tkinter import ttk, messagebox
@@ -13,7 +16,7 @@ from datetime import date, datetime
 import threading  # NEU: Für asynchrone Operationen
 
 # DB-Importe
-from database.db_shifts import delete_all_shifts_for_month
+from database.db_shifts import delete_all_shifts_for_month, EXCLUDED_SHIFTS_ON_DELETE
 from database.db_locks import delete_all_locks_for_month
 
 
@@ -56,45 +59,75 @@ class ActionAdminHandler:
                                  parent=self.tab)
             return
 
+        # NEU (Undo): Zu löschende Zellen VOR dem Löschen aus dem Cache ermitteln
+        removed_changes = self._collect_deletable_cells(year, month)
+
         # --- INNOVATION (Regel 2) ---
         # Zeige Ladebalken im ShiftPlanTab
+        reporter = None
         try:
-            self.tab.show_progress_widgets(text="Plan-Daten werden gelöscht...")
+            self.tab.show_progress_widgets(text="Plan-Daten werden gelöscht...", operation="plan_delete")
+            reporter = self.tab.progress_reporter
         except AttributeError:
             print("[ActionAdmin] Warnung: 'show_progress_widgets' nicht in self.tab gefunden.")
 
         # Starte den langsamen DB-Aufruf in einem Worker-Thread
         threading.Thread(
             target=self._task_delete_plan,
-            args=(year, month, current_admin_id),
+            args=(year, month, current_admin_id, removed_changes, reporter),
             daemon=True
         ).start()
         # --- ENDE INNOVATION ---
 
-    def _task_delete_plan(self, year, month, current_admin_id):
+    def _collect_deletable_cells(self, year, month):
+        """
+        (Main-Thread) Ermittelt aus dem Monats-Cache die Zellen, die
+        delete_all_shifts_for_month entfernt (gleiche Regeln: ohne ausgenommene
+        Kürzel und ohne gesicherte Schichten). Wird für das Undo-Journal benötigt.
+        Gibt None zurück, wenn der Monat nicht aktiv geladen ist.
+        """
+        if (self.dm.year, self.dm.month) != (year, month):
+            return None
+        month_prefix = f"{year:04d}-{month:02d}-"
+        changes = []
+        for user_id_str, day_data in self.dm.shift_schedule_data.items():
+            for date_str, shift in day_data.items():
+                if not shift or shift in EXCLUDED_SHIFTS_ON_DELETE or not date_str.startswith(month_prefix):
+                    continue
+                if self.dm.shift_lock_manager.get_lock_status(user_id_str, date_str):
+                    continue
+                changes.append((int(user_id_str), date_str, shift, None))
+        return changes
+
+    def _task_delete_plan(self, year, month, current_admin_id, removed_changes=None, reporter=None):
         """
         (Worker-Thread) Führt die langsame Datenbankoperation zum Löschen aus.
         """
         try:
+            if reporter: reporter.stage("delete", 0.1, 0.9, f"Lösche Schichten {month:02d}/{year}...")
             success, message = delete_all_shifts_for_month(year, month, current_admin_id)
+            if reporter: reporter.update(1.0, "Löschen abgeschlossen.")
         except Exception as e:
             success = False
             message = f"Unerwarteter Fehler im Lösch-Thread: {e}"
 
         # Sende das Ergebnis zurück an den Haupt-Thread
-        self.tab.after(0, self._on_delete_plan_complete, year, month, success, message)
+        self.tab.after(0, self._on_delete_plan_complete, year, month, success, message, removed_changes)
 
-    def _on_delete_plan_complete(self, year, month, success, message):
+    def _on_delete_plan_complete(self, year, month, success, message, removed_changes=None):
         """
         (Main-Thread) Callback nach Abschluss des Lösch-Threads.
         Versteckt den Ladebalken, zeigt das Ergebnis an und lädt die UI neu.
         """
         try:
+            self.tab.finish_progress(success)
             self.tab.hide_progress_widgets()
         except AttributeError:
             pass  # Ignorieren, falls nicht gefunden
 
         if success:
+            if removed_changes:
+                self.dm.plan_journal.record(f"Schichtplan {month:02d}/{year} gelöscht", year, month, removed_changes)
             messagebox.showinfo("Erfolg", message)
 
             # P5-Cache invalidieren (WICHTIG!)
@@ -135,27 +168,31 @@ class ActionAdminHandler:
 
         # --- INNOVATION (Regel 2) ---
         # Zeige Ladebalken
+        reporter = None
         try:
-            self.tab.show_progress_widgets(text="Alle Sicherungen werden aufgehoben...")
+            self.tab.show_progress_widgets(text="Alle Sicherungen werden aufgehoben...", operation="unlock_all")
+            reporter = self.tab.progress_reporter
         except AttributeError:
             print("[ActionAdmin] Warnung: 'show_progress_widgets' nicht in self.tab gefunden.")
 
         # Starte den langsamen DB-Aufruf in einem Worker-Thread
         threading.Thread(
             target=self._task_unlock_all,
-            args=(year, month, admin_id),
+            args=(year, month, admin_id, reporter),
             daemon=True
         ).start()
         # --- ENDE INNOVATION ---
 
-    def _task_unlock_all(self, year, month, admin_id):
+    def _task_unlock_all(self, year, month, admin_id, reporter=None):
         """
         (Worker-Thread) Führt die langsame DB-Operation zum Löschen
         aller Locks aus.
         """
         try:
+            if reporter: reporter.stage("unlock", 0.1, 0.9, f"Hebe Sicherungen {month:02d}/{year} auf...")
             # Der LockManager kümmert sich um DB-Aufruf UND Cache-Invalidierung
             success, message = self.dm.shift_lock_manager.delete_all_locks_for_month(year, month, admin_id)
+            if reporter: reporter.update(1.0, "Sicherungen aufgehoben.")
         except Exception as e:
             success = False
             message = f"Unerwarteter Fehler im Unlock-Thread: {e}"
@@ -168,6 +205,7 @@ class ActionAdminHandler:
         (Main-Thread) Callback nach Abschluss des Unlock-All-Threads.
         """
         try:
+            self.tab.finish_progress(success)
             self.tab.hide_progress_widgets()
         except AttributeError:
             pass
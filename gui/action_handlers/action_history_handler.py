@@ -0,0 +1,134 @@
+# gui/action_handlers/action_history_handler.py
+# NEU: Rückgängig/Wiederholen für Planänderungen (Regel 2 & 4)
+#
+# Nutzt das PlanJournal des DataManagers. Ein Schritt (auch ein ganzer
+# Generator-Lauf) wird als EINE PlanDiff in einer Transaktion gespeichert
+# (ThreadManager, wie das Speichern einer Zelle) und danach gezielt in die
+# Caches eingespielt (apply_plan_diff) - ohne kompletten Reload des Monats.
+
+from tkinter import messagebox
+
+from gui.generator.generator_persistence import save_plan_diff_to_db
+from utils.instrumentation import get_logger
+from utils.threading_utils import PRIORITY_INTERACTIVE
+
+_log = get_logger("plan_journal")
+
+
+class ActionHistoryHandler:
+    """
+    Verantwortlich für Rückgängig (Strg+Z) und Wiederholen (Strg+Y).
+    """
+
+    def __init__(self, tab, app_instance, renderer, data_manager):
+        self.tab = tab
+        self.app = app_instance
+        self.renderer = renderer
+        self.dm = data_manager
+        self._busy = False  # Verhindert überlappende Undo/Redo-Schreibvorgänge
+
+    @property
+    def journal(self):
+        return self.dm.plan_journal
+
+    def undo(self):
+        self._start(was_undo=True)
+
+    def redo(self):
+        self._start(was_undo=False)
+
+    def _start(self, was_undo):
+        """ (Main-Thread) Holt den nächsten Schritt und startet das Speichern im Hintergrund. """
+        if self._busy:
+            _log.debug("Vorheriger Schritt wird noch gespeichert. Ignoriert.")
+            self.tab.bell()
+            return
+
+        # Eine Zellenänderung, deren Speichern noch wartet, darf nicht überholt werden
+        # (die Gegen-Diff würde sonst womöglich VOR der Änderung geschrieben)
+        next_entry = self.journal.peek_undo() if was_undo else self.journal.peek_redo()
+        if next_entry is not None and self.journal.is_pending(next_entry):
+            _log.debug("%s wird noch gespeichert. Ignoriert.", next_entry)
+            self.tab.bell()
+            return
+
+        entry = self.journal.pop_undo() if was_undo else self.journal.pop_redo()
+        if entry is None:
+            _log.debug("Nichts zum %s.", 'Rückgängigmachen' if was_undo else 'Wiederholen')
+            self.tab.bell()
+            return
+
+        plan_diff = entry.inverse_diff() if was_undo else entry.forward_diff()
+
+        # Sicherheitsregel (wie beim manuellen Speichern): Gesperrte Zellen nicht ändern
+        locked_cells = self._get_conflicting_locks(plan_diff)
+        if locked_cells:
+            self.journal.revert_pop(entry, was_undo)
+            user_id, date_str, lock_status = locked_cells[0]
+            messagebox.showwarning("Gesperrte Schicht",
+                                   f"'{entry.label}' kann nicht {'rückgängig gemacht' if was_undo else 'wiederholt'} "
+                                   f"werden: {len(locked_cells)} Zelle(n) sind gesichert "
+                                   f"(z.B. {date_str} als '{lock_status}').\n"
+                                   "Bitte zuerst die Sicherung aufheben.",
+                                   parent=self.tab)
+            return
+
+        _log.debug("%s: %s (%s)", 'Rückgängig' if was_undo else 'Wiederholen', entry, plan_diff.summary())
+        self._busy = True
+        # Gleiche Prioritätsklasse wie das Speichern einer Zelle (überholt Vorladen und Polling)
+        self.app.thread_manager.submit(
+            self._save_in_thread,
+            args=(entry, plan_diff, was_undo),
+            priority=PRIORITY_INTERACTIVE
+        )
+
+    def _get_conflicting_locks(self, plan_diff):
+        lock_manager = getattr(self.dm, 'shift_lock_manager', None)
+        if lock_manager is None:
+            return []
+        conflicts = []
+        for user_id, date_str, _, new_shift in plan_diff.iter_changes():
+            lock_status = lock_manager.get_lock_status(str(user_id), date_str)
+            if lock_status and lock_status != (new_shift or ""):
+                conflicts.append((user_id, date_str, lock_status))
+        return conflicts
+
+    def _save_in_thread(self, entry, plan_diff, was_undo):
+        """ (Worker-Thread) Schreibt die Diff in EINER Transaktion. """
+        try:
+            success, _, error = save_plan_diff_to_db(plan_diff)
+        except Exception as e:
+            success, error = False, str(e)
+        self.tab.after(0, self._on_saved, entry, plan_diff, was_undo, success, error)
+
+    def _on_saved(self, entry, plan_diff, was_undo, success, error):
+        """ (Main-Thread) Spielt die gespeicherte Diff in die Caches ein und zeichnet neu. """
+        self._busy = False
+
+        if not success:
+            self.journal.revert_pop(entry, was_undo)
+            messagebox.showerror("Speicherfehler",
+                                 f"'{entry.label}' konnte nicht {'rückgängig gemacht' if was_undo else 'wiederholt'} "
+                                 f"werden.\nFehler: {error}",
+                                 parent=self.tab)
+            return
+
+        conflict_cells = None
+        try:
+            conflict_cells = self.dm.apply_plan_diff(plan_diff)
+        except Exception as e:
+            print(f"[FEHLER] PlanDiff konnte nach Undo/Redo nicht eingespielt werden: {e}")
+        patched = conflict_cells is not None
+
+        if not patched and hasattr(self.dm, 'invalidate_month_cache'):
+            # Monat nicht aktiv (oder Patch fehlgeschlagen): beim nächsten Öffnen neu laden
+            self.dm.invalidate_month_cache(plan_diff.year, plan_diff.month)
+
+        display_date = self.app.current_display_date
+        if (display_date.year, display_date.month) != (plan_diff.year, plan_diff.month):
+            return
+        # Nur die geänderten Zellen (und ihre Konflikt-Nachbarn) neu zeichnen;
+        # das komplette Grid nur, wenn die Caches neu geladen werden müssen
+        if patched and self.renderer and self.renderer.update_cells_for_diff(plan_diff, conflict_cells):
+            return
+        self.tab.build_shift_plan_grid(plan_diff.year, plan_diff.month, data_ready=patched)
@@ -145,6 +145,8 @@ class ActionRequestHandler:
             update_wunschfrei_status(request_id, "Ausstehend")
             self.tab.after(0, self._handle_request_failure, user_id, date_obj, new_shift, old_shift, new_status,
                            "Ausstehend", save_msg)
+            return
+        self._refresh_criticality(user_id)
 
     # --- 2. AKZEPTIEREN (SCHICHT) (ASYNCHRON, REGEL 2) ---
 
@@ -186,6 +188,8 @@ class ActionRequestHandler:
             update_wunschfrei_status(request_id, "Ausstehend")  # Rollback
             self.tab.after(0, self._handle_request_failure, user_id, date_obj, new_shift, old_shift, new_status,
                            "Ausstehend", save_msg)
+            return
+        self._refresh_criticality(user_id)
 
     # --- 3. ABLEHNEN (ASYNCHRON, REGEL 2) ---
 
@@ -238,6 +242,8 @@ class ActionRequestHandler:
             update_wunschfrei_status(request_id, "Ausstehend")  # Rollback
             self.tab.after(0, self._handle_request_failure, user_id, date_obj, new_shift, old_shift, new_status,
                            "Ausstehend", save_msg, req_type, req_by)
+            return
+        self._refresh_criticality(user_id)
 
     # --- 4. LÖSCHEN (ASYNCHRON, REGEL 2) ---
 
@@ -301,6 +307,7 @@ class ActionRequestHandler:
             self.tab.after(0, self._handle_request_failure, user_id, date_obj, "", old_shift, "Gelöscht", old_status,
                            msg, old_req_type, old_req_by, old_reason)
         else:
+            self._refresh_criticality(user_id)
             # (Nur Info im Main-Thread anzeigen, wenn erfolgreich)
             self.tab.after(0, lambda: messagebox.showinfo("Erfolg", "Antrag erfolgreich gelöscht/zurückgezogen.",
                                                           parent=self.tab))
@@ -359,6 +366,8 @@ class ActionRequestHandler:
                 update_wunschfrei_status(request_id, old_status)  # Rollback
                 self.tab.after(0, self._handle_request_failure, user_id, date_obj, "", old_shift, new_status,
                                old_status, save_msg, req_type, req_by)
+                return
+        self._refresh_criticality(user_id)
 
     # --- 6. ADMIN WUNSCH HINZUFÜGEN (ASYNCHRON, REGEL 2) ---
 
@@ -419,6 +428,16 @@ class ActionRequestHandler:
 
     # --- 7. GLOBALE HELFER ---
 
+    def _refresh_criticality(self, user_id):
+        """ (Worker-Thread) NEU (Regel 2): Führt den Engpass-Index für den Mitarbeiter nach. """
+        index = getattr(self.dm, 'criticality_index', None) if self.dm else None
+        if index is None:
+            return
+        try:
+            index.refresh_user(user_id)
+        except Exception as e:
+            print(f"[WARNUNG] Engpass-Index konnte nicht nachgeführt werden: {e}")
+
     def _refresh_requests_tab_if_loaded(self):
         """Aktualisiert den RequestsTab, falls geladen."""
         if hasattr(self.app, 'refresh_specific_tab'):
@@ -0,0 +1,156 @@
+# gui/action_handlers/action_sandbox_handler.py
+# NEU: Testmodus ("Was wäre wenn") für den Schichtplan (Regel 2 & 4)
+#
+# Startet, übernimmt und verwirft die Sandbox des DataManagers (siehe
+# gui/data_manager/dm_sandbox.py). Übernehmen schreibt alle Änderungen als
+# EINE PlanDiff in einer Transaktion (ThreadManager) und legt EINEN
+# Undo-Schritt an; Verwerfen setzt nur die geänderten Zellen In-Memory zurück.
+
+from tkinter import messagebox
+
+from gui.generator.generator_persistence import save_plan_diff_to_db
+from utils.threading_utils import PRIORITY_INTERACTIVE
+
+
+class ActionSandboxHandler:
+    """
+    Verantwortlich für den Testmodus des angezeigten Monats.
+    """
+
+    def __init__(self, tab, app_instance, renderer, data_manager, update_handler):
+        self.tab = tab
+        self.app = app_instance
+        self.renderer = renderer
+        self.dm = data_manager
+        self.updater = update_handler
+
+    # --- Starten ---
+
+    def start(self):
+        """ (Main-Thread) Startet den Testmodus für den angezeigten Monat. """
+        display_date = self.app.current_display_date
+        if (self.dm.year, self.dm.month) != (display_date.year, display_date.month):
+            messagebox.showinfo("Testmodus", "Bitte warten, bis der Monat vollständig geladen ist.", parent=self.tab)
+            return
+        self.dm.begin_sandbox()
+        self.tab.update_sandbox_status()
+
+    # --- Übernehmen ---
+
+    def commit(self):
+        """ (Main-Thread) Speichert alle Änderungen des Testmodus in EINER Transaktion. """
+        sandbox = self.dm.sandbox
+        if sandbox is None or sandbox.committing:
+            return
+        self.updater.flush_secondary_updates()
+        plan_diff = sandbox.commit_diff(self.dm.shift_schedule_data)
+        if plan_diff.is_empty():
+            self.dm.end_sandbox()
+            self.tab.update_sandbox_status()
+            return
+
+        # Sicherheitsregel (wie beim manuellen Speichern): Gesperrte Zellen nicht ändern
+        locked_cells = self._get_conflicting_locks(plan_diff)
+        if locked_cells:
+            user_id, date_str, lock_status = locked_cells[0]
+            messagebox.showwarning("Gesperrte Schicht",
+                                   f"Der Testmodus kann nicht übernommen werden: {len(locked_cells)} Zelle(n) sind "
+                                   f"inzwischen gesichert (z.B. {date_str} als '{lock_status}').\n"
+                                   "Bitte die Sicherung aufheben oder den Testmodus verwerfen.",
+                                   parent=self.tab)
+            return
+        if not messagebox.askyesno("Testmodus übernehmen",
+                                   f"{len(plan_diff)} Änderung(en) ({plan_diff.summary()}) speichern?",
+                                   parent=self.tab):
+            return
+
+        print(f"[ActionSandbox] Übernehme Testmodus ({plan_diff.summary()})...")
+        sandbox.committing = True
+        self.tab.update_sandbox_status()
+        # KORREKTUR (Regel 2): Über den ThreadManager mit höchster Priorität (wie das
+        # Speichern einer Zelle) statt eigenem Thread
+        self.app.thread_manager.submit(
+            self._save_in_thread,
+            args=(sandbox, plan_diff),
+            priority=PRIORITY_INTERACTIVE,
+            key=("sandbox_commit", plan_diff.year, plan_diff.month)
+        )
+
+    def _get_conflicting_locks(self, plan_diff):
+        lock_manager = getattr(self.dm, 'shift_lock_manager', None)
+        if lock_manager is None:
+            return []
+        conflicts = []
+        for user_id, date_str, _, new_shift in plan_diff.iter_changes():
+            lock_status = lock_manager.get_lock_status(str(user_id), date_str)
+            if lock_status and lock_status != (new_shift or ""):
+                conflicts.append((user_id, date_str, lock_status))
+        return conflicts
+
+    def _save_in_thread(self, sandbox, plan_diff):
+        """ (Worker-Thread) Schreibt die Diff in EINER Transaktion. """
+        try:
+            success, _, error = save_plan_diff_to_db(plan_diff)
+        except Exception as e:
+            success, error = False, str(e)
+        self.tab.after(0, self._on_saved, sandbox, plan_diff, success, error)
+
+    def _on_saved(self, sandbox, plan_diff, success, error):
+        """ (Main-Thread) Beendet den Testmodus (Caches sind bereits aktuell) und protokolliert EINEN Undo-Schritt. """
+        sandbox.committing = False
+        if not success:
+            messagebox.showerror("Speicherfehler",
+                                 f"Der Testmodus konnte nicht übernommen werden.\nFehler: {error}\n\n"
+                                 "Die Änderungen bleiben im Testmodus erhalten.",
+                                 parent=self.tab)
+            self.tab.update_sandbox_status()
+            return
+        if self.dm.sandbox is sandbox:
+            self.dm.end_sandbox()
+        self.dm.plan_journal.record_diff(f"Testmodus {plan_diff.month:02d}/{plan_diff.year} übernommen",
+                                         plan_diff)
+        self.tab.update_sandbox_status()
+
+    # --- Verwerfen ---
+
+    def discard(self, ask=True):
+        """ (Main-Thread) Verwirft den Testmodus und setzt die geänderten Zellen zurück (ohne DB). """
+        sandbox = self.dm.sandbox
+        if sandbox is None or sandbox.committing:
+            return
+        self.updater.flush_secondary_updates()
+        change_count = self.dm.sandbox_change_count()
+        if ask and change_count and not messagebox.askyesno(
+                "Testmodus verwerfen", f"{change_count} Änderung(en) im Testmodus verwerfen?", parent=self.tab):
+            return
+        plan_diff, conflict_cells = self.dm.discard_sandbox()
+        if plan_diff is not None:
+            self._refresh_cells(plan_diff, conflict_cells)
+        self.tab.update_sandbox_status()
+
+    def _refresh_cells(self, plan_diff, conflict_cells):
+        """ Zeichnet nur die zurückgesetzten Zellen, Stunden, Tageszähler und Konfliktmarker neu. """
+        display_date = self.app.current_display_date
+        if (display_date.year, display_date.month) != (plan_diff.year, plan_diff.month) or not self.renderer:
+            return
+        if not self.renderer.update_cells_for_diff(plan_diff, conflict_cells):
+            print("[FEHLER] Testmodus: Neuzeichnen der Zellen fehlgeschlagen. Zeichne Monat neu.")
+            self.tab.build_shift_plan_grid(plan_diff.year, plan_diff.month, data_ready=True)
+
+    # --- Generator im Testmodus ---
+
+    def apply_generated_diff(self, sandbox, plan_diff):
+        """
+        (Main-Thread) Spielt das Ergebnis eines Generator-Laufs nur in den
+        Testmodus ein (kein Speichern). Gibt False zurück, wenn der Testmodus
+        inzwischen beendet wurde.
+        """
+        if self.dm.sandbox is not sandbox or sandbox.committing:
+            messagebox.showinfo("Testmodus",
+                                "Der Testmodus wurde während der Generierung beendet. Das Ergebnis wird verworfen.",
+                                parent=self.tab)
+            return False
+        if self.dm.apply_plan_diff(plan_diff) is None:
+            return False
+        print(f"[ActionSandbox] Generator-Ergebnis im Testmodus eingespielt ({plan_diff.summary()}).")
+        return True
@@ -12,7 +12,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import date, datetime
-import threading  # NEU: Für asynchrones Speichern
+from utils.threading_utils import PRIORITY_INTERACTIVE
 
 # DB-Importe für Schichten und Locks
 from database.db_shifts import save_shift_entry
@@ -57,6 +57,11 @@ class ActionShiftHandler:
                                    parent=self.tab)
             return
 
+        # --- NEU (Regel 2): Testmodus - nur In-Memory, kein DB-Zugriff bis zum Übernehmen ---
+        if self.dm.in_sandbox:
+            self._save_shift_in_sandbox(user_id, date_str, old_shift_abbrev, actual_shift_to_save)
+            return
+
         # --- KORREKTUR (Regel 2): Asynchrone Ausführung ---
 
         try:
@@ -90,13 +95,21 @@ class ActionShiftHandler:
                 self.app.shift_frequency[actual_shift_to_save] += 1
             # --- ENDE KORREKTUR ---
 
-            # 4. ASYNCHRONES SPEICHERN (Hintergrund)
-            # Starte den DB-Aufruf in einem separaten Thread
-            threading.Thread(
-                target=self._save_shift_in_thread,
-                args=(user_id, date_str, actual_shift_to_save, old_shift_abbrev, date_obj),
-                daemon=True
-            ).start()
+            # 4. NEU: Im Undo-Journal protokollieren (wird bei Speicherfehler wieder entfernt)
+            journal_entry = self.dm.plan_journal.record_change(user_id, date_str, old_shift_abbrev,
+                                                               actual_shift_to_save)
+            # (Bis das Speichern bestätigt ist, kann der Schritt nicht rückgängig gemacht werden)
+            self.dm.plan_journal.mark_pending(journal_entry)
+
+            # 5. ASYNCHRONES SPEICHERN (Hintergrund)
+            # KORREKTUR (Regel 2): Über den ThreadManager mit höchster Priorität
+            # (überholt wartendes Vorladen und Polling) statt eigenem Thread
+            self.app.thread_manager.submit(
+                self._save_shift_in_thread,
+                callback=lambda result, error: self.dm.plan_journal.mark_saved(journal_entry),
+                args=(user_id, date_str, actual_shift_to_save, old_shift_abbrev, date_obj, journal_entry),
+                priority=PRIORITY_INTERACTIVE
+            )
 
         except ValueError:
             print(f"[FEHLER] Ungültiges Datum für Update-Trigger: {date_str}")
@@ -105,7 +118,27 @@ class ActionShiftHandler:
             print(f"[FEHLER] Kritischer Fehler im Optimistic UI Update: {e}")
             messagebox.showerror("Fehler", f"Fehler vor Speicherung:\n{e}", parent=self.tab)
 
-    def _save_shift_in_thread(self, user_id, date_str, new_shift, old_shift, date_obj):
+    def _save_shift_in_sandbox(self, user_id, date_str, old_shift, new_shift):
+        """
+        (Main-Thread) Änderung im Testmodus: gleiche In-Memory-Updates wie beim
+        Speichern (Zelle, Konflikte, Stunden, Tageszählung), aber ohne DB-Aufruf,
+        Undo-Journal, Wunschfrei-Cache und Schichthäufigkeit - die Sandbox merkt
+        sich den ursprünglichen Wert und wird als Ganzes übernommen oder verworfen.
+        """
+        if self.dm.sandbox.committing:
+            print("[ActionShift] Testmodus wird gerade übernommen. Änderung ignoriert.")
+            self.tab.bell()
+            return
+        try:
+            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            print(f"[FEHLER] Ungültiges Datum für Update-Trigger: {date_str}")
+            return
+        self.dm.sandbox_touch(user_id, date_str)
+        self.updater.trigger_targeted_update(user_id, date_obj, old_shift, new_shift)
+        self.tab.update_sandbox_status()
+
+    def _save_shift_in_thread(self, user_id, date_str, new_shift, old_shift, date_obj, journal_entry=None):
         """
         Führt den langsamen DB-Aufruf in einem Thread aus.
         Ruft im Fehlerfall ein Rollback auf.
@@ -116,14 +149,17 @@ class ActionShiftHandler:
             print(f"[FEHLER] Asynchrones Speichern fehlgeschlagen: {message}")
             # Sende den Fehler zurück an den Haupt-Thread (Tkinter)
             self.tab.after(0, self._handle_save_failure,
-                           user_id, date_obj, new_shift, old_shift, message)
+                           user_id, date_obj, new_shift, old_shift, message, journal_entry)
 
-    def _handle_save_failure(self, user_id, date_obj, failed_new_shift, old_shift, error_message):
+    def _handle_save_failure(self, user_id, date_obj, failed_new_shift, old_shift, error_message,
+                             journal_entry=None):
         """
         Wird im Haupt-Thread aufgerufen, wenn _save_shift_in_thread fehlschlägt.
         Führt ein UI-Rollback durch.
         """
         print(f"[ActionShift] ROLLBACK wird ausgeführt: '{failed_new_shift}' -> '{old_shift}'")
+        if journal_entry is not None:
+            self.dm.plan_journal.forget(journal_entry)
         messagebox.showerror("Speicherfehler (Rollback)",
                              f"Die Schicht '{failed_new_shift}' konnte nicht gespeichert werden.\n"
                              f"Fehler: {error_message}\n\n"
@@ -202,12 +238,12 @@ class ActionShiftHandler:
             print(f"[FEHLER] Fehler beim sofortigen Lock-UI-Update: {e}")
             # Bei Fehler UI nicht stoppen, DB-Aufruf trotzdem starten
 
-        # 2. ASYNCHRONER DB-AUFRUF
-        threading.Thread(
-            target=self._lock_shift_in_thread,
+        # 2. ASYNCHRONER DB-AUFRUF (ThreadManager, höchste Priorität)
+        self.app.thread_manager.submit(
+            self._lock_shift_in_thread,
             args=(user_id, date_str, shift_abbrev, is_locked, admin_id, date_obj),
-            daemon=True
-        ).start()
+            priority=PRIORITY_INTERACTIVE
+        )
 
     def _lock_shift_in_thread(self, user_id, date_str, shift_abbrev, is_locked, admin_id, date_obj):
         """
@@ -17,9 +17,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import date, datetime
-import threading
 from typing import List
 import queue  # Beibehalten für Konflikt-Prüfung
+from utils.threading_utils import PRIORITY_VISIBLE
 
 # (Konstanten für Debouncing/Queueing bleiben unverändert)
 CONFLICT_DEBOUNCE_TIME_MS = 300
@@ -27,6 +27,9 @@ CONFLICT_DEBOUNCE_TIME_MS = 300
 # (Regel 2) Zeit für gebündelte sekundäre UI-Updates (Stunden, Zähler, Layout)
 SECONDARY_UI_DEBOUNCE_MS = 100
 
+# Schlüssel der Konflikt-Aufgabe im ThreadManager (läuft nie parallel, wird zusammengefasst)
+CONFLICT_BATCH_KEY = "shift_plan.conflict_batch"
+
 
 class ActionUpdateHandler:
     """
@@ -42,46 +45,46 @@ class ActionUpdateHandler:
         # --- System 1 (Konflikte): Producer/Consumer Queue ---
         # (Dies ist Ihre bereits implementierte Lösung aus dem letzten Schritt,
         #  sie ist gut und bleibt bestehen, um den "Thread-Sturm" zu verhindern)
+        # KORREKTUR (Regel 2): Kein eigener Dauer-Thread mehr; der Consumer
+        # läuft als Aufgabe im gemeinsamen ThreadManager.
         self.conflict_check_queue = queue.Queue()
-        self.start_conflict_worker_thread()
 
         # --- System 2 (Layout & Sekundäre UI): Debouncer ---
         # (Dies behebt die Latenz beim Sehen von 'T.')
         self.secondary_ui_timer_id = None  # Speichert die ID des .after-Jobs
         self.secondary_ui_tasks = set()  # (NEU) Sammelt UI-Aufgaben für den Debouncer
 
-    # --- System 1: Konflikt-Worker (Unverändert) ---
-    def start_conflict_worker_thread(self):
-        """ Startet den einzelnen, langlebigen Worker-Thread (Consumer). """
-        print("[ActionUpdateHandler] Starte permanenten Konflikt-Worker-Thread...")
-        worker_thread = threading.Thread(
-            target=self._conflict_worker_loop,
-            daemon=True
-        )
-        worker_thread.start()
+    # --- System 1: Konflikt-Worker ---
+    def _schedule_conflict_worker(self):
+        """
+        Reiht den Consumer im ThreadManager ein. Wartet er schon, passiert nichts
+        (gleicher Schlüssel); läuft er gerade, startet der nächste erst danach und
+        holt sich alle inzwischen eingegangenen Änderungen.
+        """
+        self.tab.app.thread_manager.submit(self._drain_conflict_queue, priority=PRIORITY_VISIBLE,
+                                           key=CONFLICT_BATCH_KEY)
 
-    def _conflict_worker_loop(self):
-        """ (Worker-Thread) Wartet auf Konflikt-Aufgaben und bündelt sie. """
+    def _drain_conflict_queue(self):
+        """ (Worker-Thread) Holt alle wartenden Konflikt-Aufgaben und bündelt sie. """
+        batch_to_process = []
         while True:
             try:
-                first_task = self.conflict_check_queue.get()
-                batch_to_process = [first_task]
-
-                while not self.conflict_check_queue.empty():
-                    try:
-                        batch_to_process.append(self.conflict_check_queue.get_nowait())
-                    except queue.Empty:
-                        break
-
-                print(
-                    f" -> [Worker] Konflikt-Worker aufgewacht. Verarbeite Batch von {len(batch_to_process)} Änderungen...")
-                self._task_update_violations_BATCHED(batch_to_process)
+                batch_to_process.append(self.conflict_check_queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batch_to_process:
+            return
 
-                for _ in batch_to_process:
-                    self.conflict_check_queue.task_done()
-            except Exception as e:
-                # (Regel 1) Der Worker-Thread darf niemals sterben
-                print(f"[FEHLER] Kritischer Fehler im Konflikt-Worker-Loop: {e}")
+        try:
+            print(
+                f" -> [Worker] Konflikt-Worker aufgewacht. Verarbeite Batch von {len(batch_to_process)} Änderungen...")
+            self._task_update_violations_BATCHED(batch_to_process)
+        except Exception as e:
+            # (Regel 1) Fehler dürfen den Worker nicht beenden
+            print(f"[FEHLER] Kritischer Fehler im Konflikt-Worker: {e}")
+        finally:
+            for _ in batch_to_process:
+                self.conflict_check_queue.task_done()
 
     # --- Ende System 1 ---
 
@@ -113,6 +116,16 @@ class ActionUpdateHandler:
             self._run_secondary_updates
         )
 
+    def flush_secondary_updates(self):
+        """
+        NEU (Regel 2): Führt noch wartende sekundäre Updates sofort aus (z.B. vor
+        dem Verwerfen des Testmodus, damit die Stunden/Tageszählungen nicht
+        nachträglich mit veralteten Deltas verändert werden).
+        """
+        if self.secondary_ui_timer_id:
+            self.tab.after_cancel(self.secondary_ui_timer_id)
+            self._run_secondary_updates()
+
     def _run_secondary_updates(self):
         """
         (Main-Thread) Wird EINMALIG 100ms nach der letzten Eingabe
@@ -213,6 +226,8 @@ class ActionUpdateHandler:
             else:
                 print(f"  -> Cache 1/1: Setze '{new_shift}' in shift_schedule_data")
                 self.dm.shift_schedule_data[user_id_str][date_str] = new_shift
+            # NEU (Regel 2): Regel-Engine sofort nachziehen (PlanningAssistant wartet nicht auf die Konflikt-Queue)
+            self.dm.vm.sync_shift(user_id, date_obj, new_shift)
 
             # 1b. Renderer-Referenz aktualisieren (schnell)
             self.renderer.shifts_data = self.dm.shift_schedule_data
@@ -262,6 +277,7 @@ class ActionUpdateHandler:
         self.conflict_check_queue.put(
             (user_id, date_obj, old_shift, new_shift)
         )
+        self._schedule_conflict_worker()
 
         # 3b. System 2 (Layout & sekundäre UI/DATEN): Debouncer starten/zurücksetzen
         print(f"  -> Plane sekundäre Daten- & UI-Updates (Stunden, Zähler, Layout)...")
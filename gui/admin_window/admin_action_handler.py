@@ -7,22 +7,29 @@ from datetime import datetime, date
 
 
 # Importiere die Dialog-Klassen
-from ..dialogs.user_order_window import UserOrderWindow
-from ..dialogs.shift_order_window import ShiftOrderWindow
-from ..dialogs.min_staffing_window import MinStaffingWindow
-from ..dialogs.holiday_settings_window import HolidaySettingsWindow
-from ..dialogs.event_settings_window import EventSettingsWindow
-from ..dialogs.request_settings_window import RequestSettingsWindow
-from ..dialogs.planning_assistant_settings_window import PlanningAssistantSettingsWindow
-from ..dialogs.color_settings_window import ColorSettingsWindow
+# KORREKTUR (Startzeit): Dialoge und Tabs werden erst beim Öffnen importiert (Regel 2)
+from utils.lazy_import import LazyClassRef
+
+UserOrderWindow = LazyClassRef("gui.dialogs.user_order_window", "UserOrderWindow")
+ShiftOrderWindow = LazyClassRef("gui.dialogs.shift_order_window", "ShiftOrderWindow")
+MinStaffingWindow = LazyClassRef("gui.dialogs.min_staffing_window", "MinStaffingWindow")
+HolidaySettingsWindow = LazyClassRef("gui.dialogs.holiday_settings_window", "HolidaySettingsWindow")
+EventSettingsWindow = LazyClassRef("gui.dialogs.event_settings_window", "EventSettingsWindow")
+RequestSettingsWindow = LazyClassRef("gui.dialogs.request_settings_window", "RequestSettingsWindow")
+PlanningAssistantSettingsWindow = LazyClassRef("gui.dialogs.planning_assistant_settings_window",
+                                               "PlanningAssistantSettingsWindow")
+ColorSettingsWindow = LazyClassRef("gui.dialogs.color_settings_window", "ColorSettingsWindow")
+PerformanceLogWindow = LazyClassRef("gui.dialogs.performance_log_window", "PerformanceLogWindow")
+CriticalityWindow = LazyClassRef("gui.dialogs.criticality_window", "CriticalityWindow")
 
 # Importiere die Tab-Klassen, die dynamisch geladen werden
-from ..tabs.request_lock_tab import RequestLockTab
-from ..tabs.user_tab_settings_tab import UserTabSettingsTab
-from ..tabs.password_reset_requests_window import PasswordResetRequestsWindow
+RequestLockTab = LazyClassRef("gui.tabs.request_lock_tab", "RequestLockTab")
+UserTabSettingsTab = LazyClassRef("gui.tabs.user_tab_settings_tab", "UserTabSettingsTab")
+PasswordResetRequestsWindow = LazyClassRef("gui.tabs.password_reset_requests_window", "PasswordResetRequestsWindow")
 
-# Import für Typenvergleich
-from ..tabs.shift_plan_tab import ShiftPlanTab
+# Für den Typenvergleich (isinstance) wird die echte Klasse erst bei Bedarf aufgelöst
+ShiftPlanTab = LazyClassRef("gui.tabs.shift_plan_tab", "ShiftPlanTab")
+# --- ENDE KORREKTUR ---
 
 # Importiere die DB-Funktionen, die hier benötigt werden
 from database.db_core import save_config_json, MIN_STAFFING_RULES_CONFIG_KEY
@@ -77,7 +84,8 @@ class AdminActionHandler:
 
             current_widget = self.admin_window.notebook.nametowidget(selected_tab_id)
 
-            if isinstance(current_widget, ShiftPlanTab):
+            # (Ist das Modul noch nicht geladen, kann das Widget kein ShiftPlanTab sein)
+            if ShiftPlanTab.is_loaded and isinstance(current_widget, ShiftPlanTab.resolve()):
                 print("[DEBUG] Aktiver Tab ist ein ShiftPlanTab.")
                 # --- FINALE KORREKTUR: Direktes Lesen von self.admin_window.current_display_date ---
                 # Diese Variable wird vom ShiftPlanTab selbst aktualisiert.
@@ -223,4 +231,18 @@ class AdminActionHandler:
 
     def open_planning_assistant_settings(self):
         """Öffnet die Einstellungen für den Planungs-Helfer."""
-        PlanningAssistantSettingsWindow(self.admin_window)
\ No newline at end of file
+        PlanningAssistantSettingsWindow(self.admin_window)
+
+    def open_performance_log_window(self):
+        """(NEU) Öffnet das Leistungsprotokoll (gemessene Latenzen, Export)."""
+        # ShiftPlanDataManager (P5-Monats-Cache) liegt im Bootloader
+        PerformanceLogWindow(self.admin_window, data_manager=getattr(self.admin_window.app, 'data_manager', None))
+
+    def open_criticality_window(self):
+        """(NEU) Öffnet die Engpass-Vorschau (knappe Schichten der nächsten Monate)."""
+        from gui.criticality_index import find_criticality_index
+        criticality_index = find_criticality_index(self.admin_window)
+        if criticality_index is None:
+            messagebox.showinfo("Engpass-Vorschau", "Der Engpass-Index ist nicht verfügbar.", parent=self.admin_window)
+            return
+        CriticalityWindow(self.admin_window, criticality_index)
@@ -4,9 +4,8 @@ from tkinter import ttk
 
 # DB-Funktionen für Benachrichtigungen
 from database.db_chat import get_senders_with_unread_messages
-from database.db_requests import get_pending_wunschfrei_requests, get_pending_vacation_requests_count
-from database.db_reports import get_open_bug_reports_count, get_reports_with_user_feedback_count
-from database.db_admin import get_pending_password_resets_count
+# KORREKTUR (Regel 2): Alle Zähler über EINE gebündelte (gecachte) Abfrage
+from database.db_dashboard import get_admin_dashboard_counters
 
 
 class AdminNotificationManager:
@@ -48,14 +47,14 @@ class AdminNotificationManager:
 
         # 1. Thread für Header-Benachrichtigungen starten
         # --- KORREKTUR: 'args=' entfernt ---
-        self.thread_manager.start_worker(
+        self.thread_manager.start_poll_worker(
             self._fetch_header_notification_data,  # target_func
             self._on_header_data_fetched  # on_complete
         )
 
         # 2. Thread für Tab-Titel-Updates starten
         # --- KORREKTUR: 'args=' entfernt ---
-        self.thread_manager.start_worker(
+        self.thread_manager.start_poll_worker(
             self.tab_manager.fetch_tab_title_counts,  # target_func
             self._on_tab_titles_fetched  # on_complete
         )
@@ -78,13 +77,13 @@ class AdminNotificationManager:
         """
         data = {}
         try:
-            data['password_resets'] = get_pending_password_resets_count()
-            data['wunschfrei'] = len(get_pending_wunschfrei_requests())
-            data['urlaub'] = get_pending_vacation_requests_count()
-            data['user_feedback'] = get_reports_with_user_feedback_count()
-            open_bug_count = get_open_bug_reports_count()
-            actual_open_bugs = open_bug_count - data['user_feedback']
-            data['actual_open_bugs'] = actual_open_bugs
+            # (Teilt sich den Abruf mit AdminTabManager.fetch_tab_title_counts)
+            counters = get_admin_dashboard_counters()
+            data['password_resets'] = counters['password_resets']
+            data['wunschfrei'] = counters['pending_wishes']
+            data['urlaub'] = counters['pending_vacations']
+            data['user_feedback'] = counters['user_feedback']
+            data['actual_open_bugs'] = counters['open_bugs'] - counters['user_feedback']
 
             return data
         except Exception as e:
@@ -221,7 +220,7 @@ class AdminNotificationManager:
             return
 
         # --- KORREKTUR: 'args=' entfernt. Das Argument wird positional übergeben ---
-        self.thread_manager.start_worker(
+        self.thread_manager.start_poll_worker(
             get_senders_with_unread_messages,  # target_func
             self._on_chat_data_fetched,  # on_complete
             self.user_data['id']  # *args[0]
@@ -4,30 +4,35 @@ import threading
 from queue import Queue, Empty
 
 # --- TAB-KLASSEN IMPORTIEREN ---
-from ..tabs.shift_plan_tab import ShiftPlanTab
-from ..tabs.user_management_tab import UserManagementTab
-from ..tabs.dog_management_tab import DogManagementTab
-from ..tabs.shift_types_tab import ShiftTypesTab
-from ..tabs.requests_tab import RequestsTab
+# KORREKTUR (Startzeit): Die Tab-Module werden erst beim ersten Öffnen des Tabs
+# importiert (LazyClassRef, Regel 2). __name__ ist ohne Import verfügbar.
+from utils.lazy_import import LazyClassRef
+
+ShiftPlanTab = LazyClassRef("gui.tabs.shift_plan_tab", "ShiftPlanTab")
+UserManagementTab = LazyClassRef("gui.tabs.user_management_tab", "UserManagementTab")
+DogManagementTab = LazyClassRef("gui.tabs.dog_management_tab", "DogManagementTab")
+ShiftTypesTab = LazyClassRef("gui.tabs.shift_types_tab", "ShiftTypesTab")
+RequestsTab = LazyClassRef("gui.tabs.requests_tab", "RequestsTab")
 # from ..tabs.log_tab import LogTab # Auskommentiert
-from ..tabs.bug_reports_tab import BugReportsTab
-from ..tabs.tasks_tab import TasksTab
-from ..tabs.vacation_requests_tab import VacationRequestsTab
-from ..tabs.request_lock_tab import RequestLockTab
-from ..tabs.user_tab_settings_tab import UserTabSettingsTab
-from ..tabs.participation_tab import ParticipationTab
-from ..tabs.protokoll_tab import ProtokollTab
-from ..tabs.chat_tab import ChatTab
-from ..tabs.password_reset_requests_window import PasswordResetRequestsWindow
-from ..tabs.settings_tab import SettingsTab
+BugReportsTab = LazyClassRef("gui.tabs.bug_reports_tab", "BugReportsTab")
+TasksTab = LazyClassRef("gui.tabs.tasks_tab", "TasksTab")
+VacationRequestsTab = LazyClassRef("gui.tabs.vacation_requests_tab", "VacationRequestsTab")
+RequestLockTab = LazyClassRef("gui.tabs.request_lock_tab", "RequestLockTab")
+UserTabSettingsTab = LazyClassRef("gui.tabs.user_tab_settings_tab", "UserTabSettingsTab")
+ParticipationTab = LazyClassRef("gui.tabs.participation_tab", "ParticipationTab")
+ProtokollTab = LazyClassRef("gui.tabs.protokoll_tab", "ProtokollTab")
+ChatTab = LazyClassRef("gui.tabs.chat_tab", "ChatTab")
+PasswordResetRequestsWindow = LazyClassRef("gui.tabs.password_reset_requests_window", "PasswordResetRequestsWindow")
+SettingsTab = LazyClassRef("gui.tabs.settings_tab", "SettingsTab")
+# --- ENDE KORREKTUR ---
 
 # --- DB-IMPORTE FÜR NEUE THREAD-FUNKTIONEN ---
-from database.db_requests import get_pending_wunschfrei_requests, get_pending_vacation_requests_count
-from database.db_reports import get_open_bug_reports_count
+from database.db_requests import get_pending_wunschfrei_requests
 # --- KORREKTUR: Import von get_unapproved_users_count entfernt ---
 from database.db_users import get_all_users
 from database.db_dogs import get_all_dogs
-from database.db_admin import get_pending_password_resets_count
+# KORREKTUR (Regel 2): Zähler gebündelt in EINER Abfrage (mit TTL-Cache)
+from database.db_dashboard import get_admin_dashboard_counters, invalidate_admin_dashboard_counters
 
 # --- NEUER IMPORT FÜR BERECHTIGUNGEN (Regel 4) ---
 # Importiert die DB-Funktion und die Liste der Tab-Namen (ALL_ADMIN_TABS)
@@ -44,13 +49,9 @@ except ImportError as e:
 # --- ENDE NEU ---
 
 try:
-    from database.db_tasks import get_open_tasks_count, get_all_tasks
+    from database.db_tasks import get_all_tasks
 except ImportError:
-    print("[WARNUNG] db_tasks nicht gefunden. Tab-Titel für Aufgaben wird nicht aktualisiert.")
-
-
-    def get_open_tasks_count():
-        return 0
+    print("[WARNUNG] db_tasks nicht gefunden.")
 
 
     def get_all_tasks():
@@ -310,6 +311,12 @@ class AdminTabManager:
 
         print(f"[GUI-Admin] -> Starte Ladevorgang für {tab_name} (Threaded)")
         TabClass = self.tab_definitions[tab_name]
+        # KORREKTUR (Startzeit): Modul im GUI-Thread importieren, bevor der Worker startet
+        if isinstance(TabClass, LazyClassRef):
+            TabClass = TabClass.try_resolve()
+            if TabClass is None:
+                print(f"[GUI-Admin] FEHLER: Tab-Modul für '{tab_name}' konnte nicht geladen werden.")
+                return
         placeholder_frame = self.tab_frames.get(tab_name)
 
         if not placeholder_frame or not placeholder_frame.winfo_exists():
@@ -531,20 +538,25 @@ class AdminTabManager:
 
     # --- NEUE FUNKTIONEN FÜR THREAD-BASIERTE TAB-TITEL ---
 
+    @staticmethod
+    def _tab_counts_from_counters(counters):
+        """ Ordnet die gebündelten Admin-Zähler den Tab-Namen zu. """
+        return {
+            "Wunschanfragen": counters['pending_wishes'],
+            "Urlaubsanträge": counters['pending_vacations'],
+            "Bug-Reports": counters['open_bugs'],
+            "Mitarbeiter": 0,  # Platzhalter
+            "Passwort-Resets": counters['password_resets'],
+            "Aufgaben": counters['open_tasks'],
+        }
+
     def fetch_tab_title_counts(self):
         """
         [LÄUFT IM THREAD]
-        Holt alle Zähler für die Tab-Titel aus der DB.
+        Holt alle Zähler für die Tab-Titel (EINE gebündelte, gecachte Abfrage).
         """
-        counts = {}
         try:
-            counts["Wunschanfragen"] = len(get_pending_wunschfrei_requests())
-            counts["Urlaubsanträge"] = get_pending_vacation_requests_count()
-            counts["Bug-Reports"] = get_open_bug_reports_count()
-            counts["Mitarbeiter"] = 0  # Platzhalter
-            counts["Passwort-Resets"] = get_pending_password_resets_count()
-            counts["Aufgaben"] = get_open_tasks_count()
-            return counts
+            return self._tab_counts_from_counters(get_admin_dashboard_counters())
         except Exception as e:
             print(f"[FEHLER] fetch_tab_title_counts (Thread): {e}")
             return e
@@ -732,9 +744,12 @@ class AdminTabManager:
             caches['user_cache'] = get_all_users()
             caches['dog_cache'] = get_all_dogs()
             caches['pending_wishes_cache'] = get_pending_wunschfrei_requests()
-            caches['pending_vacations_count'] = get_pending_vacation_requests_count()
-            caches['open_bugs_count'] = get_open_bug_reports_count()
-            caches['open_tasks_count'] = get_open_tasks_count()
+            # Manuelles Refresh: Zähler neu abrufen (nicht aus dem TTL-Cache)
+            invalidate_admin_dashboard_counters()
+            caches['counters'] = get_admin_dashboard_counters()
+            caches['pending_vacations_count'] = caches['counters']['pending_vacations']
+            caches['open_bugs_count'] = caches['counters']['open_bugs']
+            caches['open_tasks_count'] = caches['counters']['open_tasks']
             return caches
         except Exception as e:
             print(f"[FEHLER] beim Aktualisieren der globalen Caches (Thread): {e}")
@@ -767,13 +782,7 @@ class AdminTabManager:
             bootloader_app.global_open_tasks_count = caches.get('open_tasks_count', 0)
             print("[DEBUG] Globale Caches aktualisiert.")
 
-            counts_for_titles = {
-                "Wunschanfragen": len(bootloader_app.global_pending_wishes_cache),
-                "Urlaubsanträge": bootloader_app.global_pending_vacations_count,
-                "Bug-Reports": bootloader_app.global_open_bugs_count,
-                "Aufgaben": bootlaoder_app.global_open_tasks_count,
-                "Mitarbeiter": 0
-            }
+            counts_for_titles = self._tab_counts_from_counters(caches['counters'])
             self.update_tab_titles_ui(counts_for_titles)
 
             loaded_tab_names = list(self.loaded_tabs)
@@ -75,8 +75,10 @@ class AdminUIManager:
         settings_menu.add_command(label="Antragssperre", command=action_handler.open_request_lock_window)
         settings_menu.add_command(label="Benutzer-Reiter sperren", command=action_handler.open_user_tab_settings)
         settings_menu.add_command(label="Planungs-Helfer", command=action_handler.open_planning_assistant_settings)
+        settings_menu.add_command(label="Engpass-Vorschau", command=action_handler.open_criticality_window)
         settings_menu.add_separator()
         settings_menu.add_command(label="Datenbank Wartung", command=lambda: tab_manager.switch_to_tab("Wartung"))
+        settings_menu.add_command(label="Leistungsprotokoll", command=action_handler.open_performance_log_window)
 
     def setup_footer(self):
         """Erstellt den Footer-Bereich (Logout, Bug-Report)."""
@@ -7,6 +7,8 @@ import os
 
 # Importiert die korrekte DB-Funktion (die wir in Schritt 2 erstellt haben)
 from database.db_roles import get_all_roles_details
+from gui.dialogs.progress_dialog import ProgressDialog
+from utils.threading_utils import PRIORITY_INTERACTIVE
 
 
 class AdminUtils:
@@ -149,7 +151,7 @@ class AdminUtils:
 
         filepath = os.path.join(default_path, filename)
 
-        # 5. CSV schreiben (mit UTF-8-BOM für Excel-Kompatibilität)
+        # 5. Spalten ermitteln (Tk-Thread), CSV schreiben im Worker-Thread
         try:
             # Erstelle eine sortierte Liste der Tage für die Spaltenköpfe
             first_user_id = next(iter(users_in_plan))
@@ -162,13 +164,39 @@ class AdminUtils:
             # Header-Zeile erstellen (Name, Vorname, Tag 1, Tag 2, ...)
             headers = ["Name", "Vorname"]
             headers.extend([d.strftime("%d.%m.%Y") for d in sorted_dates])
+        except Exception as e:
+            messagebox.showerror("Export fehlgeschlagen",
+                                 f"Ein unerwarteter Fehler ist aufgetreten:\n{e}",
+                                 parent=self.maw)
+            return
 
+        # --- NEU (Regel 2): Schreiben im ThreadManager mit Fortschritt und Abbruch ---
+        dialog = ProgressDialog(self.maw, "Schichtplan exportieren", "export_shift_plan_csv",
+                                text="Exportiere Schichtplan...")
+        task = self.maw.thread_manager.submit(
+            self._task_write_shift_plan_csv,
+            args=(filepath, headers, list(users_in_plan), plan_data, sorted_dates, dialog),
+            priority=PRIORITY_INTERACTIVE
+        )
+        dialog.link_task(task, lambda: self._on_export_complete(dialog, filepath, None))
+
+    def _task_write_shift_plan_csv(self, filepath, headers, users_in_plan, plan_data, sorted_dates, dialog):
+        """
+        (Worker-Thread) Schreibt die CSV-Datei (mit UTF-8-BOM für Excel-Kompatibilität).
+        Bei Abbruch wird die unvollständige Datei wieder entfernt.
+        """
+        reporter = dialog.reporter
+        error = None
+        try:
             with open(filepath, 'w', newline='', encoding='utf-8-sig') as f:
                 writer = csv.writer(f, delimiter=';')
                 writer.writerow(headers)
 
                 # Datenzeilen für jeden Benutzer schreiben
-                for user in users_in_plan:
+                for index, user in enumerate(users_in_plan):
+                    if reporter.cancelled:
+                        break
+                    reporter.step(index, len(users_in_plan), f"Exportiere {index + 1} von {len(users_in_plan)}...")
                     user_id = user['id']
                     row = [user['name'], user['vorname']]
 
@@ -187,16 +215,23 @@ class AdminUtils:
                             row.append("")  # Leere Zelle
 
                     writer.writerow(row)
-
-            messagebox.showinfo("Export erfolgreich",
-                                f"Schichtplan wurde exportiert nach:\n{filepath}",
-                                parent=self.maw)
-
+            if reporter.cancelled:
+                os.remove(filepath)
         except (IOError, PermissionError) as e:
-            messagebox.showerror("Export fehlgeschlagen",
-                                 f"Speichern fehlgeschlagen. Ist die Datei vielleicht geöffnet?\n\nFehler: {e}",
-                                 parent=self.maw)
+            error = f"Speichern fehlgeschlagen. Ist die Datei vielleicht geöffnet?\n\nFehler: {e}"
         except Exception as e:
-            messagebox.showerror("Export fehlgeschlagen",
-                                 f"Ein unerwarteter Fehler ist aufgetreten:\n{e}",
-                                 parent=self.maw)
\ No newline at end of file
+            error = f"Ein unerwarteter Fehler ist aufgetreten:\n{e}"
+        self.maw.after(0, self._on_export_complete, dialog, filepath, error)
+
+    def _on_export_complete(self, dialog, filepath, error):
+        """ (Tk-Thread) Schließt den Fortschritt und meldet das Ergebnis. """
+        cancelled = dialog.reporter.cancelled
+        dialog.close(success=error is None and not cancelled)
+        if error:
+            messagebox.showerror("Export fehlgeschlagen", error, parent=self.maw)
+        elif cancelled:
+            messagebox.showinfo("Export abgebrochen", "Der Export wurde abgebrochen.", parent=self.maw)
+        else:
+            messagebox.showinfo("Export erfolgreich",
+                                f"Schichtplan wurde exportiert nach:\n{filepath}",
+                                parent=self.maw)
\ No newline at end of file
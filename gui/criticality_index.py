@@ -0,0 +1,535 @@
+# gui/criticality_index.py
+# NEU (Regel 2 & 4): Persistenter Engpass-Index (Angebot vs. Bedarf je Tag und Schicht)
+#
+# Bisher hat der Generator bei JEDEM Lauf für die letzten 14 Tage des Monats
+# alle Mitarbeiter gegen Urlaub, Wunschfrei und Schicht-Ausschlüsse geprüft,
+# um mögliche Engpässe zu finden. Admins sahen Engpässe erst beim Planen.
+#
+# Der Index hält für die nächsten N Monate (DHF_CRITICALITY_MONTHS, Standard 6)
+# je Tag und geplanter Schicht ("6", "T.", "N."):
+#   - Bedarf:  Mindestbesetzung (gleiche Quelle wie der Generator)
+#   - Angebot: Menge der Mitarbeiter, die die Schicht grundsätzlich übernehmen
+#              könnten (freigeschaltet, aktiv, kein genehmigter Urlaub, kein
+#              genehmigter Wunschfrei für den Tag/die Schicht, kein Ausschluss)
+#
+# Änderungen (Urlaub genehmigt/storniert, Wunschfrei, Archivierung/Aktivierung,
+# Ausschlüsse in den Generator-Einstellungen) werden pro Mitarbeiter nachgeführt
+# (refresh_user: drei kleine Abfragen, O(Tage) Neuberechnung), ohne Neuaufbau.
+#
+# Der Index liegt als Datei im Benutzerprofil (wie der Warm-Start-Cache) und wird
+# nach DHF_CRITICALITY_MAX_AGE_H Stunden (Standard 12, Änderungen an anderen
+# Arbeitsplätzen) oder beim Monatswechsel neu aufgebaut. Monatsdaten (Plan,
+# gesicherte Schichten) gehören NICHT in den Index; der Generator zieht sie beim
+# Lesen ab (siehe generator_pre_planning.py).
+
+import os
+import sys
+import pickle
+import threading
+import zlib
+import calendar
+from datetime import date, datetime, time, timedelta
+
+from database import db_connection
+from database.db_users import get_all_users, get_user_by_id
+from database.db_requests import (get_approved_vacations_between, get_wunschfrei_requests_between,
+                                  get_requests_by_user, get_all_requests_by_user)
+from utils.instrumentation import span
+from utils.threading_utils import PRIORITY_PRELOAD
+
+# Bei Änderungen an der Struktur der Datei erhöhen (alte Dateien werden verworfen)
+FORMAT_VERSION = 1
+CACHE_DIR_NAME = "DHFPlaner"
+CACHE_FILE_NAME = "criticality_index.bin"
+
+HORIZON_ENV_VAR = "DHF_CRITICALITY_MONTHS"
+MAX_AGE_ENV_VAR = "DHF_CRITICALITY_MAX_AGE_H"
+DEFAULT_HORIZON_MONTHS = 6
+DEFAULT_MAX_AGE_HOURS = 12.0
+
+# Schichten, die der Generator plant (wie SHIFTS_TO_PLAN in shift_plan_generator.py)
+INDEX_SHIFTS = ("6", "T.", "N.")
+VACATION_APPROVED = ('Approved', 'Genehmigt')
+WUNSCHFREI_APPROVED = ('Approved', 'Genehmigt', 'Akzeptiert')
+
+
+def horizon_months():
+    """ Anzahl der Monate (ab dem aktuellen), die der Index abdeckt (0 = Index aus). """
+    try:
+        return max(0, int(os.environ.get(HORIZON_ENV_VAR, DEFAULT_HORIZON_MONTHS)))
+    except ValueError:
+        return DEFAULT_HORIZON_MONTHS
+
+
+def max_age_hours():
+    try:
+        return float(os.environ.get(MAX_AGE_ENV_VAR, DEFAULT_MAX_AGE_HOURS))
+    except ValueError:
+        return DEFAULT_MAX_AGE_HOURS
+
+
+def _to_datetime(value):
+    """ DB-Werte (datetime, date, 'YYYY-MM-DD[ HH:MM:SS]') -> datetime oder None. """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.min)
+    try:
+        text = str(value)
+        return datetime.strptime(text[:19], '%Y-%m-%d %H:%M:%S') if len(text) > 10 \
+            else datetime.strptime(text, '%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+class CriticalityIndex:
+    """
+    Engpass-Index über die nächsten N Monate (gehört zum ShiftPlanDataManager).
+
+    Aufbau:
+        facts     {user_id_str: {...}}  Eingaben je Mitarbeiter (Status, Urlaubstage, Wunschfrei, Ausschlüsse)
+        eligible  {(date_str, schicht): set(user_id_str)}  Angebot
+        demand    {(date_str, schicht): anzahl}            Bedarf (nur > 0)
+
+    Schreibende Methoden (rebuild, refresh_*) laufen im Worker-Thread, Lesen ist
+    aus jedem Thread möglich (Lock).
+    """
+
+    def __init__(self, data_manager, shifts=INDEX_SHIFTS):
+        self.dm = data_manager
+        self.shifts = tuple(shifts)
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self.start = None  # Erster Tag des Horizonts (Monatsanfang)
+        self.months = 0
+        self.built_at = None
+        self.facts = {}
+        self.eligible = {}
+        self.demand = {}
+        # Vorgemerkte Änderungen (request_update), gesammelt abgearbeitet von process_pending
+        self._pending_user_ids = {}
+        self._pending_preferences = False
+        self._pending_rebuild = False
+
+    # --- Zeitraum ---
+
+    @staticmethod
+    def _horizon_from(start, months):
+        """ (erster Tag, letzter Tag) ab dem Monat von 'start' über 'months' Monate. """
+        last_month_index = start.year * 12 + start.month - 1 + months - 1
+        end_year, end_month = divmod(last_month_index, 12)
+        end_month += 1
+        return start, date(end_year, end_month, calendar.monthrange(end_year, end_month)[1])
+
+    @staticmethod
+    def _horizon(months):
+        """ Horizont ab dem aktuellen Monat. """
+        today = date.today()
+        return CriticalityIndex._horizon_from(date(today.year, today.month, 1), months)
+
+    @property
+    def ready(self):
+        return self.start is not None
+
+    def _days(self):
+        """ [(date_obj, date_str)] des Horizonts. """
+        start, end = self._horizon_from(self.start, self.months)
+        day_count = (end - start).days + 1
+        return [(day, day.strftime('%Y-%m-%d')) for day in (start + timedelta(days=i) for i in range(day_count))]
+
+    def covers(self, year, month):
+        """ Deckt der (geladene) Index den ganzen Monat ab? """
+        if not self.ready:
+            return False
+        start, end = self._horizon_from(self.start, self.months)
+        return start <= date(year, month, 1) and date(year, month, calendar.monthrange(year, month)[1]) <= end
+
+    def is_stale(self):
+        months = horizon_months()
+        if not self.ready or self.months != months:
+            return True
+        if self.start != self._horizon(months)[0]:
+            return True  # Monatswechsel: Horizont ist weitergewandert
+        return self.built_at is None or datetime.now() - self.built_at > timedelta(hours=max_age_hours())
+
+    # --- Eingaben je Mitarbeiter ---
+
+    def _load_exclusions(self):
+        """ {user_id_str: frozenset(schichten)} aus den Generator-Einstellungen. """
+        try:
+            config = self.dm.get_generator_config() or {}
+        except Exception as e:
+            print(f"[Engpass-Index] Generator-Einstellungen nicht ladbar: {e}")
+            config = {}
+        return {str(user_id): frozenset(prefs.get('shift_exclusions') or ())
+                for user_id, prefs in (config.get('user_preferences') or {}).items()}
+
+    def _build_facts(self, user, vacation_rows, wunschfrei, exclusions, start, end):
+        """ Eingaben eines Mitarbeiters für den Horizont [start, end]. """
+        vacation_days = set()
+        for row in vacation_rows:
+            if row.get('status') not in VACATION_APPROVED or row.get('archived'):
+                continue
+            try:
+                day = max(_to_date(row['start_date']), start)
+                last_day = min(_to_date(row['end_date']), end)
+            except (KeyError, ValueError, TypeError):
+                continue
+            while day <= last_day:
+                vacation_days.add(day.strftime('%Y-%m-%d'))
+                day += timedelta(days=1)
+        return {
+            'approved': bool(user.get('is_approved', 1)),
+            'archived_at': _to_datetime(user.get('archived_date')) if user.get('is_archived') else None,
+            'active_from': _to_datetime(user.get('activation_date')),
+            'exclusions': exclusions,
+            'vacation_days': vacation_days,
+            # Nur genehmigte Wünsche blockieren; "" = ganzer Tag (wie im Generator)
+            'wunschfrei': {date_str: entry[1] for date_str, entry in (wunschfrei or {}).items()
+                           if entry and entry[0] in WUNSCHFREI_APPROVED},
+        }
+
+    def _eligible_shifts(self, facts, day, date_str):
+        """ Schichten, die der Mitarbeiter an dem Tag grundsätzlich übernehmen könnte. """
+        if not facts or not facts['approved'] or date_str in facts['vacation_days']:
+            return ()
+        archived_at = facts['archived_at']
+        if archived_at is not None and archived_at <= datetime.combine(day, time.min):
+            return ()
+        active_from = facts['active_from']
+        if active_from is not None and active_from > datetime.combine(day, time.max):
+            return ()
+        wf_shift = facts['wunschfrei'].get(date_str)
+        if wf_shift == "":
+            return ()
+        return [shift for shift in self.shifts if shift != wf_shift and shift not in facts['exclusions']]
+
+    def _apply_user(self, user_id_str, new_facts):
+        """ (unter Lock) Ersetzt die Eingaben eines Mitarbeiters und passt nur seine Einträge an. """
+        old_facts = self.facts.get(user_id_str)
+        if new_facts is None:
+            self.facts.pop(user_id_str, None)
+        else:
+            self.facts[user_id_str] = new_facts
+        changed = 0
+        for day, date_str in self._days():
+            old_shifts = set(self._eligible_shifts(old_facts, day, date_str))
+            new_shifts = set(self._eligible_shifts(new_facts, day, date_str))
+            for shift in old_shifts - new_shifts:
+                self.eligible.get((date_str, shift), set()).discard(user_id_str)
+                changed += 1
+            for shift in new_shifts - old_shifts:
+                self.eligible.setdefault((date_str, shift), set()).add(user_id_str)
+                changed += 1
+        return changed
+
+    def _compute_demand(self, days):
+        demand = {}
+        for day, date_str in days:
+            try:
+                min_staffing = self.dm.get_min_staffing_for_date(day) or {}
+            except Exception as e:
+                print(f"[Engpass-Index] Mindestbesetzung für {date_str} nicht ermittelbar: {e}")
+                continue
+            for shift in self.shifts:
+                required = min_staffing.get(shift, 0)
+                if required > 0:
+                    demand[(date_str, shift)] = required
+        return demand
+
+    # --- Aufbau / Nachführen (Worker-Thread) ---
+
+    def ensure_fresh(self):
+        """ (Worker-Thread) Lädt den Index von der Festplatte und baut ihn nur neu auf, wenn er veraltet ist. """
+        if horizon_months() == 0:
+            return False
+        if not self.ready:
+            self.load()
+        if self.is_stale():
+            return self.rebuild()
+        self.refresh_demand()
+        return True
+
+    def rebuild(self):
+        """ (Worker-Thread) Baut den Index vollständig auf (vier DB-Abfragen). """
+        months = horizon_months()
+        if months == 0:
+            return False
+        start, end = self._horizon(months)
+        with span("criticality.rebuild", months=months):
+            users = get_all_users()
+            if not users:
+                print("[Engpass-Index] Keine Benutzer geladen (DB nicht erreichbar?). Index bleibt unverändert.")
+                return False
+            vacations_by_user = {}
+            for row in get_approved_vacations_between(start, end):
+                vacations_by_user.setdefault(str(row['user_id']), []).append(row)
+            wunschfrei = get_wunschfrei_requests_between(start, end)
+            exclusions = self._load_exclusions()
+
+            facts = {}
+            for user in users:
+                user_id_str = str(user['id'])
+                facts[user_id_str] = self._build_facts(
+                    user, vacations_by_user.get(user_id_str, ()), wunschfrei.get(user_id_str),
+                    exclusions.get(user_id_str, frozenset()), start, end)
+            with self._lock:
+                self.start, self.months = start, months
+                self.facts, self.eligible = {}, {}
+                for user_id_str, user_facts in facts.items():
+                    self._apply_user(user_id_str, user_facts)
+                self.demand = self._compute_demand(self._days())
+                self.built_at = datetime.now()
+        print(f"[Engpass-Index] Neu aufgebaut: {start} bis {end}, {len(facts)} Mitarbeiter.")
+        self.save()
+        return True
+
+    def refresh_user(self, user_id):
+        """
+        (Worker-Thread) Führt den Index für EINEN Mitarbeiter nach (Urlaub,
+        Wunschfrei, Archivierung/Aktivierung). Liest den aktuellen DB-Stand.
+        """
+        if not self.ready:
+            return False
+        user_id_str = str(user_id)
+        start, end = self._horizon_from(self.start, self.months)
+        with span("criticality.refresh_user", user=user_id_str):
+            user = get_user_by_id(user_id)
+            vacation_rows = get_requests_by_user(user_id) if user else []
+            wunschfrei = {}
+            for row in get_all_requests_by_user(user_id):
+                date_str = str(row.get('request_date'))[:10]
+                if start.strftime('%Y-%m-%d') <= date_str <= end.strftime('%Y-%m-%d'):
+                    wunschfrei[date_str] = (row.get('status'), row.get('requested_shift'))
+            with self._lock:
+                old_facts = self.facts.get(user_id_str)
+                exclusions = old_facts['exclusions'] if old_facts else frozenset()
+                new_facts = self._build_facts(user, vacation_rows, wunschfrei, exclusions,
+                                              start, end) if user else None
+                changed = self._apply_user(user_id_str, new_facts)
+        print(f"[Engpass-Index] Mitarbeiter {user_id_str} nachgeführt ({changed} Einträge geändert).")
+        if changed:
+            self.save()
+        return True
+
+    def refresh_users(self, user_ids):
+        for user_id in dict.fromkeys(user_ids):
+            self.refresh_user(user_id)
+
+    def refresh_preferences(self):
+        """ (Worker-Thread) Übernimmt geänderte Schicht-Ausschlüsse (nur betroffene Mitarbeiter). """
+        if not self.ready:
+            return False
+        exclusions = self._load_exclusions()
+        changed = 0
+        with self._lock:
+            for user_id_str, old_facts in list(self.facts.items()):
+                new_exclusions = exclusions.get(user_id_str, frozenset())
+                if old_facts['exclusions'] != new_exclusions:
+                    changed += self._apply_user(user_id_str, dict(old_facts, exclusions=new_exclusions))
+        print(f"[Engpass-Index] Schicht-Ausschlüsse übernommen ({changed} Einträge geändert).")
+        if changed:
+            self.save()
+        return True
+
+    def request_update(self, user_ids=(), preferences=False, rebuild=False):
+        """ (Beliebiger Thread) Merkt Änderungen für den nächsten process_pending-Lauf vor. """
+        with self._lock:
+            for user_id in user_ids:
+                self._pending_user_ids[user_id] = True
+            self._pending_preferences |= preferences
+            self._pending_rebuild |= rebuild
+
+    def process_pending(self):
+        """
+        (Worker-Thread) Arbeitet alle vorgemerkten Änderungen in einem Lauf ab.
+        Ein Neuaufbau ersetzt das Nachführen einzelner Mitarbeiter/Ausschlüsse.
+        """
+        with self._lock:
+            user_ids, rebuild, preferences = list(self._pending_user_ids), self._pending_rebuild, \
+                self._pending_preferences
+            self._pending_user_ids, self._pending_rebuild, self._pending_preferences = {}, False, False
+        if rebuild:
+            return self.rebuild()
+        if preferences:
+            self.refresh_preferences()
+        if user_ids:
+            self.refresh_users(user_ids)
+        return True
+
+    def refresh_demand(self):
+        """ Bedarf neu berechnen (nur Besetzungsregeln/Feiertage im Speicher, kein DB-Zugriff). """
+        if not self.ready:
+            return
+        with self._lock:
+            self.demand = self._compute_demand(self._days())
+
+    # --- Lesen ---
+
+    def month_slice(self, year, month, shifts=None):
+        """
+        Angebot eines Monats für den Generator: {(date_str, schicht): frozenset(user_id_str)}.
+        Fehlende Schlüssel bedeuten "niemand verfügbar". None, wenn der Index den
+        Monat nicht abdeckt (Generator rechnet dann selbst).
+        """
+        with self._lock:
+            if not self.covers(year, month):
+                return None
+            prefix = f"{year:04d}-{month:02d}-"
+            shifts = set(shifts or self.shifts)
+            return {key: frozenset(user_ids) for key, user_ids in self.eligible.items()
+                    if key[0].startswith(prefix) and key[1] in shifts and user_ids}
+
+    def bottlenecks(self, buffer=1):
+        """
+        Tage/Schichten, an denen das Angebot den Bedarf höchstens um 'buffer'
+        übersteigt (wie die Kritikalität im Generator), knappste zuerst:
+        [{'date', 'shift', 'required', 'available', 'slack'}].
+        """
+        rows = []
+        with self._lock:
+            if not self.ready:
+                return rows
+            for day, date_str in self._days():
+                for shift in self.shifts:
+                    required = self.demand.get((date_str, shift), 0)
+                    if required <= 0:
+                        continue
+                    available = len(self.eligible.get((date_str, shift), ()))
+                    if available <= required + buffer:
+                        rows.append({'date': day, 'shift': shift, 'required': required, 'available': available,
+                                     'slack': available - required})
+        rows.sort(key=lambda row: (row['slack'], row['date']))
+        return rows
+
+    # --- Datei ---
+
+    @staticmethod
+    def _get_index_path():
+        """ Ermittelt den Pfad zur Index-Datei im Benutzerprofil. """
+        if sys.platform.startswith('win'):
+            base_dir = os.environ.get('LOCALAPPDATA') or os.environ.get('APPDATA') or os.path.expanduser('~')
+        else:
+            base_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(base_dir, CACHE_DIR_NAME, CACHE_FILE_NAME)
+
+    @staticmethod
+    def _get_db_identity():
+        config = db_connection.DB_CONFIG or {}
+        return f"{config.get('host', '')}:{config.get('port', '')}/{config.get('database', '')}"
+
+    def load(self):
+        """ Lädt den Index von der Festplatte. Jeder Fehler führt nur zum Neuaufbau (Regel 1). """
+        path = self._get_index_path()
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                snapshot = pickle.loads(zlib.decompress(f.read()))
+            if not isinstance(snapshot, dict) or snapshot.get('format_version') != FORMAT_VERSION \
+                    or snapshot.get('db_identity') != self._get_db_identity() \
+                    or tuple(snapshot.get('shifts', ())) != self.shifts:
+                print("[Engpass-Index] Datei passt nicht (Format/Datenbank). Wird neu aufgebaut.")
+                return False
+            with self._lock:
+                self.start = snapshot['start']
+                self.months = snapshot['months']
+                self.built_at = snapshot['built_at']
+                self.facts = snapshot['facts']
+                self.eligible = snapshot['eligible']
+                self.demand = self._compute_demand(self._days())
+            print(f"[Engpass-Index] Geladen (Stand {self.built_at:%d.%m.%Y %H:%M}, {len(self.facts)} Mitarbeiter).")
+            return True
+        except Exception as e:
+            print(f"[Engpass-Index] Datei konnte nicht gelesen werden ({e}). Wird neu aufgebaut.")
+            with self._lock:
+                self.start, self.facts, self.eligible, self.demand = None, {}, {}, {}
+            return False
+
+    def save(self):
+        """ Schreibt den Index atomar (temporäre Datei + Umbenennen). """
+        with self._lock:
+            if not self.ready:
+                return
+            data = zlib.compress(pickle.dumps({
+                'format_version': FORMAT_VERSION,
+                'db_identity': self._get_db_identity(),
+                'shifts': self.shifts,
+                'start': self.start,
+                'months': self.months,
+                'built_at': self.built_at,
+                'facts': self.facts,
+                'eligible': self.eligible,
+            }, protocol=pickle.HIGHEST_PROTOCOL))
+        path = self._get_index_path()
+        tmp_path = path + ".tmp"
+        with self._save_lock:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"[Engpass-Index] Datei konnte nicht gespeichert werden: {e}")
+                try:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                except OSError:
+                    pass
+
+
+# --- Zugriff für Tabs/Dialoge ---
+
+def find_criticality_index(app):
+    """ Index des ShiftPlanDataManagers (liegt im Bootloader) oder None. """
+    for source in (app, getattr(app, 'app', None)):
+        index = getattr(getattr(source, 'data_manager', None), 'criticality_index', None)
+        if index is not None:
+            return index
+    return None
+
+
+def schedule_update(app, index, callback=None, **changes):
+    """
+    (Tk-Thread) Merkt die Änderungen (siehe request_update) vor und plant
+    process_pending als Vorlade-Aufgabe im ThreadManager ein. Aufträge mit dem
+    Schlüssel "criticality" laufen nie parallel; ein noch wartender Auftrag
+    übernimmt die neuen Änderungen mit.
+    """
+    index.request_update(**changes)
+    thread_manager = None
+    for source in (app, getattr(app, 'app', None)):
+        thread_manager = thread_manager or getattr(source, 'thread_manager', None)
+    if thread_manager is not None:
+        return thread_manager.submit(index.process_pending, callback=callback,
+                                     priority=PRIORITY_PRELOAD, key="criticality")
+    # (Ohne ThreadManager, z.B. vor dem Hauptfenster: eigener Thread)
+    threading.Thread(target=index.process_pending, daemon=True, name="CriticalityIndex").start()
+    return None
+
+
+def notify_users_changed(app, user_ids):
+    """ (Tk-Thread) Führt den Index für die Mitarbeiter im Hintergrund nach. """
+    index = find_criticality_index(app)
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if index is None or not index.ready or not user_ids:
+        return
+    schedule_update(app, index, user_ids=user_ids)
+
+
+def notify_preferences_changed(app):
+    """ (Tk-Thread) Übernimmt geänderte Generator-Einstellungen (Ausschlüsse) im Hintergrund. """
+    index = find_criticality_index(app)
+    if index is None or not index.ready:
+        return
+    schedule_update(app, index, preferences=True)
@@ -0,0 +1,65 @@
+# gui/data_manager/dm_load_stage.py
+# NEU (Regel 2): Private Arbeitsfläche für einen Monats-Ladevorgang
+#
+# Bisher hat load_and_process_data die Konfliktprüfung und die Totals direkt
+# auf den *aktiven* Caches des DataManagers berechnet. Laufen mehrere Ladungen
+# (schnelles Blättern, Vorladen), überschreiben sie sich gegenseitig. Die Stage
+# hat dieselben Attributnamen wie der DataManager, sodass ViolationManager und
+# DataManagerHelpers unverändert darauf rechnen können - ohne die aktiven
+# Caches anzufassen. Erst das fertige Ergebnis wird (falls noch aktuell)
+# übernommen.
+
+from .dm_violation_manager import ViolationManager
+from .dm_helpers import DataManagerHelpers
+
+
+class MonthLoadStage:
+    """
+    Hält die Daten eines Monats während des Ladens (wie die aktiven Caches
+    des DataManagers, aber nur für diesen einen Ladevorgang).
+    """
+
+    def __init__(self, data_manager, year, month, temp_data):
+        self.app = data_manager.app
+        self.year = year
+        self.month = month
+
+        self.shift_schedule_data = temp_data['shift_schedule_data']
+        self.processed_vacations = temp_data['processed_vacations']
+        self.wunschfrei_data = temp_data['wunschfrei_data']
+        self.daily_counts = temp_data['daily_counts']
+        self.locked_shifts_cache = temp_data['locked_shifts_cache']
+        self._prev_month_shifts = temp_data['_prev_month_shifts']
+        self.previous_month_shifts = temp_data['previous_month_shifts']
+        self.processed_vacations_prev = temp_data['processed_vacations_prev']
+        self.wunschfrei_data_prev = temp_data['wunschfrei_data_prev']
+        self.next_month_shifts = temp_data['next_month_shifts']
+        self.cached_users_for_month = temp_data['cached_users_for_month']
+        self.user_data_map = temp_data['user_data_map']
+        self.violation_cells = set()
+        self.user_shift_totals = {}
+
+        self.vm = ViolationManager(self)
+        # Vorverarbeitete Schichtzeiten vom DataManager übernehmen (nur gelesen)
+        data_manager.vm.preprocess_shift_times()
+        self.vm._preprocessed_shift_times = data_manager.vm._preprocessed_shift_times
+        self.helpers = DataManagerHelpers(self)
+
+    def build_cache_entry(self):
+        """ P5-Cache-Eintrag (gleiches Format wie ShiftPlanDataManager._build_month_cache_entry). """
+        return {
+            'shift_schedule_data': self.shift_schedule_data,
+            'processed_vacations': self.processed_vacations,
+            'wunschfrei_data': self.wunschfrei_data,
+            'daily_counts': self.daily_counts,
+            'violation_cells': self.violation_cells,
+            '_prev_month_shifts': self._prev_month_shifts,
+            'previous_month_shifts': self.previous_month_shifts,
+            'processed_vacations_prev': self.processed_vacations_prev,
+            'wunschfrei_data_prev': self.wunschfrei_data_prev,
+            'next_month_shifts': self.next_month_shifts,
+            'cached_users_for_month': self.cached_users_for_month,
+            'locked_shifts': self.locked_shifts_cache,
+            'user_data_map': self.user_data_map,
+            'user_shift_totals': self.user_shift_totals
+        }
@@ -0,0 +1,200 @@
+# gui/data_manager/dm_month_cache.py
+# NEU (Regel 2): Begrenzter P5-Monats-Cache (LRU)
+#
+# monthly_caches war ein einfaches dict, das mit jedem besuchten oder
+# vorgeladenen Monat wuchs. Auf den Thin-Clients kann ein Jahr Historie so
+# mehrere hundert MB belegen. Dieser Cache verdrängt den am längsten nicht
+# benutzten Monat, sobald die Anzahl der Einträge oder die (geschätzte)
+# Größe das Budget überschreitet. Der angezeigte Monat und seine Nachbarn
+# (±1) sind angeheftet und werden nie verdrängt.
+#
+# Budget (optional per Umgebungsvariable):
+#     DHF_MONTH_CACHE_ENTRIES=6      maximale Anzahl Monate
+#     DHF_MONTH_CACHE_MB=64          ungefähre Obergrenze in MB
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from utils.instrumentation import get_logger
+
+_log = get_logger("month_cache")
+
+ENTRIES_ENV_VAR = "DHF_MONTH_CACHE_ENTRIES"
+BUDGET_ENV_VAR = "DHF_MONTH_CACHE_MB"
+DEFAULT_MAX_ENTRIES = 6
+DEFAULT_MAX_MB = 64
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, "")) or default
+    except ValueError:
+        return default
+
+
+def estimate_size(obj):
+    """
+    Ungefähre Größe in Bytes (rekursiv über dict/list/set/tuple).
+    Gemeinsam genutzte Objekte werden nur einmal gezählt.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        obj_id = id(current)
+        if obj_id in seen:
+            continue
+        seen.add(obj_id)
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+    return total
+
+
+def _neighbour_months(year, month):
+    """ (Vormonat, Monat, Folgemonat) als (jahr, monat)-Tupel. """
+    first_day = date(year, month, 1)
+    prev_day = first_day - timedelta(days=1)
+    next_day = first_day + timedelta(days=32)
+    return {(prev_day.year, prev_day.month), (year, month), (next_day.year, next_day.month)}
+
+
+class MonthCache:
+    """
+    Thread-sicherer LRU-Cache {(jahr, monat): cache_entry} mit Einträge- und
+    Byte-Budget. Verhält sich für den DataManager wie ein dict
+    (in, [], del, get, clear).
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = int(max_entries or _env_number(ENTRIES_ENV_VAR, DEFAULT_MAX_ENTRIES))
+        self.max_bytes = int(max_bytes or _env_number(BUDGET_ENV_VAR, DEFAULT_MAX_MB) * 1024 * 1024)
+        self._entries = OrderedDict()  # {key: entry}, zuletzt benutzte rechts
+        self._sizes = {}  # {key: geschätzte Bytes}
+        self._dirty = set()  # Einträge, deren Größe erst beim nächsten Verdrängen neu geschätzt wird
+        self._pinned = set()
+        self._lock = threading.Lock()
+
+        # Kennzahlen
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    # --- dict-Schnittstelle ---
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __getitem__(self, key):
+        with self._lock:
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            return entry
+
+    def get(self, key, default=None):
+        """ Wie dict.get, zählt aber Treffer/Fehlschläge und markiert den Eintrag als benutzt. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def __setitem__(self, key, entry):
+        size = estimate_size(entry)  # Außerhalb des Locks (kann bei großen Monaten dauern)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._dirty.discard(key)
+            self._evict_locked(protect=key)
+
+    def replace(self, key, entry):
+        """
+        Wie cache[key] = entry, aber ohne sofortige Größenschätzung (z.B. nach
+        jeder PlanDiff): die Größe wird erst beim nächsten Verdrängen geschätzt.
+        """
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._sizes.setdefault(key, 0)
+            self._dirty.add(key)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._entries[key]
+            self._sizes.pop(key, None)
+            self._dirty.discard(key)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._dirty.clear()
+
+    # --- Anheften & Verdrängen ---
+
+    def pin_around(self, year, month):
+        """ Heftet den angezeigten Monat und seine Nachbarn an (ersetzt vorherige Anheftung). """
+        with self._lock:
+            self._pinned = _neighbour_months(year, month)
+            self._evict_locked()
+
+    def _update_sizes_locked(self):
+        """ Schätzt die Größe der per replace() geänderten Einträge nach. """
+        for key in self._dirty:
+            if key in self._entries:
+                self._sizes[key] = estimate_size(self._entries[key])
+        self._dirty.clear()
+
+    def _evict_locked(self, protect=None):
+        """ Verdrängt die ältesten nicht angehefteten Monate ('protect' = gerade eingefügt). """
+        self._update_sizes_locked()
+        total_bytes = sum(self._sizes.values())
+        while len(self._entries) > self.max_entries or total_bytes > self.max_bytes:
+            victim = next((key for key in self._entries if key not in self._pinned and key != protect), None)
+            if victim is None:
+                break  # Nur noch angeheftete Monate
+            del self._entries[victim]
+            victim_size = self._sizes.pop(victim, 0)
+            total_bytes -= victim_size
+            self.evictions += 1
+            self.evicted_bytes += victim_size
+            _log.info("Monat %s-%02d verdrängt (~%.1f MB). Cache: %s Monate, ~%.1f MB.", victim[0], victim[1],
+                      victim_size / 1048576, len(self._entries), total_bytes / 1048576)
+
+    def get_stats(self):
+        """ Größe und Verdrängungs-Kennzahlen für das Leistungsprotokoll. """
+        with self._lock:
+            self._update_sizes_locked()
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': sum(self._sizes.values()),
+                'max_bytes': self.max_bytes,
+                'pinned': sorted(key for key in self._pinned if key in self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'evicted_bytes': self.evicted_bytes,
+                'months': {f"{key[0]}-{key[1]:02d}": size for key, size in self._sizes.items()},
+            }
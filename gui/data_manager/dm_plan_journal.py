@@ -0,0 +1,164 @@
+# gui/data_manager/dm_plan_journal.py
+# NEU (Regel 2 & 4): Undo/Redo-Journal für Planänderungen
+#
+# Jede Planänderung (Einzelzelle, Generator-Lauf, Monat löschen) wird als
+# Eintrag mit (user_id, datum, alt, neu)-Tupeln protokolliert. Massen-
+# operationen bilden EINEN Eintrag. Rückgängig/Wiederholen erzeugt daraus
+# eine PlanDiff, die in einem Schritt gespeichert (save_plan_diff_to_db) und
+# per ShiftPlanDataManager.apply_plan_diff in die Caches eingespielt wird.
+
+import time
+
+from gui.generator.generator_diff import PlanDiff
+from utils.instrumentation import get_logger
+
+_log = get_logger("plan_journal")
+
+# Maximale Anzahl an Rückgängig-Schritten (ältere Einträge verfallen)
+MAX_JOURNAL_ENTRIES = 50
+
+
+class JournalEntry:
+    """
+    Ein Rückgängig-Schritt.
+        changes: [(user_id_int, date_str, old_shift, new_shift)]  (None = keine Schicht)
+    """
+
+    def __init__(self, label, year, month, changes):
+        self.label = label
+        self.year = year
+        self.month = month
+        self.changes = changes
+        self.created_at = time.time()
+
+    def forward_diff(self):
+        """ PlanDiff zum (erneuten) Anwenden der Änderung (Wiederholen). """
+        return PlanDiff.from_changes(self.year, self.month, self.changes)
+
+    def inverse_diff(self):
+        """ PlanDiff zum Zurücknehmen der Änderung (Rückgängig). """
+        inverse = [(user_id, date_str, new_shift, old_shift)
+                   for user_id, date_str, old_shift, new_shift in reversed(self.changes)]
+        return PlanDiff.from_changes(self.year, self.month, inverse)
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __repr__(self):
+        return f"<JournalEntry '{self.label}' {self.year}-{self.month:02d}: {len(self.changes)} Zellen>"
+
+
+class PlanJournal:
+    """
+    In-Memory-Operationslog mit mehrstufigem Rückgängig/Wiederholen.
+    Wird ausschließlich im Haupt-Thread (Tkinter) benutzt.
+    """
+
+    def __init__(self, max_entries=MAX_JOURNAL_ENTRIES):
+        self.max_entries = max_entries
+        self._undo_stack = []
+        self._redo_stack = []
+        # Einträge, deren (optimistisches) Speichern noch läuft; sie dürfen nicht
+        # zurückgenommen werden, sonst könnte die Gegen-Diff VOR ihnen geschrieben werden
+        self._pending_saves = set()
+
+    # --- Protokollieren ---
+
+    def record(self, label, year, month, changes):
+        """
+        Protokolliert eine (Massen-)Änderung als EINEN Eintrag.
+        Leere Änderungen werden ignoriert. Eine neue Änderung verwirft den Redo-Stapel.
+        Gibt den Eintrag zurück (oder None).
+        """
+        changes = [(int(user_id), date_str, old_shift or None, new_shift or None)
+                   for user_id, date_str, old_shift, new_shift in changes
+                   if (old_shift or None) != (new_shift or None)]
+        if not changes:
+            return None
+
+        entry = JournalEntry(label, year, month, changes)
+        self._undo_stack.append(entry)
+        if len(self._undo_stack) > self.max_entries:
+            del self._undo_stack[0]
+        self._redo_stack.clear()
+        _log.debug("Protokolliert: %s", entry)
+        return entry
+
+    def record_change(self, user_id, date_str, old_shift, new_shift, label=None):
+        """ Protokolliert eine einzelne Zellenänderung ('YYYY-MM-DD'). """
+        year, month = int(date_str[:4]), int(date_str[5:7])
+        label = label or f"Schicht {date_str}: '{old_shift or 'FREI'}' -> '{new_shift or 'FREI'}'"
+        return self.record(label, year, month, [(user_id, date_str, old_shift, new_shift)])
+
+    def record_diff(self, label, plan_diff):
+        """ Protokolliert eine PlanDiff (z.B. Generator-Lauf) als einen Eintrag. """
+        return self.record(label, plan_diff.year, plan_diff.month, list(plan_diff.iter_changes()))
+
+    def forget(self, entry):
+        """ Entfernt einen Eintrag (z.B. wenn das Speichern fehlgeschlagen ist). """
+        self._pending_saves.discard(entry)
+        for stack in (self._undo_stack, self._redo_stack):
+            if entry in stack:
+                stack.remove(entry)
+
+    def clear(self):
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._pending_saves.clear()
+
+    # --- Ausstehende Speicherungen ---
+
+    def mark_pending(self, entry):
+        """ Merkt einen bereits protokollierten Eintrag, dessen Speichern noch läuft. """
+        if entry is not None:
+            self._pending_saves.add(entry)
+
+    def mark_saved(self, entry):
+        """ Das Speichern des Eintrags ist abgeschlossen (erfolgreich oder per forget entfernt). """
+        self._pending_saves.discard(entry)
+
+    def is_pending(self, entry):
+        return entry in self._pending_saves
+
+    # --- Rückgängig / Wiederholen ---
+
+    def can_undo(self):
+        return bool(self._undo_stack)
+
+    def can_redo(self):
+        return bool(self._redo_stack)
+
+    def peek_undo(self):
+        return self._undo_stack[-1] if self._undo_stack else None
+
+    def peek_redo(self):
+        return self._redo_stack[-1] if self._redo_stack else None
+
+    def pop_undo(self):
+        """
+        Nimmt den letzten Eintrag vom Undo-Stapel und legt ihn auf den Redo-Stapel.
+        Gibt None zurück, wenn der Stapel leer ist oder der Eintrag noch gespeichert wird.
+        """
+        if not self._undo_stack or self._undo_stack[-1] in self._pending_saves:
+            return None
+        entry = self._undo_stack.pop()
+        self._redo_stack.append(entry)
+        return entry
+
+    def pop_redo(self):
+        """
+        Nimmt den letzten Eintrag vom Redo-Stapel und legt ihn zurück auf den Undo-Stapel.
+        Gibt None zurück, wenn der Stapel leer ist oder der Eintrag noch gespeichert wird.
+        """
+        if not self._redo_stack or self._redo_stack[-1] in self._pending_saves:
+            return None
+        entry = self._redo_stack.pop()
+        self._undo_stack.append(entry)
+        return entry
+
+    def revert_pop(self, entry, was_undo):
+        """ Macht pop_undo/pop_redo rückgängig (wenn das Anwenden fehlgeschlagen ist). """
+        source, target = (self._redo_stack, self._undo_stack) if was_undo else (self._undo_stack, self._redo_stack)
+        if entry in source:
+            source.remove(entry)
+            target.append(entry)
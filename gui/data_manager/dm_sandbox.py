@@ -0,0 +1,65 @@
+# gui/data_manager/dm_sandbox.py
+# NEU (Regel 2 & 4): Testmodus ("Was wäre wenn") für den geladenen Monat
+#
+# Admins probieren oft eine Besetzung aus, sehen sich Stunden und Konflikte
+# an und nehmen sie wieder zurück. Bisher war jeder Versuch ein echter
+# DB-Schreibvorgang. Im Testmodus laufen Änderungen (Einzelzellen,
+# Generator-Läufe) wie gewohnt über die In-Memory-Pfade des DataManagers
+# (Konflikte, Stunden, Tageszählungen inkrementell), aber ohne DB-Zugriff.
+#
+# Copy-on-write: Die Sandbox kopiert keinen Monat, sondern merkt sich beim
+# ERSTEN Schreiben einer Zelle deren ursprünglichen Wert. Speicher und
+# Aufwand für Übernehmen/Verwerfen sind damit O(Änderungen):
+#   - Übernehmen: PlanDiff (ursprünglich -> aktuell), EINE Transaktion
+#   - Verwerfen:  PlanDiff (aktuell -> ursprünglich), nur In-Memory eingespielt
+# Einzige Kopie: der P5-Cache-Eintrag des Monats (gespeicherter Stand für
+# andere Leser, siehe ShiftPlanDataManager.begin_sandbox).
+
+import time
+
+from gui.generator.generator_diff import PlanDiff
+
+
+class PlanSandbox:
+    """
+    Overlay über dem aktiven Monat des DataManagers.
+        originals: {(user_id_str, date_str): ursprünglicher Eintrag (None = frei)}
+    """
+
+    def __init__(self, year, month):
+        self.year = year
+        self.month = month
+        self.originals = {}
+        self.created_at = time.time()
+        self.committing = False  # Während des Speicherns keine weiteren Änderungen
+
+    def touch(self, user_id, date_str, current_shift):
+        """ Merkt sich den ursprünglichen Wert einer Zelle (nur beim ersten Schreiben). """
+        key = (str(user_id), date_str)
+        if key not in self.originals:
+            self.originals[key] = current_shift or None
+
+    def changes(self, shift_schedule_data):
+        """ [(user_id_int, date_str, ursprünglich, aktuell)] aller tatsächlich geänderten Zellen. """
+        result = []
+        for (user_id_str, date_str), original in self.originals.items():
+            current = shift_schedule_data.get(user_id_str, {}).get(date_str) or None
+            if current != original:
+                result.append((int(user_id_str), date_str, original, current))
+        return result
+
+    def change_count(self, shift_schedule_data):
+        return len(self.changes(shift_schedule_data))
+
+    def commit_diff(self, shift_schedule_data):
+        """ PlanDiff zum Speichern (ursprünglicher Stand -> Testmodus). """
+        return PlanDiff.from_changes(self.year, self.month, self.changes(shift_schedule_data))
+
+    def discard_diff(self, shift_schedule_data):
+        """ PlanDiff zum Zurücksetzen der Caches (Testmodus -> ursprünglicher Stand). """
+        return PlanDiff.from_changes(self.year, self.month,
+                                     [(user_id, date_str, current, original)
+                                      for user_id, date_str, original, current in self.changes(shift_schedule_data)])
+
+    def __repr__(self):
+        return f"<PlanSandbox {self.year}-{self.month:02d}: {len(self.originals)} Zellen berührt>"
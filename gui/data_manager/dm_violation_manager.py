@@ -1,9 +1,20 @@
 # gui/data_manager/dm_violation_manager.py
 # NEU: Ausgelagerte Logik für Konflikt- und Verletzungsprüfungen (Regel 4)
+#
+# KORREKTUR (Regel 2 & 4): Die Prüfungen (Ruhezeit N->T/6/QA/S, Hunde) laufen
+# über die gemeinsame Regel-Engine (gui/rule_engine.py) - dieselben Regeln
+# wie im Generator und im PlanningAssistant. Das MonthGrid wird pro
+# geladenem Monat einmal gebaut und bei Änderungen inkrementell gepflegt.
 
-from datetime import date, datetime, timedelta
-from collections import defaultdict
-import calendar
+import threading
+
+from ..rule_engine import (MonthGrid, RuleEngine, NIGHT_REST, DOG_OVERLAP, FREE_SHIFTS, shift_minutes,
+                           user_dogs_from, work_shift_indicators)
+
+# NEU (Regel 2): Leveled Logging + Zeitmessung statt unbedingter Prints
+from utils.instrumentation import get_logger, start_span
+
+_log = get_logger("violations")
 
 
 class ViolationManager:
@@ -22,6 +33,14 @@ class ViolationManager:
         # Set zur Nachverfolgung von Warnungen
         self._warned_missing_times = set()
 
+        # NEU (Regel 2): MonthGrid + Regel-Engine des geladenen Monats
+        # (Zugriff aus GUI- und Konflikt-Worker-Thread)
+        self._rules_lock = threading.RLock()
+        self._rules_signature = None
+        self.grid = None
+        self.engine = None
+        self.plan_rules = None  # Im Plan markierte Konflikte: Ruhezeit + Hunde
+
     def _get_app_shift_types(self):
         """Hilfsfunktion, um shift_types_data sicher vom Bootloader (app.app) oder der App (app) zu holen."""
         if hasattr(self.app, 'shift_types_data'):
@@ -36,18 +55,18 @@ class ViolationManager:
         Holt die *Arbeits*-Schicht für einen User an einem Datum.
         Greift auf die aktiven Caches des DataManagers zu.
         """
-        date_str = date_obj.strftime('%Y-%m-%d')
+        shift = self._get_raw_shift(user_id_str, date_obj)
+        return shift if shift is not None and shift not in FREE_SHIFTS else ""
 
-        # Greift auf die Caches des DM zu
+    def _get_raw_shift(self, user_id_str, date_obj):
+        """ Roh-Eintrag aus den Caches des DM (Monat, dann Vormonat, dann Folgemonat) oder None. """
+        date_str = date_obj.strftime('%Y-%m-%d')
         shift = self.dm.shift_schedule_data.get(user_id_str, {}).get(date_str)
         if shift is None:
             shift = self.dm._prev_month_shifts.get(user_id_str, {}).get(date_str)
         if shift is None:
             shift = self.dm.next_month_shifts.get(user_id_str, {}).get(date_str)
-        if shift is None:
-            shift = ""
-
-        return shift if shift not in ["", "FREI", None, "U", "X", "EU", "WF", "U?"] else ""
+        return shift
 
     def preprocess_shift_times(self):
         """
@@ -66,53 +85,57 @@ class ViolationManager:
             print("[WARNUNG] shift_types_data ist leer in _preprocess_shift_times.")
             return
 
-        print("[DM/Violation] Verarbeite Schichtzeiten vor...")
-        count = 0
-        for abbrev, data in shift_types_data.items():
-            start_time_str = data.get('start_time');
-            end_time_str = data.get('end_time')
-            if not start_time_str or not end_time_str: continue
-            try:
-                s_time = datetime.strptime(start_time_str, '%H:%M').time()
-                e_time = datetime.strptime(end_time_str, '%H:%M').time()
-                s_min = s_time.hour * 60 + s_time.minute
-                e_min = e_time.hour * 60 + e_time.minute
-                if e_min <= s_min: e_min += 24 * 60
-                self._preprocessed_shift_times[abbrev] = (s_min, e_min);
-                count += 1
-            except ValueError:
-                print(f"[WARNUNG] Ungültiges Zeitformat für Schicht '{abbrev}' in shift_types_data.")
-        print(f"[DM/Violation] {count} Schichtzeiten erfolgreich vorverarbeitet.")
-
-    def _check_time_overlap_optimized(self, shift1_abbrev, shift2_abbrev):
-        """ Prüft Zeitüberlppung mit vorverarbeiteten Zeiten (Cache). """
-        if shift1_abbrev in ['U', 'X', 'EU', 'WF', '', 'FREI'] or shift2_abbrev in ['U', 'X', 'EU', 'WF', '',
-                                                                                    'FREI']: return False
-
-        s1, e1 = self._preprocessed_shift_times.get(shift1_abbrev, (None, None))
-        s2, e2 = self._preprocessed_shift_times.get(shift2_abbrev, (None, None))
-
-        if s1 is None or s2 is None:
-            if s1 is None and shift1_abbrev not in self._warned_missing_times:
-                print(f"[WARNUNG] Zeit für Schicht '{shift1_abbrev}' fehlt im Cache (_check_time_overlap).")
-                self._warned_missing_times.add(shift1_abbrev)
-            if s2 is None and shift2_abbrev not in self._warned_missing_times:
-                print(f"[WARNUNG] Zeit für Schicht '{shift2_abbrev}' fehlt im Cache (_check_time_overlap).")
-                self._warned_missing_times.add(shift2_abbrev)
-            return False
-
-        # Standard-Überlappungsprüfung
-        return (s1 < e2) and (s2 < e1)
+        _log.debug("Verarbeite Schichtzeiten vor...")
+        # (Dict wird in-place gefüllt: Lade-Stages und Regel-Engine halten dieselbe Referenz)
+        self._preprocessed_shift_times.update(shift_minutes(shift_types_data))
+        _log.debug("%s Schichtzeiten erfolgreich vorverarbeitet.", len(self._preprocessed_shift_times))
+
+    # --- NEU (Regel 2 & 4): Regel-Engine des geladenen Monats ---
+
+    def _user_names(self):
+        user_data_map = getattr(self.dm, 'user_data_map', None) or {}
+        return {str(user_id): user.get('username') for user_id, user in user_data_map.items() if user.get('username')}
+
+    def _rules_for(self, year=None, month=None, rebuild=False):
+        """
+        MonthGrid + Regel-Engine für die aktiven Caches des DM. Wird neu gebaut,
+        wenn ein anderer Monat (oder neu geladene Caches) aktiv ist: der DM erhöht
+        _cache_generation bei jedem Austausch der aktiven Caches (_apply_if_current).
+        Aufrufer halten self._rules_lock.
+        """
+        year = year if year is not None else self.dm.year
+        month = month if month is not None else self.dm.month
+        # (Ladebühne/Generator-Ersatz ohne Zähler: Caches bleiben für ihre Lebensdauer gleich)
+        signature = (year, month, getattr(self.dm, '_cache_generation', 0))
+        if rebuild or signature != self._rules_signature or self.grid is None:
+            self.preprocess_shift_times()
+            self.grid = MonthGrid(year, month, self.dm.shift_schedule_data, self.dm._prev_month_shifts,
+                                  self.dm.next_month_shifts,
+                                  user_dogs=user_dogs_from(self.dm.cached_users_for_month),
+                                  work_indicators=work_shift_indicators(self._get_app_shift_types()))
+            self.engine = RuleEngine(self.grid, shift_times=self._preprocessed_shift_times,
+                                     user_names=self._user_names())
+            self.plan_rules = self.engine.compile(NIGHT_REST, DOG_OVERLAP)
+            self._rules_signature = signature
+        return self.grid, self.engine
+
+    def sync_shift(self, user_id, date_obj, new_shift):
+        """
+        Meldet eine Änderung an den Caches des DM an das MonthGrid (z.B. sofort
+        nach dem Schreiben in shift_schedule_data, damit der PlanningAssistant
+        nicht auf die Konflikt-Queue warten muss).
+        """
+        with self._rules_lock:
+            if self.grid is None or self._rules_signature[:2] != (self.dm.year, self.dm.month):
+                return  # Wird beim nächsten Zugriff ohnehin neu gebaut
+            self.grid.set_shift(str(user_id), self.grid.day_of(date_obj), new_shift)
 
     def update_violation_set(self, year, month):
         """
         Prüft den *gesamten* Monat auf Konflikte (Ruhezeit, Hunde)
         und füllt das violation_cells-Set im DataManager.
         """
-        print(f"[DM/Violation] Starte volle Konfliktprüfung für {year}-{month:02d}...")
-
-        # Stelle sicher, dass die Schichtzeiten geladen sind
-        self.preprocess_shift_times()
+        _log.debug("Starte volle Konfliktprüfung für %s-%02d...", year, month)
 
         self.dm.violation_cells.clear();
 
@@ -122,59 +145,18 @@ class ViolationManager:
             print("[WARNUNG] Benutzer-Cache leer in update_violation_set!");
             return
 
-        # 1. Ruhezeitkonflikte (N -> T/6 und NEUE REGEL: N -> QA/S)
-        for user in current_user_order:
-            user_id = user.get('id');
-            if user_id is None: continue;
-            user_id_str = str(user_id)
-
-            current_check_date = date(year, month, 1) - timedelta(days=1);
-            # Korrigierte Monatsende-Berechnung
-            days_in_month_for_loop = calendar.monthrange(year, month)[1]
-            end_check_date = date(year, month, days_in_month_for_loop)
-
-            while current_check_date <= end_check_date:
-                next_day_date = current_check_date + timedelta(days=1)
-
-                shift1 = self._get_shift_helper(user_id_str, current_check_date, year, month);
-                shift2 = self._get_shift_helper(user_id_str, next_day_date, year, month)
-
-                is_ruhezeit_violation = (shift1 == 'N.' and shift2 in ["T.", "6", "QA", "S"])
-
-                if is_ruhezeit_violation:
-                    if current_check_date.month == month and current_check_date.year == year:
-                        self.dm.violation_cells.add((user_id, current_check_date.day))
-                    if next_day_date.month == month and next_day_date.year == year:
-                        self.dm.violation_cells.add((user_id, next_day_date.day))
-
-                current_check_date += timedelta(days=1)
-
-        # 2. Hundekonflikte (zeitliche Überlappung am selben Tag)
-        days_in_month = calendar.monthrange(year, month)[1]
-        for day in range(1, days_in_month + 1):
-            current_date = date(year, month, day);
-            dog_schedule_today = defaultdict(list)
-            for user in current_user_order:
-                dog = user.get('diensthund')
-                if dog and dog != '---':
-                    user_id = user.get('id');
-                    if user_id is None: continue;
-                    user_id_str = str(user_id)
-                    shift = self._get_shift_helper(user_id_str, current_date, year, month)
-                    if shift:
-                        dog_schedule_today[dog].append({'id': user_id, 'shift': shift})
-
-            for dog, assignments in dog_schedule_today.items():
-                if len(assignments) > 1:
-                    for i in range(len(assignments)):
-                        for j in range(i + 1, len(assignments)):
-                            u1 = assignments[i];
-                            u2 = assignments[j]
-                            if self._check_time_overlap_optimized(u1['shift'], u2['shift']):
-                                self.dm.violation_cells.add((u1['id'], day));
-                                self.dm.violation_cells.add((u2['id'], day))
-
-        print(f"[DM/Violation] Volle Konfliktprüfung abgeschlossen. Konflikte: {len(self.dm.violation_cells)}")
+        with self._rules_lock:
+            # Volle Prüfung = frisches Grid (die Caches können sich außerhalb der Engine geändert haben)
+            grid, engine = self._rules_for(year, month, rebuild=True)
+            cells = engine.violation_cells(self.plan_rules)
+
+        # Nur angezeigte Benutzer, Zellen als (user_id, tag) wie im Renderer
+        user_ids = {str(user.get('id')): user.get('id') for user in current_user_order if user.get('id') is not None}
+        self.dm.violation_cells.update((user_ids[user_id_str], day) for user_id_str, day in cells
+                                       if user_id_str in user_ids)
+
+        _log.info("Volle Konfliktprüfung %s-%02d abgeschlossen. Konflikte: %s", year, month,
+                  len(self.dm.violation_cells))
 
     def update_violations_incrementally(self, user_id, date_obj, old_shift, new_shift):
         """Aktualisiert das violation_cells Set gezielt nach einer Schichtänderung und gibt betroffene Zellen zurück."""
@@ -182,131 +164,38 @@ class ViolationManager:
         # P5-Cache-Invalidierung (wird im DM selbst aufgerufen)
         # ...
 
-        print(f"[DM/Violation-Incr] Update für User {user_id} am {date_obj}: '{old_shift}' -> '{new_shift}'")
+        # KORREKTUR (Regel 2): Ausgaben nur auf DEBUG-Stufe, Dauer landet im Leistungsprotokoll
+        incr_span = start_span("violations.incremental")
+        debug = _log.debug_enabled
+        if debug: _log.debug("Update für User %s am %s: '%s' -> '%s'", user_id, date_obj, old_shift, new_shift)
         affected_cells = set()
-        day = date_obj.day;
-        year = date_obj.year;
-        month = date_obj.month
         user_id_str = str(user_id)
-
-        def add_violation(uid, d):
-            cell = (uid, d)
-            if cell not in self.dm.violation_cells:
-                print(f"    -> ADD V: U{uid}, D{d}")
-                self.dm.violation_cells.add(cell)
-                affected_cells.add(cell)
-
-        def remove_violation(uid, d):
-            cell = (uid, d)
-            if cell in self.dm.violation_cells:
-                print(f"    -> REMOVE V: U{uid}, D{d}")
-                self.dm.violation_cells.discard(cell)
-                affected_cells.add(cell)
-
-        # 1. Ruhezeitkonflikte
-        print("  Prüfe Ruhezeit...")
-        prev_day_obj = date_obj - timedelta(days=1);
-        next_day_obj = date_obj + timedelta(days=1)
-        prev_shift = self._get_shift_helper(user_id_str, prev_day_obj, year, month)
-        next_shift = self._get_shift_helper(user_id_str, next_day_obj, year, month)
-
-        # N. -> T/6/QA/S
-        is_old_shift_conflict = old_shift in ["T.", "6", "QA", "S"]
-        is_new_shift_conflict = new_shift in ["T.", "6", "QA", "S"]
-        is_next_shift_conflict = next_shift in ["T.", "6", "QA", "S"]
-
-        # a) Alte Konflikte entfernen
-        # Fall 1: Die geänderte Schicht war 'N.'
-        if old_shift == 'N.' and is_next_shift_conflict:
-            remove_violation(user_id, day)
-            if next_day_obj.month == month and next_day_obj.year == year:
-                remove_violation(user_id, day + 1)
-        # Fall 2: Die Schicht davor war 'N.' und die geänderte war ein Konflikt
-        if prev_shift == 'N.' and is_old_shift_conflict:
-            if prev_day_obj.month == month and prev_day_obj.year == year:
-                remove_violation(user_id, day - 1)
-            remove_violation(user_id, day)
-
-        # b) Neue Konflikte hinzufügen
-        # Fall 1: Die geänderte Schicht ist 'N.' und die nächste ist ein Konflikt
-        if new_shift == 'N.' and is_next_shift_conflict:
-            add_violation(user_id, day)
-            if next_day_obj.month == month and next_day_obj.year == year:
-                add_violation(user_id, day + 1)
-        # Fall 2: Die Schicht davor ist 'N.' und die geänderte ist ein Konflikt
-        if prev_shift == 'N.' and is_new_shift_conflict:
-            if prev_day_obj.month == month and prev_day_obj.year == year:
-                add_violation(user_id, day - 1)
-            add_violation(user_id, day)
-
-        # 2. Hundekonflikte
-        print("  Prüfe Hundekonflikt...")
-        user_data = next((u for u in self.dm.cached_users_for_month if u.get('id') == user_id), None)
-        dog = user_data.get('diensthund') if user_data and user_data.get('diensthund') != '---' else None
-        old_dog = user_data.get('diensthund') if user_data else None
-        if old_dog == '---': old_dog = None
-
-        involved_dogs = set()
-        if dog: involved_dogs.add(dog)
-        if old_dog and old_dog != dog: involved_dogs.add(old_dog)
-        if old_shift and not new_shift and old_dog: involved_dogs.add(old_dog)
-
-        # Finde alle Hunde, die an diesem Tag (potenziell) involviert waren oder sind
-        if not involved_dogs and (old_shift or new_shift):
-            for other_user in self.dm.cached_users_for_month:
-                other_dog = other_user.get('diensthund')
-                if other_dog and other_dog != '---':
-                    other_id = other_user.get('id')
-                    if other_id is None: continue
-                    # Prüfe, ob der andere User an diesem Tag *jetzt* eine Schicht hat
-                    other_shift_exists = self._get_shift_helper(str(other_id), date_obj, year, month)
-                    if other_shift_exists:
-                        involved_dogs.add(other_dog)
-                    # Prüfe, ob der *geänderte* User (der die Schleife ausgelöst hat) diesen Hund hat
-                    elif (other_id == user_id and dog == other_dog):
-                        involved_dogs.add(other_dog)
-
-        print(f"    -> Hunde zu prüfen für Tag {day}: {involved_dogs}")
-
-        for current_dog in involved_dogs:
-            assignments_today = []
-            for other_user in self.dm.cached_users_for_month:
-                if other_user.get('diensthund') == current_dog:
-                    other_user_id = other_user.get('id')
-                    if other_user_id is None: continue
-                    # WICHTIG: Nutze den *neuen* Wert für den aktuellen User
-                    current_shift_for_other = new_shift if other_user_id == user_id else self._get_shift_helper(
-                        str(other_user_id), date_obj, year, month)
-
-                    if current_shift_for_other:
-                        assignments_today.append({'id': other_user_id, 'shift': current_shift_for_other})
-
-            # Finde alle User (mit diesem Hund), die *vorher* oder *nachher* betroffen sind/waren
-            involved_user_ids_now = {a['id'] for a in assignments_today}
-            involved_user_ids_before = set(involved_user_ids_now)
-
-            if old_shift and not new_shift and user_id not in involved_user_ids_now and old_dog == current_dog:
-                involved_user_ids_before.add(user_id)
-
-            all_potentially_involved = involved_user_ids_now.union(involved_user_ids_before)
-
-            print(
-                f"    Hund '{current_dog}' T{day}. Beteiligte (Vorher/Nachher): {all_potentially_involved}. Aktuelle Assignments: {assignments_today}")
-
-            print(f"    -> Entferne alte Konflikte für Hund '{current_dog}' T{day}...")
-            for uid_involved in all_potentially_involved:
-                remove_violation(uid_involved, day)
-
-            print(f"    -> Prüfe neue Konflikte für Hund '{current_dog}' T{day}...")
-            if len(assignments_today) > 1:
-                for i in range(len(assignments_today)):
-                    for j in range(i + 1, len(assignments_today)):
-                        u1 = assignments_today[i];
-                        u2 = assignments_today[j]
-                        if self._check_time_overlap_optimized(u1['shift'], u2['shift']):
-                            print(f"      -> Konflikt: {u1['id']}({u1['shift']}) vs {u2['id']}({u2['shift']})")
-                            add_violation(u1['id'], day);
-                            add_violation(u2['id'], day)
-
-        print(f"[DM/Violation-Incr] Update abgeschlossen. Betroffene Zellen: {affected_cells}")
-        return affected_cells
\ No newline at end of file
+        user_ids = {str(user.get('id')): user.get('id') for user in self.dm.cached_users_for_month
+                    if user.get('id') is not None}
+        user_ids.setdefault(user_id_str, user_id)
+
+        with self._rules_lock:
+            grid, engine = self._rules_for()
+            day = grid.day_of(date_obj)
+            # Stand aus dem Cache übernehmen (bei gebündelten Änderungen ist das der neueste Wert)
+            grid.set_shift(user_id_str, day, self._get_raw_shift(user_id_str, date_obj))
+
+            # Ruhezeit (Vor-/Folgetag) und Hunde (alle Halter des Hundes am selben Tag)
+            for cell_user_id_str, cell_day in engine.cells_affected_by(self.plan_rules, user_id_str, day):
+                cell_user_id = user_ids.get(cell_user_id_str)
+                if cell_user_id is None:
+                    continue
+                cell = (cell_user_id, cell_day)
+                if engine.cell_in_violation(self.plan_rules, cell_user_id_str, cell_day):
+                    if cell not in self.dm.violation_cells:
+                        if debug: _log.debug("    -> ADD V: U%s, D%s", cell_user_id, cell_day)
+                        self.dm.violation_cells.add(cell)
+                        affected_cells.add(cell)
+                elif cell in self.dm.violation_cells:
+                    if debug: _log.debug("    -> REMOVE V: U%s, D%s", cell_user_id, cell_day)
+                    self.dm.violation_cells.discard(cell)
+                    affected_cells.add(cell)
+
+        if debug: _log.debug("Update abgeschlossen. Betroffene Zellen: %s", affected_cells)
+        incr_span.finish(cells=len(affected_cells))
+        return affected_cells
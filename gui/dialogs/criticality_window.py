@@ -0,0 +1,94 @@
+# gui/dialogs/criticality_window.py
+# NEU: Engpass-Vorschau über mehrere Monate aus dem Engpass-Index (Regel 2)
+import tkinter as tk
+from tkinter import ttk
+
+from gui.criticality_index import schedule_update
+
+WEEKDAY_NAMES = ("Mo", "Di", "Mi", "Do", "Fr", "Sa", "So")
+
+
+class CriticalityWindow(tk.Toplevel):
+    """
+    Listet Tage/Schichten im Horizont des Engpass-Index, an denen die Zahl der
+    verfügbaren Mitarbeiter den Bedarf höchstens um den Puffer übersteigt.
+    Rot: weniger verfügbar als benötigt, Gelb: kein Puffer.
+    """
+
+    BUFFER = 1  # Wie die Kritikalität im Generator (verfügbar <= benötigt + 1)
+
+    def __init__(self, master, criticality_index):
+        super().__init__(master)
+        self.index = criticality_index
+        self.title("Engpass-Vorschau")
+        self.geometry("640x560")
+        self.transient(master)
+
+        main_frame = ttk.Frame(self, padding="15")
+        main_frame.pack(fill="both", expand=True)
+
+        self.info_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.info_var, justify="left").pack(anchor="w", pady=(0, 10))
+
+        frame = ttk.Frame(main_frame)
+        columns = (("date", "Datum", 90, "center"), ("weekday", "Tag", 50, "center"),
+                   ("shift", "Schicht", 70, "center"), ("required", "Bedarf", 70, "e"),
+                   ("available", "Verfügbar", 80, "e"), ("slack", "Puffer", 70, "e"))
+        self.tree = ttk.Treeview(frame, columns=[c[0] for c in columns], show="headings")
+        for key, text, width, anchor in columns:
+            self.tree.heading(key, text=text)
+            self.tree.column(key, width=width, anchor=anchor)
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        vsb.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        frame.pack(fill="both", expand=True)
+        self.tree.tag_configure("shortage", background="#F8D7DA")
+        self.tree.tag_configure("tight", background="#FFF3CD")
+
+        button_bar = ttk.Frame(main_frame)
+        button_bar.pack(fill="x", pady=(10, 0))
+        button_bar.columnconfigure((0, 1, 2), weight=1)
+        ttk.Button(button_bar, text="Aktualisieren", command=self.refresh).grid(row=0, column=0, sticky="ew", padx=2)
+        self.rebuild_button = ttk.Button(button_bar, text="Neu aufbauen", command=self.rebuild)
+        self.rebuild_button.grid(row=0, column=1, sticky="ew", padx=2)
+        ttk.Button(button_bar, text="Schließen", command=self.destroy).grid(row=0, column=2, sticky="ew", padx=2)
+
+        self.refresh()
+
+    def refresh(self):
+        """ Liest die Engpässe aus dem Index (Bedarf vorher neu berechnet, kein DB-Zugriff). """
+        self.tree.delete(*self.tree.get_children())
+        if not self.index.ready:
+            self.info_var.set("Der Engpass-Index ist noch nicht aufgebaut.\n"
+                              "Er wird beim Start im Hintergrund erstellt oder über 'Neu aufbauen'.")
+            return
+        self.index.refresh_demand()
+        rows = self.index.bottlenecks(buffer=self.BUFFER)
+        start, end = self.index._horizon_from(self.index.start, self.index.months)
+        built_at = self.index.built_at.strftime('%d.%m.%Y %H:%M') if self.index.built_at else "-"
+        shortages = sum(1 for row in rows if row['slack'] < 0)
+        self.info_var.set(f"Zeitraum: {start:%d.%m.%Y} bis {end:%d.%m.%Y} (Stand: {built_at})\n"
+                          f"{len(rows)} knappe Schicht(en), davon {shortages} unterbesetzt "
+                          f"(Urlaub, genehmigte Wünsche und Ausschlüsse berücksichtigt).")
+        for row in rows:
+            tags = ("shortage",) if row['slack'] < 0 else ("tight",) if row['slack'] == 0 else ()
+            self.tree.insert("", "end", values=(
+                row['date'].strftime('%d.%m.%Y'), WEEKDAY_NAMES[row['date'].weekday()], row['shift'],
+                row['required'], row['available'], f"{row['slack']:+d}"), tags=tags)
+
+    def rebuild(self):
+        """ Baut den Index im Hintergrund vollständig neu auf (DB). """
+        self.rebuild_button.config(state="disabled")
+        self.info_var.set("Engpass-Index wird neu aufgebaut...")
+
+        # Wie das Nachführen als Vorlade-Aufgabe im ThreadManager (Schlüssel "criticality")
+        schedule_update(self.master, self.index, callback=self._on_rebuilt, rebuild=True)
+
+    def _on_rebuilt(self, result=None, error=None):
+        if error is not None:
+            print(f"[FEHLER] Engpass-Index konnte nicht aufgebaut werden: {error}")
+        if not self.winfo_exists():
+            return
+        self.rebuild_button.config(state="normal")
+        self.refresh()
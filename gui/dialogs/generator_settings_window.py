@@ -4,6 +4,7 @@ from tkinter import ttk, simpledialog, messagebox
 import traceback
 from collections import defaultdict
 from database.db_users import get_ordered_users_for_schedule
+from ..criticality_index import notify_preferences_changed  # NEU (Regel 2): Engpass-Index nachführen
 
 # NEU: Aufgeteilte Importe für die Tabs
 from .settings_tabs.general_rules_tab import GeneralRulesTab
@@ -54,6 +55,9 @@ class GeneratorSettingsWindow(simpledialog.Dialog):
         self.wunschfrei_respect_level_var = tk.IntVar(value=self.config.get('wunschfrei_respect_level', 75))
         self.generator_fill_rounds_var = tk.IntVar(value=self.config.get('generator_fill_rounds', 3))
         self.generator_fill_rounds_label_var = tk.StringVar()  # Für das Label
+        # NEU (Regel 2): Optionales Solver-Backend (OR-Tools CP-SAT)
+        self.use_solver_backend_var = tk.BooleanVar(value=self.config.get('use_solver_backend', False))
+        self.solver_time_limit_var = tk.IntVar(value=self.config.get('solver_time_limit_s', 10))
 
         # 2. Tab: Scoring & Gewichtung
         self.fairness_threshold_hours_var = tk.DoubleVar(value=self.config.get('fairness_threshold_hours', 10.0))
@@ -207,6 +211,8 @@ class GeneratorSettingsWindow(simpledialog.Dialog):
             if not (0 <= val_wunschfrei <= 100): raise ValueError("Wunschfrei-Prio muss 0-100 sein.")
             val_rounds = int(self.generator_fill_rounds_var.get())
             if not (0 <= val_rounds <= 3): raise ValueError("Auffüllrunden müssen 0-3 sein.")
+            val_solver_limit = int(self.solver_time_limit_var.get())
+            if not (1 <= val_solver_limit <= 600): raise ValueError("Solver-Zeitlimit muss 1-600 Sekunden sein.")
 
             # Scoring-Werte
             val_fair_thresh = float(self.fairness_threshold_hours_var.get())
@@ -241,6 +247,8 @@ class GeneratorSettingsWindow(simpledialog.Dialog):
             'ensure_one_weekend_off': self.ensure_one_weekend_off_var.get(),
             'wunschfrei_respect_level': int(self.wunschfrei_respect_level_var.get()),
             'generator_fill_rounds': int(self.generator_fill_rounds_var.get()),
+            'use_solver_backend': self.use_solver_backend_var.get(),
+            'solver_time_limit_s': int(self.solver_time_limit_var.get()),
             'fairness_threshold_hours': float(self.fairness_threshold_hours_var.get()),
             'min_hours_fairness_threshold': float(self.min_hours_fairness_threshold_var.get()),
             'min_hours_score_multiplier': float(self.min_hours_score_multiplier_var.get()),
@@ -257,6 +265,8 @@ class GeneratorSettingsWindow(simpledialog.Dialog):
             try:
                 success = self.data_manager.save_generator_config(new_config)
                 if success:
+                    # Ausschlüsse (Schicht/Wochentag) wirken auf den Engpass-Index
+                    notify_preferences_changed(self)
                     messagebox.showinfo("Speichern erfolgreich", "Generator-Einstellungen aktualisiert.", parent=self)
                 else:
                     messagebox.showwarning("Speicherfehler", "Fehler beim Speichern der Konfiguration.", parent=self)
@@ -0,0 +1,255 @@
+# gui/dialogs/performance_log_window.py
+# NEU: Anzeige/Export der gemessenen Latenzen (Leistungsprotokoll, Regel 2)
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from datetime import datetime
+
+from utils.instrumentation import Instrumentation
+from database.db_query_profiler import QueryProfiler
+from database.db_connection import get_pool_stats
+from utils.threading_utils import PRIORITY_INTERACTIVE
+from .progress_dialog import ProgressDialog
+
+
+class PerformanceLogWindow(tk.Toplevel):
+    """
+    Reiter "Abläufe": Zeitmessungen (span) aus dem Ringpuffer - Statistik pro
+    Abschnitt und die letzten Einzelmessungen, Export als CSV; dazu die
+    Größe des P5-Monats-Caches.
+    Reiter "DB-Abfragen": Kennzahlen der Verbindungspools und Top-N-Bericht
+    des QueryProfilers (Statements, Aufrufer, Pool-Wartezeit), als Textdatei
+    speicherbar.
+    """
+
+    RECENT_LIMIT = 300  # Anzahl der angezeigten Einzelmessungen
+    QUERY_TOP_N = 50
+
+    def __init__(self, master, data_manager=None):
+        super().__init__(master)
+        self.data_manager = data_manager
+        self.title("Leistungsprotokoll")
+        self.geometry("900x640")
+        self.transient(master)
+
+        main_frame = ttk.Frame(self, padding="15")
+        main_frame.pack(fill="both", expand=True)
+
+        notebook = ttk.Notebook(main_frame)
+        notebook.pack(fill="both", expand=True)
+
+        spans_tab = ttk.Frame(notebook, padding=10)
+        queries_tab = ttk.Frame(notebook, padding=10)
+        notebook.add(spans_tab, text="Abläufe")
+        notebook.add(queries_tab, text="DB-Abfragen")
+
+        self._create_spans_tab(spans_tab)
+        self._create_queries_tab(queries_tab)
+
+        ttk.Button(main_frame, text="Schließen", command=self.destroy).pack(anchor="e", pady=(10, 0))
+
+        self.refresh()
+        self.refresh_queries()
+
+    @staticmethod
+    def _create_tree(parent, columns, height=None):
+        """ Treeview mit Spalten [(key, überschrift, breite, anchor)] und Scrollbar. """
+        frame = ttk.Frame(parent)
+        tree = ttk.Treeview(frame, columns=[c[0] for c in columns], show="headings",
+                            **({'height': height} if height else {}))
+        for key, text, width, anchor in columns:
+            tree.heading(key, text=text)
+            tree.column(key, width=width, anchor=anchor, stretch=(anchor == "w"))
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=vsb.set)
+        vsb.pack(side="right", fill="y")
+        tree.pack(side="left", fill="both", expand=True)
+        return frame, tree
+
+    # --- Reiter "Abläufe" ---
+
+    def _create_spans_tab(self, parent):
+        info_text = "Gemessene Dauer der Abläufe in dieser Sitzung (Laden, Konfliktprüfung, Rendern, Generator)."
+        if not Instrumentation.spans_enabled:
+            info_text += "\nZeitmessung ist deaktiviert (DHF_SPANS=0)."
+        ttk.Label(parent, text=info_text).pack(anchor="w", pady=(0, 10))
+        self.month_cache_var = tk.StringVar()
+        ttk.Label(parent, textvariable=self.month_cache_var).pack(anchor="w", pady=(0, 10))
+
+        frame, self.summary_tree = self._create_tree(parent, (
+            ("name", "Abschnitt", 220, "w"), ("count", "Anzahl", 70, "e"), ("avg", "Ø ms", 80, "e"),
+            ("p50", "Median ms", 90, "e"), ("p95", "P95 ms", 80, "e"), ("max", "Max ms", 80, "e"),
+            ("last", "Letzte ms", 90, "e")), height=10)
+        frame.pack(fill="x", expand=False)
+
+        ttk.Label(parent, text=f"Letzte Messungen (max. {self.RECENT_LIMIT}):").pack(anchor="w", pady=(10, 5))
+        frame, self.recent_tree = self._create_tree(parent, (
+            ("time", "Zeit", 90, "center"), ("name", "Abschnitt", 180, "center"), ("duration", "ms", 70, "e"),
+            ("thread", "Thread", 110, "center"), ("details", "Details", 300, "w")))
+        frame.pack(fill="both", expand=True)
+
+        button_bar = ttk.Frame(parent)
+        button_bar.pack(fill="x", pady=(10, 0))
+        button_bar.columnconfigure((0, 1, 2), weight=1)
+        ttk.Button(button_bar, text="Aktualisieren", command=self.refresh).grid(row=0, column=0, sticky="ew", padx=2)
+        ttk.Button(button_bar, text="Als CSV exportieren...", command=self.export_csv).grid(row=0, column=1,
+                                                                                            sticky="ew", padx=2)
+        ttk.Button(button_bar, text="Leeren", command=self.clear).grid(row=0, column=2, sticky="ew", padx=2)
+
+    def refresh(self):
+        """ Liest den Ringpuffer (und die Monats-Cache-Kennzahlen) neu ein. """
+        self.month_cache_var.set(self._format_month_cache_stats())
+
+        self.summary_tree.delete(*self.summary_tree.get_children())
+        for row in Instrumentation.summarize_spans():
+            self.summary_tree.insert("", "end", values=(
+                row['name'], row['count'], f"{row['avg_ms']:.1f}", f"{row['p50_ms']:.1f}",
+                f"{row['p95_ms']:.1f}", f"{row['max_ms']:.1f}", f"{row['last_ms']:.1f}"))
+
+        self.recent_tree.delete(*self.recent_tree.get_children())
+        recent_spans = Instrumentation.get_spans()[-self.RECENT_LIMIT:]
+        for timestamp, name, duration_ms, thread_name, attrs in reversed(recent_spans):
+            self.recent_tree.insert("", "end", values=(
+                datetime.fromtimestamp(timestamp).strftime("%H:%M:%S"), name, f"{duration_ms:.1f}", thread_name,
+                ", ".join(f"{k}={v}" for k, v in attrs.items())))
+
+    def _format_month_cache_stats(self):
+        month_cache = getattr(self.data_manager, 'monthly_caches', None)
+        if month_cache is None or not hasattr(month_cache, 'get_stats'):
+            return "Monats-Cache (P5): nicht verfügbar."
+        stats = month_cache.get_stats()
+        months = ", ".join(f"{name} ({size / 1048576:.1f} MB)" for name, size in sorted(stats['months'].items()))
+        return (f"Monats-Cache (P5): {stats['entries']}/{stats['max_entries']} Monate, "
+                f"~{stats['bytes'] / 1048576:.1f} von {stats['max_bytes'] / 1048576:.0f} MB, "
+                f"Treffer {stats['hits']}, Fehlschläge {stats['misses']}, "
+                f"verdrängt {stats['evictions']}x (~{stats['evicted_bytes'] / 1048576:.1f} MB)\n"
+                f"Monate: {months or '-'}")
+
+    def export_csv(self):
+        file_path = filedialog.asksaveasfilename(
+            parent=self, title="Leistungsprotokoll exportieren", defaultextension=".csv",
+            initialfile=f"leistungsprotokoll_{datetime.now():%Y%m%d_%H%M}.csv",
+            filetypes=[("CSV-Dateien", "*.csv"), ("Alle Dateien", "*.*")])
+        if not file_path:
+            return
+        # NEU (Regel 2): Export im ThreadManager, Fortschritt über den gemeinsamen Kanal
+        dialog = ProgressDialog(self, "Leistungsprotokoll exportieren", "export_spans_csv",
+                                text="Exportiere Messungen...", cancellable=False)
+
+        def task():
+            try:
+                count, error = Instrumentation.export_spans_csv(file_path, dialog.reporter), None
+            except OSError as e:
+                count, error = 0, e
+            self.after(0, self._on_export_complete, dialog, file_path, count, error)
+
+        dialog.link_task(self.master.thread_manager.submit(task, priority=PRIORITY_INTERACTIVE),
+                         lambda: self._on_export_complete(dialog, file_path, 0, None))
+
+    def _on_export_complete(self, dialog, file_path, count, error):
+        dialog.close(success=error is None)
+        if error is None:
+            messagebox.showinfo("Export", f"{count} Messungen exportiert nach:\n{file_path}", parent=self)
+        else:
+            messagebox.showerror("Fehler", f"Export fehlgeschlagen:\n{error}", parent=self)
+
+    def clear(self):
+        if messagebox.askyesno("Leeren", "Alle bisherigen Messungen verwerfen?", parent=self):
+            Instrumentation.clear_spans()
+            self.refresh()
+
+    # --- Reiter "DB-Abfragen" ---
+
+    def _create_queries_tab(self, parent):
+        top_bar = ttk.Frame(parent)
+        top_bar.pack(fill="x", pady=(0, 10))
+        self.profiler_active_var = tk.BooleanVar(value=QueryProfiler.enabled)
+        ttk.Checkbutton(top_bar, text="Abfragen messen (gilt für neue Verbindungen)",
+                        variable=self.profiler_active_var, command=self._toggle_profiler).pack(side="left")
+        self.pool_info_var = tk.StringVar()
+        ttk.Label(top_bar, textvariable=self.pool_info_var).pack(side="right")
+
+        ttk.Label(parent, text="Verbindungspools (interaktiv / Hintergrund):").pack(anchor="w", pady=(0, 5))
+        frame, self.pool_tree = self._create_tree(parent, (
+            ("name", "Pool", 100, "w"), ("usage", "Benutzt/Offen/Max", 120, "center"),
+            ("waiting", "Wartend (max)", 100, "center"), ("checkouts", "Ausleihen", 80, "e"),
+            ("wait_avg", "Ø Warten ms", 90, "e"), ("wait_max", "max Warten ms", 100, "e"),
+            ("timeouts", "Timeouts", 70, "e"), ("validations", "Prüfungen", 75, "e"),
+            ("replaced", "Ersetzt", 65, "e")), height=2)
+        frame.pack(fill="x", expand=False, pady=(0, 10))
+        self.pool_tree.tag_configure("timeouts", background="#FFCDD2")
+
+        ttk.Label(parent, text=f"Top {self.QUERY_TOP_N} Statements (nach Gesamtzeit, "
+                               f"'N+1?' = viele Ausführungen auf einer Verbindung):").pack(anchor="w", pady=(0, 5))
+        frame, self.query_tree = self._create_tree(parent, (
+            ("count", "Anzahl", 65, "e"), ("total", "ges. ms", 80, "e"), ("max", "max ms", 70, "e"),
+            ("rows", "Zeilen", 70, "e"), ("per_conn", "/Verb.", 60, "e"), ("caller", "Aufrufer", 200, "center"),
+            ("template", "Vorlage", 380, "w")))
+        frame.pack(fill="both", expand=True)
+        self.query_tree.tag_configure("n_plus_one", background="#FFE0B2")
+
+        ttk.Label(parent, text="Aufrufer (nach Wartezeit auf den Pool):").pack(anchor="w", pady=(10, 5))
+        frame, self.caller_tree = self._create_tree(parent, (
+            ("caller", "Aufrufer", 300, "w"), ("connections", "Verbindungen", 100, "e"),
+            ("wait_total", "Warten ges. ms", 120, "e"), ("wait_max", "Warten max ms", 120, "e")), height=6)
+        frame.pack(fill="x", expand=False)
+
+        button_bar = ttk.Frame(parent)
+        button_bar.pack(fill="x", pady=(10, 0))
+        button_bar.columnconfigure((0, 1, 2), weight=1)
+        ttk.Button(button_bar, text="Aktualisieren", command=self.refresh_queries).grid(row=0, column=0,
+                                                                                        sticky="ew", padx=2)
+        ttk.Button(button_bar, text="Bericht speichern...", command=self.save_query_report).grid(row=0, column=1,
+                                                                                                sticky="ew", padx=2)
+        ttk.Button(button_bar, text="Zurücksetzen", command=self.reset_queries).grid(row=0, column=2,
+                                                                                     sticky="ew", padx=2)
+
+    def _toggle_profiler(self):
+        if self.profiler_active_var.get():
+            QueryProfiler.enable()
+        else:
+            QueryProfiler.disable()
+        self.refresh_queries()
+
+    def refresh_queries(self):
+        pool = QueryProfiler.pool_summary()
+        self.pool_info_var.set(f"Pool: max. gleichzeitig {pool['max_checked_out']}, "
+                               f"erschöpft {pool['pool_exhausted']}x")
+
+        self.pool_tree.delete(*self.pool_tree.get_children())
+        for stats in get_pool_stats():
+            self.pool_tree.insert("", "end", values=(
+                stats['name'], f"{stats['in_use']}/{stats['open']}/{stats['size']}",
+                f"{stats['waiting']} ({stats['max_waiting']})", stats['checkouts'], f"{stats['wait_avg_ms']:.1f}",
+                f"{stats['wait_max_ms']:.1f}", stats['timeouts'], stats['validations'], stats['replaced']),
+                                  tags=("timeouts",) if stats['timeouts'] else ())
+
+        self.query_tree.delete(*self.query_tree.get_children())
+        for row in QueryProfiler.top_statements(self.QUERY_TOP_N):
+            caller = row['caller'] + (" [N+1?]" if row['n_plus_one'] else "")
+            self.query_tree.insert("", "end", values=(
+                row['count'], f"{row['total_ms']:.1f}", f"{row['max_ms']:.1f}", row['rows'],
+                row['max_per_connection'], caller, row['template']),
+                                   tags=("n_plus_one",) if row['n_plus_one'] else ())
+
+        self.caller_tree.delete(*self.caller_tree.get_children())
+        for row in QueryProfiler.top_callers(self.QUERY_TOP_N):
+            self.caller_tree.insert("", "end", values=(
+                row['caller'], row['connections'], f"{row['wait_total_ms']:.1f}", f"{row['wait_max_ms']:.1f}"))
+
+    def save_query_report(self):
+        file_path = filedialog.asksaveasfilename(
+            parent=self, title="Abfrage-Bericht speichern", defaultextension=".txt",
+            initialfile=f"query_profile_{datetime.now():%Y%m%d_%H%M}.txt",
+            filetypes=[("Textdateien", "*.txt"), ("Alle Dateien", "*.*")])
+        if not file_path:
+            return
+        try:
+            QueryProfiler.dump_report(file_path, top_n=self.QUERY_TOP_N)
+            messagebox.showinfo("Export", f"Bericht gespeichert:\n{file_path}", parent=self)
+        except OSError as e:
+            messagebox.showerror("Fehler", f"Speichern fehlgeschlagen:\n{e}", parent=self)
+
+    def reset_queries(self):
+        if messagebox.askyesno("Zurücksetzen", "Alle bisherigen Abfrage-Messungen verwerfen?", parent=self):
+            QueryProfiler.reset()
+            self.refresh_queries()
@@ -0,0 +1,79 @@
+# gui/dialogs/progress_dialog.py
+# NEU (Regel 2): Kleines Fortschrittsfenster für lange Vorgänge außerhalb des
+# Schichtplan-Tabs (Urlaubsgenehmigung, Exporte). Angezeigt wird über den
+# gemeinsamen Fortschrittskanal (utils/progress.py).
+import tkinter as tk
+from tkinter import ttk
+
+from utils.progress import ProgressChannel
+
+
+class ProgressDialog(tk.Toplevel):
+    """
+    Fenster mit Text, Balken und (optional) Abbrechen-Knopf.
+    Der Worker meldet über dialog.reporter (thread-sicher) und fragt
+    dialog.reporter.cancelled ab; der Tk-Thread ruft am Ende close(success).
+    """
+
+    def __init__(self, parent, title, operation, text="Bitte warten...", cancellable=True, on_cancel=None):
+        super().__init__(parent)
+        self.title(title)
+        self.transient(parent)
+        self.resizable(False, False)
+
+        main_frame = ttk.Frame(self, padding="20")
+        main_frame.pack(expand=True, fill="both")
+        self.status_label = ttk.Label(main_frame, text=text, width=50)
+        self.status_label.pack(pady=(0, 10))
+        self.progress_bar = ttk.Progressbar(main_frame, orient='horizontal', length=320, mode='determinate',
+                                            maximum=100)
+        self.progress_bar.pack(pady=5)
+        self.cancel_button = None
+        if cancellable:
+            self.cancel_button = ttk.Button(main_frame, text="Abbrechen", command=self._on_cancel)
+            self.cancel_button.pack(pady=(10, 0))
+            self.protocol("WM_DELETE_WINDOW", self._on_cancel)
+        else:
+            self.protocol("WM_DELETE_WINDOW", lambda: None)  # Schließen erst nach Abschluss
+
+        # Fenster zentrieren
+        parent.update_idletasks()
+        x = parent.winfo_rootx() + (parent.winfo_width() - self.winfo_reqwidth()) / 2
+        y = parent.winfo_rooty() + (parent.winfo_height() - self.winfo_reqheight()) / 2
+        self.geometry(f"+{int(x)}+{int(y)}")
+        self.grab_set()
+
+        self.channel = ProgressChannel(self, operation, self._apply_update,
+                                       on_cancel=on_cancel if cancellable else None).start()
+        self.reporter = self.channel.reporter
+
+    def _apply_update(self, update):
+        if not self.winfo_exists():
+            return
+        self.progress_bar.config(value=update.percent)
+        self.status_label.config(text=update.display_text())
+
+    def _on_cancel(self):
+        self.channel.cancel()
+        if self.cancel_button is not None:
+            self.cancel_button.config(state="disabled")
+
+    def link_task(self, task, on_dropped):
+        """
+        (Tk-Thread) Verknüpft eine Aufgabe des ThreadManagers mit dem Abbrechen-Knopf
+        (reporter.link). Wird abgebrochen, bevor ein Worker sie übernommen hat, läuft
+        sie nie: dann ruft der Dialog 'on_dropped' auf, sonst meldet der Worker das Ende.
+        """
+        self.reporter.link(task)
+        if task is not None and self.cancel_button is not None:
+            self.channel.on_cancel = lambda: None if task.started else on_dropped()
+        return task
+
+    def close(self, success=True):
+        """ (Tk-Thread) Beendet den Kanal (Verlauf nur bei Erfolg) und schließt das Fenster. """
+        self.channel.finish(success)
+        try:
+            self.grab_release()
+        except tk.TclError:
+            pass
+        self.destroy()
@@ -126,6 +126,24 @@ class GeneralRulesTab(ttk.Frame):
             row=0, column=1, sticky="e", padx=(5, 0))
         self._update_rounds_label(self.dialog.generator_fill_rounds_var.get())  # Initiales Label setzen
 
+        row += 1
+        # NEU (Regel 2): Solver-Backend
+        ttk.Checkbutton(prio_frame, text="Plan mit Solver nachoptimieren (OR-Tools)",
+                        variable=self.dialog.use_solver_backend_var).grid(row=row, column=0, columnspan=2,
+                                                                          sticky="w", pady=5)
+        self._add_tooltip(prio_frame, row, 2,
+                          "Optional (benötigt 'pip install ortools'):\n"
+                          "Nach den Runden wird der Monat als Gesamtmodell gelöst\n"
+                          "(Greedy-Plan als Startlösung). Übernommen wird die Lösung nur,\n"
+                          "wenn sie mindestens so viele Lücken schließt wie der Greedy-Plan.")
+
+        row += 1
+        ttk.Label(prio_frame, text="Solver-Zeitlimit (Sekunden):").grid(row=row, column=0, columnspan=2,
+                                                                         sticky="w", pady=3)
+        ttk.Spinbox(prio_frame, from_=1, to=600, width=7,
+                    textvariable=self.dialog.solver_time_limit_var).grid(row=row, column=3, sticky="e", pady=3,
+                                                                          padx=5)
+
     def _add_tooltip(self, parent, row, col, text):
         """Helper zum Hinzufügen eines (?) Icons mit Tooltip."""
         info_label = ttk.Label(parent, text=" (?)", cursor="question_arrow", foreground="blue")
@@ -11,6 +11,8 @@ import io
 
 # --- NEU (Regel 1 & 2): Import der neuen DB-Funktion ---
 from database.db_dogs import add_dog, update_dog, get_dog_details
+# --- NEU (Regel 2): Vorschaubilder aus dem gemeinsamen LRU-Cache ---
+from .dog_image_cache import dog_thumbnail_cache
 
 
 class DogEditWindow(tk.Toplevel):
@@ -23,6 +25,8 @@ class DogEditWindow(tk.Toplevel):
         # --- NEU (Regel 1): BLOB-Daten-Container ---
         self.image_blob = None
         self.image_preview = None  # Referenz für Bild-Label
+        # NEU (Regel 2): Original-BLOB wird nur gespeichert, wenn das Bild geändert wurde
+        self.image_changed = False
 
         self.title(
             "Neuen Diensthund anlegen" if self.is_new else f"Diensthund bearbeiten: {self.dog_data.get('name', '')}")
@@ -106,22 +110,41 @@ class DogEditWindow(tk.Toplevel):
             threading.Thread(target=self._load_dog_image_threaded, daemon=True).start()
 
     def _load_dog_image_threaded(self):
-        """(NEU) Lädt das Bild im Hintergrund (Regel 2)."""
+        """(NEU) Lädt das Vorschaubild im Hintergrund (Regel 2)."""
         try:
             dog_id = self.dog_data['id']
-            # Ruft die neue DB-Funktion auf, die den BLOB holt
-            full_dog_data = get_dog_details(dog_id)
+            # --- KORREKTUR (Regel 2): Nur Vorschaubild (bzw. Cache-Treffer), kein Original-BLOB ---
+            full_dog_data = get_dog_details(dog_id, known_image_hash=dog_thumbnail_cache.known_hash(dog_id))
 
-            if full_dog_data and full_dog_data.get('image_blob'):
-                self.image_blob = full_dog_data['image_blob']
+            if full_dog_data and full_dog_data.get('has_image'):
+                image_hash = full_dog_data.get('image_hash')
+                thumb_image = (dog_thumbnail_cache.get(dog_id, image_hash)
+                               or dog_thumbnail_cache.put_bytes(dog_id, image_hash, full_dog_data.get('image_thumb')))
                 # UI-Update im Main-Thread
-                self.after(0, self._display_image)
+                self.after(0, self._display_thumbnail, thumb_image)
             else:
                 self.after(0, self.image_label.config, {"text": "Kein Bild vorhanden"})
         except Exception as e:
             print(f"Fehler beim Laden des Hundebilds: {e}")
             self.after(0, self.image_label.config, {"text": "Fehler beim Laden"})
 
+    def _display_thumbnail(self, thumb_image):
+        """(NEU) Zeigt das gespeicherte Vorschaubild an (solange das Bild nicht geändert wurde)."""
+        if self.image_changed:
+            return  # Benutzer hat inzwischen ein anderes Bild gewählt/entfernt
+        if thumb_image is None:
+            self.image_label.config(image=None, text="Keine Vorschau verfügbar")
+            return
+        try:
+            img = thumb_image.copy()
+            img.thumbnail((200, 200 * 4), Image.Resampling.LANCZOS)  # max 200px Breite
+            self.image_preview = ImageTk.PhotoImage(img)
+            self.image_label.config(image=self.image_preview, text="")
+        except Exception as e:
+            print(f"Fehler beim Anzeigen des Vorschaubilds: {e}")
+            self.image_label.config(image=None, text="Bild-Vorschau fehlgeschlagen")
+            self.image_preview = None
+
     def _display_image(self):
         """(NEU) Zeigt das Bild im self.image_blob im Label an."""
         if not self.image_blob:
@@ -164,6 +187,7 @@ class DogEditWindow(tk.Toplevel):
 
             with open(file_path, "rb") as f:
                 self.image_blob = f.read()
+            self.image_changed = True
 
             # Zeige Vorschau
             self._display_image()
@@ -175,6 +199,7 @@ class DogEditWindow(tk.Toplevel):
     def _remove_image(self):
         """(NEU) Entfernt das Bild (setzt BLOB auf None)."""
         self.image_blob = None
+        self.image_changed = True
         self._display_image()
         self.image_label.config(text="Bild entfernt")
 
@@ -186,7 +211,9 @@ class DogEditWindow(tk.Toplevel):
             updated_data[key] = date_obj.strftime('%Y-%m-%d') if date_obj else None
 
         # --- NEU (Regel 1): Bild-BLOB zu den Daten hinzufügen ---
-        updated_data['image_blob'] = self.image_blob
+        # KORREKTUR (Regel 2): Nur bei neuem Hund oder geändertem Bild (sonst bleibt das Bild in der DB unverändert)
+        if self.is_new or self.image_changed:
+            updated_data['image_blob'] = self.image_blob
         # --- ENDE NEU ---
 
         if not updated_data.get('name'):
@@ -0,0 +1,82 @@
+# gui/dog_image_cache.py
+# NEU: Lokaler LRU-Cache für dekodierte Hunde-Vorschaubilder (Regel 2)
+#
+# Schlüssel ist (dog_id, image_hash): Ändert sich das Bild, ändert sich der
+# Hash und der alte Eintrag wird nie wieder getroffen (verdrängt sich selbst).
+# Die DB-Abfrage bekommt den bekannten Hash mit und überträgt das
+# Vorschaubild dann gar nicht erst (siehe get_dog_details).
+
+import io
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+# Maximale Anzahl dekodierter Vorschaubilder im Speicher
+MAX_CACHED_THUMBNAILS = 64
+
+
+class DogThumbnailCache:
+    """
+    Thread-sicherer LRU-Cache: {(dog_id, image_hash): PIL.Image}.
+    Dekodieren (decode) passiert im Lade-Thread, das Umwandeln in ein
+    ImageTk.PhotoImage bleibt Aufgabe des Main-Threads.
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_THUMBNAILS):
+        self.max_entries = max_entries
+        self._images = OrderedDict()
+        self._hash_by_dog = {}  # {dog_id: image_hash} - zuletzt bekannter Hash
+        self._lock = threading.Lock()
+
+    def known_hash(self, dog_id):
+        """ Hash des zuletzt gecachten Bildes für den Hund (oder None). """
+        with self._lock:
+            return self._hash_by_dog.get(dog_id)
+
+    def get(self, dog_id, image_hash):
+        """ Gibt das dekodierte Bild zurück (oder None) und markiert es als zuletzt benutzt. """
+        if not image_hash:
+            return None
+        key = (dog_id, image_hash)
+        with self._lock:
+            img = self._images.get(key)
+            if img is not None:
+                self._images.move_to_end(key)
+            return img
+
+    def put_bytes(self, dog_id, image_hash, thumb_bytes):
+        """ Dekodiert die Vorschaubild-Bytes, legt sie ab und gibt das Bild zurück (oder None). """
+        if not image_hash or not thumb_bytes:
+            return None
+        img = Image.open(io.BytesIO(thumb_bytes))
+        img.load()  # Vollständig dekodieren (nicht erst im Main-Thread)
+
+        key = (dog_id, image_hash)
+        with self._lock:
+            old_hash = self._hash_by_dog.get(dog_id)
+            if old_hash and old_hash != image_hash:
+                self._images.pop((dog_id, old_hash), None)
+            self._images[key] = img
+            self._images.move_to_end(key)
+            self._hash_by_dog[dog_id] = image_hash
+            while len(self._images) > self.max_entries:
+                (old_dog_id, _), _ = self._images.popitem(last=False)
+                self._hash_by_dog.pop(old_dog_id, None)
+        return img
+
+    def invalidate(self, dog_id):
+        """ Entfernt alle Bilder eines Hundes (z.B. nach dem Löschen). """
+        with self._lock:
+            image_hash = self._hash_by_dog.pop(dog_id, None)
+            if image_hash:
+                self._images.pop((dog_id, image_hash), None)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._hash_by_dog.clear()
+
+
+# Globale Instanz (geteilt von Detailansicht und Edit-Fenster)
+dog_thumbnail_cache = DogThumbnailCache()
@@ -0,0 +1,290 @@
+# gui/generator/generator_benchmark.py
+# NEU (Regel 2): Vergleich Greedy-Generator vs. Solver-Backend
+#
+# Läuft ohne Datenbank und ohne Oberfläche auf GeneratorJobs:
+#   - synthetische Monate (reproduzierbar per Seed)
+#   - anonymisierte echte Monate: mit DHF_GENERATOR_EXPORT_DIR=<ordner> legt
+#     jede Generierung ihren Job (IDs neu nummeriert, Hunde umbenannt, ohne
+#     Namen) als .pkl in diesem Ordner ab (siehe GeneratorJob.from_app)
+#
+# Aufruf:
+#     python -m gui.generator.generator_benchmark --synthetic 5 --time-limit 10
+#     python -m gui.generator.generator_benchmark --jobs <ordner>
+#
+# Je Monat und Backend: Laufzeit, offene Bedarfe (fehlende Personen),
+# Konflikte (Ruhezeit/Hunde) und Streuung der Monatsstunden.
+
+import argparse
+import glob
+import io
+import os
+import pickle
+import random
+import statistics
+import time
+from contextlib import redirect_stdout
+from datetime import date, datetime
+
+from .generator_input import build_generator_input, _restore_generator_input
+from .generator_process import GeneratorJob, EXPORT_ENV_VAR, _SnapshotApp, _SnapshotDataManager
+from .generator_solver import BACKEND_ENV_VAR, TIME_LIMIT_ENV_VAR
+
+BACKENDS = ("greedy", "solver")
+
+SYNTHETIC_SHIFT_TYPES = {
+    'T.': {'hours': 12, 'start_time': '06:00', 'end_time': '18:00'},
+    'N.': {'hours': 12, 'start_time': '18:00', 'end_time': '06:00'},
+    '6': {'hours': 6, 'start_time': '12:00', 'end_time': '18:00'},
+    'QA': {'hours': 8}, 'S': {'hours': 8}, 'U': {'hours': 0}, 'X': {'hours': 0},
+}
+SYNTHETIC_STAFFING = {'T.': 3, 'N.': 3, '6': 1}
+
+
+# --- Anonymisierung / Export echter Monate ---
+
+def anonymize_job(job):
+    """
+    Kopie eines GeneratorJobs ohne personenbezogene Daten: Benutzer-IDs werden
+    neu nummeriert (1..n in Planreihenfolge), Diensthunde umbenannt, von den
+    Benutzerdaten bleiben nur die für den Generator nötigen Felder.
+    """
+    generator_input = job.generator_input
+    id_map = {user['id']: index for index, user in enumerate(generator_input.users, start=1)}
+    id_map_str = {str(old): str(new) for old, new in id_map.items()}
+    dog_map = {}
+    users = []
+    for user in generator_input.users:
+        dog = user.get('diensthund')
+        if dog not in (None, "", "---"):
+            dog = dog_map.setdefault(dog, f"Hund {len(dog_map) + 1}")
+        users.append({'id': id_map[user['id']], 'is_visible': 1, 'diensthund': dog})
+
+    def by_str_id(data):
+        return {id_map_str[uid]: dict(inner) for uid, inner in data.items() if uid in id_map_str}
+
+    def by_int_id(data):
+        return {id_map[uid]: (dict(inner) if hasattr(inner, 'items') else inner)
+                for uid, inner in data.items() if uid in id_map}
+
+    values = {name: getattr(generator_input, name) for name in generator_input.__slots__ if name != '_frozen'}
+    values.update(
+        users=users,
+        shifts=by_str_id(generator_input.shifts),
+        loaded_shifts=by_str_id(generator_input.loaded_shifts),
+        locks=by_str_id(generator_input.locks),
+        vacations=by_str_id(generator_input.vacations),
+        wunschfrei={uid: {date_str: tuple(entry)[:2] for date_str, entry in inner.items()}
+                    for uid, inner in by_str_id(generator_input.wunschfrei).items()},
+        min_staffing=tuple(dict(day) for day in generator_input.min_staffing),
+        initial_user_hours=by_int_id(generator_input.initial_user_hours),
+        initial_shift_counts=by_int_id(generator_input.initial_shift_counts),
+        initial_shift_counts_ratio=by_int_id(generator_input.initial_shift_counts_ratio),
+        criticality=None if generator_input.criticality is None else {
+            key: frozenset(id_map_str[uid] for uid in user_ids if uid in id_map_str)
+            for key, user_ids in generator_input.criticality.items()},
+    )
+
+    generator_config = dict(job.generator_config)
+    generator_config['user_preferences'] = {id_map_str[uid]: prefs for uid, prefs in
+                                            (generator_config.get('user_preferences') or {}).items()
+                                            if uid in id_map_str}
+    for key in ('preferred_partners_prioritized', 'avoid_partners_prioritized'):
+        pairs = []
+        for entry in generator_config.get(key) or []:
+            try:
+                pairs.append({'id_a': id_map[int(entry['id_a'])], 'id_b': id_map[int(entry['id_b'])],
+                              'priority': int(entry['priority'])})
+            except (KeyError, TypeError, ValueError):
+                continue
+        generator_config[key] = pairs
+    generator_config.pop('preferred_partners', None)
+
+    return GeneratorJob(
+        generator_input=_restore_generator_input(values),
+        shift_types_data=job.shift_types_data,
+        staffing_rules=job.staffing_rules,
+        generator_config=generator_config,
+        previous_month_shifts=by_str_id(job.previous_month_shifts),
+        next_month_shifts=by_str_id(job.next_month_shifts),
+    )
+
+
+def export_job(job, directory):
+    """ Legt den anonymisierten Job als .pkl in 'directory' ab und gibt den Pfad zurück. """
+    os.makedirs(directory, exist_ok=True)
+    generator_input = job.generator_input
+    path = os.path.join(directory, f"job_{generator_input.year}_{generator_input.month:02d}_"
+                                   f"{datetime.now():%Y%m%d_%H%M%S}.pkl")
+    with open(path, "wb") as f:
+        pickle.dump(anonymize_job(job), f)
+    return path
+
+
+def load_jobs(directory):
+    jobs = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.pkl"))):
+        with open(path, "rb") as f:
+            jobs.append((os.path.basename(path), pickle.load(f)))
+    return jobs
+
+
+# --- Synthetische Monate ---
+
+class _SyntheticMonthSource:
+    """ Liefert die Attribute, die build_generator_input von einem DataManager liest. """
+
+    def __init__(self, year, month, users, shifts, vacations, wunschfrei):
+        self.app = None
+        self.year = year
+        self.month = month
+        self.cached_users_for_month = users
+        self.locked_shifts_cache = {}
+        self.shift_schedule_data = shifts
+        self.processed_vacations = vacations
+        self.wunschfrei_data = wunschfrei
+
+    def get_min_staffing_for_date(self, current_date):
+        return dict(SYNTHETIC_STAFFING)
+
+
+def synthetic_job(seed, year=2025, month=3, user_count=16):
+    """ Zufälliger, aber reproduzierbarer Monat (Vorbelegung, Urlaub, Wunschfrei, Hunde, Partner). """
+    rnd = random.Random(seed)
+    first_day = date(year, month, 1)
+    days_in_month = (date(year + month // 12, month % 12 + 1, 1) - first_day).days
+    prefix = f"{year:04d}-{month:02d}-"
+    user_ids = range(1, user_count + 1)
+
+    users = [{'id': uid, 'is_visible': 1, 'diensthund': rnd.choice(['---', '---', 'Hund 1', 'Hund 2'])}
+             for uid in user_ids]
+    shifts, vacations, wunschfrei = {}, {}, {}
+    for uid in user_ids:
+        shifts[str(uid)] = {f"{prefix}{day:02d}": rnd.choice(['X', 'X', 'T.', 'N.', 'QA', 'S'])
+                            for day in rnd.sample(range(1, days_in_month + 1), 5)}
+        if rnd.random() < 0.3:
+            start = rnd.randint(1, days_in_month - 6)
+            vacations[str(uid)] = {date(year, month, day): 'Genehmigt' for day in range(start, start + 7)}
+            for day in range(start, start + 7):
+                shifts[str(uid)][f"{prefix}{day:02d}"] = 'U'
+        if rnd.random() < 0.5:
+            wunschfrei[str(uid)] = {f"{prefix}{rnd.randint(1, days_in_month):02d}":
+                                    ('Genehmigt', rnd.choice(['', 'T.', 'N.']), 'user')}
+
+    previous_month = date(year - (month == 1), (month - 2) % 12 + 1, 1)
+    previous_days = (first_day - previous_month).days
+    previous_month_shifts = {str(uid): {f"{previous_month:%Y-%m}-{day:02d}": rnd.choice(['T.', 'N.', 'X'])
+                                        for day in range(previous_days - 6, previous_days + 1)
+                                        if rnd.random() < 0.7}
+                             for uid in user_ids}
+
+    generator_config = {
+        'avoid_understaffing_hard': True,
+        'mandatory_rest_days_after_max_shifts': 2,
+        'max_consecutive_same_shift': 4,
+        'user_preferences': {str(uid): {'shift_exclusions': [rnd.choice(['N.', '6'])]}
+                             for uid in user_ids if rnd.random() < 0.2},
+        'preferred_partners_prioritized': [{'id_a': 1, 'id_b': 2, 'priority': 1}],
+        'avoid_partners_prioritized': [{'id_a': 3, 'id_b': 4, 'priority': 1}],
+    }
+    shift_hours = {abbrev: float(data['hours']) for abbrev, data in SYNTHETIC_SHIFT_TYPES.items()}
+    source = _SyntheticMonthSource(year, month, users, shifts, vacations, wunschfrei)
+    from gui.shift_plan_generator import SHIFTS_TO_PLAN
+    return GeneratorJob(
+        generator_input=build_generator_input(source, year, month, shift_hours, SHIFTS_TO_PLAN),
+        shift_types_data=SYNTHETIC_SHIFT_TYPES,
+        staffing_rules={},
+        generator_config=generator_config,
+        previous_month_shifts=previous_month_shifts,
+        next_month_shifts={},
+    )
+
+
+# --- Messung ---
+
+def evaluate(job, backend, time_limit_s):
+    """ Generiert den Monat mit dem Backend und misst Laufzeit, offene Bedarfe, Konflikte, Stunden-Streuung. """
+    from gui.shift_plan_generator import ShiftPlanGenerator
+    from gui.rule_engine import (MonthGrid, RuleEngine, NIGHT_REST, DOG_OVERLAP, shift_minutes, user_dogs_from,
+                                 work_shift_indicators)
+
+    saved_env = {key: os.environ.get(key) for key in (BACKEND_ENV_VAR, TIME_LIMIT_ENV_VAR)}
+    os.environ[BACKEND_ENV_VAR] = backend
+    os.environ[TIME_LIMIT_ENV_VAR] = str(time_limit_s)
+    try:
+        with redirect_stdout(io.StringIO()):  # Generator-Ausgaben unterdrücken
+            generator = ShiftPlanGenerator(_SnapshotApp(job), _SnapshotDataManager(job), job.generator_input,
+                                           None, None)
+            started = time.perf_counter()
+            generator.compute_plan()
+            elapsed = time.perf_counter() - started
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    generator_input = job.generator_input
+    missing = 0
+    for day in range(1, generator_input.days_in_month + 1):
+        current_date = date(generator_input.year, generator_input.month, day)
+        date_str = current_date.strftime('%Y-%m-%d')
+        staffing = generator.staffing_for_day(current_date)
+        for shift in generator.shifts_to_plan:
+            required = staffing.get(shift, 0)
+            if required <= 0 or not generator.plans_shift_on(shift, current_date):
+                continue
+            present = sum(1 for user_id in generator.user_data_map
+                          if generator.live_shifts_data.get(str(user_id), {}).get(date_str) == shift)
+            missing += max(required - present, 0)
+
+    grid = MonthGrid(generator_input.year, generator_input.month, generator.live_shifts_data,
+                     job.previous_month_shifts, job.next_month_shifts,
+                     user_dogs=user_dogs_from(generator_input.users),
+                     work_indicators=work_shift_indicators(job.shift_types_data))
+    engine = RuleEngine(grid, shift_times=shift_minutes(job.shift_types_data))
+    conflicts = len(engine.violation_cells(engine.compile(NIGHT_REST, DOG_OVERLAP)))
+    hours = [generator.live_user_hours.get(user_id, 0.0) for user_id in generator.user_data_map]
+    return {'time': elapsed, 'missing': missing, 'conflicts': conflicts,
+            'hours_stdev': statistics.pstdev(hours) if hours else 0.0}
+
+
+def run_benchmark(named_jobs, time_limit_s, backends=BACKENDS):
+    """ Gibt die Vergleichstabelle aus und liefert {(name, backend): messwerte}. """
+    results = {}
+    print(f"{'Monat':<32} {'Backend':<8} {'Zeit':>8} {'Offen':>6} {'Konfl.':>7} {'Std(h)':>7}")
+    for name, job in named_jobs:
+        for backend in backends:
+            result = evaluate(job, backend, time_limit_s)
+            results[(name, backend)] = result
+            print(f"{name:<32} {backend:<8} {result['time']:>7.2f}s {result['missing']:>6} "
+                  f"{result['conflicts']:>7} {result['hours_stdev']:>7.1f}")
+    for backend in backends:
+        rows = [result for (_, b), result in results.items() if b == backend]
+        if rows:
+            print(f"{'Summe/Mittel':<32} {backend:<8} {sum(r['time'] for r in rows):>7.2f}s "
+                  f"{sum(r['missing'] for r in rows):>6} {sum(r['conflicts'] for r in rows):>7} "
+                  f"{statistics.mean(r['hours_stdev'] for r in rows):>7.1f}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vergleich Greedy-Generator vs. Solver-Backend")
+    parser.add_argument("--synthetic", type=int, default=0, help="Anzahl synthetischer Monate")
+    parser.add_argument("--seed", type=int, default=1, help="Start-Seed der synthetischen Monate")
+    parser.add_argument("--users", type=int, default=16, help="Mitarbeiter je synthetischem Monat")
+    parser.add_argument("--jobs", help=f"Ordner mit exportierten Jobs ({EXPORT_ENV_VAR})")
+    parser.add_argument("--time-limit", type=float, default=10.0, help="Zeitlimit des Solvers (Sekunden)")
+    args = parser.parse_args(argv)
+
+    named_jobs = [(f"synthetisch #{seed}", synthetic_job(seed, user_count=args.users))
+                  for seed in range(args.seed, args.seed + args.synthetic)]
+    if args.jobs:
+        named_jobs.extend(load_jobs(args.jobs))
+    if not named_jobs:
+        parser.error("Keine Monate: --synthetic N und/oder --jobs <ordner> angeben.")
+    run_benchmark(named_jobs, args.time_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ DEFAULT_GENERATOR_FILL_ROUNDS = 3
 DEFAULT_MANDATORY_REST_DAYS = 2
 DEFAULT_MAX_CONSECUTIVE_SAME_SHIFT = 4
 AVOID_PARTNER_PENALTY_SCORE = 10000
+DEFAULT_SOLVER_TIME_LIMIT_S = 10
 
 
 class GeneratorConfig:
@@ -56,6 +57,10 @@ class GeneratorConfig:
             'generator_fill_rounds', DEFAULT_GENERATOR_FILL_ROUNDS
         )
 
+        # NEU (Regel 2): Optionales Solver-Backend (siehe generator_solver.py)
+        self.use_solver_backend = self.generator_config.get('use_solver_backend', False)
+        self.solver_time_limit_s = self.generator_config.get('solver_time_limit_s', DEFAULT_SOLVER_TIME_LIMIT_S)
+
         # 2. Scoring-Gewichtung
         self.fairness_threshold_hours = self.generator_config.get(
             'fairness_threshold_hours', DEFAULT_FAIRNESS_THRESHOLD_HOURS
@@ -0,0 +1,262 @@
+# gui/generator/generator_decision_log.py
+# NEU (Regel 2): Entscheidungsprotokoll des Generators (kompakt, binär)
+#
+# Wirkt ein generierter Plan falsch, gab es bisher keine Aufzeichnung, WARUM
+# ein Kandidat gewählt wurde - nur Prints. Mit DHF_DECISION_LOG_DIR=<ordner>
+# schreibt jeder GeneratorJob/HorizonJob eine Datei mit:
+#   - dem Eingabe-Snapshot (der Job, wie er an den Generator-Prozess geht)
+#     und den Umgebungsvariablen, die das Ergebnis beeinflussen
+#   - je Zuweisungsversuch (Runde 1-4): Kandidaten in Rangfolge, Teil-Scores
+#     (float32), gewählter Mitarbeiter, Ablehnungsgründe der harten Regeln
+#     (Anzahl je Grund, ohne Namen - siehe reason_key) und die Dauer des Versuchs
+#   - dem Ergebnis (Änderungen je Monat)
+#
+# Ein Eintrag ist ein struct-Kopf plus Arrays (Mitarbeiter und Gründe als
+# Index in Tabellen), gesammelt in einem bytearray; geschrieben wird einmal
+# am Ende (zlib, atomar). Das ist billig genug, um es im Betrieb
+# eingeschaltet zu lassen. DHF_DECISION_LOG_KEEP begrenzt die Anzahl der
+# Dateien im Ordner (Standard 50, älteste zuerst gelöscht).
+#
+# Nachspielen, Vergleich und Zeitmessung je Slot: generator_replay.py
+#
+# Hinweis: Die Datei enthält den vollständigen Eingabe-Snapshot (inkl.
+# Benutzerdaten) und gehört nur in einen lokalen Ordner.
+
+import glob
+import os
+import pickle
+import struct
+import sys
+import zlib
+from array import array
+from collections import namedtuple
+from datetime import datetime
+
+from .generator_solver import BACKEND_ENV_VAR, TIME_LIMIT_ENV_VAR
+
+LOG_DIR_ENV_VAR = "DHF_DECISION_LOG_DIR"
+KEEP_ENV_VAR = "DHF_DECISION_LOG_KEEP"
+DEFAULT_KEEP = 50
+FILE_SUFFIX = ".dhflog"
+MAGIC = b"DHFDLOG"
+FORMAT_VERSION = 2  # 2: Ablehnungsgründe als reason_key (ohne Namen)
+
+# Umgebungsvariablen, die das Ergebnis beeinflussen (werden beim Nachspielen gesetzt)
+REPLAY_ENV_VARS = (BACKEND_ENV_VAR, TIME_LIMIT_ENV_VAR)
+
+# Teil-Scores der Runde 1 im Protokoll (Reihenfolge = Sortierschlüssel)
+SCORE_KEYS = ('avoid_score', 'partner_score', 'future_conflict_score', 'min_hours_score', 'fairness_score',
+              'ratio_pref_score', 'isolation_score')
+# Runden 2-4 sortieren nur nach 'balance_hours'
+FILL_SCORE_KEYS = ('balance_hours',)
+
+# Kopf je Eintrag: Monat (Index im Horizont), Runde, Tag, Schicht (Index), gewählt (Index),
+# Anzahl Kandidaten, Dauer in Mikrosekunden, Anzahl Ablehnungsgründe
+_RECORD = struct.Struct("<BBBBHHIH")
+_REASON = struct.Struct("<HH")
+NO_USER = 0xFFFF
+
+Decision = namedtuple("Decision", "month round day shift candidates scores chosen rejections elapsed_us")
+
+
+def pack_floats(values):
+    """ Werte als float32 little-endian (Teil-Scores im Protokoll). """
+    packed = array('f', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def reason_key(reason):
+    """
+    Ablehnungsgrund ohne Namen ('Hund (mit Max M.)' -> 'Hund'): welcher Kollege
+    den Hund schon führt, hängt nur an der Reihenfolge der Prüfung und ist
+    kein Unterschied in der Entscheidung.
+    """
+    return reason.split(" (mit ", 1)[0]
+
+
+def _unpack(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class DecisionLog:
+    """
+    Sammelt die Entscheidungen eines Generator-Laufs (ein Job, ggf. mehrere
+    Monate). record() wird von GeneratorRounds pro Zuweisungsversuch
+    aufgerufen; decisions() liefert die Einträge wieder als Decision-Tupel.
+    """
+
+    def __init__(self, job, env=None):
+        self.job = job
+        self.env = dict(env) if env is not None else {key: os.environ.get(key) for key in REPLAY_ENV_VARS}
+        self.created_at = datetime.now()
+        self.month_index = 0
+        self.users, self._user_codes = [], {}
+        self.shifts, self._shift_codes = [], {}
+        self.reasons, self._reason_codes = [], {}
+        self.results = []  # je Monat: sortierte Änderungen (user_id, date_str, alt, neu)
+        self.record_count = 0
+        self._records = bytearray()
+
+    @classmethod
+    def from_env(cls, job):
+        """ DecisionLog, wenn DHF_DECISION_LOG_DIR gesetzt ist, sonst None. """
+        return cls(job) if os.environ.get(LOG_DIR_ENV_VAR) else None
+
+    # --- Aufzeichnen (Generator) ---
+
+    def begin_month(self, index):
+        self.month_index = index
+
+    @staticmethod
+    def _code(table, codes, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(table)
+            table.append(value)
+        return code
+
+    def record(self, round_num, day, shift, candidate_ids, packed_scores, chosen_id, rejections, elapsed_ns):
+        """
+        Ein Zuweisungsversuch. 'candidate_ids' in Rangfolge, 'packed_scores' je
+        Kandidat die Teil-Scores der Runde (pack_floats), 'chosen_id' None, wenn
+        niemand in Frage kam, 'rejections' {grund: anzahl} der harten Regeln.
+        """
+        user_codes = self._user_codes
+        codes = array('H', [user_codes[user_id] if user_id in user_codes
+                            else self._code(self.users, user_codes, user_id) for user_id in candidate_ids])
+        if sys.byteorder == 'big':
+            codes.byteswap()
+        chosen = NO_USER if chosen_id is None else self._code(self.users, user_codes, chosen_id)
+        reasons = {}
+        for reason, count in (rejections or {}).items():
+            key = reason_key(reason)
+            reasons[key] = reasons.get(key, 0) + count
+        rejections = reasons
+        self._records += _RECORD.pack(self.month_index, round_num, day,
+                                      self._code(self.shifts, self._shift_codes, shift), chosen,
+                                      len(codes), min(elapsed_ns // 1000, 0xFFFFFFFF), len(rejections))
+        self._records += codes.tobytes()
+        self._records += packed_scores
+        for reason, count in rejections.items():
+            self._records += _REASON.pack(self._code(self.reasons, self._reason_codes, reason), min(count, 0xFFFF))
+        self.record_count += 1
+
+    def add_result(self, plan_diff):
+        self.results.append(sorted(plan_diff.iter_changes(), key=lambda change: (str(change[0]), change[1])))
+
+    # --- Lesen ---
+
+    @staticmethod
+    def score_keys(round_num):
+        return SCORE_KEYS if round_num == 1 else FILL_SCORE_KEYS
+
+    def decisions(self):
+        """ Alle Einträge in Aufzeichnungsreihenfolge als Decision-Tupel. """
+        data = memoryview(bytes(self._records))
+        position = 0
+        while position < len(data):
+            month, round_num, day, shift, chosen, count, elapsed_us, reason_count = _RECORD.unpack_from(data, position)
+            position += _RECORD.size
+            candidates = tuple(self.users[code] for code in _unpack('H', data[position:position + 2 * count]))
+            position += 2 * count
+            width = len(self.score_keys(round_num))
+            flat = _unpack('f', data[position:position + 4 * width * count])
+            position += 4 * width * count
+            scores = tuple(tuple(flat[i * width:(i + 1) * width]) for i in range(count))
+            rejections = {}
+            for _ in range(reason_count):
+                reason, reason_total = _REASON.unpack_from(data, position)
+                position += _REASON.size
+                rejections[self.reasons[reason]] = reason_total
+            yield Decision(month, round_num, day, self.shifts[shift], candidates, scores,
+                           None if chosen == NO_USER else self.users[chosen], rejections, elapsed_us)
+
+    # --- Datei ---
+
+    def to_bytes(self):
+        payload = pickle.dumps({
+            'created_at': self.created_at,
+            'env': self.env,
+            'job': self.job,
+            'users': self.users,
+            'shifts': self.shifts,
+            'reasons': self.reasons,
+            'results': self.results,
+            'record_count': self.record_count,
+            'records': bytes(self._records),
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        return MAGIC + bytes([FORMAT_VERSION]) + zlib.compress(payload)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Keine Entscheidungsprotokoll-Datei.")
+        if data[len(MAGIC)] != FORMAT_VERSION:
+            raise ValueError(f"Nicht unterstützte Formatversion {data[len(MAGIC)]}.")
+        payload = pickle.loads(zlib.decompress(data[len(MAGIC) + 1:]))
+        log = cls(payload['job'], env=payload['env'])
+        log.created_at = payload['created_at']
+        log.users, log.shifts, log.reasons = payload['users'], payload['shifts'], payload['reasons']
+        log._user_codes = {user_id: code for code, user_id in enumerate(log.users)}
+        log._shift_codes = {shift: code for code, shift in enumerate(log.shifts)}
+        log._reason_codes = {reason: code for code, reason in enumerate(log.reasons)}
+        log.results = payload['results']
+        log.record_count = payload['record_count']
+        log._records = bytearray(payload['records'])
+        return log
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def save(self, path):
+        """ Schreibt das Protokoll atomar (temporäre Datei + Umbenennen). """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+        return path
+
+    def save_to_configured_dir(self):
+        """ Legt das Protokoll in DHF_DECISION_LOG_DIR ab (Fehler nur melden, Regel 1). """
+        directory = os.environ.get(LOG_DIR_ENV_VAR)
+        if not directory:
+            return None
+        generator_inputs = getattr(self.job, 'generator_inputs', None) or [self.job.generator_input]
+        first = generator_inputs[0]
+        months = f"_{len(generator_inputs)}M" if len(generator_inputs) > 1 else ""
+        path = os.path.join(directory, f"decisions_{first.year}_{first.month:02d}{months}_"
+                                       f"{self.created_at:%Y%m%d_%H%M%S_%f}{FILE_SUFFIX}")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.save(path)
+            _prune(directory)
+        except Exception as e:
+            print(f"[FEHLER] Entscheidungsprotokoll konnte nicht gespeichert werden: {e}")
+            return None
+        print(f"[Generator] Entscheidungsprotokoll: {path} ({self.record_count} Einträge)")
+        return path
+
+    def __repr__(self):
+        return f"<DecisionLog {self.record_count} Einträge, {len(self._records)} Bytes>"
+
+
+def _prune(directory):
+    """ Löscht die ältesten Protokolle über DHF_DECISION_LOG_KEEP hinaus. """
+    try:
+        keep = max(1, int(os.environ.get(KEEP_ENV_VAR, DEFAULT_KEEP)))
+    except ValueError:
+        keep = DEFAULT_KEEP
+    paths = sorted(glob.glob(os.path.join(directory, f"decisions_*{FILE_SUFFIX}")), key=os.path.getmtime)
+    for path in paths[:-keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,101 @@
+# gui/generator/generator_diff.py
+# NEUE DATEI (Regel 2): Differenz zwischen Ausgangsplan und generiertem Plan
+#
+# Statt den gesamten Monat zu speichern, werden nur neue und geänderte
+# Zellen geschrieben. Die gleiche Differenz wird genutzt, um die Caches
+# des DataManagers gezielt zu aktualisieren (kein kompletter Reload).
+
+
+class PlanDiff:
+    """
+    Änderungen eines Monatsplans.
+        inserted: [(user_id_int, date_str, new_shift)]
+        changed:  [(user_id_int, date_str, old_shift, new_shift)]
+        removed:  [(user_id_int, date_str, old_shift)]
+    """
+
+    def __init__(self, year, month, inserted=None, changed=None, removed=None):
+        self.year = year
+        self.month = month
+        self.inserted = inserted or []
+        self.changed = changed or []
+        self.removed = removed or []
+
+    @classmethod
+    def from_changes(cls, year, month, changes):
+        """ Baut eine PlanDiff aus (user_id_int, date_str, old_shift, new_shift)-Tupeln. """
+        diff = cls(year, month)
+        for user_id, date_str, old_shift, new_shift in changes:
+            old_shift = old_shift or None
+            new_shift = new_shift or None
+            if old_shift == new_shift:
+                continue
+            if old_shift is None:
+                diff.inserted.append((user_id, date_str, new_shift))
+            elif new_shift is None:
+                diff.removed.append((user_id, date_str, old_shift))
+            else:
+                diff.changed.append((user_id, date_str, old_shift, new_shift))
+        return diff
+
+    def __len__(self):
+        return len(self.inserted) + len(self.changed) + len(self.removed)
+
+    def is_empty(self):
+        return len(self) == 0
+
+    def iter_changes(self):
+        """ Alle Änderungen einheitlich als (user_id_int, date_str, old_shift, new_shift). """
+        for user_id, date_str, new_shift in self.inserted:
+            yield user_id, date_str, None, new_shift
+        for user_id, date_str, old_shift, new_shift in self.changed:
+            yield user_id, date_str, old_shift, new_shift
+        for user_id, date_str, old_shift in self.removed:
+            yield user_id, date_str, old_shift, None
+
+    def affected_user_ids(self):
+        return {user_id for user_id, _, _, _ in self.iter_changes()}
+
+    def summary(self):
+        return f"{len(self.inserted)} neu, {len(self.changed)} geändert, {len(self.removed)} entfernt"
+
+    def __repr__(self):
+        return f"<PlanDiff {self.year}-{self.month:02d}: {self.summary()}>"
+
+
+def compute_plan_diff(base_shifts, new_shifts, year, month):
+    """
+    Vergleicht zwei Pläne {user_id_str: {date_str: shift}} für den Monat (year, month).
+    Leere Einträge ('' / None) gelten als "keine Schicht".
+    """
+    month_prefix = f"{year:04d}-{month:02d}-"
+    diff = PlanDiff(year, month)
+
+    for user_id_str in set(base_shifts.keys()) | set(new_shifts.keys()):
+        try:
+            user_id_int = int(user_id_str)
+        except (TypeError, ValueError):
+            continue
+
+        base_days = base_shifts.get(user_id_str) or {}
+        new_days = new_shifts.get(user_id_str) or {}
+
+        for date_str in set(base_days.keys()) | set(new_days.keys()):
+            if not (isinstance(date_str, str) and date_str.startswith(month_prefix)):
+                continue
+            old_shift = base_days.get(date_str) or None
+            new_shift = new_days.get(date_str) or None
+            if old_shift == new_shift:
+                continue
+            if old_shift is None:
+                diff.inserted.append((user_id_int, date_str, new_shift))
+            elif new_shift is None:
+                diff.removed.append((user_id_int, date_str, old_shift))
+            else:
+                diff.changed.append((user_id_int, date_str, old_shift, new_shift))
+
+    # Stabile Reihenfolge (Logs, Tests, deterministische Writes)
+    diff.inserted.sort()
+    diff.changed.sort()
+    diff.removed.sort()
+    return diff
@@ -0,0 +1,149 @@
+# gui/generator/generator_feasibility.py
+# NEU (Regel 2): Machbarkeits-Index für das Lookahead-Scoring
+#
+# _calculate_future_conflicts hat für jeden Kandidaten in jeder fairen Runde
+# live_shifts_data temporär verändert und dann für 7 Tage x 3 Schichten die
+# harten Regeln geprüft - jedes Mal mit Rückwärts-Suchen über Datums-Strings
+# (Vorschicht, Folgetage, Ruhezeit). Der Index liest den Plan aus dem
+# MonthGrid der Regel-Engine (Tages-Arrays mit Kategorie Arbeit/Frei/Sonstiges
+# und der Länge der Arbeits-Kette bis zu jedem Tag, inkrementell gepflegt
+# über ShiftPlanGenerator.record_assignment) und hält pro Mitarbeiter nur
+# noch eine Sperr-Bitmaske (Tag x Schicht) für Urlaub, Wunschfrei und
+# Schicht-Ausschlüsse. Die Konfliktzählung ist damit eine Popcount-Summe
+# über die Konflikt-Masken des Lookahead-Fensters.
+#
+# Das Ergebnis ist identisch zur bisherigen Prüfung
+# (GeneratorScoring._calculate_future_conflicts_reference).
+
+from ..rule_engine import CAT_WORK, CAT_FREE, VACATION, WUNSCHFREI, EXCLUSION
+
+
+class FeasibilityIndex:
+    """
+    Konfliktzählung des Generators auf dem MonthGrid. Die Sperr-Masken
+    werden beim ersten Zugriff pro Mitarbeiter aus den statischen Regeln
+    (Urlaub, Wunschfrei, Ausschluss) kompiliert.
+    """
+
+    def __init__(self, generator_instance):
+        self.gen = generator_instance
+        self.grid = generator_instance.rule_grid
+        self.days_in_month = self.grid.days_in_month
+
+        self.shifts = list(generator_instance.shifts_to_plan)
+        self.shift_bits = {abbrev: 1 << i for i, abbrev in enumerate(self.shifts)}
+        self.full_mask = (1 << len(self.shifts)) - 1
+        self._popcount = [bin(mask).count('1') for mask in range(self.full_mask + 1)]
+        # N. -> T./6/QA/S am Folgetag (nur die geplanten Schichten)
+        self.after_night_mask = self.shift_bits.get('T.', 0) | self.shift_bits.get('6', 0)
+        self.day_bit = self.shift_bits.get('T.', 0)
+
+        self._static_rules = generator_instance.rules.compile(VACATION, WUNSCHFREI, EXCLUSION)
+        self._blocked = {}  # uid_str -> [Bitmaske je Tag], Index = Tag im Monat
+
+    def is_work_shift(self, shift):
+        return self.grid.is_work_shift(shift)
+
+    def _blocked_for(self, user_id_str):
+        blocked = self._blocked.get(user_id_str)
+        if blocked is None:
+            rules = self._static_rules
+            blocked = [0] * (self.days_in_month + 1)
+            for day in range(1, self.days_in_month + 1):
+                mask = 0
+                for abbrev, bit in self.shift_bits.items():
+                    if rules.first_violation(user_id_str, day, abbrev):
+                        mask |= bit
+                blocked[day] = mask
+            self._blocked[user_id_str] = blocked
+        return blocked
+
+    # --- Konfliktzählung ---
+
+    def count_future_conflicts(self, user_id_str, day, assigned_shift, lookahead_days):
+        """
+        Anzahl der (Tag, Schicht)-Kombinationen in den nächsten 'lookahead_days'
+        Tagen des Monats, die durch 'assigned_shift' an 'day' neu blockiert werden.
+        'assigned_shift' muss eine Arbeitsschicht sein (is_work_shift).
+        """
+        gen = self.gen
+        row = self.grid.row(user_id_str)
+        offset = self.grid.offset
+        cats = row.cats
+        hard_max = gen.HARD_MAX_CONSECUTIVE_SHIFTS
+        rest_days = gen.mandatory_rest_days
+        is_night = assigned_shift == "N."
+
+        chain_before = row.work_run[day - 1 + offset]  # Kette vor heute (ohne Simulation)
+        chain_today = chain_before + 1  # Kette inkl. der simulierten Schicht
+        chain_was_ok = chain_before < hard_max
+
+        # Simulierte Ketten ab heute: sim_work[k - day] = Arbeitstage bis einschließlich Tag k
+        sim_work = [chain_today]
+        prev_work = chain_today
+        prev_free = 0
+
+        total = 0
+        last_day = min(day + lookahead_days, self.days_in_month)
+        for future_day in range(day + 1, last_day + 1):
+            offset_days = future_day - day
+            if prev_work >= hard_max and chain_was_ok:
+                # Max Consecutive: die heutige Schicht hat die Kette über das Limit gebracht
+                mask = self.full_mask
+            elif (rest_days > 0 and prev_work == 0 and offset_days <= rest_days and chain_today >= hard_max
+                  and not self._rest_ok(sim_work, day, future_day, prev_free, hard_max, rest_days)):
+                # Ruhezeit nach dem (durch heute) vollen Block verletzt
+                mask = self.full_mask
+            else:
+                mask = 0
+                if is_night and offset_days == 1:
+                    mask = self.after_night_mask  # N -> T/6
+                elif is_night and offset_days == 2 and self.day_bit and self._night_free_day_conflict(
+                        user_id_str, row, future_day, prev_work, prev_free, sim_work, day, hard_max, rest_days):
+                    mask = self.day_bit  # N-F-T
+            total += self._popcount[mask]
+
+            category = cats[future_day + offset]
+            prev_work = prev_work + 1 if category == CAT_WORK else 0
+            prev_free = prev_free + 1 if category == CAT_FREE else 0
+            sim_work.append(prev_work)
+
+        return total
+
+    def _rest_ok(self, sim_work, day, future_day, free_run, hard_max, rest_days):
+        """ Entspricht MonthGrid.rest_ok(future_day) auf dem simulierten Plan. """
+        if free_run == 0 or free_run > hard_max + rest_days:
+            return True
+        last_work_day = future_day - 1 - free_run  # Liegt >= day (heute ist eine Arbeitsschicht)
+        if sim_work[last_work_day - day] >= hard_max:
+            return free_run >= rest_days
+        return True
+
+    def _night_free_day_conflict(self, user_id_str, row, future_day, prev_work, prev_free, sim_work, day,
+                                 hard_max, rest_days):
+        """
+        N-F-T-Zählung für T. am übernächsten Tag: nur wenn dieser Tag leer/frei ist
+        und T. dort (mit der simulierten Nachtschicht) gegen eine harte Regel verstößt.
+        """
+        offset = self.grid.offset
+        index = future_day + offset
+        if row.shifts[index] is not None and row.cats[index] != CAT_FREE:
+            return False
+
+        gen = self.gen
+        if self._blocked_for(user_id_str)[future_day] & self.day_bit:
+            return True  # Urlaub, Wunschfrei oder Ausschluss
+        if row.shifts[index - 1] == "N.":
+            return True  # N -> T
+        if row.cats[index - 1] == CAT_FREE:
+            return True  # N-F-T (heute N.)
+        if prev_work >= hard_max:
+            return True
+        if rest_days > 0 and prev_work == 0 and not self._rest_ok(sim_work, day, future_day, prev_free, hard_max,
+                                                                  rest_days):
+            return True
+        user_pref = gen.user_preferences[user_id_str]
+        max_hours_override = user_pref.get('max_monthly_hours')
+        max_hours_check = max_hours_override if max_hours_override is not None else gen.MAX_MONTHLY_HOURS
+        current_hours = gen.live_user_hours.get(int(user_id_str), 0.0)
+        return current_hours + gen.shift_hours.get('T.', 0.0) > max_hours_check
@@ -0,0 +1,258 @@
+# gui/generator/generator_horizon.py
+# NEU (Regel 2): Mehrmonats-Generierung (z.B. Quartal)
+#
+# Bisher wurde jeder Monat einzeln generiert: der Generator sah vom Vormonat
+# nur den gespeicherten Stand und vom Folgemonat ein paar Tage, und die
+# Stundenbilanz begann in jedem Monat bei Null. Hier werden mehrere Monate
+# in EINEM Lauf geplant:
+#   - Eingaben: je Monat ein GeneratorInput aus den Monats-Caches (P5-Cache
+#     bzw. ein DB-Abruf pro fehlendem Monat, vor dem Start im Worker-Thread)
+#   - Monatsgrenzen: das MonthGrid eines Monats sieht den *generierten* Plan
+#     des vorherigen Horizont-Monats und den Stand des folgenden - Ruhezeit,
+#     N-F-T und Ketten gelten damit über die Grenze hinweg
+#   - Fairness: HorizonCarry trägt Stunden und T./N.-Zähler weiter, die
+#     Fairness-Scores vergleichen die Stunden über den ganzen Horizont
+#   - Speichern: alle PlanDiffs in EINER Transaktion (save_plan_diffs_to_db)
+#
+# Die Monate werden nacheinander auf dem gemeinsamen Übertrag geplant (kein
+# monolithisches Gitter über den ganzen Horizont): Laufzeit = Summe der
+# Einzelmonate, d.h. ein Quartal liegt weiter im interaktiven Bereich.
+
+import traceback
+from collections import defaultdict
+
+from utils.instrumentation import get_logger, start_span
+from .generator_process import GeneratorJob, _SnapshotApp, _SnapshotDataManager
+from .generator_persistence import save_plan_diffs_to_db
+
+_log = get_logger("generator")
+
+HORIZON_DEFAULT_MONTHS = 3  # Quartal
+HORIZON_MAX_MONTHS = 6
+
+
+def horizon_months(year, month, count):
+    """ [(jahr, monat), ...] ab (year, month) für 'count' Monate. """
+    months = []
+    for offset in range(count):
+        index = month - 1 + offset
+        months.append((year + index // 12, index % 12 + 1))
+    return months
+
+
+class HorizonCarry:
+    """
+    Übertrag zwischen den Monaten einer Mehrmonats-Generierung:
+        hours          {user_id_int: Stunden der bereits geplanten Horizont-Monate}
+        ratio_counts   {user_id_int: {'T_OR_6'|'N_DOT': anzahl}}  (kumuliert)
+    """
+
+    def __init__(self):
+        self.hours = defaultdict(float)
+        self.ratio_counts = {}
+        self.months_planned = 0
+
+    def balance_offsets(self, user_ids):
+        """
+        Stunden-Offset je Benutzer für die Fairness (Monatsstunden + Offset =
+        Stunden im Horizont). Benutzer, die in den Vormonaten nicht im Plan
+        waren, erhalten den Durchschnitt (weder bevorzugt noch benachteiligt).
+        """
+        if not self.months_planned:
+            return {}
+        known = [self.hours[user_id] for user_id in user_ids if user_id in self.hours]
+        average = sum(known) / len(known) if known else 0.0
+        return {user_id: self.hours[user_id] if user_id in self.hours else average for user_id in user_ids}
+
+    def seed_ratio_counts(self, live_shift_counts_ratio):
+        """ Belegt die T./N.-Zähler des Monats mit den Zählern der Vormonate vor. """
+        for user_id, counts in self.ratio_counts.items():
+            for key, count in counts.items():
+                live_shift_counts_ratio[user_id][key] += count
+
+    def add_month(self, user_ids, live_user_hours, live_shift_counts_ratio):
+        """
+        Übernimmt den fertigen Monat. 'live_shift_counts_ratio' ist bereits
+        kumuliert (seed_ratio_counts) und ersetzt daher den bisherigen Stand.
+        """
+        for user_id in user_ids:
+            self.hours[user_id] += live_user_hours.get(user_id, 0.0)
+        self.ratio_counts = {user_id: dict(counts) for user_id, counts in live_shift_counts_ratio.items()}
+        self.months_planned += 1
+
+
+class _HorizonDataManager(_SnapshotDataManager):
+    """
+    Ersatz für den DataManager je Horizont-Monat: Vormonat = generierter Plan
+    des vorherigen Horizont-Monats, Folgemonat = Stand des nächsten.
+    """
+
+    def __init__(self, job, index, previous_month_shifts):
+        super().__init__(job)
+        self._index = index
+        self._previous_month_shifts = previous_month_shifts
+
+    def get_previous_month_shifts(self):
+        return self._previous_month_shifts
+
+    def get_next_month_shifts(self):
+        inputs = self._job.generator_inputs
+        if self._index + 1 < len(inputs):
+            return inputs[self._index + 1].shifts
+        return self._job.next_month_shifts
+
+    def get_min_staffing_for_date(self, current_date):
+        # (Lookahead über das Monatsende hinaus: Mindestbesetzung des nächsten Horizont-Monats)
+        generator_input = self._job.input_for(current_date.year, current_date.month)
+        if generator_input is None:
+            return {}
+        return generator_input.min_staffing_for_day(current_date.day)
+
+
+class HorizonJob(GeneratorJob):
+    """
+    GeneratorJob für mehrere aufeinanderfolgende Monate. compute() liefert
+    eine Liste von PlanDiffs (eine je Monat, in Horizont-Reihenfolge).
+        previous_month_shifts   Stand vor dem ersten Monat
+        next_month_shifts       Stand nach dem letzten Monat
+    """
+
+    def __init__(self, generator_inputs, shift_types_data, staffing_rules, generator_config,
+                 previous_month_shifts, next_month_shifts):
+        super().__init__(generator_inputs[0], shift_types_data, staffing_rules, generator_config,
+                         previous_month_shifts, next_month_shifts)
+        self.generator_inputs = list(generator_inputs)
+
+    @classmethod
+    def from_data_manager(cls, app, data_manager, months, progress_callback=None):
+        """
+        (Worker-Thread) Holt die Monatsdaten (aktive Caches, P5-Cache oder
+        DB-Abruf ohne Monatswechsel) und baut die Eingabe-Snapshots.
+        Wirft ValueError, wenn ein Monat nicht geladen werden kann.
+        """
+        from gui.shift_plan_generator import ShiftPlanGenerator
+
+        generator_inputs = []
+        cache_entries = []
+        for index, (year, month) in enumerate(months):
+            if progress_callback:
+                progress_callback(int(index * 10 / len(months)), f"Lade Plandaten {month:02d}/{year}...")
+            cache_entry = data_manager.get_month_data(year, month)
+            if cache_entry is None:
+                raise ValueError(f"Plandaten für {month:02d}/{year} konnten nicht geladen werden.")
+            cache_entries.append(cache_entry)
+            generator_inputs.append(ShiftPlanGenerator.build_input(app, data_manager, year, month, cache_entry))
+
+        generator_config = {}
+        try:
+            generator_config = data_manager.get_generator_config() or {}
+        except Exception as e:
+            print(f"[FEHLER] Konnte Generator-Konfiguration nicht laden: {e}")
+        return cls(
+            generator_inputs=generator_inputs,
+            shift_types_data=dict(app.shift_types_data),
+            staffing_rules=getattr(app, 'staffing_rules', {}),
+            generator_config=generator_config,
+            previous_month_shifts=cache_entries[0].get('_prev_month_shifts') or {},
+            next_month_shifts=cache_entries[-1].get('next_month_shifts') or {},
+        )
+
+    @property
+    def months(self):
+        return [(generator_input.year, generator_input.month) for generator_input in self.generator_inputs]
+
+    def input_for(self, year, month):
+        for generator_input in self.generator_inputs:
+            if (generator_input.year, generator_input.month) == (year, month):
+                return generator_input
+        return None
+
+    def compute(self, progress_callback=None, decision_log=None):
+        """ Plant alle Monate nacheinander auf dem gemeinsamen Übertrag (ohne DB-Zugriff). """
+        from gui.shift_plan_generator import ShiftPlanGenerator
+        from .generator_decision_log import DecisionLog
+        log_from_env = decision_log is None
+        if log_from_env:
+            decision_log = DecisionLog.from_env(self)  # NEU (Regel 2): Entscheidungsprotokoll (optional)
+
+        total_span = start_span("generator.horizon", months=len(self.generator_inputs))
+        app = _SnapshotApp(self)
+        carry = HorizonCarry()
+        previous_month_shifts = self.previous_month_shifts
+        plan_diffs = []
+        try:
+            for index, generator_input in enumerate(self.generator_inputs):
+                generator = ShiftPlanGenerator(app, _HorizonDataManager(self, index, previous_month_shifts),
+                                               generator_input, self._month_progress(progress_callback, index),
+                                               None, horizon_carry=carry)
+                if decision_log is not None:
+                    decision_log.begin_month(index)
+                    generator.decision_log = decision_log
+                plan_diffs.append(generator.compute_plan())
+                if decision_log is not None:
+                    decision_log.add_result(plan_diffs[-1])
+                # Der nächste Monat sieht den generierten (nicht den gespeicherten) Stand
+                previous_month_shifts = generator.live_shifts_data
+        except Exception as e:
+            total_span.finish(error=type(e).__name__)
+            raise
+        total_span.finish(changes=sum(len(plan_diff) for plan_diff in plan_diffs))
+        if decision_log is not None and log_from_env:
+            decision_log.save_to_configured_dir()
+        return plan_diffs
+
+    def _month_progress(self, progress_callback, index):
+        """ Skaliert den Fortschritt eines Monats (0-95) auf seinen Anteil am Horizont. """
+        if progress_callback is None:
+            return None
+        count = len(self.generator_inputs)
+        generator_input = self.generator_inputs[index]
+        label = f"Monat {index + 1}/{count} ({generator_input.month:02d}/{generator_input.year})"
+
+        def report(value, text):
+            progress_callback(int((index * 95 + min(value, 95)) / count), f"{label}: {text}")
+
+        return report
+
+    def persist(self, app, result, completion_callback, progress_callback=None):
+        persist_plan_diffs(app, result, completion_callback, progress_callback)
+
+    def run(self, app, progress_callback, completion_callback):
+        """ Thread-Modus (DHF_GENERATOR_MODE=thread): berechnen und speichern im Worker-Thread. """
+        try:
+            plan_diffs = self.compute(progress_callback)
+        except Exception as e:
+            print(f"Fehler im Generierungs-Thread: {e}")
+            traceback.print_exc()
+            if completion_callback:
+                error_msg = f"Ein Fehler ist aufgetreten:\n{e}"
+                app.after(100, lambda: completion_callback(False, 0, error_msg))
+            return
+        self.persist(app, plan_diffs, completion_callback, progress_callback)
+
+
+def persist_plan_diffs(app, plan_diffs, completion_callback, progress_callback=None):
+    """
+    Speichert die PlanDiffs aller Monate in EINER Transaktion und meldet das
+    Ergebnis (payload = Liste der PlanDiffs) über app.after an den Tk-Thread.
+    Läuft im Worker-Thread (DB-Zugriff).
+    """
+    if progress_callback: progress_callback(95, "Speichere Pläne in Datenbank...")
+    save_span = start_span("generator.save", changes=sum(len(plan_diff) for plan_diff in plan_diffs))
+    try:
+        success, saved_count, error_msg = save_plan_diffs_to_db(plan_diffs)
+    except Exception as e:
+        traceback.print_exc()
+        success, saved_count, error_msg = False, 0, str(e)
+    save_span.finish(success=success)
+
+    if not success:
+        print(f"KRITISCHER FEHLER: Das Speichern der Mehrmonats-Generierung ist fehlgeschlagen: {error_msg}")
+        if completion_callback:
+            err_msg = f"Fehler beim Batch-Speichern:\n{error_msg}"
+            app.after(100, lambda: completion_callback(False, 0, err_msg))
+        return
+
+    if progress_callback: progress_callback(100, "Generierung abgeschlossen.")
+    if completion_callback:
+        app.after(100, lambda sc=saved_count, pd=list(plan_diffs): completion_callback(True, sc, None, pd))
@@ -0,0 +1,236 @@
+# gui/generator/generator_input.py
+# NEUE DATEI (Regel 2 & 4): Unveränderlicher Eingabe-Snapshot für den Generator
+#
+# Der Snapshot wird in EINEM Durchlauf direkt aus den Monats-Caches des
+# ShiftPlanDataManager gebaut (kein DB-Zugriff, keine doppelten Kopien,
+# kein strptime pro Eintrag). Generator und "Was-wäre-wenn"-Simulationen
+# arbeiten auf ihm; der Generator legt nur seine eigene Arbeitskopie an.
+
+import calendar
+from collections import defaultdict
+from datetime import date
+from types import MappingProxyType
+
+# Schichten, die für das T./6-vs-N.-Verhältnis gezählt werden (wie im Generator)
+RATIO_DAY_SHIFTS = ('T.', '6')
+RATIO_NIGHT_SHIFT = 'N.'
+
+
+def _freeze_nested(data):
+    """ Erzeugt eine schreibgeschützte Sicht {key: {key: value}} (flache Kopie je Ebene). """
+    return MappingProxyType({key: MappingProxyType(dict(inner)) for key, inner in data.items()})
+
+
+def _thaw(value):
+    """ Wandelt (verschachtelte) MappingProxyType-Sichten wieder in normale dicts um. """
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(inner) for key, inner in value.items()}
+    if isinstance(value, tuple):
+        return tuple(_thaw(inner) for inner in value)
+    return value
+
+
+def _restore_generator_input(values):
+    """ Gegenstück zu GeneratorInput.__reduce__ (friert die übertragenen dicts wieder ein). """
+    users = tuple(MappingProxyType(user) for user in values['users'])
+    values.update(
+        users=users,
+        user_data_map=MappingProxyType({user['id']: user for user in users}),
+        initial_user_hours=MappingProxyType(values['initial_user_hours']),
+        min_staffing=tuple(MappingProxyType(day) for day in values['min_staffing']),
+    )
+    # (Ältere exportierte Jobs ohne Engpass-Index -> None)
+    if values.setdefault('criticality', None) is not None:
+        values['criticality'] = MappingProxyType(values['criticality'])
+    for name in _NESTED_FIELDS:
+        values[name] = _freeze_nested(values[name])
+    return GeneratorInput(**values)
+
+
+# Felder der Form {key: {key: value}}
+_NESTED_FIELDS = ('shifts', 'loaded_shifts', 'locks', 'vacations', 'wunschfrei',
+                  'initial_shift_counts', 'initial_shift_counts_ratio')
+
+
+class GeneratorInput:
+    """
+    Schreibgeschützte Momentaufnahme aller Eingabedaten einer Generierung.
+
+    Attribute (alle read-only):
+        year, month, days_in_month, month_prefix ('YYYY-MM-')
+        users               Tuple der (sichtbaren) Benutzer in Planreihenfolge
+        user_data_map       {user_id_int: user}
+        shifts              {user_id_str: {date_str: abbrev}}  (inkl. angewendeter Locks)
+        loaded_shifts       {user_id_str: {date_str: abbrev}}  (Stand wie geladen, Basis für die PlanDiff)
+        locks               {user_id_str: {date_str: abbrev}}
+        vacations           {user_id_str: {date_obj: status}}
+        wunschfrei          {user_id_str: {date_str: (status, shift, by, ...)}}
+        holidays_in_month   frozenset(date_obj)
+        min_staffing        Tuple (Index = Tag - 1) von {abbrev: anzahl}
+        initial_user_hours  {user_id_int: stunden}
+        initial_shift_counts       {user_id_int: {abbrev: anzahl}}  (nur geplante Schichten)
+        initial_shift_counts_ratio {user_id_int: {'T_OR_6'|'N_DOT': anzahl}}
+        criticality         {(date_str, abbrev): frozenset(user_id_str)} aus dem Engpass-Index
+                            (gui/criticality_index.py) oder None (Index deckt den Monat nicht ab)
+    """
+
+    __slots__ = ('year', 'month', 'days_in_month', 'month_prefix', 'users', 'user_data_map',
+                 'shifts', 'loaded_shifts', 'locks', 'vacations', 'wunschfrei', 'holidays_in_month',
+                 'min_staffing', 'initial_user_hours', 'initial_shift_counts',
+                 'initial_shift_counts_ratio', 'criticality', '_frozen')
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            if name != '_frozen':
+                object.__setattr__(self, name, values[name])
+        object.__setattr__(self, '_frozen', True)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GeneratorInput ist unveränderlich.")
+
+    def __delattr__(self, name):
+        raise AttributeError("GeneratorInput ist unveränderlich.")
+
+    def __reduce__(self):
+        # NEU (Regel 2): MappingProxyType ist nicht picklebar. Für den Generator-Prozess
+        # werden die Daten als normale dicts übertragen und dort wieder eingefroren.
+        values = {name: _thaw(getattr(self, name)) for name in self.__slots__ if name != '_frozen'}
+        return _restore_generator_input, (values,)
+
+    def is_in_month(self, date_str):
+        """ Schneller Monats-Check für 'YYYY-MM-DD'-Strings (ersetzt strptime). """
+        return isinstance(date_str, str) and date_str.startswith(self.month_prefix)
+
+    def min_staffing_for_day(self, day):
+        """ Gibt eine (veränderbare) Kopie der Mindestbesetzung für den Tag zurück. """
+        return dict(self.min_staffing[day - 1])
+
+    def copy_shifts(self):
+        """ Arbeitskopie des Plans für den Generator: {user_id_str: {date_str: abbrev}}. """
+        return defaultdict(dict, {uid: dict(day_data) for uid, day_data in self.shifts.items()})
+
+    def copy_user_hours(self):
+        return defaultdict(float, self.initial_user_hours)
+
+    def copy_shift_counts(self):
+        return defaultdict(lambda: defaultdict(int),
+                           {uid: defaultdict(int, counts) for uid, counts in self.initial_shift_counts.items()})
+
+    def copy_shift_counts_ratio(self):
+        return defaultdict(lambda: defaultdict(int),
+                           {uid: defaultdict(int, counts) for uid, counts in self.initial_shift_counts_ratio.items()})
+
+
+def build_generator_input(data_manager, year, month, shift_hours, shifts_to_plan):
+    """
+    Baut den GeneratorInput aus den aktiven Monats-Caches des DataManagers.
+
+    Setzt voraus, dass der DataManager den Monat (year, month) geladen hat
+    (sonst ValueError). Es findet KEIN Datenbankzugriff statt.
+    """
+    dm = data_manager
+    if (dm.year, dm.month) != (year, month):
+        raise ValueError(f"Monat {year}-{month:02d} ist nicht im DataManager geladen "
+                         f"(aktiv: {dm.year}-{dm.month:02d}).")
+
+    days_in_month = calendar.monthrange(year, month)[1]
+    month_prefix = f"{year:04d}-{month:02d}-"
+
+    # 1. Benutzer (wie get_ordered_users_for_schedule: nur sichtbare, bereits sortiert)
+    users = tuple(MappingProxyType(dict(u)) for u in dm.cached_users_for_month
+                  if u.get('is_visible', 1) == 1)
+    user_data_map = {u['id']: u for u in users}
+
+    # 2. Plan + Locks (Locks des Monats haben Vorrang) und Start-Zähler in einem Durchlauf
+    locks = dm.locked_shifts_cache or {}
+    loaded_shifts = _freeze_nested(dm.shift_schedule_data)
+    shifts = {uid: dict(day_data) for uid, day_data in loaded_shifts.items()}
+    for uid, lock_data in locks.items():
+        for date_str, locked_shift in lock_data.items():
+            if locked_shift and isinstance(date_str, str) and date_str.startswith(month_prefix):
+                shifts.setdefault(uid, {})[date_str] = locked_shift
+
+    user_hours = defaultdict(float)
+    shift_counts = defaultdict(lambda: defaultdict(int))
+    shift_counts_ratio = defaultdict(lambda: defaultdict(int))
+    for uid, day_data in shifts.items():
+        try:
+            uid_int = int(uid)
+        except ValueError:
+            continue
+        if uid_int not in user_data_map:
+            continue
+        for date_str, shift in day_data.items():
+            if not (isinstance(date_str, str) and date_str.startswith(month_prefix)):
+                continue
+            hours = shift_hours.get(shift, 0.0)
+            if hours > 0:
+                user_hours[uid_int] += hours
+            if shift in RATIO_DAY_SHIFTS:
+                shift_counts_ratio[uid_int]['T_OR_6'] += 1
+            if shift == RATIO_NIGHT_SHIFT:
+                shift_counts_ratio[uid_int]['N_DOT'] += 1
+            if shift in shifts_to_plan:
+                shift_counts[uid_int][shift] += 1
+
+    # NEU (Regel 2): Angebot je Tag/Schicht aus dem Engpass-Index (statt Neuberechnung im Generator)
+    criticality_index = getattr(dm, 'criticality_index', None)
+    criticality = criticality_index.month_slice(year, month, shifts_to_plan) if criticality_index else None
+
+    # 3. Feiertage und Mindestbesetzung (gleiche Quelle wie die Plananzeige)
+    rules_source = dm.app.app if hasattr(dm.app, 'app') else dm.app
+    holidays_in_month = set()
+    min_staffing = []
+    for day in range(1, days_in_month + 1):
+        day_obj = date(year, month, day)
+        if hasattr(rules_source, 'is_holiday') and rules_source.is_holiday(day_obj):
+            holidays_in_month.add(day_obj)
+        min_staffing.append(MappingProxyType(dm.get_min_staffing_for_date(day_obj) or {}))
+
+    return GeneratorInput(
+        year=year, month=month, days_in_month=days_in_month, month_prefix=month_prefix,
+        users=users,
+        user_data_map=MappingProxyType(user_data_map),
+        shifts=_freeze_nested(shifts),
+        loaded_shifts=loaded_shifts,
+        locks=_freeze_nested(locks),
+        vacations=_freeze_nested(dm.processed_vacations or {}),
+        wunschfrei=_freeze_nested(dm.wunschfrei_data or {}),
+        holidays_in_month=frozenset(holidays_in_month),
+        min_staffing=tuple(min_staffing),
+        initial_user_hours=MappingProxyType(dict(user_hours)),
+        initial_shift_counts=_freeze_nested(shift_counts),
+        initial_shift_counts_ratio=_freeze_nested(shift_counts_ratio),
+        criticality=MappingProxyType(criticality) if criticality is not None else None,
+    )
+
+
+class _CachedMonthSource:
+    """
+    NEU (Regel 2): Stellt einen P5-Cache-Eintrag (siehe
+    ShiftPlanDataManager._build_month_cache_entry) mit den Attributnamen der
+    aktiven DM-Caches bereit, damit build_generator_input auch für Monate
+    arbeitet, die gerade nicht angezeigt werden (Mehrmonats-Generierung).
+    """
+
+    def __init__(self, data_manager, year, month, cache_entry):
+        self.app = data_manager.app
+        self.year = year
+        self.month = month
+        self.cached_users_for_month = cache_entry.get('cached_users_for_month') or []
+        self.locked_shifts_cache = cache_entry.get('locked_shifts') or {}
+        self.shift_schedule_data = cache_entry.get('shift_schedule_data') or {}
+        self.processed_vacations = cache_entry.get('processed_vacations') or {}
+        self.wunschfrei_data = cache_entry.get('wunschfrei_data') or {}
+        # Mindestbesetzung hängt nur von den Besetzungsregeln und Feiertagen ab (nicht vom aktiven Monat)
+        self.get_min_staffing_for_date = data_manager.get_min_staffing_for_date
+        self.criticality_index = getattr(data_manager, 'criticality_index', None)
+
+
+def build_generator_input_from_cache(data_manager, year, month, cache_entry, shift_hours, shifts_to_plan):
+    """
+    Wie build_generator_input, aber aus einem Monats-Cache-Eintrag statt aus den
+    aktiven Caches (der angezeigte Monat muss nicht (year, month) sein).
+    """
+    return build_generator_input(_CachedMonthSource(data_manager, year, month, cache_entry), year, month,
+                                 shift_hours, shifts_to_plan)
@@ -87,4 +87,74 @@ def save_generation_batch_to_db(live_shifts_data, year, month):
     finally:
         if conn and conn.is_connected():
             cursor.close()
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+# --- NEU (Regel 2): Minimales Speichern (nur Differenz) ---
+def save_plan_diff_to_db(plan_diff):
+    """
+    Schreibt nur die neuen und geänderten Zellen (und Löschungen) einer
+    PlanDiff in EINER Transaktion. Unveränderte Zellen werden nicht angefasst.
+    Gibt (success, anzahl_geschriebener_zellen, fehlertext) zurück.
+    """
+    return save_plan_diffs_to_db([plan_diff] if plan_diff is not None else [])
+
+
+def save_plan_diffs_to_db(plan_diffs):
+    """
+    NEU (Regel 2): Wie save_plan_diff_to_db, aber für mehrere Monate
+    (Mehrmonats-Generierung): alle PlanDiffs in EINER Transaktion - entweder
+    werden alle Monate gespeichert oder keiner.
+    Gibt (success, anzahl_geschriebener_zellen, fehlertext) zurück.
+    """
+    plan_diffs = [plan_diff for plan_diff in plan_diffs if plan_diff is not None and not plan_diff.is_empty()]
+    if not plan_diffs:
+        print("[GeneratorPersistence] Keine Änderungen gegenüber dem Ausgangsplan. Nichts zu speichern.")
+        return True, 0, None
+
+    upserts = []
+    deletes = []
+    for plan_diff in plan_diffs:
+        upserts += [(user_id, date_str, new_shift) for user_id, date_str, new_shift in plan_diff.inserted]
+        upserts += [(user_id, date_str, new_shift) for user_id, date_str, _, new_shift in plan_diff.changed]
+        deletes += [(user_id, date_str) for user_id, date_str, _ in plan_diff.removed]
+
+    conn = create_connection()
+    if conn is None:
+        return False, 0, "Keine Datenbankverbindung."
+
+    cursor = None
+    try:
+        cursor = conn.cursor()
+
+        if upserts:
+            # (Upsert, falls zwischenzeitlich jemand dieselbe Zelle angelegt hat)
+            cursor.executemany(
+                "INSERT INTO shift_schedule (user_id, shift_date, shift_abbrev) VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE shift_abbrev = VALUES(shift_abbrev)",
+                upserts
+            )
+        if deletes:
+            cursor.executemany("DELETE FROM shift_schedule WHERE user_id = %s AND shift_date = %s", deletes)
+
+        conn.commit()
+
+        written = len(upserts) + len(deletes)
+        for plan_diff in plan_diffs:
+            print(f"[GeneratorPersistence] Differenz {plan_diff.year}-{plan_diff.month:02d} gespeichert "
+                  f"({plan_diff.summary()}).")
+        return True, written, None
+
+    except mysql.connector.Error as e:
+        print(f"DB Error on save_plan_diffs_to_db: {e}")
+        conn.rollback()
+        return False, 0, str(e)
+    except Exception as e:
+        print(f"Genereller Fehler in save_plan_diffs_to_db: {e}")
+        conn.rollback()
+        return False, 0, str(e)
+    finally:
+        if conn and conn.is_connected():
+            if cursor:
+                cursor.close()
+            conn.close()
+# --- ENDE NEU ---
@@ -4,7 +4,7 @@
 import calendar
 import traceback
 from collections import defaultdict
-from datetime import date, timedelta, datetime
+from datetime import date, datetime
 
 
 class GeneratorPrePlanner:
@@ -36,6 +36,11 @@ class GeneratorPrePlanner:
         days_in_month = calendar.monthrange(self.gen.year, self.gen.month)[1]
         start_day = max(1, days_in_month - self.gen.CRITICAL_LOOKAHEAD_DAYS + 1)
         print(f"  [Krit-Check Vorfilter] Prüfe Tage {start_day} bis {days_in_month}...")
+
+        # NEU (Regel 2): Angebot aus dem Engpass-Index (Snapshot) statt Schleife über alle Mitarbeiter
+        criticality = getattr(self.gen.input, 'criticality', None)
+        if criticality is not None:
+            return self._critical_from_index(criticality, start_day, days_in_month)
         for day in range(start_day, days_in_month + 1):
             current_date_obj = date(self.gen.year, self.gen.month, day)
             date_str = current_date_obj.strftime('%Y-%m-%d')
@@ -133,6 +138,34 @@ class GeneratorPrePlanner:
                             f"  [Krit-Check Vorfilter {date_str}-{shift_abbrev}] Potenziell Kritisch! Benötigt: {required}, Verfügbar: {available}, Puffer: {self.gen.CRITICAL_BUFFER}")
         return potential_critical
 
+    def _critical_from_index(self, criticality, start_day, days_in_month):
+        """
+        NEU (Regel 2): Wie identify_potential_critical_shifts, aber Urlaub, Wunschfrei
+        und Ausschlüsse stecken bereits im Angebot des Engpass-Index
+        (gui/criticality_index.py). Hier werden nur die Monatsdaten abgezogen:
+        Mitarbeiter, die nicht im Plan stehen, und gesicherte Schichten.
+        """
+        potential_critical = set()
+        plan_user_ids = {str(user_dict['id']) for user_dict in self.gen.all_users if user_dict.get('id') is not None}
+        for day in range(start_day, days_in_month + 1):
+            current_date_obj = date(self.gen.year, self.gen.month, day)
+            date_str = current_date_obj.strftime('%Y-%m-%d')
+            min_staffing_today = self.gen.staffing_for_day(current_date_obj)
+            if not min_staffing_today: continue
+
+            locked_today = {uid_str for uid_str, lock_data in self.gen.locked_shifts_data.items()
+                            if lock_data.get(date_str) is not None}
+            for shift_abbrev in self.gen.shifts_to_plan:
+                required = min_staffing_today.get(shift_abbrev, 0)
+                if required <= 0: continue
+                available = len((criticality.get((date_str, shift_abbrev), frozenset()) & plan_user_ids)
+                                - locked_today)
+                if available <= required + self.gen.CRITICAL_BUFFER:
+                    potential_critical.add((current_date_obj, shift_abbrev))
+                    print(
+                        f"  [Krit-Check Vorfilter {date_str}-{shift_abbrev}] Potenziell Kritisch! Benötigt: {required}, Verfügbar: {available}, Puffer: {self.gen.CRITICAL_BUFFER} (Index)")
+        return potential_critical
+
     def get_actually_available_count(self, target_date_obj, target_shift_abbrev, live_user_hours):
         """
         Zählt, wie viele Mitarbeiter *aktuell* die Ziels-Schicht machen könnten.
@@ -148,7 +181,6 @@ class GeneratorPrePlanner:
         print(f"    [DynCheck Detail {date_str}-{target_shift_abbrev}] Starte Zählung...")  # DEBUG START
 
         users_unavailable_on_target_day = set()
-        occupied_dogs = defaultdict(list)
         unavailable_reasons = {}  # DEBUG: Speichert Gründe
 
         # Status Quo für den Zielt-Tag sammeln
@@ -158,10 +190,6 @@ class GeneratorPrePlanner:
                 if shift and shift not in self.gen.free_shifts_indicators:
                     users_unavailable_on_target_day.add(uid_str);
                     unavailable_reasons[uid_str] = f"Hat Schicht {shift}"  # DEBUG
-                    uid_int = int(uid_str);
-                    user_dog = self.gen.user_data_map.get(uid_int, {}).get('diensthund');
-                    if user_dog and user_dog != '---': occupied_dogs[user_dog].append(
-                        {'user_id': uid_int, 'shift': shift})
             if self.gen.vacation_requests.get(uid_str, {}).get(target_date_obj) in ['Approved', 'Genehmigt']:
                 users_unavailable_on_target_day.add(uid_str);
                 unavailable_reasons[uid_str] = "Urlaub"  # DEBUG
@@ -185,6 +213,9 @@ class GeneratorPrePlanner:
             # --- ENDE NEU ---
 
         # Jeden Mitarbeiter gegen harte Regeln prüfen
+        # KORREKTUR (Regel 2 & 4): Regel-Satz der Regel-Engine (Hund, N->T/6, N-F-T, Ausschluss, Kette, Ruhezeit, MaxHrs)
+        rules = self.gen.pre_plan_rules
+        target_day = target_date_obj.day
         for user_dict in self.gen.all_users:
             user_id_int = user_dict.get('id');
             if user_id_int is None: continue
@@ -195,36 +226,8 @@ class GeneratorPrePlanner:
                     f"      - User {user_id_str}: Nicht verfügbar ({unavailable_reasons.get(user_id_str, 'Unbekannt')})")  # DEBUG
                 continue
 
-            user_pref = self.gen.user_preferences[user_id_str];
-            user_dog = user_dict.get('diensthund');
             current_hours = live_user_hours.get(user_id_int, 0.0);
-            hours_for_this_shift = self.gen.shift_hours.get(target_shift_abbrev, 0.0);
-            max_hours_override = user_pref.get('max_monthly_hours');
-            skip_reason = None;
-            prev_date_obj = target_date_obj - timedelta(days=1);
-            two_days_ago_obj = target_date_obj - timedelta(days=2);
-            prev_shift = self.helpers.get_previous_shift(user_id_str, prev_date_obj);
-            one_day_ago_raw_shift = self.helpers.get_previous_raw_shift(user_id_str, prev_date_obj);
-            two_days_ago_shift = self.helpers.get_previous_shift(user_id_str, two_days_ago_obj)
-
-            # Harte Regeln
-            if user_dog and user_dog != '---' and user_dog in occupied_dogs and any(
-                    self.helpers.check_time_overlap_optimized(target_shift_abbrev, a['shift']) for a in
-                    occupied_dogs[user_dog]): skip_reason = "Dog"
-
-            # N->T/6 Block
-            if not skip_reason and prev_shift == "N." and target_shift_abbrev in ["T.", "6"]: skip_reason = "N->T/6"
-
-            if not skip_reason and target_shift_abbrev == "T." and one_day_ago_raw_shift in self.gen.free_shifts_indicators and two_days_ago_shift == "N.": skip_reason = "N-F-T"
-            if not skip_reason and target_shift_abbrev in user_pref.get('shift_exclusions',
-                                                                        []): skip_reason = f"Excl({target_shift_abbrev})"
-            consecutive_days = 0
-            if not skip_reason: consecutive_days = self.helpers.count_consecutive_shifts(user_id_str, target_date_obj);
-            if consecutive_days >= self.gen.HARD_MAX_CONSECUTIVE_SHIFTS: skip_reason = f"MaxCons({consecutive_days})"
-            if not skip_reason and self.gen.mandatory_rest_days > 0 and consecutive_days == 0 and not self.helpers.check_mandatory_rest(
-                    user_id_str, target_date_obj): skip_reason = f"Rest({self.gen.mandatory_rest_days}d)"
-            max_hours_check = max_hours_override if max_hours_override is not None else self.gen.MAX_MONTHLY_HOURS
-            if not skip_reason and current_hours + hours_for_this_shift > max_hours_check: skip_reason = f"MaxHrs({current_hours:.1f}+{hours_for_this_shift:.1f}>{max_hours_check})"
+            skip_reason = rules.first_violation(user_id_str, target_day, target_shift_abbrev)
 
             if not skip_reason:
                 count += 1
@@ -247,8 +250,7 @@ class GeneratorPrePlanner:
         date_str = critical_date_obj.strftime('%Y-%m-%d')
         print(f"    [Pre-Plan] Fülle {critical_shift_abbrev} am {date_str} (benötigt: {needed_count})")
         users_unavailable_this_call = set();
-        assignments_on_critical_date = defaultdict(set);
-        dogs_assigned_on_critical_date = defaultdict(list)
+        assignments_on_critical_date = defaultdict(set)
         for uid_str, day_data in self.gen.live_shifts_data.items():  # Status Quo für diesen Tag holen
             if date_str in day_data:
                 shift = day_data[date_str]
@@ -256,9 +258,6 @@ class GeneratorPrePlanner:
                 assignments_on_critical_date[shift].add(uid_int);
                 users_unavailable_this_call.add(
                     uid_str);
-                user_dog = self.gen.user_data_map.get(uid_int, {}).get('diensthund');
-                if user_dog and user_dog != '---': dogs_assigned_on_critical_date[user_dog].append(
-                    {'user_id': uid_int, 'shift': shift})
             if self.gen.vacation_requests.get(uid_str, {}).get(critical_date_obj) in ['Approved', 'Genehmigt']:
                 users_unavailable_this_call.add(uid_str)
             elif date_str in self.gen.wunschfrei_requests.get(uid_str, {}):
@@ -273,6 +272,8 @@ class GeneratorPrePlanner:
                 users_unavailable_this_call.add(uid_str)
             # --- ENDE NEU ---
 
+        rules = self.gen.pre_plan_rules  # KORREKTUR (Regel 2 & 4): Regel-Satz der Regel-Engine
+        critical_day = critical_date_obj.day
         while assigned_count < needed_count and search_attempts < len(
                 self.gen.all_users) + 1:  # Kandidaten suchen und zuweisen
             search_attempts += 1;
@@ -282,45 +283,9 @@ class GeneratorPrePlanner:
                 if user_id_int is None: continue
                 user_id_str = str(user_id_int)
                 if user_id_str in users_unavailable_this_call: continue
-                user_pref = self.gen.user_preferences[user_id_str];
                 user_dog = user_dict.get('diensthund');
                 current_hours = live_user_hours.get(user_id_int, 0.0);
-                hours_for_this_shift = self.gen.shift_hours.get(critical_shift_abbrev, 0.0);
-                max_hours_override = user_pref.get('max_monthly_hours');
-                skip_reason = None;
-                prev_date_obj = critical_date_obj - timedelta(days=1);
-                two_days_ago_obj = critical_date_obj - timedelta(days=2);
-                prev_shift = self.helpers.get_previous_shift(user_id_str, prev_date_obj);
-                one_day_ago_raw_shift = self.helpers.get_previous_raw_shift(user_id_str, prev_date_obj);
-                two_days_ago_shift = self.helpers.get_previous_shift(user_id_str, two_days_ago_obj)
-
-                # --- KORREKTUR (Regel 1): Diensthund-Logik ---
-                if user_dog and user_dog != '---' and user_dog in dogs_assigned_on_critical_date:
-                    for assigned_dog_shift in dogs_assigned_on_critical_date[user_dog]:
-                        assigned_shift = assigned_dog_shift['shift']
-                        if critical_shift_abbrev == assigned_shift:
-                            skip_reason = "Dog (Same Shift)"
-                            break
-                        if self.helpers.check_time_overlap_optimized(critical_shift_abbrev, assigned_shift):
-                            skip_reason = "Dog (Overlap)"
-                            break
-                # --- ENDE KORREKTUR ---
-
-                # N->T/6 Block
-                if not skip_reason and prev_shift == "N." and critical_shift_abbrev in ["T.",
-                                                                                        "6"]: skip_reason = "N->T/6"
-
-                if not skip_reason and critical_shift_abbrev == "T." and one_day_ago_raw_shift in self.gen.free_shifts_indicators and two_days_ago_shift == "N.": skip_reason = "N-F-T"
-                if not skip_reason and critical_shift_abbrev in user_pref.get('shift_exclusions',
-                                                                              []): skip_reason = "Excl"
-                consecutive_days = 0
-                if not skip_reason: consecutive_days = self.helpers.count_consecutive_shifts(user_id_str,
-                                                                                             critical_date_obj);
-                if consecutive_days >= self.gen.HARD_MAX_CONSECUTIVE_SHIFTS: skip_reason = "MaxCons"
-                if not skip_reason and self.gen.mandatory_rest_days > 0 and consecutive_days == 0 and not self.helpers.check_mandatory_rest(
-                        user_id_str, critical_date_obj): skip_reason = "Rest"
-                max_hours_check = max_hours_override if max_hours_override is not None else self.gen.MAX_MONTHLY_HOURS
-                if not skip_reason and current_hours + hours_for_this_shift > max_hours_check: skip_reason = "MaxHrs"
+                skip_reason = rules.first_violation(user_id_str, critical_day, critical_shift_abbrev)
 
                 if not skip_reason and user_id_int in self.gen.avoid_priority_map:
                     for prio, avoid_id in self.gen.avoid_priority_map[user_id_int]:
@@ -341,9 +306,8 @@ class GeneratorPrePlanner:
             user_id_int = chosen_user['id'];
             user_id_str = chosen_user['id_str'];
             user_dog = chosen_user['dog']
-            if user_id_str not in self.gen.live_shifts_data: self.gen.live_shifts_data[user_id_str] = {}
-            # WICHTIG: Schreibe direkt in die live_shifts_data der Generator-Instanz
-            self.gen.live_shifts_data[user_id_str][date_str] = critical_shift_abbrev;
+            # WICHTIG: Schreibe direkt in die live_shifts_data der Generator-Instanz (und das MonthGrid)
+            self.gen.record_assignment(user_id_str, date_str, critical_shift_abbrev)
             users_unavailable_this_call.add(user_id_str);
             hours_added = self.gen.shift_hours.get(critical_shift_abbrev, 0.0);
             live_user_hours[user_id_int] += hours_added;
@@ -353,7 +317,5 @@ class GeneratorPrePlanner:
             assignments_on_critical_date[critical_shift_abbrev].add(user_id_int)
             print(
                 f"      [Pre-Plan] OK (In-Memory): User {user_id_int} -> {critical_shift_abbrev} @ {date_str}. (Hrs: {live_user_hours[user_id_int]:.1f})")
-            if user_dog and user_dog != '---': dogs_assigned_on_critical_date[user_dog].append(
-                {'user_id': user_id_int, 'shift': critical_shift_abbrev})
 
         return assigned_count
\ No newline at end of file
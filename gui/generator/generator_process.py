@@ -0,0 +1,259 @@
+# gui/generator/generator_process.py
+# NEU (Regel 2): Plan-Generierung in einem eigenen Prozess
+#
+# Im Thread-Modus halten die Scoring-Schleifen des Generators den GIL und die
+# Tk-Oberfläche ruckelt während der gesamten Generierung. Hier läuft die
+# Berechnung (ShiftPlanGenerator.compute_plan) in einem separaten Prozess:
+#   - Eingabe: GeneratorJob (Snapshot + Konfiguration, picklebar, kein DB-Zugriff im Prozess)
+#   - Fortschritt: über eine Pipe, im Prozess gedrosselt, im Tk-Thread per after() abgeholt
+#   - Ergebnis: nur die PlanDiff; gespeichert wird wie bisher im Hauptprozess
+#   - Abbruch: "cancel" über die Pipe, nach kurzer Frist terminate()
+#
+# Modus (optional per Umgebungsvariable):
+#     DHF_GENERATOR_MODE=process     eigener Prozess (Standard)
+#     DHF_GENERATOR_MODE=thread      bisheriger Worker-Thread
+
+import multiprocessing
+import os
+import time
+import traceback
+
+from utils.instrumentation import get_logger
+
+_log = get_logger("generator")
+
+MODE_ENV_VAR = "DHF_GENERATOR_MODE"
+EXPORT_ENV_VAR = "DHF_GENERATOR_EXPORT_DIR"  # Anonymisierte Jobs für den Benchmark
+PROGRESS_INTERVAL_S = 0.1  # Höchstens 10 Fortschrittsmeldungen pro Sekunde über die Pipe
+POLL_INTERVAL_MS = 100  # Abholen der Meldungen im Tk-Thread
+CANCEL_GRACE_S = 2.0  # Danach wird der Prozess hart beendet
+
+# Meldungen Prozess -> Hauptprozess
+MSG_PROGRESS = "progress"
+MSG_DONE = "done"
+MSG_ERROR = "error"
+MSG_CANCELLED = "cancelled"
+# Meldung Hauptprozess -> Prozess
+MSG_CANCEL = "cancel"
+
+
+class GenerationCancelled(Exception):
+    """ Wird im Generator-Prozess ausgelöst, wenn der Benutzer abgebrochen hat. """
+
+
+def use_process_mode():
+    return os.environ.get(MODE_ENV_VAR, "process").strip().lower() != "thread"
+
+
+class GeneratorJob:
+    """
+    Alles, was der Generator außerhalb des Snapshots braucht - als einfache,
+    picklebare Daten (Schichtarten, Besetzungsregeln, Generator-Konfiguration,
+    Vor-/Folgemonat). Wird im Hauptprozess gebaut, damit der Prozess keine
+    DB-Verbindung benötigt.
+    """
+
+    def __init__(self, generator_input, shift_types_data, staffing_rules, generator_config,
+                 previous_month_shifts, next_month_shifts):
+        self.generator_input = generator_input
+        self.shift_types_data = shift_types_data
+        self.staffing_rules = staffing_rules
+        self.generator_config = generator_config
+        self.previous_month_shifts = previous_month_shifts
+        self.next_month_shifts = next_month_shifts
+
+    @classmethod
+    def from_app(cls, app, data_manager, generator_input):
+        """ Sammelt die Daten aus Bootloader und DataManager (wie sie der Generator im Thread liest). """
+        generator_config = {}
+        try:
+            generator_config = data_manager.get_generator_config() or {}
+        except Exception as e:
+            print(f"[FEHLER] Konnte Generator-Konfiguration nicht laden: {e}")
+        job = cls(
+            generator_input=generator_input,
+            shift_types_data=dict(app.shift_types_data),
+            staffing_rules=getattr(app, 'staffing_rules', {}),
+            generator_config=generator_config,
+            previous_month_shifts=data_manager.get_previous_month_shifts() or {},
+            next_month_shifts=data_manager.get_next_month_shifts() or {},
+        )
+        # NEU (Regel 2): Optional anonymisiert für den Benchmark ablegen (siehe generator_benchmark.py)
+        export_dir = os.environ.get(EXPORT_ENV_VAR)
+        if export_dir:
+            try:
+                from .generator_benchmark import export_job
+                print(f"[Generator] Job exportiert: {export_job(job, export_dir)}")
+            except Exception as e:
+                print(f"[FEHLER] Job-Export fehlgeschlagen: {e}")
+        return job
+
+    def compute(self, progress_callback=None, decision_log=None):
+        """
+        Berechnet die PlanDiff auf dem Snapshot (ohne DB-Zugriff). Läuft im
+        Generator-Prozess; der Generator wird erst hier importiert.
+        NEU (Regel 2): Mit DHF_DECISION_LOG_DIR (oder übergebenem 'decision_log',
+        z.B. beim Nachspielen) werden die Entscheidungen protokolliert.
+        """
+        from gui.shift_plan_generator import ShiftPlanGenerator
+        from .generator_decision_log import DecisionLog
+        log_from_env = decision_log is None
+        if log_from_env:
+            decision_log = DecisionLog.from_env(self)
+        generator = ShiftPlanGenerator(_SnapshotApp(self), _SnapshotDataManager(self), self.generator_input,
+                                       progress_callback, None)
+        generator.decision_log = decision_log
+        plan_diff = generator.compute_plan()
+        if decision_log is not None:
+            decision_log.add_result(plan_diff)
+            if log_from_env:
+                decision_log.save_to_configured_dir()
+        return plan_diff
+
+    def persist(self, app, result, completion_callback, progress_callback=None):
+        """ Speichert das Ergebnis von compute() (Worker-Thread im Hauptprozess, DB-Zugriff). """
+        from gui.shift_plan_generator import ShiftPlanGenerator
+        ShiftPlanGenerator.persist_plan_diff(app, result, completion_callback, progress_callback)
+
+
+class _SnapshotApp:
+    """ Ersatz für den Bootloader im Generator-Prozess (nur gelesene Attribute). """
+
+    def __init__(self, job):
+        self.shift_types_data = job.shift_types_data
+        self.staffing_rules = job.staffing_rules
+
+
+class _SnapshotDataManager:
+    """ Ersatz für den ShiftPlanDataManager im Generator-Prozess (nur gelesene Daten). """
+
+    def __init__(self, job):
+        self._job = job
+
+    def get_generator_config(self):
+        return self._job.generator_config
+
+    def get_previous_month_shifts(self):
+        return self._job.previous_month_shifts
+
+    def get_next_month_shifts(self):
+        return self._job.next_month_shifts
+
+    def get_min_staffing_for_date(self, current_date):
+        generator_input = self._job.generator_input
+        if (current_date.year, current_date.month) != (generator_input.year, generator_input.month):
+            return {}
+        return generator_input.min_staffing_for_day(current_date.day)
+
+
+def _worker_main(job, conn):
+    """ Einstiegspunkt im Generator-Prozess. """
+    last_sent = [0.0]
+
+    def report_progress(value, text):
+        # Wird pro Tag/Schicht aufgerufen: Abbruch prüfen, Fortschritt gedrosselt senden
+        if conn.poll() and conn.recv() == MSG_CANCEL:
+            raise GenerationCancelled()
+        now = time.monotonic()
+        if now - last_sent[0] >= PROGRESS_INTERVAL_S:
+            last_sent[0] = now
+            conn.send((MSG_PROGRESS, value, text))
+
+    try:
+        # (GeneratorJob: eine PlanDiff; HorizonJob: Liste von PlanDiffs, siehe generator_horizon.py)
+        conn.send((MSG_DONE, job.compute(report_progress)))
+    except GenerationCancelled:
+        conn.send((MSG_CANCELLED,))
+    except Exception as e:
+        traceback.print_exc()
+        conn.send((MSG_ERROR, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class GeneratorProcessRunner:
+    """
+    Startet den Generator-Prozess und liefert Fortschritt und Ergebnis im
+    Tk-Thread aus (Abholen per widget.after, kein zusätzlicher Thread).
+
+        on_progress(value, text)
+        on_finished(status, payload)   status: "done" (payload=job.compute()), "error" (payload=Text), "cancelled"
+    """
+
+    def __init__(self, widget, job, on_progress, on_finished):
+        self.widget = widget
+        self.job = job
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.process = None
+        self._conn = None
+        self._cancel_requested_at = None
+        self._finished = False
+
+    @property
+    def is_running(self):
+        return self.process is not None and not self._finished
+
+    def start(self):
+        ctx = multiprocessing.get_context("spawn")  # Gleiches Verhalten unter Windows und Linux
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(self.job, child_conn), name="dhf-generator",
+                                   daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        print(f"[Generator] Prozess gestartet (PID {self.process.pid}).")
+        self.widget.after(POLL_INTERVAL_MS, self._poll)
+
+    def cancel(self):
+        """ Bittet den Prozess um Abbruch (wird beim nächsten Tag/Schicht-Schritt wirksam). """
+        if not self.is_running or self._cancel_requested_at is not None:
+            return
+        self._cancel_requested_at = time.monotonic()
+        try:
+            self._conn.send(MSG_CANCEL)
+        except (OSError, EOFError):
+            pass
+
+    def _poll(self):
+        if self._finished:
+            return
+        latest_progress = None
+        try:
+            while self._conn.poll():
+                message = self._conn.recv()
+                if message[0] == MSG_PROGRESS:
+                    latest_progress = message  # Nur die neueste Meldung anzeigen
+                else:
+                    self._finish(message[0], message[1] if len(message) > 1 else None)
+                    return
+        except (EOFError, OSError):
+            # Pipe geschlossen ohne Ergebnis (Prozess abgestürzt oder beendet)
+            status = MSG_CANCELLED if self._cancel_requested_at is not None else MSG_ERROR
+            self._finish(status, f"Generator-Prozess unerwartet beendet (Exit-Code {self.process.exitcode}).")
+            return
+
+        if latest_progress is not None:
+            self.on_progress(latest_progress[1], latest_progress[2])
+
+        if self._cancel_requested_at is not None and time.monotonic() - self._cancel_requested_at > CANCEL_GRACE_S:
+            _log.info("Generator-Prozess reagiert nicht auf Abbruch, wird beendet.")
+            self.process.terminate()
+            self._finish(MSG_CANCELLED, None)
+            return
+
+        if not self.process.is_alive() and not self._conn.poll():
+            self._finish(MSG_ERROR, f"Generator-Prozess unerwartet beendet (Exit-Code {self.process.exitcode}).")
+            return
+
+        self.widget.after(POLL_INTERVAL_MS, self._poll)
+
+    def _finish(self, status, payload):
+        self._finished = True
+        try:
+            self._conn.close()
+        except OSError:
+            pass
+        self.process.join(timeout=1.0)
+        print(f"[Generator] Prozess beendet: {status}")
+        self.on_finished(status, payload)
@@ -0,0 +1,194 @@
+# gui/generator/generator_replay.py
+# NEU (Regel 2): Nachspielen eines Entscheidungsprotokolls (generator_decision_log.py)
+#
+# Baut den Lauf aus dem protokollierten Eingabe-Snapshot ohne Datenbank und
+# ohne Oberfläche nach (gleiche Umgebungsvariablen wie beim Original) und
+# vergleicht Eintrag für Eintrag: Kandidaten-Rangfolge, gewählter
+# Mitarbeiter, Teil-Scores, Ablehnungsgründe und das Ergebnis je Monat.
+# Dazu die Dauer je Slot (Tag/Schicht) im Original und beim Nachspielen.
+#
+# Aufruf:
+#     python -m gui.generator.generator_replay <datei.dhflog>
+#     python -m gui.generator.generator_replay <datei.dhflog> --dump --day 14
+#     python -m gui.generator.generator_replay <ordner> --repeat 5 --slowest 10
+#
+# Rückgabewert 1, wenn ein Lauf abweicht - damit taugen abgelegte Protokolle
+# als Regressions- und Leistungstest (vor/nach einer Änderung am Generator).
+
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import redirect_stdout
+from datetime import date
+
+from .generator_decision_log import DecisionLog, FILE_SUFFIX
+from .generator_solver import BACKEND_ENV_VAR
+
+
+class ReplayResult:
+    """
+    Ergebnis eines Nachspielens.
+        divergence      None oder (index, original, nachgespielt) der ersten abweichenden Entscheidung
+        results_match   Ergebnis (Änderungen je Monat) identisch?
+        slot_timings    {(monat, tag, schicht): (original_us, nachgespielt_us)}
+    """
+
+    def __init__(self, original, replayed, elapsed_s):
+        self.original = original
+        self.replayed = replayed
+        self.elapsed_s = elapsed_s
+        self.divergence = _first_divergence(list(original.decisions()), list(replayed.decisions()))
+        self.results_match = original.results == replayed.results
+        self.slot_timings = _slot_timings(original, replayed)
+
+    @property
+    def ok(self):
+        return self.divergence is None and self.results_match
+
+    @property
+    def solver_used(self):
+        return (self.original.env.get(BACKEND_ENV_VAR) or "").strip().lower() == "solver" or bool(
+            getattr(self.original.job, 'generator_config', {}).get('use_solver_backend'))
+
+
+def _first_divergence(original, replayed):
+    for index in range(max(len(original), len(replayed))):
+        left = original[index] if index < len(original) else None
+        right = replayed[index] if index < len(replayed) else None
+        if left is None or right is None or left._replace(elapsed_us=0) != right._replace(elapsed_us=0):
+            return index, left, right
+    return None
+
+
+def _slot_timings(original, replayed):
+    timings = defaultdict(lambda: [0, 0])
+    for column, log in enumerate((original, replayed)):
+        for decision in log.decisions():
+            timings[(decision.month, decision.day, decision.shift)][column] += decision.elapsed_us
+    return {slot: tuple(values) for slot, values in timings.items()}
+
+
+def replay(original, repeat=1):
+    """
+    Spielt das Protokoll 'original' (DecisionLog) 'repeat'-mal nach. Verglichen
+    wird der erste Lauf; die Zeiten je Slot sind das Minimum über alle Läufe.
+    """
+    saved_env = {key: os.environ.get(key) for key in original.env}
+    for key, value in original.env.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    try:
+        runs = []
+        for _ in range(max(1, repeat)):
+            replayed = DecisionLog(original.job, env=original.env)
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):  # Generator-Ausgaben unterdrücken
+                original.job.compute(None, decision_log=replayed)
+            runs.append((replayed, time.perf_counter() - started))
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    result = ReplayResult(original, runs[0][0], min(elapsed for _, elapsed in runs))
+    for replayed, _ in runs[1:]:
+        for slot, (original_us, replay_us) in _slot_timings(original, replayed).items():
+            result.slot_timings[slot] = (original_us, min(result.slot_timings[slot][1], replay_us))
+    return result
+
+
+# --- Ausgabe ---
+
+def _month_of(log, index):
+    generator_inputs = getattr(log.job, 'generator_inputs', None) or [log.job.generator_input]
+    generator_input = generator_inputs[index]
+    return generator_input.year, generator_input.month
+
+
+def format_decision(log, decision, limit=8):
+    """ Eine Entscheidung als lesbarer Text (Kandidaten mit Teil-Scores, Ablehnungsgründe). """
+    year, month = _month_of(log, decision.month)
+    keys = log.score_keys(decision.round)
+    chosen = "niemand" if decision.chosen is None else f"MA {decision.chosen}"
+    lines = [f"{date(year, month, decision.day):%d.%m.%Y} {decision.shift:<3} Runde {decision.round}: "
+             f"{chosen} ({len(decision.candidates)} Kandidaten, {decision.elapsed_us} µs)"]
+    for user_id, scores in list(zip(decision.candidates, decision.scores))[:limit]:
+        lines.append(f"    MA {user_id}: " + ", ".join(f"{key.replace('_score', '')}={value:g}"
+                                                     for key, value in zip(keys, scores)))
+    if len(decision.candidates) > limit:
+        lines.append(f"    ... {len(decision.candidates) - limit} weitere")
+    if decision.rejections:
+        lines.append("    abgelehnt: " + ", ".join(f"{reason} x{count}" for reason, count in
+                                                 sorted(decision.rejections.items(), key=lambda item: -item[1])))
+    return "\n".join(lines)
+
+
+def print_report(name, result, slowest=10):
+    original = result.original
+    original_total = sum(timing[0] for timing in result.slot_timings.values())
+    replay_total = sum(timing[1] for timing in result.slot_timings.values())
+    status = "OK" if result.ok else "ABWEICHUNG"
+    print(f"{name}: {status} - {original.record_count} Entscheidungen, {len(result.slot_timings)} Slots, "
+          f"Slots {original_total / 1000:.1f} ms (Original) / {replay_total / 1000:.1f} ms (nachgespielt), "
+          f"Lauf gesamt {result.elapsed_s:.2f}s")
+    if result.divergence is not None:
+        index, left, right = result.divergence
+        print(f"  Erste Abweichung bei Entscheidung {index}:")
+        print("  Original:     " + (format_decision(original, left) if left else "(keine)").replace("\n", "\n  "))
+        print("  Nachgespielt: " + (format_decision(result.replayed, right) if right else "(keine)").replace(
+            "\n", "\n  "))
+    if not result.results_match:
+        hint = " (Solver-Backend mit Zeitlimit ist nicht deterministisch)" if result.solver_used else ""
+        print(f"  Ergebnis (Plan-Änderungen) weicht ab{hint}.")
+    if slowest:
+        print("  Langsamste Slots (µs Original / nachgespielt):")
+        rows = sorted(result.slot_timings.items(), key=lambda item: -max(item[1]))[:slowest]
+        for (month_index, day, shift), (original_us, replay_us) in rows:
+            year, month = _month_of(original, month_index)
+            print(f"    {date(year, month, day):%d.%m.%Y} {shift:<3} {original_us:>9} {replay_us:>9}")
+
+
+def _log_paths(target):
+    if os.path.isdir(target):
+        return sorted(glob.glob(os.path.join(target, f"*{FILE_SUFFIX}")))
+    return [target]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entscheidungsprotokoll des Generators nachspielen")
+    parser.add_argument("target", help=f"Protokoll-Datei ({FILE_SUFFIX}) oder Ordner")
+    parser.add_argument("--dump", action="store_true", help="Entscheidungen lesbar ausgeben (ohne Nachspielen)")
+    parser.add_argument("--day", type=int, help="Mit --dump: nur diesen Tag ausgeben")
+    parser.add_argument("--repeat", type=int, default=1, help="Nachspielen N-mal (Zeiten: Minimum)")
+    parser.add_argument("--slowest", type=int, default=10, help="Anzahl der langsamsten Slots im Bericht")
+    args = parser.parse_args(argv)
+
+    paths = _log_paths(args.target)
+    if not paths:
+        parser.error(f"Keine Protokolle gefunden: {args.target}")
+    failed = 0
+    for path in paths:
+        log = DecisionLog.load(path)
+        name = os.path.basename(path)
+        if args.dump:
+            print(f"{name} (erstellt {log.created_at:%d.%m.%Y %H:%M:%S}, {log.record_count} Entscheidungen)")
+            for decision in log.decisions():
+                if args.day is None or decision.day == args.day:
+                    print(format_decision(log, decision))
+            continue
+        result = replay(log, repeat=args.repeat)
+        print_report(name, result, args.slowest)
+        failed += not result.ok
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
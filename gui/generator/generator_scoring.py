@@ -1,6 +1,9 @@
 # gui/generator/generator_scoring.py
 from datetime import timedelta
 
+# NEU (Regel 2): Teil-Scores für das Entscheidungsprotokoll
+from .generator_decision_log import SCORE_KEYS, pack_floats
+
 
 class GeneratorScoring:
     """
@@ -16,65 +19,33 @@ class GeneratorScoring:
     def _check_rule_violation_at_date(self, candidate_id_str, check_date, check_shift):
         """
         Prüft, ob der Mitarbeiter an 'check_date' die Schicht 'check_shift'
-        machen könnte, basierend auf dem *aktuellen* Planungsstand in live_shifts_data
+        machen könnte, basierend auf dem *aktuellen* Planungsstand (MonthGrid)
         und den harten Regeln. Gibt True zurück, wenn eine Regel verletzt wird.
-        (Diese Funktion ist ähnlich zu Teilen von _get_actually_available_count)
+
+        KORREKTUR (Regel 2 & 4): Die Regeln (Urlaub, WF, bestehende Schicht, N->T/6/QA/S,
+        N-F-T, Ausschluss, Max Consecutive, Ruhezeit, Max Stunden) kommen aus der
+        Regel-Engine (ShiftPlanGenerator.hard_rules).
         """
-        date_str = check_date.strftime('%Y-%m-%d')
-
-        # --- Allgemeine Verfügbarkeit prüfen (Urlaub, WF, bestehende Schicht) ---
-        # WICHTIG: Prüfe nur, ob der Tag generell blockiert ist. Die spezifische Schicht
-        # wird später durch Regeln geprüft.
-        if self.gen.vacation_requests.get(candidate_id_str, {}).get(check_date) in ['Approved',
-                                                                                    'Genehmigt']: return True  # Urlaub
-        if date_str in self.gen.wunschfrei_requests.get(candidate_id_str, {}):
-            wf_entry = self.gen.wunschfrei_requests[candidate_id_str][date_str]
-            wf_status, wf_shift = None, None
-            if isinstance(wf_entry, tuple) and len(wf_entry) >= 2: wf_status, wf_shift = wf_entry[0], wf_entry[1]
-            if wf_status in ['Approved', 'Genehmigt', 'Akzeptiert']:
-                if wf_shift == "" or wf_shift == check_shift: return True  # WF(Tag) oder WF(Schicht)
-        existing_shift = self.gen.live_shifts_data.get(candidate_id_str, {}).get(date_str)
-        if existing_shift and existing_shift not in self.gen.free_shifts_indicators: return True  # Hat schon Schicht
-
-        # --- Harte Regeln prüfen ---
-        user_pref = self.gen.user_preferences[candidate_id_str]
-        user_dog = self.gen.user_data_map.get(int(candidate_id_str), {}).get('diensthund')
-        current_hours = self.gen.live_user_hours.get(int(candidate_id_str), 0.0)
-        hours_for_this_shift = self.gen.shift_hours.get(check_shift, 0.0)
-        max_hours_override = user_pref.get('max_monthly_hours')
-
-        prev_date_obj = check_date - timedelta(days=1)
-        two_days_ago_obj = check_date - timedelta(days=2)
-
-        # Helferfunktionen verwenden
-        prev_shift = self.gen.helpers.get_previous_shift(candidate_id_str, prev_date_obj)
-        one_day_ago_raw_shift = self.gen.helpers.get_previous_raw_shift(candidate_id_str, prev_date_obj)
-        two_days_ago_shift = self.gen.helpers.get_previous_shift(candidate_id_str, two_days_ago_obj)
-
-        # N -> T/6
-        if prev_shift == "N." and check_shift in ["T.", "6"]: return True
-
-        # NEUE HARD RULE: N. -> QA/S Block
-        if prev_shift == "N." and check_shift in ["QA", "S"]: return True
-
-        # N-F-T
-        if check_shift == "T." and one_day_ago_raw_shift in self.gen.free_shifts_indicators and two_days_ago_shift == "N.": return True
-        # Schicht-Ausschluss
-        if check_shift in user_pref.get('shift_exclusions', []): return True
-        # Max Consecutive (HARD LIMIT)
-        consecutive_days = self.gen.helpers.count_consecutive_shifts(candidate_id_str, check_date)
-        if consecutive_days >= self.gen.HARD_MAX_CONSECUTIVE_SHIFTS: return True
-        # Mandatory Rest
-        if self.gen.mandatory_rest_days > 0 and consecutive_days == 0 and not self.gen.helpers.check_mandatory_rest(
-                candidate_id_str, check_date): return True
-        # Max Stunden
-        max_hours_check = max_hours_override if max_hours_override is not None else self.gen.MAX_MONTHLY_HOURS
-        if current_hours + hours_for_this_shift > max_hours_check: return True
-
-        return False  # Keine Regelverletzung gefunden
-
-    # NEUE Funktion zur Konfliktzählung
+        return self.gen.hard_rules.first_violation(candidate_id_str, check_date.day, check_shift) is not None
+
     def _calculate_future_conflicts(self, candidate_id_str, current_date, assigned_shift_today):
+        """
+        Zählt, wie viele Schichten der Mitarbeiter in den nächsten CONFLICT_LOOKAHEAD_DAYS
+        durch 'assigned_shift_today' am 'current_date' nicht mehr machen könnte.
+
+        KORREKTUR (Regel 2): Rechnet über den FeasibilityIndex des Generators (Tages-Arrays
+        + Konflikt-Bitmasken, inkrementell gepflegt) statt live_shifts_data zu verändern und
+        pro Tag/Schicht rückwärts zu suchen. Ohne Index (z.B. Pre-Planning vor der
+        Hauptplanung) oder für Nicht-Arbeitsschichten greift die bisherige Prüfung.
+        """
+        index = getattr(self.gen, 'feasibility', None)
+        if index is not None and index.is_work_shift(assigned_shift_today):
+            return index.count_future_conflicts(candidate_id_str, current_date.day, assigned_shift_today,
+                                                self.CONFLICT_LOOKAHEAD_DAYS)
+        return self._calculate_future_conflicts_reference(candidate_id_str, current_date, assigned_shift_today)
+
+    # Referenz-Implementierung (Ergebnis muss mit dem FeasibilityIndex übereinstimmen)
+    def _calculate_future_conflicts_reference(self, candidate_id_str, current_date, assigned_shift_today):
         """
         Simuliert die Zuweisung von 'assigned_shift_today' am 'current_date' und zählt,
         wie viele Schichten der Mitarbeiter in den nächsten CONFLICT_LOOKAHEAD_DAYS
@@ -83,11 +54,10 @@ class GeneratorScoring:
         """
         conflict_count = 0
 
-        # Temporäre Simulation der heutigen Zuweisung im live_shifts_data
-        original_shift = self.gen.live_shifts_data.get(candidate_id_str, {}).get(current_date.strftime('%Y-%m-%d'))
-        if candidate_id_str not in self.gen.live_shifts_data: self.gen.live_shifts_data[
-            candidate_id_str] = {}  # Sicherstellen
-        self.gen.live_shifts_data[candidate_id_str][current_date.strftime('%Y-%m-%d')] = assigned_shift_today
+        # Temporäre Simulation der heutigen Zuweisung im MonthGrid der Regel-Engine
+        grid = self.gen.rule_grid
+        original_shift = grid.raw(candidate_id_str, current_date.day)
+        grid.set_shift(candidate_id_str, current_date.day, assigned_shift_today)
 
         # Iteriere durch die nächsten X Tage
         for i in range(1, self.CONFLICT_LOOKAHEAD_DAYS + 1):
@@ -148,13 +118,7 @@ class GeneratorScoring:
                                 continue
 
         # WICHTIG: Simulation zurücksetzen!
-        if original_shift is None:
-            # Wenn vorher kein Eintrag da war, lösche den simulierten
-            if current_date.strftime('%Y-%m-%d') in self.gen.live_shifts_data.get(candidate_id_str, {}):
-                del self.gen.live_shifts_data[candidate_id_str][current_date.strftime('%Y-%m-%d')]
-        else:
-            # Setze auf den ursprünglichen Wert zurück
-            self.gen.live_shifts_data[candidate_id_str][current_date.strftime('%Y-%m-%d')] = original_shift
+        grid.set_shift(candidate_id_str, current_date.day, original_shift)
 
         return conflict_count
 
@@ -188,8 +152,8 @@ class GeneratorScoring:
             elif hours_to_min > 0:
                 scores['min_hours_score'] = 1 * day_factor
 
-        # 2. Fairness Score
-        hours_diff = average_hours - candidate['hours']
+        # 2. Fairness Score (über den Horizont: Monatsstunden + Übertrag, siehe HorizonCarry)
+        hours_diff = average_hours - candidate['balance_hours']
         if hours_diff > self.gen.fairness_threshold_hours: scores[
             'fairness_score'] = self.gen.fairness_score_multiplier * day_factor
 
@@ -251,4 +215,49 @@ class GeneratorScoring:
             )
             scores['future_conflict_score'] *= 10
 
-        return scores
\ No newline at end of file
+        return scores
+
+    # --- NEU (Regel 2): Bewertung und Sortierung aller Kandidaten eines Slots ---
+
+    @staticmethod
+    def sort_key(shift_abbrev):
+        """ Sortierschlüssel der Runde 1 (niedriger = besser) über die Scores aus calculate_scores. """
+        return lambda x: (
+            x.get('avoid_score', 0),  # NEU: Strafe (niedriger=besser)
+            x.get('partner_score', 1000),  # Partner (niedriger=besser)
+            x.get('future_conflict_score', 0),  # Strafe (niedriger=besser)
+            -x.get('min_hours_score', 0),  # Bonus (höher=besser)
+            -x.get('fairness_score', 0),  # Bonus (höher=besser)
+            x.get('ratio_pref_score', 0),  # Strafe (näher an 0=besser)
+            x.get('isolation_score', 0),  # Strafe (niedriger=besser)
+            0 if x['prev_shift'] == shift_abbrev else 1,  # Bonus für gleiche Schicht
+            -x['hours']  # Mitarbeiter mit MEHR Stunden bevorzugen
+        )
+
+    def rank_candidates(self, candidates, average_hours, available_candidate_ids,
+                        shift_abbrev, live_shift_counts_ratio,
+                        assignments_today_by_shift,
+                        current_date_obj, days_in_month):
+        """
+        Bewertet alle Kandidaten eines Slots (calculate_scores) und gibt sie
+        sortiert zurück (bester zuerst). Die Teil-Scores stehen danach in jedem
+        Kandidaten-Dict.
+
+        HINWEIS: Eine NumPy-Variante (Arrays + lexsort) wurde gemessen und verworfen:
+        fester Aufwand ~100 µs je Slot, schneller erst ab ~100-150 Kandidaten. Die
+        Zeit je Kandidat steckt im Lookahead (FeasibilityIndex), nicht in den Scores.
+        """
+        for candidate in candidates:
+            scores = self.calculate_scores(
+                candidate, average_hours, available_candidate_ids,
+                shift_abbrev, live_shift_counts_ratio,
+                assignments_today_by_shift,
+                current_date_obj, days_in_month
+            )
+            candidate.update(scores)  # HIER WIRD 'avoid_score' hinzugefügt
+        candidates.sort(key=self.sort_key(shift_abbrev))
+        return candidates
+
+    def packed_scores(self, ranked):
+        """ (Entscheidungsprotokoll) Teil-Scores aller Kandidaten in Rangfolge (SCORE_KEYS, float32). """
+        return pack_floats([candidate.get(key, 0) for candidate in ranked for key in SCORE_KEYS])
@@ -0,0 +1,460 @@
+# gui/generator/generator_solver.py
+# NEU (Regel 2): Optionales exaktes Solver-Backend (CP-SAT aus Google OR-Tools)
+#
+# Der Greedy-Generator plant Tag für Tag und kann Lücken lassen, die eine
+# andere Verteilung geschlossen hätte. Hier wird der Monat als Constraint-
+# Modell formuliert und mit dem Greedy-Ergebnis als Warmstart gelöst:
+#   - Variablen: x[Mitarbeiter, Tag, Schicht] nur für freie Zellen mit Bedarf
+#     (Urlaub, genehmigtes Wunschfrei, Ausschlüsse, Locks, belegte Zellen
+#     entfallen bereits beim Aufbau)
+#   - Hart (wie im Greedy): eine Schicht pro Tag, N -> T/6/QA/S, Hunde-
+#     Überschneidung, Max. Arbeitstage in Folge, Max. Monatsstunden
+#   - Weich (Strafe, wie die Lockerungen der Auffüllrunden): N-F-T,
+#     Pflicht-Ruhezeit, weiche Kettenlänge, Max. gleiche Schicht in Folge,
+#     Konflikte mit *folgenden* festen Einträgen (prüft der Greedy nicht)
+#   - Ziel: Unterbesetzung >> weiche Regeln >> Partner/Vermeiden >
+#     Min.-Stunden > Stunden-Fairness (gewichtete Summe, ganzzahlig)
+#   - Zeitlimit: die beste bis dahin gefundene Lösung wird verwendet
+#
+# Übernommen wird die Solver-Lösung nur, wenn sie mindestens so viele Lücken
+# schließt wie der Greedy-Plan. OR-Tools ist optional (pip install ortools);
+# ohne die Bibliothek bleibt es beim Greedy-Ergebnis.
+#
+# Aktivierung: Generator-Einstellung 'use_solver_backend' (Zeitlimit
+# 'solver_time_limit_s') oder per Umgebungsvariable:
+#     DHF_GENERATOR_BACKEND=solver|greedy
+#     DHF_SOLVER_TIME_LIMIT_S=30
+
+import os
+import threading
+import time
+from datetime import date
+
+from utils.instrumentation import get_logger, start_span
+from ..rule_engine import (MonthGrid, FREE_SHIFTS, NIGHT_SHIFT, DAY_SHIFT, NIGHT_REST_BLOCKED, APPROVED_VACATION,
+                           APPROVED_WUNSCHFREI, user_dogs_from, work_shift_indicators)
+
+_log = get_logger("generator")
+
+BACKEND_ENV_VAR = "DHF_GENERATOR_BACKEND"
+TIME_LIMIT_ENV_VAR = "DHF_SOLVER_TIME_LIMIT_S"
+POLL_INTERVAL_S = 0.2  # Fortschritt/Abbruch während der Suche
+
+# Gewichte der Zielfunktion (je Einheit; Stunden in 1/HOURS_SCALE h)
+HOURS_SCALE = 10
+WEIGHT_UNDERSTAFFED = 100000  # je fehlender Person
+WEIGHT_SOFT_RULE = 10000  # je Verstoß gegen eine weiche Regel
+WEIGHT_AVOID_PARTNER = 500  # je gemeinsamer Schicht (Prio 1; höhere Prio = geringer)
+WEIGHT_PARTNER = 50  # je gemeinsamer Schicht (Prio 1; höhere Prio = geringer)
+WEIGHT_MIN_HOURS = 2  # je 1/10 h unter 'min_monthly_hours'
+WEIGHT_FAIRNESS = 1  # je 1/10 h Abweichung vom Durchschnitt
+
+# KORREKTUR (Startzeit): OR-Tools ist groß und optional - Import erst bei Bedarf
+_cp_model = None
+_cp_model_checked = False
+
+
+def _get_cp_model():
+    """Importiert ortools.sat.python.cp_model beim ersten Gebrauch (oder None, falls nicht installiert)."""
+    global _cp_model, _cp_model_checked
+    if not _cp_model_checked:
+        _cp_model_checked = True
+        try:
+            from ortools.sat.python import cp_model
+            _cp_model = cp_model
+        except ImportError:
+            print("[WARNUNG] 'ortools' nicht gefunden. Solver-Backend nicht verfügbar, nutze Greedy-Generator.")
+            print("Bitte installieren Sie es: pip install ortools")
+            _cp_model = None
+    return _cp_model
+
+
+def solver_requested(config):
+    """ Solver-Backend gewünscht? (Umgebungsvariable vor Generator-Einstellung) """
+    backend = os.environ.get(BACKEND_ENV_VAR, "").strip().lower()
+    if backend:
+        return backend == "solver"
+    return bool(config.use_solver_backend)
+
+
+def solver_time_limit(config):
+    try:
+        return max(1.0, float(os.environ.get(TIME_LIMIT_ENV_VAR) or config.solver_time_limit_s))
+    except (TypeError, ValueError):
+        return 10.0
+
+
+class SolverResult:
+    """
+    Ergebnis eines Solver-Laufs.
+        assignments   {(user_id_str, date_str): schicht}  (nur neue Zuweisungen)
+        understaffed  fehlende Personen über alle Schichten des Monats
+    """
+
+    def __init__(self, status, assignments, understaffed, greedy_understaffed, objective, wall_time):
+        self.status = status
+        self.assignments = assignments
+        self.understaffed = understaffed
+        self.greedy_understaffed = greedy_understaffed
+        self.objective = objective
+        self.wall_time = wall_time
+
+    @property
+    def improves_on_greedy(self):
+        return self.assignments is not None and self.understaffed <= self.greedy_understaffed
+
+    def summary(self):
+        return (f"{self.status}: {self.understaffed} Lücken (Greedy: {self.greedy_understaffed}), "
+                f"Ziel {self.objective}, {self.wall_time:.1f}s")
+
+
+class MonthSolver:
+    """
+    CP-SAT-Modell eines Monats auf dem Eingabe-Snapshot des Generators.
+    Liest Regeln, Präferenzen und Mindestbesetzung aus dem ShiftPlanGenerator,
+    damit Greedy und Solver dieselben Eingaben sehen.
+    """
+
+    def __init__(self, generator, time_limit_s):
+        self.gen = generator
+        self.time_limit_s = time_limit_s
+        self.cp_model = _get_cp_model()
+
+    @property
+    def available(self):
+        return self.cp_model is not None
+
+    # --- Modell ---
+
+    def _build(self):
+        gen = self.gen
+        cp_model = self.cp_model
+        model = cp_model.CpModel()
+        generator_input = gen.input
+        year, month = generator_input.year, generator_input.month
+        days_in_month = generator_input.days_in_month
+
+        # Ausgangsstand (Snapshot inkl. Locks, ohne Greedy-Zuweisungen)
+        grid = MonthGrid(year, month, generator_input.shifts,
+                         gen.data_manager.get_previous_month_shifts() or {},
+                         gen.data_manager.get_next_month_shifts() or {},
+                         user_dogs=user_dogs_from(gen.all_users),
+                         work_indicators=work_shift_indicators(gen.app.shift_types_data))
+        self.grid = grid
+        user_ids = [str(user_id) for user_id in gen.user_data_map]
+
+        # 1. Bedarf je (Tag, Schicht) nach Abzug der bereits eingetragenen Personen
+        self.slots = {}
+        for day in range(1, days_in_month + 1):
+            current_date = date(year, month, day)
+            staffing = gen.staffing_for_day(current_date)
+            for shift in gen.shifts_to_plan:
+                required = staffing.get(shift, 0)
+                if required <= 0 or not gen.plans_shift_on(shift, current_date):
+                    continue
+                present = sum(1 for user_id in gen.user_data_map if grid.raw(str(user_id), day) == shift)
+                if required - present > 0:
+                    self.slots[(day, shift)] = required - present
+
+        # 2. Variablen nur für zulässige Zellen (statische Regeln entfallen hier)
+        self.x = {}
+        for user_id in user_ids:
+            excluded = gen.user_preferences[user_id].get('shift_exclusions', [])
+            vacations = gen.vacation_requests.get(user_id, {})
+            wunschfrei = gen.wunschfrei_requests.get(user_id, {})
+            locks = gen.locked_shifts_data.get(user_id, {})
+            for (day, shift) in self.slots:
+                if grid.raw(user_id, day) not in (None, ""):
+                    continue
+                date_str = grid.date_str(day)
+                if locks.get(date_str) is not None or shift in excluded:
+                    continue
+                if vacations.get(date(year, month, day)) in APPROVED_VACATION:
+                    continue
+                wf_entry = wunschfrei.get(date_str)
+                if isinstance(wf_entry, tuple) and wf_entry and wf_entry[0] in APPROVED_WUNSCHFREI \
+                        and (not wf_entry[1] or wf_entry[1] == shift):
+                    continue
+                self.x[(user_id, day, shift)] = model.NewBoolVar(f"x_{user_id}_{day}_{shift}")
+
+        cells = {}  # (uid, tag) -> [(schicht, var)]
+        self.slot_vars = {slot: [] for slot in self.slots}  # (tag, schicht) -> [(uid, var)]
+        for (user_id, day, shift), var in self.x.items():
+            cells.setdefault((user_id, day), []).append((shift, var))
+            self.slot_vars[(day, shift)].append((user_id, var))
+
+        objective = []
+        soft_count = [0]
+
+        def soft_slack():
+            soft_count[0] += 1
+            slack = model.NewBoolVar(f"soft_{soft_count[0]}")
+            objective.append(WEIGHT_SOFT_RULE * slack)
+            return slack
+
+        def work(user_id, day):
+            """ (konstante, [vars]) Arbeitstag-Indikator. """
+            day_cells = cells.get((user_id, day))
+            if day_cells:
+                return 0, [var for _, var in day_cells]
+            return (1 if grid.is_work_shift(grid.raw(user_id, day)) else 0), []
+
+        def duty_is(user_id, day, shifts):
+            """ (konstante, [vars]) für 'Dienst an diesem Tag ist einer von shifts'. """
+            day_cells = cells.get((user_id, day))
+            if day_cells:
+                return 0, [var for shift, var in day_cells if shift in shifts]
+            return (1 if grid.raw(user_id, day) in shifts else 0), []
+
+        def add_at_most(terms, limit, soft=False):
+            """ Summe(terms) <= limit; terms = [(konstante, [vars])]. Ohne Variablen: nichts zu tun. """
+            constant = sum(term[0] for term in terms)
+            variables = [var for term in terms for var in term[1]]
+            if not variables:
+                return
+            bound = max(limit - constant, 0)
+            if soft:
+                model.Add(sum(variables) <= bound + soft_slack())
+            else:
+                model.Add(sum(variables) <= bound)
+
+        # 3. Eine Schicht pro Tag
+        for day_cells in cells.values():
+            if len(day_cells) > 1:
+                model.AddAtMostOne(var for _, var in day_cells)
+
+        first_day, last_day = grid.first_grid_day, grid.last_grid_day
+        hard_max = gen.HARD_MAX_CONSECUTIVE_SHIFTS
+        soft_max = gen.SOFT_MAX_CONSECUTIVE_SHIFTS
+        chain_limit = hard_max if gen.avoid_understaffing_hard else soft_max
+        rest_days = gen.mandatory_rest_days
+        var_days = {}
+        for (user_id, day) in cells:
+            var_days.setdefault(user_id, set()).add(day)
+
+        for user_id, days_with_vars in var_days.items():
+            # 4. Ruhezeit nach Nachtdienst (N -> T/6/QA/S) und N-F-T (weich)
+            # Hart wie im Greedy (Prüfung beim Zuweisen des zweiten Tages); ein neuer
+            # Nachtdienst vor einem festen T./QA/S ist nur weich (Greedy prüft nicht vorwärts)
+            for day in range(max(first_day + 1, 1), min(last_day, days_in_month + 1) + 1):
+                if day not in days_with_vars and day - 1 not in days_with_vars and day - 2 not in days_with_vars:
+                    continue
+                blocked = duty_is(user_id, day, NIGHT_REST_BLOCKED)
+                add_at_most([duty_is(user_id, day - 1, (NIGHT_SHIFT,)), blocked], 1, soft=not blocked[1])
+                if day - 2 >= first_day and grid.raw(user_id, day - 1) in FREE_SHIFTS \
+                        and grid.raw(user_id, day - 1) is not None and day - 1 not in days_with_vars:
+                    add_at_most([duty_is(user_id, day - 2, (NIGHT_SHIFT,)), duty_is(user_id, day, (DAY_SHIFT,))], 1,
+                                soft=True)
+
+            # 5. Kettenlänge (Fenster von limit + 1 Tagen): hart, wenn das Fenster an einem
+            # planbaren Tag endet (wie der Greedy-Blick zurück), sonst und ab soft_max weich
+            for window, soft_only in ((chain_limit, False), (soft_max, True)):
+                if soft_only and window >= chain_limit:
+                    continue
+                for start in range(first_day, last_day - window + 1):
+                    window_days = range(start, start + window + 1)
+                    if days_with_vars.isdisjoint(window_days):
+                        continue
+                    add_at_most([work(user_id, d) for d in window_days], window,
+                                soft=soft_only or window_days[-1] not in days_with_vars)
+
+            # 6. Pflicht-Ruhezeit nach vollem Block (weich, wie Runde 4)
+            if rest_days > 0:
+                for day in range(1, min(last_day, days_in_month + 2) + 1):
+                    for free_days in range(1, rest_days):
+                        free_range = range(day - free_days, day)
+                        if any(grid.raw(user_id, d) not in FREE_SHIFTS or grid.raw(user_id, d) is None
+                               or d in days_with_vars for d in free_range):
+                            continue
+                        block_end = day - free_days - 1
+                        if grid.raw(user_id, block_end) in FREE_SHIFTS and block_end not in days_with_vars:
+                            continue  # Frei-Phase ist länger
+                        block = range(block_end - hard_max + 1, block_end + 1)
+                        if block.start < first_day or (days_with_vars.isdisjoint(block) and day not in days_with_vars):
+                            continue
+                        add_at_most([work(user_id, d) for d in block] + [work(user_id, day)], hard_max, soft=True)
+
+            # 7. Max. gleiche Schicht in Folge (weich, wie Runde 1)
+            override = gen.user_preferences[user_id].get('max_consecutive_same_shift_override')
+            same_limit = override if override is not None else gen.max_consecutive_same_shift_limit
+            if same_limit:
+                for shift in gen.shifts_to_plan:
+                    for start in range(first_day, days_in_month - same_limit + 1):
+                        window_days = range(start, start + same_limit + 1)
+                        if not any((user_id, d, shift) in self.x for d in window_days):
+                            continue
+                        add_at_most([duty_is(user_id, d, (shift,)) for d in window_days], same_limit, soft=True)
+
+        # 8. Hunde: zwei Halter desselben Hundes nicht in überlappenden Diensten
+        holders_by_dog = {}
+        for user_id, dog in grid.user_dogs.items():
+            holders_by_dog.setdefault(dog, []).append(user_id)
+        for holders in holders_by_dog.values():
+            if len(holders) < 2:
+                continue
+            for day in range(1, days_in_month + 1):
+                items = []  # (uid, schicht, var oder None)
+                for user_id in holders:
+                    day_cells = cells.get((user_id, day))
+                    if day_cells:
+                        items.extend((user_id, shift, var) for shift, var in day_cells)
+                    else:
+                        existing = grid.duty(user_id, day)
+                        if existing:
+                            items.append((user_id, existing, None))
+                for i, (user_a, shift_a, var_a) in enumerate(items):
+                    for user_b, shift_b, var_b in items[i + 1:]:
+                        if user_a == user_b or (var_a is None and var_b is None):
+                            continue
+                        if not gen.rules.shifts_clash(shift_a, shift_b):
+                            continue
+                        if var_a is None or var_b is None:
+                            model.Add((var_b if var_a is None else var_a) == 0)
+                        else:
+                            model.Add(var_a + var_b <= 1)
+
+        # 9. Stunden: Max. hart, Min. und Fairness (über den Horizont, siehe HorizonCarry) weich
+        shift_hours = {shift: int(round(gen.shift_hours.get(shift, 0.0) * HOURS_SCALE)) for shift in gen.shifts_to_plan}
+        hour_terms = {user_id: [] for user_id in user_ids}
+        for (user_id, _, shift), var in self.x.items():
+            hour_terms[user_id].append(shift_hours[shift] * var)
+        user_hours = {}
+        for user_id in user_ids:
+            initial = int(round(generator_input.initial_user_hours.get(int(user_id), 0.0) * HOURS_SCALE))
+            terms = hour_terms[user_id]
+            user_hours[user_id] = (initial, terms)
+            prefs = gen.user_preferences[user_id]
+            max_hours = prefs.get('max_monthly_hours')
+            max_hours = max_hours if max_hours is not None else gen.MAX_MONTHLY_HOURS
+            if terms:
+                model.Add(sum(terms) <= max(int(max_hours * HOURS_SCALE) - initial, 0))
+            min_hours = prefs.get('min_monthly_hours')
+            if min_hours is not None and terms:
+                below = model.NewIntVar(0, int(min_hours * HOURS_SCALE), f"below_{user_id}")
+                model.Add(below >= int(min_hours * HOURS_SCALE) - initial - sum(terms))
+                objective.append(WEIGHT_MIN_HOURS * below)
+
+        if user_ids:
+            offsets = {user_id: int(round(gen.balance_offsets.get(int(user_id), 0.0) * HOURS_SCALE))
+                       for user_id in user_ids}
+            demand = sum(need * shift_hours[shift] for (_, shift), need in self.slots.items())
+            average = (sum(user_hours[u][0] + offsets[u] for u in user_ids) + demand) // len(user_ids)
+            bound = 1000 * HOURS_SCALE
+            for user_id in user_ids:
+                initial, terms = user_hours[user_id]
+                deviation = model.NewIntVar(0, bound, f"dev_{user_id}")
+                balance = initial + offsets[user_id] + sum(terms)
+                model.Add(deviation >= balance - average)
+                model.Add(deviation >= average - balance)
+                objective.append(WEIGHT_FAIRNESS * deviation)
+
+        # 10. Partner (Bonus) und zu vermeidende Partner (Strafe) in derselben Schicht
+        for priority_map, weight, bonus in ((gen.partner_priority_map, WEIGHT_PARTNER, True),
+                                            (gen.avoid_priority_map, WEIGHT_AVOID_PARTNER, False)):
+            for user_a, partners in priority_map.items():
+                for priority, user_b in partners:
+                    if user_a >= user_b:
+                        continue  # Jedes Paar nur einmal (Maps sind symmetrisch)
+                    pair_weight = max(1, weight // max(1, priority))
+                    self._add_pair_terms(model, objective, str(user_a), str(user_b), pair_weight, bonus)
+
+        # 11. Abdeckung (weich mit sehr hohem Gewicht)
+        self.short = {}
+        for (day, shift), need in self.slots.items():
+            variables = [var for _, var in self.slot_vars[(day, shift)]]
+            short = model.NewIntVar(0, need, f"short_{day}_{shift}")
+            model.Add(sum(variables) + short >= need)
+            self.short[(day, shift)] = short
+            objective.append(WEIGHT_UNDERSTAFFED * short)
+
+        model.Minimize(sum(objective))
+        return model
+
+    def _add_pair_terms(self, model, objective, user_a, user_b, weight, bonus):
+        """ Bonus/Strafe, wenn beide an einem Tag dieselbe Schicht haben (auch mit festen Einträgen). """
+        grid = self.grid
+        for (day, shift) in self.slots:
+            var_a = self.x.get((user_a, day, shift))
+            var_b = self.x.get((user_b, day, shift))
+            fixed_a = grid.raw(user_a, day) == shift
+            fixed_b = grid.raw(user_b, day) == shift
+            if var_a is not None and var_b is not None:
+                together = model.NewBoolVar(f"pair_{user_a}_{user_b}_{day}_{shift}")
+                if bonus:
+                    model.Add(together <= var_a)
+                    model.Add(together <= var_b)
+                    objective.append(-weight * together)
+                else:
+                    model.Add(together >= var_a + var_b - 1)
+                    objective.append(weight * together)
+            elif (var_a is not None and fixed_b) or (var_b is not None and fixed_a):
+                var = var_a if var_a is not None else var_b
+                objective.append((-weight if bonus else weight) * var)
+
+    # --- Lösen ---
+
+    def understaffed_in(self, live_shifts_data):
+        """ Fehlende Personen eines Plans (z.B. Greedy-Ergebnis) gemessen an den Modell-Slots. """
+        grid = self.grid
+        missing = 0
+        for (day, shift), need in self.slots.items():
+            date_str = grid.date_str(day)
+            assigned = sum(1 for user_id, _ in self.slot_vars[(day, shift)]
+                           if live_shifts_data.get(user_id, {}).get(date_str) == shift)
+            missing += max(need - assigned, 0)
+        return missing
+
+    def solve(self, greedy_shifts, progress_callback=None):
+        """
+        Löst den Monat mit dem Greedy-Plan als Warmstart. Gibt ein SolverResult
+        zurück (oder None, wenn OR-Tools fehlt). Wirft Ausnahmen aus
+        progress_callback (z.B. Abbruch) nach dem Stoppen der Suche weiter.
+        """
+        if not self.available:
+            return None
+        cp_model = self.cp_model
+        solve_span = start_span("generator.solver")
+        model = self._build()
+
+        # Warmstart: Zuweisungen des Greedy-Plans
+        for (user_id, day, shift), var in self.x.items():
+            model.AddHint(var, 1 if greedy_shifts.get(user_id, {}).get(self.grid.date_str(day)) == shift else 0)
+        greedy_understaffed = self.understaffed_in(greedy_shifts)
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = float(self.time_limit_s)
+        solver.parameters.num_workers = max(1, min(8, os.cpu_count() or 1))
+        _log.info("Solver: %s Variablen, %s Bedarfs-Slots, Greedy-Lücken: %s, Zeitlimit %ss",
+                  len(self.x), len(self.slots), greedy_understaffed, self.time_limit_s)
+
+        outcome = {}
+        worker = threading.Thread(target=lambda: outcome.setdefault('status', solver.Solve(model)),
+                                  name="dhf-solver", daemon=True)
+        started = time.monotonic()
+        worker.start()
+        try:
+            while worker.is_alive():
+                worker.join(POLL_INTERVAL_S)
+                if progress_callback and worker.is_alive():
+                    elapsed = time.monotonic() - started
+                    progress_callback(95, f"Optimiere Plan (Solver)... {elapsed:.0f}/{self.time_limit_s:.0f}s")
+        except BaseException:
+            solver.StopSearch()
+            worker.join()
+            solve_span.finish(error="cancelled")
+            raise
+
+        status = outcome.get('status')
+        wall_time = time.monotonic() - started
+        status_name = solver.StatusName(status) if status is not None else "UNKNOWN"
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            solve_span.finish(status=status_name)
+            return SolverResult(status_name, None, greedy_understaffed, greedy_understaffed, None, wall_time)
+
+        assignments = {(user_id, self.grid.date_str(day)): shift
+                       for (user_id, day, shift), var in self.x.items() if solver.Value(var)}
+        understaffed = sum(solver.Value(short) for short in self.short.values())
+        result = SolverResult(status_name, assignments, understaffed, greedy_understaffed,
+                              int(solver.ObjectiveValue()), wall_time)
+        solve_span.finish(status=status_name, understaffed=understaffed, greedy=greedy_understaffed)
+        return result
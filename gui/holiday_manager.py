@@ -7,12 +7,25 @@ import mysql.connector
 
 # --- NEU: Import für die automatische Feiertagsgenerierung ---
 # (Stellen Sie sicher, dass 'holidays' installiert ist: pip install holidays)
-try:
-    import holidays
-except ImportError:
-    print("[FEHLER] 'holidays'-Bibliothek nicht gefunden. Automatische Feiertagsgenerierung schlägt fehl.")
-    print("Bitte installieren Sie sie: pip install holidays")
-    holidays = None
+# KORREKTUR (Startzeit): Die 'holidays'-Bibliothek ist groß (alle Länder) und wird
+# nur zum Generieren fehlender Jahre gebraucht. Sie wird daher erst bei Bedarf geladen.
+_holidays_lib = None
+_holidays_lib_checked = False
+
+
+def _get_holidays_lib():
+    """Importiert die 'holidays'-Bibliothek beim ersten Gebrauch (oder None, falls nicht installiert)."""
+    global _holidays_lib, _holidays_lib_checked
+    if not _holidays_lib_checked:
+        _holidays_lib_checked = True
+        try:
+            import holidays
+            _holidays_lib = holidays
+        except ImportError:
+            print("[FEHLER] 'holidays'-Bibliothek nicht gefunden. Automatische Feiertagsgenerierung schlägt fehl.")
+            print("Bitte installieren Sie sie: pip install holidays")
+            _holidays_lib = None
+    return _holidays_lib
 # -------------------------------------------------------------
 
 # Globaler Cache (unverändert)
@@ -36,6 +49,7 @@ class HolidayManager:
         """
         NEUE FUNKTION: Generiert Feiertage für MV für ein bestimmtes Jahr.
         """
+        holidays = _get_holidays_lib()
         if holidays is None:
             print(f"[FEHLER] 'holidays'-Bibliothek fehlt. Kann Feiertage für {year_int} nicht generieren.")
             return {}
@@ -16,6 +16,7 @@ from .admin_window.admin_utils import AdminUtils
 
 # --- NEUER IMPORT FÜR THREADING ---
 from utils.threading_utils import ThreadManager
+from database.db_pool_manager import background_pool
 # ----------------------------------
 
 # --- DB-IMPORTE FÜR LOGOUT ---
@@ -79,7 +80,8 @@ class MainAdminWindow(tk.Toplevel):
         # --- NEU: ThreadManager hier initialisieren ---
         # Er muss nach 'self' (dem root-Fenster) und vor den Managern,
         # die ihn verwenden (z.B. NotificationManager), initialisiert werden.
-        self.thread_manager = ThreadManager(self)
+        # (Vorlade-/Polling-Aufgaben nutzen den Hintergrund-DB-Pool)
+        self.thread_manager = ThreadManager(self, background_context=background_pool)
         # -----------------------------------------------
 
         # DataManager (lädt shift_frequency beim Init)
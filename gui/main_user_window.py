@@ -7,9 +7,9 @@ from datetime import date, datetime, timedelta
 import calendar
 
 # --- NEUE IMPORTE für Threading ---
-import threading
 from queue import Queue, Empty
-from utils.threading_utils import ThreadManager
+from utils.threading_utils import ThreadManager, PRIORITY_VISIBLE
+from database.db_pool_manager import background_pool
 # ---------------------------------
 
 # --- WICHTIGE IMPORTE ---
@@ -148,7 +148,8 @@ class MainUserWindow(tk.Toplevel):
         print("[DEBUG] MainUserWindow.__init__: Basisdaten referenziert.")
 
         # --- NEU: ThreadManager initialisieren ---
-        self.thread_manager = ThreadManager(self)
+        # (Vorlade-/Polling-Aufgaben nutzen den Hintergrund-DB-Pool)
+        self.thread_manager = ThreadManager(self, background_context=background_pool)
         # -----------------------------------------
 
         # --- UI-Gerüst aufbauen ---
@@ -288,11 +289,9 @@ class MainUserWindow(tk.Toplevel):
 
         self.loading_tabs.add(tab_name)
 
-        threading.Thread(
-            target=self._load_tab_threaded,
-            args=(tab_name, TabClass, tab_index),
-            daemon=True
-        ).start()
+        # KORREKTUR (Regel 2): Über den ThreadManager statt eigenem Thread
+        self.thread_manager.submit(self._load_tab_threaded, args=(tab_name, TabClass, tab_index),
+                                   priority=PRIORITY_VISIBLE, key=("tab_load", tab_name))
 
         if not self.tab_load_checker_running:
             if not self.winfo_exists():
@@ -384,7 +383,7 @@ class MainUserWindow(tk.Toplevel):
 
         print("[DEBUG] run_periodic_checks_threaded: Starte Worker...")
         # --- KORREKTUR: 'args=' entfernt ---
-        self.thread_manager.start_worker(
+        self.thread_manager.start_poll_worker(
             self._fetch_periodic_data,
             self._on_periodic_data_fetched,
             self.user_id,
@@ -448,7 +447,7 @@ class MainUserWindow(tk.Toplevel):
         if not self.winfo_exists(): return
 
         # --- KORREKTUR: 'args=' entfernt ---
-        self.thread_manager.start_worker(
+        self.thread_manager.start_poll_worker(
             get_senders_with_unread_messages,
             self._on_chat_data_fetched,
             self.user_id
@@ -0,0 +1,96 @@
+# gui/prefetch_policy.py
+# NEU (Regel 2): Lernende Vorlade-Strategie für Dienstplan-Monate
+#
+# Statt stur N+1 vorzuladen, merkt sich die Strategie die letzten
+# Monatswechsel (vorwärts planen vs. Vormonat nachsehen) und schlägt daraus
+# die wahrscheinlichsten nächsten Monate (N-1, N+1, N+2) vor. Die Pause
+# zwischen zwei Vorlade-Aufträgen richtet sich nach der gemessenen
+# DB-Ladezeit statt nach einem festen sleep.
+
+from collections import deque
+
+# Anzahl der gemerkten Monatswechsel
+HISTORY_SIZE = 12
+# Höchstens so viele Monate pro Blättern vorladen
+PREFETCH_BUDGET = 2
+# Monate mit geringerer Wahrscheinlichkeit werden nicht vorgeladen
+MIN_SCORE = 0.2
+
+# Drosselung: Pause = gemessene Ladezeit * Faktor (Vorladen belegt die DB
+# damit höchstens etwa die Hälfte der Zeit), begrenzt auf [MIN, MAX] Sekunden.
+THROTTLE_FACTOR = 1.0
+MIN_PAUSE_S = 0.2
+MAX_PAUSE_S = 5.0
+LATENCY_SMOOTHING = 0.3  # Gewicht der neuesten Messung im gleitenden Mittel
+
+
+def shift_month(year, month, delta):
+    """ (jahr, monat) um 'delta' Monate verschoben. """
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def month_delta(from_ym, to_ym):
+    return (to_ym[0] * 12 + to_ym[1]) - (from_ym[0] * 12 + from_ym[1])
+
+
+class PrefetchPolicy:
+    """
+    Navigationsmodell + Drosselung. Wird nur vom PreloadingManager benutzt
+    (Aufrufe aus GUI- und Worker-Thread, die Zustände sind einfache Werte).
+    """
+
+    def __init__(self):
+        self._deltas = deque(maxlen=HISTORY_SIZE)  # Monatswechsel: +1, -1, +3, ...
+        self._current = None  # Zuletzt angezeigter Monat (jahr, monat)
+        self.db_latency_s = None  # Gleitendes Mittel der gemessenen Ladezeit
+
+    # --- Navigationsmodell ---
+
+    def record_navigation(self, year, month):
+        """ Merkt sich einen Monatswechsel (vom zuletzt angezeigten Monat aus). """
+        target = (year, month)
+        if self._current is not None and target != self._current:
+            self._deltas.append(month_delta(self._current, target))
+        self._current = target
+
+    def direction_probabilities(self):
+        """
+        (p_vorwärts, p_rückwärts) mit Laplace-Glättung; ohne Historie 0.5/0.5.
+        Sprünge zählen nur über ihr Vorzeichen.
+        """
+        forward = sum(1 for d in self._deltas if d > 0)
+        backward = sum(1 for d in self._deltas if d < 0)
+        total = forward + backward
+        return (forward + 1) / (total + 2), (backward + 1) / (total + 2)
+
+    def candidates(self, year, month):
+        """
+        Vorzuladende Monate für den angezeigten Monat, wahrscheinlichste zuerst:
+        [((jahr, monat), score), ...] - höchstens PREFETCH_BUDGET Einträge.
+        """
+        p_forward, p_backward = self.direction_probabilities()
+        scored = [
+            (shift_month(year, month, 1), p_forward),
+            (shift_month(year, month, -1), p_backward),
+            # Zwei Schritte vorwärts nur, wenn vorwärts klar überwiegt
+            (shift_month(year, month, 2), p_forward * p_forward),
+        ]
+        scored = [item for item in scored if item[1] >= MIN_SCORE]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:PREFETCH_BUDGET]
+
+    # --- Drosselung ---
+
+    def record_load_time(self, duration_s):
+        """ Aktualisiert das gleitende Mittel der DB-Ladezeit. """
+        if self.db_latency_s is None:
+            self.db_latency_s = duration_s
+        else:
+            self.db_latency_s = (1 - LATENCY_SMOOTHING) * self.db_latency_s + LATENCY_SMOOTHING * duration_s
+
+    def pause_after_load(self):
+        """ Pause vor dem nächsten Vorlade-Auftrag in Sekunden. """
+        if self.db_latency_s is None:
+            return MIN_PAUSE_S
+        return min(MAX_PAUSE_S, max(MIN_PAUSE_S, self.db_latency_s * THROTTLE_FACTOR))
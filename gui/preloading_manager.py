@@ -4,8 +4,15 @@ import time
 from datetime import date, timedelta
 from queue import Queue, Empty
 
-from utils.threading_utils import Task, ThreadPool
+from utils.threading_utils import PRIORITY_PRELOAD
+from utils.instrumentation import get_logger, span
 from gui.shift_plan_data_manager import ShiftPlanDataManager
+from gui.prefetch_policy import PrefetchPolicy
+
+_log = get_logger("preloader")
+
+# Maximale Wartezeit auf laufende Speichervorgänge, bevor trotzdem vorgeladen wird
+MAX_SAVE_WAIT_S = 30.0
 
 
 # --- NEU (Regel 4) ---
@@ -16,7 +23,9 @@ class PreloadingManager:
     """
     Orchestriert das Vorladen von Daten und UI-Tabs im Hintergrund (Post-Login),
     um die wahrgenommene Performance der Anwendung zu maximieren (P1b, P2, P4).
-    Läuft in einem eigenen Thread-Pool, um die GUI nicht zu blockieren.
+    KORREKTUR (Regel 2): Läuft nicht mehr in einem eigenen Thread-Pool, sondern
+    als PRIORITY_PRELOAD-Aufgaben im ThreadManager des Hauptfensters (höchstens
+    eine gleichzeitig, Hintergrund-DB-Pool, gleiche Monate werden zusammengefasst).
     """
 
     def __init__(self, app, data_manager: ShiftPlanDataManager, main_window):
@@ -33,11 +42,12 @@ class PreloadingManager:
         self.main_window = main_window
         self.is_admin = hasattr(main_window, 'tab_manager')  # Prüfen, ob es sich um das Admin-Fenster handelt
 
-        # Thread-Pool für alle Pre-Loading-Aufgaben
-        # Wir nutzen einen Pool mit 1 Worker, um die Ladeaufgaben zu serialisieren
-        # und die DB nicht mit parallelen Anfragen zu überlasten (Regel 2).
-        self.pool = ThreadPool(max_workers=1, thread_name_prefix="Preloader")
-        self.pool.start()
+        # Gemeinsamer Scheduler des Hauptfensters (statt eigenem Thread-Pool)
+        self.thread_manager = main_window.thread_manager
+        self._scheduled_keys = set()
+
+        # NEU (Regel 2): Lernt das Blätter-Muster und drosselt nach gemessener DB-Ladezeit
+        self.prefetch_policy = PrefetchPolicy()
 
         # Queue für UI-Preloading (P2), wird vom Hauptthread abgearbeitet
         self.ui_preload_queue = Queue()
@@ -52,12 +62,10 @@ class PreloadingManager:
         """
         print("[Preloader] Starte Post-Login Ladekaskade (P1b, P2)...")
 
-        # P1b: Nächsten Dienstplan-Monat vorladen (N+1)
+        # P1b: Wahrscheinlichste Nachbarmonate vorladen (anfangs N+1, N-1)
         preloaded_date = self.app.current_display_date
-        task_p1 = Task(self._task_preload_next_month_data,
-                       current_year=preloaded_date.year,
-                       current_month=preloaded_date.month)
-        self.pool.add_task(task_p1)
+        self.prefetch_policy.record_navigation(preloaded_date.year, preloaded_date.month)
+        self._schedule_month_preload(preloaded_date.year, preloaded_date.month)
 
         # P2: UI-Tabs vorladen
         if self.is_admin:
@@ -69,19 +77,31 @@ class PreloadingManager:
                 self.original_selected_index = 0
 
             # P2: UI-Tabs vorladen (im Admin-Fenster)
-            task_p2 = Task(self._task_preload_admin_tabs_ui)
-            self.pool.add_task(task_p2)
+            self._schedule(self._task_preload_admin_tabs_ui, ("preload", "admin_tabs_ui"))
         else:
             pass
 
     def trigger_shift_plan_preload(self, new_year, new_month):
         """
         Wird aufgerufen, wenn der Benutzer im Dienstplan blättert (P4).
-        Lädt den *darauf* folgenden Monat vor (N+1).
+        Merkt sich die Richtung und lädt die wahrscheinlichsten nächsten Monate vor.
         """
-        print(f"[Preloader] P4-Trigger: Blättern zu {new_year}-{new_month}. Lade N+1...")
-        task = Task(self._task_preload_next_month_data, current_year=new_year, current_month=new_month)
-        self.pool.add_task(task)
+        self.prefetch_policy.record_navigation(new_year, new_month)
+        print(f"[Preloader] P4-Trigger: Blättern zu {new_year}-{new_month}. Lade Nachbarmonate...")
+        self._schedule_month_preload(new_year, new_month)
+
+    def _schedule(self, target_func, key, *args, supersede=False, pass_token=False):
+        """ Reiht eine Vorlade-Aufgabe ein (gleicher Schlüssel wartend = No-Op). """
+        self._scheduled_keys.add(key)
+        self.thread_manager.submit(target_func, args=args, priority=PRIORITY_PRELOAD, key=key, supersede=supersede,
+                                   pass_token=pass_token)
+
+    def _schedule_month_preload(self, current_year, current_month):
+        # Beim schnellen Blättern zählt nur der zuletzt angezeigte Monat:
+        # der neue Auftrag ersetzt den alten (auch einen laufenden, der
+        # zwischen zwei Monaten abbricht).
+        self._schedule(self._task_prefetch_months, "preload_month", current_year, current_month,
+                       supersede=True, pass_token=True)
 
     def _get_next_month(self, year, month):
         """Berechnet den nächsten Monat basierend auf einem gegebenen Datum."""
@@ -93,36 +113,74 @@ class PreloadingManager:
             next_month_date = today + timedelta(days=32)
             return next_month_date.year, next_month_date.month
 
-    # --- P1b: Dienstplan-Daten (N+1) ---
+    # --- P1b/P4: Dienstplan-Daten (Nachbarmonate) ---
 
-    def _task_preload_next_month_data(self, current_year, current_month):
+    def _task_prefetch_months(self, current_year, current_month, cancel_token=None):
         """
-        (Worker-Thread) Lädt die Daten für den Monat NACH dem übergebenen Monat (P1b / P4).
+        (Worker-Thread) Lädt die von der PrefetchPolicy vorgeschlagenen Monate
+        in den P5-Cache. Pausiert, solange Speichervorgänge laufen, und wartet
+        zwischen zwei DB-Abrufen abhängig von der gemessenen Ladezeit.
         """
         # FIX (Regel 1): Fängt den kritischen AttributeError ab, falls data_manager noch None ist.
         if not self.data_manager:
             print("[Preloader P1 FEHLER] ShiftPlanDataManager ist nicht initialisiert (None). Breche Dienstplan-Preload ab.")
             return
 
-        try:
-            year_to_load, month_to_load = self._get_next_month(current_year, current_month)
-            cache_key = (year_to_load, month_to_load)
+        candidates = self.prefetch_policy.candidates(current_year, current_month)
+        # Nicht mehr Monate vorladen, als der P5-Cache neben dem angezeigten Monat halten kann
+        max_entries = getattr(self.data_manager.monthly_caches, 'max_entries', None)
+        if max_entries is not None:
+            candidates = candidates[:max(0, max_entries - 1)]
+        _log.debug("Kandidaten für %s-%02d: %s", current_year, current_month,
+                   ", ".join(f"{y}-{m:02d} ({score:.2f})" for (y, m), score in candidates))
 
-            if cache_key in self.data_manager.monthly_caches:
-                print(
-                    f"[Preloader P1] Monat {year_to_load}-{month_to_load} ist bereits im Cache (P5). Überspringe.")
+        for (year_to_load, month_to_load), score in candidates:
+            if cancel_token and cancel_token.cancelled:
+                return
+            if (year_to_load, month_to_load) in self.data_manager.monthly_caches:
+                _log.debug("Monat %s-%02d ist bereits im Cache (P5). Überspringe.", year_to_load, month_to_load)
+                continue
+            if not self._wait_for_interactive_work(cancel_token):
                 return
 
-            print(f"[Preloader P1] Lade Dienstplan-Daten (N+1) für {year_to_load}-{month_to_load} vor...")
-            self.data_manager.load_and_process_data(year_to_load, month_to_load, force_reload=False)
-            print(f"[Preloader P1] Vorladen (N+1) für {year_to_load}-{month_to_load} abgeschlossen.")
-
-        except Exception as e:
-            print(f"[Preloader P1 FEHLER] Fehler beim Vorladen des Dienstplans: {e}")
-            import traceback
-            traceback.print_exc()
-
-        time.sleep(2)
+            try:
+                print(f"[Preloader P1] Lade Dienstplan-Daten für {year_to_load}-{month_to_load} vor "
+                      f"(Wahrscheinlichkeit {score:.2f})...")
+                start = time.perf_counter()
+                with span("preload.month", month=f"{year_to_load}-{month_to_load:02d}", score=round(score, 2)):
+                    # apply=False: Nur in den P5-Cache, die aktiven Caches (sichtbarer Monat) bleiben unberührt
+                    self.data_manager.load_and_process_data(year_to_load, month_to_load, force_reload=False,
+                                                            apply=False)
+                self.prefetch_policy.record_load_time(time.perf_counter() - start)
+            except Exception as e:
+                print(f"[Preloader P1 FEHLER] Fehler beim Vorladen des Dienstplans: {e}")
+                import traceback
+                traceback.print_exc()
+
+            # KORREKTUR (Regel 2): Pause nach gemessener DB-Ladezeit statt festem sleep(2)
+            pause = self.prefetch_policy.pause_after_load()
+            if cancel_token:
+                if cancel_token.wait(pause):
+                    return
+            else:
+                time.sleep(pause)
+
+    def _wait_for_interactive_work(self, cancel_token):
+        """
+        Wartet, solange interaktive Aufgaben (Speichern, Sperren) anstehen.
+        Gibt False zurück, wenn der Auftrag inzwischen abgebrochen wurde.
+        """
+        waited = 0.0
+        while self.thread_manager.has_interactive_work() and waited < MAX_SAVE_WAIT_S:
+            if cancel_token:
+                if cancel_token.wait(0.1):
+                    return False
+            else:
+                time.sleep(0.1)
+            waited += 0.1
+        if waited:
+            _log.debug("Vorladen %.1f s wegen laufender Speichervorgänge pausiert.", waited)
+        return not (cancel_token and cancel_token.cancelled)
 
     # --- P2: Admin UI-Tabs ---
 
@@ -192,6 +250,8 @@ class PreloadingManager:
             self.main_window.after(250, self.process_ui_queue)
 
     def stop(self):
-        """Stoppt den Thread-Pool."""
-        print("[Preloader] Stoppe Thread-Pool...")
-        self.pool.stop()
\ No newline at end of file
+        """Bricht alle noch ausstehenden Vorlade-Aufgaben ab."""
+        print("[Preloader] Breche ausstehende Vorlade-Aufgaben ab...")
+        for key in self._scheduled_keys:
+            self.thread_manager.cancel_key(key)
+        self._scheduled_keys.clear()
\ No newline at end of file
@@ -280,6 +280,11 @@ class RendererDraw:
                      bd=1, relief="solid", anchor="e").grid(row=current_row, column=days_in_month + 3, sticky="nsew")
             current_row += 1
 
+        # NEU (Regel 2): Messung des Grid-Aufbaus beenden
+        if self.renderer.render_span is not None:
+            self.renderer.render_span.finish(users=len(self.renderer.users_to_render))
+            self.renderer.render_span = None
+
         # Abschluss: UI im Tab finalisieren (Aufruf an den Haupt-Renderer)
         if self.renderer.master and self.renderer.master.winfo_exists():
             if hasattr(self.renderer.master, '_finalize_ui_after_render'):
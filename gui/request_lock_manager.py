@@ -2,6 +2,10 @@
 from datetime import datetime
 # Importiere db_core und nutze die bereits vorhandenen DB-Funktionen
 from database import db_core
+# NEU (Regel 2): Leveled Logging statt Debug-Prints in jedem Aufruf
+from utils.instrumentation import get_logger
+
+_log = get_logger("request_locks")
 
 # Die Konstanten BASE_DIR und LOCK_FILE wurden entfernt.
 
@@ -10,21 +14,12 @@ class RequestLockManager:
     @staticmethod
     def is_month_locked(year, month):
         """Überprüft, ob ein bestimmter Monat für Anfragen gesperrt ist."""
-        # --- ZUSÄTZLICHES DEBUGGING START ---
-        print(f"\n--- PRÜFE SPERRSTATUS (DB) ---")
-        print(f"Angefragtes Jahr: {year}, Monat: {month}")
-        # --- ZUSÄTZLICHES DEBUGGING END ---
-
         locks = RequestLockManager.load_locks()
         lock_key = f"{year}-{month:02d}"
-
-        # --- ZUSÄTZLICHES DEBUGGING START ---
-        print(f"Generierter Schlüssel: '{lock_key}'")
         is_locked = locks.get(lock_key, False)
-        print(f"Schlüssel im Wörterbuch gefunden: {lock_key in locks}")
-        print(f"Ergebnis der Prüfung (is_locked): {is_locked}")
-        print(f"--- PRÜFUNG ABGESCHLOSSEN ---\n")
-        # --- ZUSÄTZLICHES DEBUGGING END ---
+
+        # KORREKTUR (Regel 2): Eine Debug-Zeile statt sechs Prints pro Aufruf (nur mit DHF_LOG_LEVEL=DEBUG)
+        _log.debug("Sperrstatus %s: gefunden=%s, gesperrt=%s", lock_key, lock_key in locks, is_locked)
 
         return is_locked
 
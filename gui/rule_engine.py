@@ -0,0 +1,658 @@
+# gui/rule_engine.py
+# NEU (Regel 2 & 4): Gemeinsame Regel-Engine für die harten Planungsregeln
+#
+# Die harten Regeln (Ruhezeit N->T/6/QA/S, N-F-T, max. Tage in Folge,
+# Pflicht-Ruhezeit, max. Stunden, Hunde-Überschneidung, Schicht-Ausschluss,
+# Urlaub/Wunschfrei) waren in Generator-Scoring, Generator-Runden,
+# Pre-Planner, PlanningAssistant und ViolationManager jeweils eigenständig
+# (und leicht unterschiedlich) implementiert - jede mit eigener Rückwärts-
+# Suche über Datums-Strings.
+#
+# Hier ist jede Regel genau EINMAL deklariert (_RULES). Ausgewertet werden
+# sie gegen ein MonthGrid: pro Mitarbeiter ein Tages-Array über Vormonat,
+# Monat und die ersten Tage des Folgemonats, mit vorberechneten Arbeits-
+# und Frei-Ketten und einem Index (Hund, Tag) -> Dienste. Änderungen am
+# Plan werden per set_shift inkrementell eingepflegt.
+#
+#     grid = MonthGrid(jahr, monat, monatsdaten, vormonat, folgemonat, user_dogs)
+#     engine = RuleEngine(grid, shift_times=..., user_preferences=..., ...)
+#     regeln = engine.compile(NIGHT_REST, DOG_OVERLAP, MAX_CONSECUTIVE, max_consecutive=8)
+#     grund = regeln.first_violation("12", tag, "T.")   # None = erlaubt
+#
+# Tage werden als Tag im Monat adressiert: 0 = letzter Tag des Vormonats,
+# negative Werte weiter zurück, > Monatslänge = Folgemonat.
+
+import calendar
+from datetime import date, datetime, timedelta
+
+# --- Schicht-Klassen ---
+FREE_SHIFTS = frozenset({"", "FREI", "U", "X", "EU", "WF", "U?"})
+# Schichten, die immer als Arbeitstag zählen (auch ohne Stunden in den Schichtarten)
+BASE_WORK_SHIFTS = frozenset({'T.', 'N.', '6', '24', 'QA', 'S'})
+NIGHT_SHIFT = "N."
+DAY_SHIFT = "T."
+NIGHT_REST_BLOCKED = frozenset({"T.", "6", "QA", "S"})  # Nicht am Tag nach N.
+NO_DOG = (None, "", "---")
+
+APPROVED_VACATION = ('Approved', 'Genehmigt')
+APPROVED_WUNSCHFREI = ('Approved', 'Genehmigt', 'Akzeptiert')
+
+# Tage des Folgemonats im Grid (wie get_next_month_shifts im DataManager)
+NEXT_MONTH_DAYS = 2
+
+# Kategorien der Tages-Einträge
+CAT_OTHER = 0  # Kein Eintrag (None) oder sonstige Schicht
+CAT_WORK = 1  # Arbeitstag (zählt für Max-Consecutive)
+CAT_FREE = 2  # Frei-Eintrag (zählt für die Pflicht-Ruhezeit)
+
+# --- Regel-Schlüssel ---
+VACATION = "vacation"
+WUNSCHFREI = "wunschfrei"
+OCCUPIED = "occupied"
+EXCLUSION = "exclusion"
+NIGHT_REST = "night_rest"
+NIGHT_FREE_DAY = "night_free_day"
+MAX_CONSECUTIVE = "max_consecutive"
+MANDATORY_REST = "mandatory_rest"
+MAX_HOURS = "max_hours"
+MAX_SAME_SHIFT = "max_same_shift"
+DOG_OVERLAP = "dog_overlap"
+
+
+def work_shift_indicators(shift_types_data):
+    """ Arbeitstage: Schichtarten mit Stunden (außer U/EU) plus BASE_WORK_SHIFTS. """
+    indicators = {abbrev for abbrev, data in (shift_types_data or {}).items()
+                  if float(data.get('hours', 0.0) or 0.0) > 0 and abbrev not in ('U', 'EU')}
+    indicators.update(BASE_WORK_SHIFTS)
+    return frozenset(indicators)
+
+
+def shift_minutes(shift_types_data):
+    """ {kürzel: (start_min, ende_min)} für die Überlappungsprüfung (Ende nach Mitternacht +24h). """
+    times = {}
+    for abbrev, data in (shift_types_data or {}).items():
+        start_time_str = data.get('start_time')
+        end_time_str = data.get('end_time')
+        if not start_time_str or not end_time_str:
+            continue
+        try:
+            s_time = datetime.strptime(start_time_str, '%H:%M').time()
+            e_time = datetime.strptime(end_time_str, '%H:%M').time()
+        except ValueError:
+            print(f"[WARNUNG] Ungültiges Zeitformat für Schicht '{abbrev}' in shift_types_data.")
+            continue
+        s_min = s_time.hour * 60 + s_time.minute
+        e_min = e_time.hour * 60 + e_time.minute
+        if e_min <= s_min:
+            e_min += 24 * 60
+        times[abbrev] = (s_min, e_min)
+    return times
+
+
+def _dog_of(user_data):
+    dog = (user_data or {}).get('diensthund')
+    return None if dog in NO_DOG else dog
+
+
+def user_dogs_from(users):
+    """ {uid_str: hund} aus einer Benutzerliste (nur Benutzer mit Diensthund). """
+    dogs = {}
+    for user in users or ():
+        user_id = user.get('id')
+        dog = _dog_of(user)
+        if user_id is not None and dog:
+            dogs[str(user_id)] = dog
+    return dogs
+
+
+class _Row:
+    """ Tages-Arrays eines Mitarbeiters (Index = Tag + MonthGrid.offset). """
+
+    __slots__ = ('shifts', 'cats', 'work_run', 'free_run')
+
+    def __init__(self, size):
+        self.shifts = [None] * size  # Roh-Eintrag (wie im Schichtplan)
+        self.cats = [CAT_OTHER] * size
+        self.work_run = [0] * size  # Fortlaufende Arbeitstage bis einschließlich Index
+        self.free_run = [0] * size  # Fortlaufende Frei-Einträge bis einschließlich Index
+
+
+class MonthGrid:
+    """
+    Planstand eines Monats als Tages-Arrays (Vormonat + Monat + Folgetage).
+    Mitarbeiter ohne Einträge werden bei Bedarf angelegt. Änderungen am
+    zugrunde liegenden Plan müssen per set_shift gemeldet werden.
+    """
+
+    def __init__(self, year, month, month_shifts, previous_month_shifts=None, next_month_shifts=None,
+                 user_dogs=None, work_indicators=BASE_WORK_SHIFTS):
+        self.year = year
+        self.month = month
+        self.first_day = date(year, month, 1)
+        self.days_in_month = calendar.monthrange(year, month)[1]
+        self.prefix_days = (self.first_day - timedelta(days=1)).day  # Länge des Vormonats
+        self.offset = self.prefix_days - 1  # Index = Tag + offset
+        self.first_grid_day = -self.offset
+        self.last_grid_day = self.days_in_month + NEXT_MONTH_DAYS
+        self.size = self.last_grid_day + self.offset + 1
+        self.work_indicators = frozenset(work_indicators)
+        self.user_dogs = dict(user_dogs or {})
+
+        start = self.first_day - timedelta(days=self.offset + 1)  # Tag -offset
+        self._date_strs = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(self.size)]
+        self._empty_row = _Row(self.size)
+        self._rows = {}
+        self._dog_duties = {}  # (hund, tag) -> {uid_str: dienst}
+
+        sources = (month_shifts or {}, previous_month_shifts or {}, next_month_shifts or {})
+        user_ids = set(self.user_dogs)
+        for source in sources:
+            user_ids.update(str(uid) for uid in source)
+        # Feste Reihenfolge (nicht die des Sets): bestimmt die Reihenfolge der Hunde-Dienste je Tag
+        for user_id_str in sorted(user_ids, key=_user_sort_key):
+            self._build_row(user_id_str, sources)
+
+    # --- Aufbau ---
+
+    def _category(self, shift):
+        if shift and shift in self.work_indicators:
+            return CAT_WORK
+        if shift in FREE_SHIFTS:
+            return CAT_FREE
+        return CAT_OTHER
+
+    def _build_row(self, user_id_str, sources):
+        row = _Row(self.size)
+        # Reihenfolge wie bisher: aktueller Monat, dann Vormonat, dann Folgemonat
+        user_sources = [source.get(user_id_str) or source.get(_int_or_none(user_id_str)) or {} for source in sources]
+        for i, date_str in enumerate(self._date_strs):
+            shift = None
+            for user_shifts in user_sources:
+                shift = user_shifts.get(date_str)
+                if shift is not None:
+                    break
+            row.shifts[i] = shift
+            row.cats[i] = self._category(shift)
+        self._rows[user_id_str] = row
+        self._update_runs(row, 0, stop_early=False)
+        dog = self.user_dogs.get(user_id_str)
+        if dog:
+            for i, shift in enumerate(row.shifts):
+                if shift and shift not in FREE_SHIFTS:
+                    self._dog_duties.setdefault((dog, i - self.offset), {})[user_id_str] = shift
+
+    @staticmethod
+    def _update_runs(row, from_index, stop_early=True):
+        """ Rechnet die Ketten ab 'from_index' neu (bricht ab, sobald sie sich nicht mehr ändern). """
+        for i in range(from_index, len(row.cats)):
+            category = row.cats[i]
+            prev_work = row.work_run[i - 1] if i > 0 else 0
+            prev_free = row.free_run[i - 1] if i > 0 else 0
+            work = prev_work + 1 if category == CAT_WORK else 0
+            free = prev_free + 1 if category == CAT_FREE else 0
+            if stop_early and i > from_index and work == row.work_run[i] and free == row.free_run[i]:
+                break
+            row.work_run[i] = work
+            row.free_run[i] = free
+
+    # --- Adressierung ---
+
+    def day_of(self, date_obj):
+        """ Tag im Grid für ein Datum (0 = letzter Tag des Vormonats). """
+        return (date_obj - self.first_day).days + 1
+
+    def date_str(self, day):
+        index = day + self.offset
+        if 0 <= index < self.size:
+            return self._date_strs[index]
+        return (self.first_day + timedelta(days=day - 1)).strftime('%Y-%m-%d')
+
+    def in_month(self, day):
+        return 1 <= day <= self.days_in_month
+
+    def user_ids(self):
+        return list(self._rows)
+
+    def is_work_shift(self, shift):
+        return self._category(shift) == CAT_WORK
+
+    def row(self, user_id_str):
+        """ Tages-Arrays eines Mitarbeiters (nur lesen; Index = Tag + offset). """
+        return self._rows.get(user_id_str, self._empty_row)
+
+    # --- Abfragen ---
+
+    def raw(self, user_id_str, day):
+        """ Roh-Eintrag (inkl. Frei-Einträgen) oder None. """
+        index = day + self.offset
+        if 0 <= index < self.size:
+            return self.row(user_id_str).shifts[index]
+        return None
+
+    def duty(self, user_id_str, day):
+        """ Dienst an einem Tag (Frei-Einträge wie U, X, WF zählen nicht) oder "". """
+        shift = self.raw(user_id_str, day)
+        return shift if shift and shift not in FREE_SHIFTS else ""
+
+    def is_free(self, user_id_str, day):
+        """ True für Frei-Einträge ("", FREI, U, X, ...), False für Dienste und leere Tage. """
+        return self.raw(user_id_str, day) in FREE_SHIFTS
+
+    def work_run(self, user_id_str, day):
+        """ Fortlaufende Arbeitstage bis einschließlich 'day'. """
+        index = day + self.offset
+        if 0 <= index < self.size:
+            return self.row(user_id_str).work_run[index]
+        return 0
+
+    def consecutive_before(self, user_id_str, day):
+        """ Fortlaufende Arbeitstage direkt vor 'day'. """
+        return self.work_run(user_id_str, day - 1)
+
+    def free_run(self, user_id_str, day):
+        index = day + self.offset
+        if 0 <= index < self.size:
+            return self.row(user_id_str).free_run[index]
+        return 0
+
+    def same_shift_run_before(self, user_id_str, day, shift):
+        """ Fortlaufende Tage mit genau diesem Dienst direkt vor 'day'. """
+        count = 0
+        check_day = day - 1
+        while self.duty(user_id_str, check_day) == shift:
+            count += 1
+            check_day -= 1
+        return count
+
+    def rest_ok(self, user_id_str, day, hard_max, rest_days):
+        """
+        Pflicht-Ruhezeit: Endet vor 'day' eine Frei-Phase, die auf einen vollen
+        Block (>= hard_max Arbeitstage) folgt, muss sie >= rest_days lang sein.
+        """
+        if rest_days <= 0:
+            return True
+        free_days = self.free_run(user_id_str, day - 1)
+        if free_days == 0 or free_days > hard_max + rest_days:
+            return True
+        if self.work_run(user_id_str, day - 1 - free_days) >= hard_max:
+            return free_days >= rest_days
+        return True
+
+    def dog_duties(self, dog, day):
+        """ {uid_str: dienst} aller Mitarbeiter mit diesem Hund an 'day'. """
+        return self._dog_duties.get((dog, day), {})
+
+    def dog_members(self, dog):
+        return [user_id_str for user_id_str, user_dog in self.user_dogs.items() if user_dog == dog]
+
+    # --- Inkrementelle Pflege ---
+
+    def set_shift(self, user_id_str, day, shift):
+        """ Übernimmt einen geänderten Eintrag (None/"" = gelöscht). Tage außerhalb des Grids werden ignoriert. """
+        index = day + self.offset
+        if not 0 <= index < self.size:
+            return
+        shift = shift or None
+        row = self._rows.get(user_id_str)
+        if row is None:
+            row = _Row(self.size)
+            self._rows[user_id_str] = row
+        if row.shifts[index] == shift:
+            return
+        row.shifts[index] = shift
+        row.cats[index] = self._category(shift)
+        self._update_runs(row, index)
+
+        dog = self.user_dogs.get(user_id_str)
+        if dog:
+            duties = self._dog_duties.setdefault((dog, day), {})
+            if shift and shift not in FREE_SHIFTS:
+                duties[user_id_str] = shift
+            else:
+                duties.pop(user_id_str, None)
+
+
+def _preferences_of(user_preferences, user_id_str):
+    # .get statt []: ein defaultdict (GeneratorConfig) soll nicht wachsen
+    if user_preferences is None:
+        return {}
+    return user_preferences.get(user_id_str) or {}
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _user_sort_key(user_id_str):
+    """ Mitarbeiter numerisch nach ID (nicht-numerische IDs zuletzt). """
+    user_id = _int_or_none(user_id_str)
+    return user_id is None, user_id or 0, user_id_str
+
+
+# --- Regel-Deklarationen ---
+#
+# Jede Regel ist eine Fabrik (engine, optionen) -> prüfe(uid_str, tag, schicht),
+# die den Verstoß als kurzen Text liefert (oder None). 'lookback' gibt an,
+# wie viele Vortage in die Regel eingehen (für die inkrementelle Neubewertung
+# und die Markierung bestehender Verstöße).
+
+class _RuleSpec:
+    __slots__ = ('key', 'factory', 'lookback')
+
+    def __init__(self, key, factory, lookback):
+        self.key = key
+        self.factory = factory
+        self.lookback = lookback
+
+
+_RULES = {}
+
+
+def _rule(key, lookback=0):
+    def register(factory):
+        _RULES[key] = _RuleSpec(key, factory, lookback)
+        return factory
+
+    return register
+
+
+@_rule(VACATION)
+def _vacation_rule(engine, options):
+    def check(user_id_str, day, shift):
+        if engine.vacation_day(user_id_str, day):
+            return "Urlaub"
+        return None
+
+    return check
+
+
+@_rule(WUNSCHFREI)
+def _wunschfrei_rule(engine, options):
+    def check(user_id_str, day, shift):
+        wf_shift = engine.wunschfrei_shift(user_id_str, day)
+        if wf_shift is not None and (wf_shift == "" or wf_shift == shift):
+            return "Wunschfrei"
+        return None
+
+    return check
+
+
+@_rule(OCCUPIED)
+def _occupied_rule(engine, options):
+    grid = engine.grid
+
+    def check(user_id_str, day, shift):
+        existing = grid.duty(user_id_str, day)
+        if existing:
+            return f"Hat bereits {existing}"
+        return None
+
+    return check
+
+
+@_rule(EXCLUSION)
+def _exclusion_rule(engine, options):
+    user_preferences = options.get('user_preferences', engine.user_preferences)
+
+    def check(user_id_str, day, shift):
+        if shift in _preferences_of(user_preferences, user_id_str).get('shift_exclusions', []):
+            return "Persönl. Ausschluss"
+        return None
+
+    return check
+
+
+@_rule(NIGHT_REST, lookback=1)
+def _night_rest_rule(engine, options):
+    grid = engine.grid
+
+    def check(user_id_str, day, shift):
+        if shift in NIGHT_REST_BLOCKED and grid.duty(user_id_str, day - 1) == NIGHT_SHIFT:
+            return "N->T/6/QA/S (Ruhezeit)"
+        return None
+
+    return check
+
+
+@_rule(NIGHT_FREE_DAY, lookback=2)
+def _night_free_day_rule(engine, options):
+    grid = engine.grid
+
+    def check(user_id_str, day, shift):
+        if shift == DAY_SHIFT and grid.is_free(user_id_str, day - 1) and grid.duty(user_id_str,
+                                                                                   day - 2) == NIGHT_SHIFT:
+            return "N-F-T"
+        return None
+
+    return check
+
+
+@_rule(MAX_CONSECUTIVE)
+def _max_consecutive_rule(engine, options):
+    grid = engine.grid
+    limit = options.get('max_consecutive', engine.hard_max_consecutive)
+
+    def check(user_id_str, day, shift):
+        if grid.consecutive_before(user_id_str, day) >= limit:
+            return f"Max. {limit} Tage in Folge"
+        return None
+
+    return check
+
+
+@_rule(MANDATORY_REST)
+def _mandatory_rest_rule(engine, options):
+    grid = engine.grid
+    hard_max = engine.hard_max_consecutive
+    rest_days = options.get('rest_days', engine.mandatory_rest_days)
+
+    def check(user_id_str, day, shift):
+        if rest_days > 0 and not grid.rest_ok(user_id_str, day, hard_max, rest_days):
+            return f"Ruhezeit ({rest_days} Tage)"
+        return None
+
+    return check
+
+
+@_rule(MAX_HOURS)
+def _max_hours_rule(engine, options):
+    hours = engine.hours
+    shift_hours = engine.shift_hours
+    user_preferences = engine.user_preferences
+    default_limit = engine.max_monthly_hours
+
+    def check(user_id_str, day, shift):
+        if hours is None:
+            return None
+        override = _preferences_of(user_preferences, user_id_str).get('max_monthly_hours')
+        limit = override if override is not None else default_limit
+        current = hours.get(int(user_id_str), 0.0)
+        if current + shift_hours.get(shift, 0.0) > limit:
+            return f"Max. {limit} Stunden"
+        return None
+
+    return check
+
+
+@_rule(MAX_SAME_SHIFT)
+def _max_same_shift_rule(engine, options):
+    grid = engine.grid
+    user_preferences = engine.user_preferences
+    default_limit = options.get('max_same_shift')
+
+    def check(user_id_str, day, shift):
+        override = _preferences_of(user_preferences, user_id_str).get('max_consecutive_same_shift_override')
+        limit = override if override is not None else default_limit
+        if limit is None:
+            return None
+        if grid.same_shift_run_before(user_id_str, day, shift) >= limit:
+            return f"Max. {limit}x {shift} in Folge"
+        return None
+
+    return check
+
+
+@_rule(DOG_OVERLAP)
+def _dog_overlap_rule(engine, options):
+    grid = engine.grid
+
+    def check(user_id_str, day, shift):
+        dog = grid.user_dogs.get(user_id_str)
+        if not dog:
+            return None
+        for other_id_str, other_shift in grid.dog_duties(dog, day).items():
+            if other_id_str != user_id_str and engine.shifts_clash(shift, other_shift):
+                return f"Hund (mit {engine.user_name(other_id_str)})"
+        return None
+
+    return check
+
+
+class RuleSet:
+    """ Kompilierte Regel-Auswahl (Reihenfolge = Reihenfolge der Prüfung). """
+
+    __slots__ = ('keys', '_checks', '_lookbacks', 'max_lookback')
+
+    def __init__(self, keys, checks, lookbacks):
+        self.keys = tuple(keys)
+        self._checks = tuple(checks)
+        self._lookbacks = tuple(lookbacks)
+        self.max_lookback = max(lookbacks) if lookbacks else 0
+
+    def first_violation(self, user_id_str, day, shift):
+        """ Erster Verstoß als Text oder None (= Schicht erlaubt). """
+        for check in self._checks:
+            reason = check(user_id_str, day, shift)
+            if reason:
+                return reason
+        return None
+
+    def allows(self, user_id_str, day, shift):
+        return self.first_violation(user_id_str, day, shift) is None
+
+    def violations(self, user_id_str, day, shift):
+        """ Alle Verstöße (z.B. für die Anzeige im PlanningAssistant). """
+        return [reason for reason in (check(user_id_str, day, shift) for check in self._checks) if reason]
+
+    def _evaluations(self):
+        return zip(self._checks, self._lookbacks)
+
+
+class RuleEngine:
+    """
+    Daten, gegen die die Regeln ausgewertet werden: das MonthGrid plus
+    Schichtzeiten, Präferenzen, Urlaub/Wunschfrei und (Live-)Stunden.
+    Nicht benötigte Quellen dürfen None sein; die zugehörigen Regeln
+    melden dann keinen Verstoß.
+    """
+
+    def __init__(self, grid, shift_times=None, user_preferences=None, vacations=None, wunschfrei=None,
+                 hours=None, shift_hours=None, max_monthly_hours=None, hard_max_consecutive=8,
+                 mandatory_rest_days=0, user_names=None):
+        self.grid = grid
+        self.shift_times = shift_times or {}
+        self.user_preferences = user_preferences
+        self.vacations = vacations or {}
+        self.wunschfrei = wunschfrei or {}
+        self.hours = hours
+        self.shift_hours = shift_hours or {}
+        self.max_monthly_hours = max_monthly_hours
+        self.hard_max_consecutive = hard_max_consecutive
+        self.mandatory_rest_days = mandatory_rest_days
+        self.user_names = user_names or {}
+        self._static = {}  # uid_str -> (urlaubstage, {tag: wf_schicht})
+
+    def compile(self, *rule_keys, **options):
+        """
+        Bindet die gewählten Regeln (in dieser Reihenfolge) an das Grid.
+        Optionen: max_consecutive, rest_days, max_same_shift, user_preferences.
+        """
+        specs = [_RULES[key] for key in rule_keys]
+        return RuleSet(rule_keys, [spec.factory(self, options) for spec in specs], [spec.lookback for spec in specs])
+
+    # --- Vorberechnete Verfügbarkeit (Urlaub / Wunschfrei) ---
+
+    def _static_for(self, user_id_str):
+        static = self._static.get(user_id_str)
+        if static is None:
+            grid = self.grid
+            vacation_days = set()
+            for vac_date, status in (self.vacations.get(user_id_str) or {}).items():
+                if status in APPROVED_VACATION and isinstance(vac_date, date):
+                    vacation_days.add(grid.day_of(vac_date))
+            wunschfrei_days = {}
+            for date_str, wf_entry in (self.wunschfrei.get(user_id_str) or {}).items():
+                if isinstance(wf_entry, tuple) and len(wf_entry) >= 2 and wf_entry[0] in APPROVED_WUNSCHFREI:
+                    try:
+                        wf_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+                    except (TypeError, ValueError):
+                        continue
+                    wunschfrei_days[grid.day_of(wf_date)] = wf_entry[1] or ""
+            static = (vacation_days, wunschfrei_days)
+            self._static[user_id_str] = static
+        return static
+
+    def vacation_day(self, user_id_str, day):
+        return day in self._static_for(user_id_str)[0]
+
+    def wunschfrei_shift(self, user_id_str, day):
+        """ "" = ganzer Tag gesperrt, Kürzel = nur diese Schicht, None = kein Wunschfrei. """
+        return self._static_for(user_id_str)[1].get(day)
+
+    # --- Hilfen ---
+
+    def shifts_clash(self, shift1, shift2):
+        """ Gleicher Dienst oder zeitliche Überlappung (Frei-Einträge nie). """
+        if shift1 in FREE_SHIFTS or shift2 in FREE_SHIFTS:
+            return False
+        if shift1 == shift2:
+            return True
+        s1, e1 = self.shift_times.get(shift1, (None, None))
+        s2, e2 = self.shift_times.get(shift2, (None, None))
+        if s1 is None or s2 is None:
+            return False
+        return (s1 < e2) and (s2 < e1)
+
+    def user_name(self, user_id_str):
+        return self.user_names.get(user_id_str) or f"ID {user_id_str}"
+
+    # --- Bestehende Verstöße (Konflikt-Markierung im Plan) ---
+
+    def cell_in_violation(self, rule_set, user_id_str, day):
+        """
+        True, wenn der eingetragene Dienst an 'day' an einem Verstoß beteiligt
+        ist - als geprüfter Dienst selbst oder als Vortag eines Folgedienstes
+        (z.B. das N. vor einem T.).
+        """
+        grid = self.grid
+        if not grid.duty(user_id_str, day):
+            return False
+        for check, lookback in rule_set._evaluations():
+            for check_day in range(day, day + lookback + 1):
+                shift = grid.duty(user_id_str, check_day)
+                if shift and check(user_id_str, check_day, shift):
+                    return True
+        return False
+
+    def violation_cells(self, rule_set):
+        """ Alle Zellen (uid_str, tag) des Monats mit Verstoß. """
+        grid = self.grid
+        cells = set()
+        for user_id_str in grid.user_ids():
+            for day in range(1, grid.days_in_month + 1):
+                if self.cell_in_violation(rule_set, user_id_str, day):
+                    cells.add((user_id_str, day))
+        return cells
+
+    def cells_affected_by(self, rule_set, user_id_str, day):
+        """ Zellen, deren Verstoß-Status sich durch eine Änderung an (uid, day) ändern kann. """
+        grid = self.grid
+        reach = rule_set.max_lookback
+        cells = {(user_id_str, d) for d in range(day - reach, day + reach + 1) if grid.in_month(d)}
+        dog = grid.user_dogs.get(user_id_str)
+        if dog and grid.in_month(day):
+            cells.update((other_id_str, day) for other_id_str in grid.dog_members(dog))
+        return cells
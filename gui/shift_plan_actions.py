@@ -17,6 +17,8 @@ from .action_handlers.action_update_handler import ActionUpdateHandler
 from .action_handlers.action_shift_handler import ActionShiftHandler
 from .action_handlers.action_request_handler import ActionRequestHandler
 from .action_handlers.action_admin_handler import ActionAdminHandler
+from .action_handlers.action_history_handler import ActionHistoryHandler
+from .action_handlers.action_sandbox_handler import ActionSandboxHandler
 
 # --- ENDE NEUE IMPORTE ---
 
@@ -51,6 +53,8 @@ class ShiftPlanActionHandler:
         self.shift_handler = None
         self.request_handler = None
         self.admin_handler = None
+        self.history_handler = None
+        self.sandbox_handler = None
 
     def set_renderer_and_init_helpers(self, renderer_instance):
         """
@@ -91,6 +95,22 @@ class ShiftPlanActionHandler:
             data_manager=self.data_manager
         )
 
+        self.history_handler = ActionHistoryHandler(
+            tab=self.tab,
+            app_instance=self.app,
+            renderer=self.renderer,
+            data_manager=self.data_manager
+        )
+
+        # NEU (Regel 2): Testmodus (Was-wäre-wenn)
+        self.sandbox_handler = ActionSandboxHandler(
+            tab=self.tab,
+            app_instance=self.app,
+            renderer=self.renderer,
+            data_manager=self.data_manager,
+            update_handler=self.updater
+        )
+
     def _load_menu_config(self):
         """Lädt die Konfiguration für das Schicht-Kontextmenü."""
         config = load_config_json(SHIFT_MENU_CONFIG_KEY)
@@ -137,12 +157,26 @@ class ShiftPlanActionHandler:
 
     def _check_helpers_initialized(self):
         """Prüft, ob der Renderer und die Helfer initialisiert wurden."""
-        if not self.updater or not self.shift_handler or not self.request_handler or not self.admin_handler:
+        if not self.updater or not self.shift_handler or not self.request_handler or not self.admin_handler \
+                or not self.history_handler or not self.sandbox_handler:
             print("[FEHLER] ActionHandler-Helfer sind nicht initialisiert! Renderer wurde nie gesetzt.")
             # Verhindere weitere Aktionen, wenn der Klick zu früh erfolgt
             return False
         return True
 
+    def _blocked_by_sandbox(self, action_label):
+        """
+        NEU (Regel 2): Aktionen, die sofort in die DB schreiben, sind im Testmodus
+        gesperrt (der Testmodus darf die DB erst beim Übernehmen berühren).
+        """
+        if not self.data_manager.in_sandbox:
+            return False
+        messagebox.showinfo("Testmodus aktiv",
+                            f"'{action_label}' ist im Testmodus nicht möglich.\n"
+                            "Bitte den Testmodus zuerst übernehmen oder verwerfen.",
+                            parent=self.tab)
+        return True
+
     def save_shift_entry_and_refresh(self, user_id, date_str, shift_abbrev):
         """Delegiert das Speichern einer Schicht an den ShiftHandler."""
         if self._check_helpers_initialized():
@@ -150,17 +184,17 @@ class ShiftPlanActionHandler:
 
     def secure_shift(self, user_id, date_str, shift_abbrev):
         """Delegiert das Sichern einer Schicht an den ShiftHandler."""
-        if self._check_helpers_initialized():
+        if self._check_helpers_initialized() and not self._blocked_by_sandbox("Schicht sichern"):
             self.shift_handler.secure_shift(user_id, date_str, shift_abbrev)
 
     def unlock_shift(self, user_id, date_str):
         """Delegiert das Entsichern einer Schicht an den ShiftHandler."""
-        if self._check_helpers_initialized():
+        if self._check_helpers_initialized() and not self._blocked_by_sandbox("Sicherung aufheben"):
             self.shift_handler.unlock_shift(user_id, date_str)
 
     def admin_add_wunschfrei(self, user_id, date_str, request_type):
         """Delegiert das Admin-Erstellen von Wünschen an den RequestHandler."""
-        if self._check_helpers_initialized():
+        if self._check_helpers_initialized() and not self._blocked_by_sandbox("Wunsch eintragen"):
             self.request_handler.admin_add_wunschfrei(user_id, date_str, request_type)
 
     def show_wunschfrei_context_menu(self, event, user_id, date_str):
@@ -170,14 +204,39 @@ class ShiftPlanActionHandler:
 
     def delete_shift_plan_by_admin(self, year, month):
         """Delegiert das Löschen des Plans an den AdminHandler."""
-        if self._check_helpers_initialized():
+        if self._check_helpers_initialized() and not self._blocked_by_sandbox("Schichtplan löschen"):
             self.admin_handler.delete_shift_plan_by_admin(year, month)
 
     def unlock_all_shifts_for_month(self, year, month):
         """Delegiert das globale Entsichern an den AdminHandler."""
-        if self._check_helpers_initialized():
+        if self._check_helpers_initialized() and not self._blocked_by_sandbox("Alle Sicherungen aufheben"):
             self.admin_handler.unlock_all_shifts_for_month(year, month)
 
+    def undo_last_change(self):
+        """Delegiert Rückgängig (Strg+Z) an den HistoryHandler."""
+        if self._check_helpers_initialized() and not self._blocked_by_sandbox("Rückgängig"):
+            self.history_handler.undo()
+
+    def redo_last_change(self):
+        """Delegiert Wiederholen (Strg+Y) an den HistoryHandler."""
+        if self._check_helpers_initialized() and not self._blocked_by_sandbox("Wiederholen"):
+            self.history_handler.redo()
+
+    def start_sandbox(self):
+        """Delegiert das Starten des Testmodus an den SandboxHandler."""
+        if self._check_helpers_initialized():
+            self.sandbox_handler.start()
+
+    def commit_sandbox(self):
+        """Delegiert das Übernehmen des Testmodus an den SandboxHandler."""
+        if self._check_helpers_initialized():
+            self.sandbox_handler.commit()
+
+    def discard_sandbox(self, ask=True):
+        """Delegiert das Verwerfen des Testmodus an den SandboxHandler."""
+        if self._check_helpers_initialized():
+            self.sandbox_handler.discard(ask=ask)
+
     # --- Haupt-Kontextmenü (verbleibt hier als Orchestrator) ---
 
     def on_grid_cell_click(self, event, user_id, day, year, month):
@@ -234,6 +293,11 @@ class ShiftPlanActionHandler:
                                                     d=date_str: self.shift_handler.save_shift_entry_and_refresh(u, d,
                                                                                                                 ""))
 
+        # NEU (Regel 2): Im Testmodus nur Schichtänderungen (Wünsche/Sicherungen schreiben sofort in die DB)
+        if self.data_manager.in_sandbox:
+            context_menu.tk_popup(event.x_root, event.y_root)
+            return
+
         # 3. Admin-Optionen (Wunschfrei)
         context_menu.add_separator()
         context_menu.add_command(label="Admin: Wunschfrei (WF)",
@@ -14,12 +14,22 @@ from gui.shift_lock_manager import ShiftLockManager
 # Importiere die Helfer aus dem neuen Unterordner
 from .data_manager.dm_violation_manager import ViolationManager
 from .data_manager.dm_helpers import DataManagerHelpers
+from .data_manager.dm_plan_journal import PlanJournal
+from .data_manager.dm_load_stage import MonthLoadStage
+from .data_manager.dm_month_cache import MonthCache
+from .data_manager.dm_sandbox import PlanSandbox
+# NEU (Regel 2): Zeitmessung der Ladeabschnitte (Leistungsprotokoll)
+from utils.instrumentation import get_logger, span
 # --- NEUER IMPORT (Regel 2 & 4): Latenz-Problem beheben ---
 from gui.planning_assistant import PlanningAssistant
+# NEU (Regel 2): Persistenter Engpass-Index (Angebot vs. Bedarf über mehrere Monate)
+from gui.criticality_index import CriticalityIndex
 
 
 # --- ENDE NEUE IMPORTE ---
 
+_log = get_logger("data_manager")
+
 
 class ShiftPlanDataManager:
     """
@@ -35,7 +45,8 @@ class ShiftPlanDataManager:
         self.app = app
 
         # --- P5: Multi-Monats-Cache ---
-        self.monthly_caches = {}
+        # KORREKTUR (Regel 2): Begrenzter LRU-Cache statt unbegrenztem dict
+        self.monthly_caches = MonthCache()
 
         # Aktiver Monat
         self.year = 0
@@ -53,6 +64,22 @@ class ShiftPlanDataManager:
         self.user_shift_totals = {}
         # --- ENDE KORREKTUR ---
 
+        # --- NEU (Regel 2): Undo/Redo-Journal für Planänderungen ---
+        self.plan_journal = PlanJournal()
+
+        # NEU (Regel 2): Testmodus (Copy-on-write-Overlay über dem aktiven Monat, siehe dm_sandbox.py)
+        self.sandbox = None
+
+        # NEU (Regel 2): Engpass-Index (wird im Preload-Thread geladen/aufgebaut, siehe ensure_fresh)
+        self.criticality_index = CriticalityIndex(self)
+
+        # NEU (Regel 2): Lade-Token - nur der neueste Ladevorgang darf die aktiven Caches setzen
+        self._load_lock = threading.Lock()
+        self._latest_load_token = 0
+        # Wird bei jedem Austausch der aktiven Caches erhöht (MonthGrid/Regeln im ViolationManager neu bauen)
+        self._cache_generation = 0
+        # --- ENDE NEU ---
+
         # --- NEU: user_data_map (wird für PlanningAssistant benötigt) ---
         # Stellt sicher, dass die User-Metadaten immer verfügbar sind
         self.user_data_map = {}
@@ -125,6 +152,7 @@ class ShiftPlanDataManager:
         self.next_month_shifts = {}
         self.cached_users_for_month = []
         self.user_shift_totals = {}
+        self._cache_generation += 1
         # self.user_data_map wird NICHT geleert
 
     def clear_all_monthly_caches(self):
@@ -134,7 +162,7 @@ class ShiftPlanDataManager:
         """
         # (Unverändert)
         print("[DM Cache] Lösche gesamten Monats-Cache (P5) und globale Helfer-Caches...")
-        self.monthly_caches = {}
+        self.monthly_caches.clear()
         self._clear_active_caches()
 
         if hasattr(self.vm, '_preprocessed_shift_times'):
@@ -184,7 +212,7 @@ class ShiftPlanDataManager:
         Placeholder für die langsame Berechnung der Ist-Stunden-Totals.
         """
         # (Unverändert)
-        print("[DM] Starte langsame Berechnung der user_shift_totals...")
+        _log.debug("Starte langsame Berechnung der user_shift_totals...")
         return self.helpers.calculate_user_shift_totals_from_db(shift_data, user_data_map, shift_types_data)
 
     def update_violation_set(self, year, month):
@@ -203,53 +231,50 @@ class ShiftPlanDataManager:
 
     # --- Haupt-Ladefunktion (schlanker) ---
 
-    def load_and_process_data(self, year, month, progress_callback=None, force_reload=False):
+    def load_and_process_data(self, year, month, progress_callback=None, force_reload=False, cancel_token=None,
+                              apply=True):
         """
         Führt den konsolidierten DB-Abruf im Worker-Thread durch ODER lädt aus dem P5-Cache.
         Nutzt Helfer für die Datenverarbeitung.
+
+        NEU (Regel 2): Ladevorgänge mit apply=True erhalten ein Lade-Token. Ein
+        neuerer Ladevorgang überholt ältere: diese brechen an den Stufengrenzen
+        ab (bzw. wenn 'cancel_token' gesetzt wird) und überschreiben die aktiven
+        Caches nicht mehr. Ein bereits abgeschlossener DB-Abruf landet trotzdem
+        im P5-Cache. apply=False (Vorladen) füllt nur den P5-Cache.
+
+        Returns:
+            bool: True, wenn die Daten übernommen (bzw. bei apply=False gecacht)
+                  wurden; False bei Fehler oder wenn der Ladevorgang überholt wurde.
         """
-        # (Funktion ist unverändert)
         cache_key = (year, month)
+        load_token = self._begin_load() if apply else None
+
+        def is_superseded():
+            if cancel_token is not None and cancel_token.cancelled:
+                return True
+            return load_token is not None and load_token != self._latest_load_token
 
         def update_progress(value, text):
-            if progress_callback: progress_callback(value, text)
+            if progress_callback and not is_superseded(): progress_callback(value, text)
 
         # 1. PRÜFE GLOBALEN CACHE (P5)
-        if cache_key in self.monthly_caches and not force_reload:
+        cached_data = self.monthly_caches.get(cache_key) if not force_reload else None
+        if cached_data is not None:
+            if not apply:
+                return True
             print(f"[DM Cache] Lade Monat {year}-{month} aus dem P5-Cache.")
             update_progress(50, "Lade Daten aus Cache...")
 
-            cached_data = self.monthly_caches[cache_key]
-
-            # Atomares Überschreiben der aktiven Caches
-            self.year = year
-            self.month = month
-            self.shift_schedule_data = cached_data['shift_schedule_data']
-            self.processed_vacations = cached_data['processed_vacations']
-            self.wunschfrei_data = cached_data['wunschfrei_data']
-            self.daily_counts = cached_data['daily_counts']
-            self.violation_cells = cached_data['violation_cells']
-            self._prev_month_shifts = cached_data['_prev_month_shifts']
-            self.previous_month_shifts = cached_data['previous_month_shifts']
-            self.processed_vacations_prev = cached_data['processed_vacations_prev']
-            self.wunschfrei_data_prev = cached_data['wunschfrei_data_prev']
-            self.next_month_shifts = cached_data['next_month_shifts']
-            self.cached_users_for_month = cached_data['cached_users_for_month']
-            self.locked_shifts_cache = cached_data.get('locked_shifts', {})
-
-            if 'user_data_map' in cached_data:
-                self.user_data_map = cached_data['user_data_map']
-            if 'user_shift_totals' in cached_data:
-                self.user_shift_totals = cached_data['user_shift_totals']
-
-            if self.user_data_map:
-                self._initialize_user_shift_totals(self.user_data_map)
-
-            self.vm.preprocess_shift_times()
+            if not self._apply_if_current(load_token, cancel_token, year, month, cached_data):
+                return False
             update_progress(95, "Vorbereitung abgeschlossen.")
             return True  # Erfolg
 
         # 2. NICHT IM CACHE: Von DB laden
+        if is_superseded():
+            print(f"[DM] Ladevorgang {year}-{month} überholt, DB-Abruf entfällt.")
+            return False
         print(f"[DM] Lade Monat {year}-{month} von DB (nicht im P5-Cache).")
 
         temp_data = {
@@ -266,7 +291,8 @@ class ShiftPlanDataManager:
         first_day_current_month = date(year, month, 1)
         current_date_for_archive_check = datetime.combine(first_day_current_month, time(0, 0, 0))
 
-        batch_data = get_all_data_for_plan_display(year, month, current_date_for_archive_check)
+        with span("dm.batch_load", month=f"{year}-{month:02d}"):
+            batch_data = get_all_data_for_plan_display(year, month, current_date_for_archive_check)
         if batch_data is None:
             print("[FEHLER] get_all_data_for_plan_display hat None zurückgegeben.")
             return False
@@ -292,7 +318,32 @@ class ShiftPlanDataManager:
         temp_data['next_month_shifts'] = batch_data.get('next_month_shifts', {})
         print(f"[DM Load] Batch-Entpacken (temporär) abgeschlossen.")
 
-        # 3. Restliche Verarbeitung
+        # 3. Konflikte und Totals auf einer privaten Stage berechnen (aktive Caches bleiben unberührt)
+        stage = MonthLoadStage(self, year, month, temp_data)
+        update_progress(80, "Prüfe Konflikte (Ruhezeit, Hunde)...")
+        with span("dm.violation_scan", month=f"{year}-{month:02d}"):
+            stage.vm.update_violation_set(year, month)
+
+        update_progress(90, "Berechne Monats-Totals...")
+        with span("dm.totals", month=f"{year}-{month:02d}"):
+            stage.user_shift_totals = stage.helpers.calculate_user_shift_totals_from_db(
+                stage.shift_schedule_data,
+                stage.user_data_map,
+                self.app.shift_types_data
+            )
+
+        # 4. Im P5-Cache speichern (auch wenn der Ladevorgang inzwischen überholt wurde)
+        print(f"[DM Cache] Speichere Monat {year}-{month} im P5-Cache.")
+        cache_entry = stage.build_cache_entry()
+        self.monthly_caches[cache_key] = cache_entry
+
+        if not apply:
+            return True
+        if is_superseded():
+            print(f"[DM] Ladevorgang {year}-{month} überholt. Ergebnis nur im P5-Cache abgelegt.")
+            return False
+
+        # 5. Restliche Verarbeitung (globale Events des Jahres, nur für den angezeigten Monat)
         try:
             if hasattr(self.app, 'app'):
                 self.app.app.global_events_data = EventManager.get_events_for_year(year)
@@ -307,41 +358,63 @@ class ShiftPlanDataManager:
                 self.app.global_events_data = {}
 
         print("[DM Load] Tageszählungen (daily_counts) direkt aus Batch übernommen.")
-        self.vm.preprocess_shift_times()
 
-        # 4. Atomares Update der aktiven Caches
-        print(f"[DM] Atomares Update: Überschreibe aktive Caches mit Daten für {year}-{month}")
-        self.year = year
-        self.month = month
-        self.user_data_map = temp_data['user_data_map']
-        self._initialize_user_shift_totals(self.user_data_map)
-        self.shift_schedule_data = temp_data['shift_schedule_data']
-        self.processed_vacations = temp_data['processed_vacations']
-        self.wunschfrei_data = temp_data['wunschfrei_data']
-        self.daily_counts = temp_data['daily_counts']
-        self.locked_shifts_cache = temp_data['locked_shifts_cache']
-        self._prev_month_shifts = temp_data['_prev_month_shifts']
-        self.previous_month_shifts = temp_data['previous_month_shifts']
-        self.processed_vacations_prev = temp_data['processed_vacations_prev']
-        self.wunschfrei_data_prev = temp_data['wunschfrei_data_prev']
-        self.next_month_shifts = temp_data['next_month_shifts']
-        self.cached_users_for_month = temp_data['cached_users_for_month']
+        # 6. Atomares Update der aktiven Caches (nur, wenn noch der neueste Ladevorgang)
+        if not self._apply_if_current(load_token, cancel_token, year, month, cache_entry):
+            return False
+        update_progress(95, "Vorbereitung abgeschlossen.")
+        return True  # Erfolg
 
-        update_progress(80, "Prüfe Konflikte (Ruhezeit, Hunde)...")
-        self.update_violation_set(year, month)
+    def _begin_load(self):
+        """ Vergibt ein neues Lade-Token; alle älteren Ladevorgänge gelten damit als überholt. """
+        with self._load_lock:
+            self._latest_load_token += 1
+            return self._latest_load_token
 
-        update_progress(90, "Berechne Monats-Totals...")
-        self.user_shift_totals = self._calculate_user_shift_totals(
-            self.shift_schedule_data,
-            self.user_data_map,
-            self.app.shift_types_data
-        )
+    def _apply_if_current(self, load_token, cancel_token, year, month, cached_data):
+        """
+        Überschreibt die aktiven Caches mit 'cached_data', sofern 'load_token'
+        noch das neueste ist. Gibt False zurück, wenn der Ladevorgang überholt wurde.
+        """
+        with self._load_lock:
+            if load_token != self._latest_load_token or (cancel_token is not None and cancel_token.cancelled):
+                print(f"[DM] Ladevorgang {year}-{month} überholt. Aktive Caches bleiben unverändert.")
+                return False
 
-        update_progress(95, "Vorbereitung abgeschlossen.")
+            # Atomares Überschreiben der aktiven Caches
+            print(f"[DM] Atomares Update: Überschreibe aktive Caches mit Daten für {year}-{month}")
+            self.year = year
+            self.month = month
+            # Angezeigter Monat ±1 wird nie aus dem P5-Cache verdrängt
+            self.monthly_caches.pin_around(year, month)
+            self.shift_schedule_data = cached_data['shift_schedule_data']
+            self.processed_vacations = cached_data['processed_vacations']
+            self.wunschfrei_data = cached_data['wunschfrei_data']
+            self.daily_counts = cached_data['daily_counts']
+            self.violation_cells = cached_data['violation_cells']
+            self._prev_month_shifts = cached_data['_prev_month_shifts']
+            self.previous_month_shifts = cached_data['previous_month_shifts']
+            self.processed_vacations_prev = cached_data['processed_vacations_prev']
+            self.wunschfrei_data_prev = cached_data['wunschfrei_data_prev']
+            self.next_month_shifts = cached_data['next_month_shifts']
+            self.cached_users_for_month = cached_data['cached_users_for_month']
+            self.locked_shifts_cache = cached_data.get('locked_shifts', {})
+            self._cache_generation += 1
 
-        # 5. Im P5-Cache speichern
-        print(f"[DM Cache] Speichere Monat {year}-{month} im P5-Cache.")
-        self.monthly_caches[cache_key] = {
+            if 'user_data_map' in cached_data:
+                self.user_data_map = cached_data['user_data_map']
+            if 'user_shift_totals' in cached_data:
+                self.user_shift_totals = cached_data['user_shift_totals']
+
+            if self.user_data_map:
+                self._initialize_user_shift_totals(self.user_data_map)
+
+        self.vm.preprocess_shift_times()
+        return True
+
+    def _build_month_cache_entry(self):
+        """ Erstellt den P5-Cache-Eintrag aus den aktiven Caches. """
+        return {
             'shift_schedule_data': self.shift_schedule_data,
             'processed_vacations': self.processed_vacations,
             'wunschfrei_data': self.wunschfrei_data,
@@ -358,7 +431,150 @@ class ShiftPlanDataManager:
             'user_shift_totals': self.user_shift_totals
         }
 
-        return True  # Erfolg
+    @staticmethod
+    def _copy_month_cache_entry(entry):
+        """
+        Kopie eines P5-Cache-Eintrags, die von Änderungen an den aktiven Caches
+        unabhängig ist (Strukturen, die Schreibvorgänge in-place ändern).
+        """
+        entry = dict(entry)
+        for key in ('shift_schedule_data', 'daily_counts', 'user_shift_totals'):
+            entry[key] = {outer: dict(inner) for outer, inner in entry[key].items()}
+        entry['violation_cells'] = set(entry['violation_cells'])
+        return entry
+
+    def get_month_data(self, year, month):
+        """
+        NEU (Regel 2): Monatsdaten im Format des P5-Cache-Eintrags für einen
+        beliebigen Monat (z.B. Mehrmonats-Generierung): aktiver Monat aus den
+        aktiven Caches, sonst aus dem P5-Cache bzw. per DB-Abruf (apply=False,
+        der angezeigte Monat bleibt unverändert). Läuft im Worker-Thread.
+        Im Testmodus liefert der aktive Monat den gespeicherten Stand (P5-Eintrag).
+        Gibt None zurück, wenn der Monat nicht geladen werden konnte.
+        """
+        if (self.year, self.month) == (year, month) and self.sandbox is None:
+            return self._build_month_cache_entry()
+        cached_data = self.monthly_caches.get((year, month))
+        if cached_data is not None:
+            return cached_data
+        if not self.load_and_process_data(year, month, apply=False):
+            return None
+        return self.monthly_caches.get((year, month))
+
+    # --- NEU (Regel 2): Testmodus (Was-wäre-wenn) ---
+
+    @property
+    def in_sandbox(self):
+        return self.sandbox is not None
+
+    def begin_sandbox(self):
+        """
+        Startet den Testmodus für den aktiven Monat. Die aktiven Caches werden
+        weiter in-place geändert (siehe PlanSandbox); der P5-Cache-Eintrag teilt
+        sich sonst ihre Objekte und bekommt daher eine eigene Kopie des
+        gespeicherten Stands (get_month_data, Mehrmonats-Generierung).
+        """
+        if self.sandbox is None:
+            self.monthly_caches[(self.year, self.month)] = self._copy_month_cache_entry(
+                self._build_month_cache_entry())
+            self.sandbox = PlanSandbox(self.year, self.month)
+            print(f"[DM] Testmodus gestartet: {self.sandbox}")
+        return self.sandbox
+
+    def sandbox_touch(self, user_id, date_str):
+        """ Vor dem Schreiben einer Zelle aufrufen: merkt sich im Testmodus den ursprünglichen Wert. """
+        if self.sandbox is not None:
+            self.sandbox.touch(user_id, date_str, self.shift_schedule_data.get(str(user_id), {}).get(date_str))
+
+    def sandbox_change_count(self):
+        return self.sandbox.change_count(self.shift_schedule_data) if self.sandbox is not None else 0
+
+    def end_sandbox(self):
+        """
+        Beendet den Testmodus nach dem Übernehmen: die Caches enthalten bereits
+        den gespeicherten Stand, nur der P5-Cache-Eintrag wird aktualisiert.
+        """
+        sandbox, self.sandbox = self.sandbox, None
+        if sandbox is not None and (self.year, self.month) == (sandbox.year, sandbox.month):
+            self.monthly_caches.replace((self.year, self.month), self._build_month_cache_entry())
+        return sandbox
+
+    def discard_sandbox(self):
+        """
+        Verwirft den Testmodus: setzt nur die geänderten Zellen (inkl. Konflikte,
+        Stunden und Tageszählungen) In-Memory zurück, ohne DB-Zugriff.
+        Gibt die zurückgesetzte PlanDiff und die betroffenen Konflikt-Zellen zurück.
+        """
+        sandbox, self.sandbox = self.sandbox, None
+        if sandbox is None:
+            return None, set()
+        plan_diff = sandbox.discard_diff(self.shift_schedule_data)
+        print(f"[DM] Testmodus verworfen ({plan_diff.summary()}).")
+        if plan_diff.is_empty():
+            return plan_diff, set()
+        conflict_cells = self.apply_plan_diff(plan_diff)
+        if conflict_cells is None:
+            # Monat ist nicht mehr aktiv: der P5-Eintrag ist die Kopie vom Start (gespeicherter Stand)
+            return plan_diff, set()
+        return plan_diff, conflict_cells
+
+    # --- ENDE NEU ---
+
+    # --- NEU (Regel 2): Generator-Ergebnis gezielt einspielen (statt Reload) ---
+    def apply_plan_diff(self, plan_diff):
+        """
+        Spielt eine PlanDiff (z.B. vom Generator) in die aktiven Caches ein:
+        Schichtplan, Tageszählungen, Konflikte (inkrementell) und Stunden-Totals.
+        Aktualisiert danach den P5-Cache-Eintrag des Monats.
+        Im Testmodus werden die ursprünglichen Werte in der Sandbox gemerkt und
+        der P5-Cache bleibt unverändert.
+        Gibt die Menge der betroffenen Konflikt-Zellen zurück oder None,
+        wenn der Monat nicht (mehr) aktiv ist (Aufrufer muss dann neu laden).
+        """
+        if (self.year, self.month) != (plan_diff.year, plan_diff.month):
+            print(f"[DM] apply_plan_diff: Monat {plan_diff.year}-{plan_diff.month} ist nicht aktiv. Übersprungen.")
+            return None
+
+        print(f"[DM] Spiele Plan-Differenz ein ({plan_diff.summary()})...")
+        affected_conflict_cells = set()
+        for user_id, date_str, _, new_shift in plan_diff.iter_changes():
+            user_id_str = str(user_id)
+            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+
+            # 1. Schichtplan (muss VOR der Konfliktprüfung aktualisiert sein)
+            # (Alter Wert kommt aus dem Cache, nicht aus der Diff: so bleiben die
+            #  Zähler auch bei Undo/Redo einer älteren Diff konsistent)
+            self.sandbox_touch(user_id_str, date_str)
+            user_shifts = self.shift_schedule_data.setdefault(user_id_str, {})
+            old_shift = user_shifts.get(date_str)
+            if new_shift:
+                user_shifts[date_str] = new_shift
+            else:
+                user_shifts.pop(date_str, None)
+
+            # 2. Tageszählung
+            self._apply_daily_count_change(date_str, old_shift, new_shift)
+
+            # 3. Konflikte (inkrementell)
+            updates = self.vm.update_violations_incrementally(user_id, date_obj, old_shift, new_shift)
+            if updates:
+                affected_conflict_cells.update(updates)
+
+        # 4. Stunden-Totals nur für betroffene Benutzer neu berechnen
+        for user_id in plan_diff.affected_user_ids():
+            user_id_str = str(user_id)
+            self.user_shift_totals[user_id_str] = {
+                'hours_total': self.calculate_total_hours_for_user(user_id_str, self.year, self.month),
+                'shifts_total': len(self.shift_schedule_data.get(user_id_str, {}))
+            }
+
+        # 5. P5-Cache aktuell halten (kein Invalidieren nötig; im Testmodus erst beim Übernehmen)
+        # (replace statt Zuweisung: die Größe wird erst beim nächsten Verdrängen neu geschätzt)
+        if self.sandbox is None:
+            self.monthly_caches.replace((self.year, self.month), self._build_month_cache_entry())
+        return affected_conflict_cells
+
+    # --- ENDE NEU ---
 
     # --- MODIFIZIERTE FUNKTION (Regel 2: Latenz-Fix) ---
     def recalculate_daily_counts_for_day(self, date_obj, old_shift, new_shift):
@@ -372,7 +588,8 @@ class ShiftPlanDataManager:
         # --- INNOVATION (Regel 2): Latenz-Fix ---
         # Diese Operation (del) blockiert den Hauptthread und verzögert
         # das Anzeigen von 'T.' in der UI.
-        if cache_key in self.monthly_caches:
+        # (Im Testmodus ist der P5-Eintrag eine Kopie des gespeicherten Stands und bleibt gültig.)
+        if cache_key in self.monthly_caches and self.sandbox is None:
 
             print(f"[DM Cache] Plane asynchrones Entfernen von {cache_key} aus P5-Cache...")
 
@@ -404,8 +621,11 @@ class ShiftPlanDataManager:
         # --- ENDE ---
 
         # (Der Rest der Funktion ist schnell und bleibt synchron im Hauptthread)
-        date_str = date_obj.strftime('%Y-%m-%d')
-        print(f"[DM Counts] Aktualisiere Zählung für {date_str}: '{old_shift}' -> '{new_shift}'")
+        self._apply_daily_count_change(date_obj.strftime('%Y-%m-%d'), old_shift, new_shift)
+
+    def _apply_daily_count_change(self, date_str, old_shift, new_shift):
+        """ Aktualisiert self.daily_counts für einen Tag (ohne Cache-Invalidierung). """
+        _log.debug("Aktualisiere Zählung für %s: '%s' -> '%s'", date_str, old_shift, new_shift)
         if date_str not in self.daily_counts:
             self.daily_counts[date_str] = {}
 
@@ -426,7 +646,7 @@ class ShiftPlanDataManager:
         if not counts_today and date_str in self.daily_counts:
             del self.daily_counts[date_str]
 
-        print(f"[DM Counts] Neue Zählung für {date_str}: {self.daily_counts.get(date_str, {})}")
+        _log.debug("Neue Zählung für %s: %s", date_str, self.daily_counts.get(date_str, {}))
 
     # --- (Unverändert) ---
     def get_conflicts_for_shift(self, user_id, date_obj, target_shift_abbrev):
@@ -2,7 +2,7 @@
 import calendar
 import threading
 from collections import defaultdict
-from datetime import date, timedelta, datetime, time
+from datetime import date, timedelta, time
 import math
 import traceback
 
@@ -19,12 +19,26 @@ except ImportError:
 from .generator.generator_helpers import GeneratorHelpers
 from .generator.generator_scoring import GeneratorScoring
 from .generator.generator_rounds import GeneratorRounds
+from .generator.generator_feasibility import FeasibilityIndex
+# --- NEU (Regel 2 & 4): Gemeinsame Regel-Engine (auch für PlanningAssistant / ViolationManager) ---
+from .rule_engine import (MonthGrid, RuleEngine, shift_minutes, user_dogs_from, work_shift_indicators,
+                          VACATION, WUNSCHFREI, OCCUPIED, EXCLUSION, NIGHT_REST, NIGHT_FREE_DAY,
+                          MAX_CONSECUTIVE, MANDATORY_REST, MAX_HOURS, MAX_SAME_SHIFT, DOG_OVERLAP)
 # --- NEUER IMPORT für Batch-Speichern ---
-from .generator.generator_persistence import save_generation_batch_to_db
+from .generator.generator_persistence import save_plan_diff_to_db
+from .generator.generator_diff import compute_plan_diff
 
 # --- NEUE IMPORTS FÜR REFACTORING (Regel 4) ---
 from .generator.generator_pre_planning import GeneratorPrePlanner
 from .generator.generator_config import GeneratorConfig
+# --- NEU (Regel 2): Unveränderlicher Eingabe-Snapshot ---
+from .generator.generator_input import GeneratorInput, build_generator_input, build_generator_input_from_cache
+# --- NEU (Regel 2): Optionales Solver-Backend (CP-SAT, nur mit installiertem OR-Tools) ---
+from .generator.generator_solver import MonthSolver, solver_requested, solver_time_limit
+# --- NEU (Regel 2): Leveled Logging + Zeitmessung (Leistungsprotokoll) ---
+from utils.instrumentation import get_logger, span, start_span
+
+_log = get_logger("generator")
 
 # Konstanten (Basis-Konfiguration, die nicht aus der DB kommt)
 MAX_MONTHLY_HOURS = 228.0
@@ -38,6 +52,9 @@ CRITICAL_BUFFER = 1
 # Standardwerte für Scores (Werden jetzt primär in GeneratorConfig verwaltet)
 LOOKAHEAD_PENALTY_SCORE = 500
 
+# Der Generator plant nur diese Schichten aktiv
+SHIFTS_TO_PLAN = ("6", "T.", "N.")
+
 
 class ShiftPlanGenerator:
     """
@@ -46,24 +63,50 @@ class ShiftPlanGenerator:
     Implementiert Pre-Planning mit dynamischer Kritikalitätsprüfung.
     """
 
-    def __init__(self, app, data_manager, year, month, all_users, user_data_map,
-                 vacation_requests, wunschfrei_requests, live_shifts_data,
-                 locked_shifts_data,
-                 holidays_in_month, progress_callback, completion_callback):
+    @staticmethod
+    def build_input(app, data_manager, year, month, cache_entry=None):
+        """
+        NEU (Regel 2): Baut den Eingabe-Snapshot aus den Monats-Caches des DataManagers
+        (ohne DB-Zugriff). Wird vom Generator und von Simulationen verwendet.
+        Mit 'cache_entry' (P5-Cache-Eintrag) auch für nicht angezeigte Monate
+        (Mehrmonats-Generierung, siehe generator_horizon.py).
+        """
+        shift_hours = {abbrev: float(data.get('hours', 0.0)) for abbrev, data in app.shift_types_data.items()}
+        if cache_entry is not None:
+            return build_generator_input_from_cache(data_manager, year, month, cache_entry, shift_hours,
+                                                    SHIFTS_TO_PLAN)
+        return build_generator_input(data_manager, year, month, shift_hours, SHIFTS_TO_PLAN)
+
+    def __init__(self, app, data_manager, generator_input: GeneratorInput, progress_callback, completion_callback,
+                 horizon_carry=None):
 
         # --- KERN-ATTRIBUTE ---
         self.app = app
         self.data_manager = data_manager
-        self.year = year
-        self.month = month
-        self.all_users = all_users
-        self.user_data_map = user_data_map
-        self.vacation_requests = vacation_requests
-        self.wunschfrei_requests = wunschfrei_requests
-        self.initial_live_shifts_data = live_shifts_data
-        self.locked_shifts_data = locked_shifts_data
+
+        # --- NEU (Regel 2): Alle Eingabedaten kommen aus dem (read-only) Snapshot ---
+        # Die Attribute bleiben als Aliase erhalten, damit Helfer/Scoring/Runden unverändert
+        # darauf zugreifen können. Nur live_shifts_data ist eine eigene Arbeitskopie.
+        self.input = generator_input
+        self.year = generator_input.year
+        self.month = generator_input.month
+        self.all_users = generator_input.users
+        self.user_data_map = generator_input.user_data_map
+        self.vacation_requests = generator_input.vacations
+        self.wunschfrei_requests = generator_input.wunschfrei
+        self.locked_shifts_data = generator_input.locks
         self.live_shifts_data = {}
-        self.holidays_in_month = holidays_in_month
+        self.feasibility = None  # NEU (Regel 2): FeasibilityIndex, wird in _generate aufgebaut
+        self.rule_grid = None  # NEU (Regel 2): MonthGrid der Regel-Engine, wird in compute_plan aufgebaut
+        self.rules = None
+        self.decision_log = None  # NEU (Regel 2): Entscheidungsprotokoll, vom GeneratorJob gesetzt (optional)
+        self.holidays_in_month = generator_input.holidays_in_month
+        # --- ENDE NEU ---
+        # NEU (Regel 2): Übertrag aus den vorherigen Monaten einer Mehrmonats-Generierung
+        # (HorizonCarry). Die Fairness vergleicht dann die Stunden über den ganzen Horizont;
+        # ohne Übertrag sind alle Offsets 0 (Einzelmonat, Verhalten unverändert).
+        self.horizon_carry = horizon_carry
+        self.balance_offsets = horizon_carry.balance_offsets(self.user_data_map) if horizon_carry else {}
         self.progress_callback = progress_callback
         self.completion_callback = completion_callback
 
@@ -82,7 +125,7 @@ class ShiftPlanGenerator:
 
         # --- KORREKTUR (INNOVATION) ---
         # Der Generator soll nur 6, T. und N. aktiv planen.
-        self.shifts_to_plan = ["6", "T.", "N."]
+        self.shifts_to_plan = list(SHIFTS_TO_PLAN)
         # --- ENDE KORREKTUR ---
 
         self.shift_hours = {abbrev: float(data.get('hours', 0.0))
@@ -137,6 +180,145 @@ class ShiftPlanGenerator:
             f"[Generator] Potenzielle kritische Schichten identifiziert (Lookahead={self.CRITICAL_LOOKAHEAD_DAYS}d, Puffer={self.CRITICAL_BUFFER}): {self.potential_critical_shifts if self.potential_critical_shifts else 'Keine'}")
         self.critical_shifts = set()
 
+    def _build_rules(self):
+        """
+        NEU (Regel 2 & 4): Baut das MonthGrid (Vormonat + live_shifts_data + Folgetage)
+        und kompiliert die Regel-Sätze für Scoring, Pre-Planning und die Runden.
+        """
+        self.rule_grid = MonthGrid(
+            self.year, self.month, self.live_shifts_data,
+            self.data_manager.get_previous_month_shifts() or {},
+            self.data_manager.get_next_month_shifts() or {},
+            user_dogs=user_dogs_from(self.all_users),
+            work_indicators=work_shift_indicators(self.app.shift_types_data))
+        self.rules = RuleEngine(
+            self.rule_grid, shift_times=shift_minutes(self.app.shift_types_data),
+            user_preferences=self.user_preferences, vacations=self.vacation_requests,
+            wunschfrei=self.wunschfrei_requests, hours=self.live_user_hours, shift_hours=self.shift_hours,
+            max_monthly_hours=self.MAX_MONTHLY_HOURS, hard_max_consecutive=self.HARD_MAX_CONSECUTIVE_SHIFTS,
+            mandatory_rest_days=self.mandatory_rest_days)
+
+        # Verfügbarkeit für Lookahead-Scoring (Stand des Plans, harte Grenzen)
+        self.hard_rules = self.rules.compile(VACATION, WUNSCHFREI, OCCUPIED, NIGHT_REST, NIGHT_FREE_DAY, EXCLUSION,
+                                             MAX_CONSECUTIVE, MANDATORY_REST, MAX_HOURS)
+        # Pre-Planning (Urlaub/WF/Belegung prüft der Pre-Planner vorab)
+        self.pre_plan_rules = self.rules.compile(DOG_OVERLAP, NIGHT_REST, NIGHT_FREE_DAY, EXCLUSION,
+                                                 MAX_CONSECUTIVE, MANDATORY_REST, MAX_HOURS)
+        # Runde 1 (fair): weiche Kettenlänge, Wunschfrei je nach Respekt-Stufe, Max. gleiche Schicht
+        round_1 = [DOG_OVERLAP, NIGHT_REST, NIGHT_FREE_DAY, EXCLUSION, MAX_CONSECUTIVE, MANDATORY_REST]
+        if self.wunschfrei_respect_level >= 50:
+            round_1.append(WUNSCHFREI)
+        round_1 += [MAX_SAME_SHIFT, MAX_HOURS]
+        self.round_rules = {1: self.rules.compile(*round_1, max_consecutive=self.SOFT_MAX_CONSECUTIVE_SHIFTS,
+                                                  max_same_shift=self.max_consecutive_same_shift_limit)}
+        # Runden 2-4 (Auffüllen): N-F-T nur bis Runde 2, Ruhezeit nur bis Runde 3
+        fill_limit = (self.HARD_MAX_CONSECUTIVE_SHIFTS if self.avoid_understaffing_hard
+                      else self.SOFT_MAX_CONSECUTIVE_SHIFTS)
+        for round_num in (2, 3, 4):
+            keys = [DOG_OVERLAP, NIGHT_REST]
+            if round_num <= 2:
+                keys.append(NIGHT_FREE_DAY)
+            keys += [EXCLUSION, MAX_CONSECUTIVE]
+            if round_num <= 3:
+                keys.append(MANDATORY_REST)
+            keys.append(MAX_HOURS)
+            self.round_rules[round_num] = self.rules.compile(*keys, max_consecutive=fill_limit)
+
+    def staffing_for_day(self, current_date_obj):
+        """
+        Mindestbesetzung eines Tages (aus dem Snapshot). An Sonderterminen (S/QA)
+        gilt für die geplanten Schichten die Basisbesetzung (Wochentag/Feiertag).
+        """
+        day = current_date_obj.day
+        date_str = current_date_obj.strftime('%Y-%m-%d')
+        # --- KORREKTE MINDESTBESETZUNG LOGIK (SONDERTERMINE IGNORIEREN) ---
+        try:
+            min_staffing_today = self.input.min_staffing_for_day(day)  # (Regel 2) aus dem Snapshot
+            is_event_day = False
+            if min_staffing_today:
+                if min_staffing_today.get('S', 0) > 0 or min_staffing_today.get('QA', 0) > 0:
+                    is_event_day = True
+            if is_event_day:
+                base_staffing_rules = self.app.staffing_rules
+                is_holiday_today = current_date_obj in self.holidays_in_month
+                base_staffing_today = {}
+                if is_holiday_today and 'holiday_staffing' in base_staffing_rules:
+                    base_staffing_today = base_staffing_rules['holiday_staffing'].copy()
+                else:
+                    weekday_str = str(current_date_obj.weekday())
+                    if weekday_str in base_staffing_rules.get('weekday_staffing', {}):
+                        base_staffing_today = base_staffing_rules['weekday_staffing'][weekday_str].copy()
+                for shift in self.shifts_to_plan:
+                    if shift in base_staffing_today:
+                        min_staffing_today[shift] = base_staffing_today[shift]
+        except Exception as staffing_err:
+            min_staffing_today = {};
+            print(f"[WARN] Staffing Error {date_str}: {staffing_err}")
+            traceback.print_exc()
+        # --- ENDE MINDESTBESETZUNG LOGIK ---
+        return min_staffing_today
+
+    def plans_shift_on(self, shift_abbrev, current_date_obj):
+        """ "6" wird nur freitags und an Feiertagen geplant, alle anderen Schichten täglich. """
+        if shift_abbrev != '6':
+            return True
+        return current_date_obj.weekday() == 4 or current_date_obj in self.holidays_in_month
+
+    def _init_live_state(self):
+        """
+        Legt die Arbeitskopie des Snapshots an, baut Regel-Engine und
+        Machbarkeits-Index darauf auf und gibt (live_shift_counts,
+        live_shift_counts_ratio) zurück.
+        """
+        # --- KORREKTUR (Regel 2): Locks, Stunden und Zähler sind bereits im Snapshot
+        # (GeneratorInput) vorberechnet. Hier wird nur noch EINE Arbeitskopie angelegt.
+        self.live_shifts_data = self.input.copy_shifts()
+        self.live_user_hours = self.input.copy_user_hours()
+        live_shift_counts = self.input.copy_shift_counts()
+        live_shift_counts_ratio = self.input.copy_shift_counts_ratio()
+        if self.horizon_carry is not None:
+            # T./N.-Verhältnis über den gesamten Horizont (Zähler der Vormonate vorbelegen)
+            self.horizon_carry.seed_ratio_counts(live_shift_counts_ratio)
+        # --- ENDE KORREKTUR ---
+        # NEU (Regel 2): Regel-Engine auf der Arbeitskopie (Zuweisungen über record_assignment)
+        self._build_rules()
+        # NEU (Regel 2): Machbarkeits-Index für das Lookahead-Scoring (wird bei Zuweisungen mitgeführt)
+        self.feasibility = FeasibilityIndex(self)
+        return live_shift_counts, live_shift_counts_ratio
+
+    def _run_solver(self, live_shift_counts, live_shift_counts_ratio):
+        """
+        NEU (Regel 2): Löst den Monat mit dem Solver-Backend (generator_solver.py,
+        Greedy-Plan als Warmstart). Schließt die Lösung mindestens so viele Lücken
+        wie der Greedy-Plan, ersetzt sie dessen Zuweisungen; sonst (oder ohne
+        OR-Tools) bleibt der Greedy-Plan. Gibt die gültigen Zähler zurück.
+        """
+        solver = MonthSolver(self, solver_time_limit(self.config))
+        if not solver.available:
+            return live_shift_counts, live_shift_counts_ratio
+        self._update_progress(95, "Optimiere Plan (Solver)...")
+        result = solver.solve(self.live_shifts_data, self.progress_callback)
+        print(f"[Generator] Solver: {result.summary()}")
+        if not result.improves_on_greedy:
+            return live_shift_counts, live_shift_counts_ratio
+
+        # Solver-Lösung auf einer frischen Arbeitskopie nachziehen (wie die Runden)
+        live_shift_counts, live_shift_counts_ratio = self._init_live_state()
+        for (user_id_str, date_str), shift_abbrev in sorted(result.assignments.items()):
+            user_id_int = int(user_id_str)
+            self.record_assignment(user_id_str, date_str, shift_abbrev)
+            self.live_user_hours[user_id_int] += self.shift_hours.get(shift_abbrev, 0.0)
+            if shift_abbrev in ['T.', '6']: live_shift_counts_ratio[user_id_int]['T_OR_6'] += 1
+            if shift_abbrev == 'N.': live_shift_counts_ratio[user_id_int]['N_DOT'] += 1
+            live_shift_counts[user_id_int][shift_abbrev] += 1
+        return live_shift_counts, live_shift_counts_ratio
+
+    def record_assignment(self, user_id_str, date_str, shift_abbrev):
+        """ NEU (Regel 2): Schreibt eine Zuweisung in live_shifts_data und in das MonthGrid. """
+        self.live_shifts_data.setdefault(user_id_str, {})[date_str] = shift_abbrev
+        if self.rule_grid is not None:
+            self.rule_grid.set_shift(user_id_str, int(date_str[-2:]), shift_abbrev)
+
     def _update_progress(self, value, text):
         if self.progress_callback: self.progress_callback(value, text)
 
@@ -150,63 +332,31 @@ class ShiftPlanGenerator:
     # --- ENDE REFACTORING ---
 
     def _generate(self):
-        """ Führt die eigentliche Generierungslogik aus. """
+        """ Führt die Generierung im aktuellen (Worker-)Thread aus: Plan berechnen und speichern. """
+        try:
+            plan_diff = self.compute_plan()
+        except Exception as e:
+            print(f"Fehler im Generierungs-Thread: {e}");
+            traceback.print_exc()
+            if self.completion_callback:
+                error_msg = f"Ein Fehler ist aufgetreten:\n{e}"
+                self.app.after(100, lambda: self.completion_callback(False, 0, error_msg))
+            return
+        self.persist_plan_diff(self.app, plan_diff, self.completion_callback, self.progress_callback)
+
+    def compute_plan(self):
+        """
+        NEU (Regel 2): Berechnet den Plan rein im Speicher (kein DB-Zugriff, keine Tk-Aufrufe)
+        und gibt die PlanDiff zum geladenen Stand zurück. Läuft im Generator-Thread oder im
+        Generator-Prozess (siehe generator_process.py).
+        """
+        total_span = start_span("generator.total", month=f"{self.year}-{self.month:02d}")
         try:
             self._update_progress(0, "Initialisiere Planung...")
             days_in_month = calendar.monthrange(self.year, self.month)[1]
 
             # --- Initialisierung der Live-Daten ---
-
-            # --- NEU (Regel 1 & 4): Berücksichtige gesicherte Schichten ---
-            self.live_shifts_data = defaultdict(dict)
-            # 1. Lade die normalen Schichten
-            for user_id_str, day_data in self.initial_live_shifts_data.items():
-                self.live_shifts_data[user_id_str] = day_data.copy()
-
-            # 2. Überschreibe (oder füge hinzu) die gesicherten Schichten
-            # (Diese haben Vorrang)
-            if self.locked_shifts_data:
-                print("[Generator] Wende gesicherte Schichten (Locks) an...")
-                for user_id_str, date_data in self.locked_shifts_data.items():
-                    if user_id_str not in self.live_shifts_data:
-                        self.live_shifts_data[user_id_str] = {}
-                    for date_str, locked_shift in date_data.items():
-                        # Prüfe, ob das Datum im aktuellen Monat liegt (wichtig!)
-                        try:
-                            lock_date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-                            if lock_date_obj.year == self.year and lock_date_obj.month == self.month:
-                                # Überschreibe nur, wenn die gesicherte Schicht
-                                # nicht "leer" ist (obwohl das nie passieren sollte)
-                                if locked_shift:
-                                    self.live_shifts_data[user_id_str][date_str] = locked_shift
-                        except ValueError:
-                            continue  # Ungültiges Datum im Lock-Cache ignorieren
-            # --- ENDE NEU ---
-
-            self.live_user_hours = defaultdict(float)
-            live_shift_counts = defaultdict(lambda: defaultdict(int))
-            live_shift_counts_ratio = defaultdict(lambda: defaultdict(int))
-
-            # WICHTIG: Diese Schleife muss *nach* dem Laden der Locks laufen
-            for user_id_str, day_data in self.live_shifts_data.items():
-                try:
-                    user_id_int = int(user_id_str)
-                except ValueError:
-                    continue
-                if user_id_int not in self.user_data_map: continue
-                for date_str, shift in day_data.items():
-                    try:
-                        shift_date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    except ValueError:
-                        continue
-                    if shift_date_obj.year != self.year or shift_date_obj.month != self.month: continue
-                    hours = self.shift_hours.get(shift, 0.0)
-                    if hours > 0: self.live_user_hours[user_id_int] += hours
-                    if shift in ['T.', '6']: live_shift_counts_ratio[user_id_int]['T_OR_6'] += 1
-                    if shift == 'N.': live_shift_counts_ratio[user_id_int]['N_DOT'] += 1
-
-                    if shift in self.shifts_to_plan:
-                        live_shift_counts[user_id_int][shift] += 1
+            live_shift_counts, live_shift_counts_ratio = self._init_live_state()
             # --- Ende Initialisierung ---
 
             # HINWEIS: Die Logik zur dynamischen Prüfung (get_actually_available_count)
@@ -225,31 +375,7 @@ class ShiftPlanGenerator:
                 current_date_obj = date(self.year, self.month, day)
                 date_str = current_date_obj.strftime('%Y-%m-%d')
 
-                # --- KORREKTE MINDESTBESETZUNG LOGIK (SONDERTERMINE IGNORIEREN) ---
-                try:
-                    min_staffing_today = self.data_manager.get_min_staffing_for_date(current_date_obj)
-                    is_event_day = False
-                    if min_staffing_today:
-                        if min_staffing_today.get('S', 0) > 0 or min_staffing_today.get('QA', 0) > 0:
-                            is_event_day = True
-                    if is_event_day:
-                        base_staffing_rules = self.app.staffing_rules
-                        is_holiday_today = current_date_obj in self.holidays_in_month
-                        base_staffing_today = {}
-                        if is_holiday_today and 'holiday_staffing' in base_staffing_rules:
-                            base_staffing_today = base_staffing_rules['holiday_staffing'].copy()
-                        else:
-                            weekday_str = str(current_date_obj.weekday())
-                            if weekday_str in base_staffing_rules.get('weekday_staffing', {}):
-                                base_staffing_today = base_staffing_rules['weekday_staffing'][weekday_str].copy()
-                        for shift in self.shifts_to_plan:
-                            if shift in base_staffing_today:
-                                min_staffing_today[shift] = base_staffing_today[shift]
-                except Exception as staffing_err:
-                    min_staffing_today = {};
-                    print(f"[WARN] Staffing Error {date_str}: {staffing_err}")
-                    traceback.print_exc()
-                # --- ENDE MINDESTBESETZUNG LOGIK ---
+                min_staffing_today = self.staffing_for_day(current_date_obj)
 
                 # Schleife: Schichten (self.shifts_to_plan ist jetzt ["6", "T.", "N."])
                 for shift_abbrev in self.shifts_to_plan:
@@ -258,13 +384,12 @@ class ShiftPlanGenerator:
                     self._update_progress(progress_perc, f"Plane {shift_abbrev} für {date_str}...")
 
                     # --- NEUER VORDURCHLAUF (pro Schicht) ---
+                    # (Hunde-Belegung des Tages kommt aus dem MonthGrid der Regel-Engine)
                     users_unavailable_today = set();
-                    existing_dog_assignments = defaultdict(list);
                     assignments_today_by_shift = defaultdict(set)
 
                     for user_id_int, user_data in self.user_data_map.items():
                         user_id_str = str(user_id_int);
-                        user_dog = user_data.get('diensthund');
                         is_unavailable, is_working = False, False
 
                         # --- KORREKTUR (PROBLEM 1: LOCKS): Explizite Prüfung auf Schichtsicherung ---
@@ -280,9 +405,6 @@ class ShiftPlanGenerator:
 
                             if locked_shift:
                                 assignments_today_by_shift[locked_shift].add(user_id_int)
-                                if user_dog and user_dog != '---':
-                                    existing_dog_assignments[user_dog].append(
-                                        {'user_id': user_id_int, 'shift': locked_shift})
 
                             continue  # Gehe zum nächsten User, dieser ist gesperrt
                         # --- ENDE KORREKTUR (PROBLEM 1) ---
@@ -320,15 +442,10 @@ class ShiftPlanGenerator:
                             users_unavailable_today.add(user_id_str)
                         elif is_working:
                             users_unavailable_today.add(user_id_str)
-
-                        if is_working and user_dog and user_dog != '---':
-                            existing_dog_assignments[user_dog].append({'user_id': user_id_int, 'shift': existing_shift})
                     # --- ENDE NEUER VORDURCHLAUF ---
 
                     # Logik für "6" Schicht
-                    is_friday_6 = shift_abbrev == '6' and current_date_obj.weekday() == 4;
-                    is_holiday_6 = shift_abbrev == '6' and current_date_obj in self.holidays_in_month
-                    if shift_abbrev == '6' and not (is_friday_6 or is_holiday_6): continue
+                    if not self.plans_shift_on(shift_abbrev, current_date_obj): continue
 
                     required_count = min_staffing_today.get(shift_abbrev, 0);
                     if required_count <= 0: continue
@@ -336,8 +453,8 @@ class ShiftPlanGenerator:
                     current_assigned_count = len(assignments_today_by_shift.get(shift_abbrev, set()));
                     needed_now = required_count - current_assigned_count
                     if needed_now <= 0: continue
-                    print(
-                        f"   -> Need {needed_now} for '{shift_abbrev}' @ {date_str} (Req:{required_count}, Has:{current_assigned_count})")
+                    _log.debug("   -> Need %s for '%s' @ %s (Req:%s, Has:%s)",
+                               needed_now, shift_abbrev, date_str, required_count, current_assigned_count)
 
                     # --- KORREKTUR (Regel 1): `while`-Schleife (Fix 2) ---
                     while needed_now > 0:
@@ -347,7 +464,6 @@ class ShiftPlanGenerator:
                         assigned_in_round_1 = self.rounds.run_fair_assignment_round(
                             shift_abbrev, current_date_obj,
                             users_unavailable_today,
-                            existing_dog_assignments,
                             assignments_today_by_shift,
                             self.live_user_hours, live_shift_counts,
                             live_shift_counts_ratio,
@@ -359,7 +475,7 @@ class ShiftPlanGenerator:
                         # Runden 2, 3, 4 (Fill)
                         if assigned_this_loop == 0 and self.generator_fill_rounds >= 1:
                             assigned_in_round_2 = self.rounds.run_fill_round(
-                                shift_abbrev, current_date_obj, users_unavailable_today, existing_dog_assignments,
+                                shift_abbrev, current_date_obj, users_unavailable_today,
                                 assignments_today_by_shift, self.live_user_hours, live_shift_counts,
                                 live_shift_counts_ratio,
                                 1, round_num=2  # HIER: Harte 1
@@ -368,7 +484,7 @@ class ShiftPlanGenerator:
 
                         if assigned_this_loop == 0 and self.generator_fill_rounds >= 2:
                             assigned_in_round_3 = self.rounds.run_fill_round(
-                                shift_abbrev, current_date_obj, users_unavailable_today, existing_dog_assignments,
+                                shift_abbrev, current_date_obj, users_unavailable_today,
                                 assignments_today_by_shift, self.live_user_hours, live_shift_counts,
                                 live_shift_counts_ratio,
                                 1, round_num=3  # HIER: Harte 1
@@ -377,7 +493,7 @@ class ShiftPlanGenerator:
 
                         if assigned_this_loop == 0 and self.generator_fill_rounds >= 3:
                             assigned_in_round_4 = self.rounds.run_fill_round(
-                                shift_abbrev, current_date_obj, users_unavailable_today, existing_dog_assignments,
+                                shift_abbrev, current_date_obj, users_unavailable_today,
                                 assignments_today_by_shift, self.live_user_hours, live_shift_counts,
                                 live_shift_counts_ratio,
                                 1, round_num=4  # HIER: Harte 1
@@ -403,14 +519,6 @@ class ShiftPlanGenerator:
                         if newly_assigned_id:
                             newly_assigned_id_str = str(newly_assigned_id)
                             users_unavailable_today.add(newly_assigned_id_str)
-
-                            user_data = self.user_data_map.get(newly_assigned_id)
-                            if user_data:
-                                user_dog = user_data.get('diensthund')
-                                if user_dog and user_dog != '---':
-                                    existing_dog_assignments[user_dog].append(
-                                        {'user_id': newly_assigned_id, 'shift': shift_abbrev}
-                                    )
                         # --- ENDE State-Update ---
 
                         current_assigned_count = len(assignments_today_by_shift.get(shift_abbrev, set()))
@@ -419,44 +527,59 @@ class ShiftPlanGenerator:
                     # --- ENDE KORREKTUR (Regel 1) ---
 
                     final_assigned_count = len(assignments_today_by_shift.get(shift_abbrev, set()))
-                    if final_assigned_count < required_count: print(
-                        f"   -> [WARNUNG] Mindestbesetzung für '{shift_abbrev}' an {date_str} NICHT erreicht (Req: {required_count}, Assigned: {final_assigned_count}).")
+                    if final_assigned_count < required_count:
+                        _log.info("   -> Mindestbesetzung für '%s' an %s NICHT erreicht (Req: %s, Assigned: %s).",
+                                  shift_abbrev, date_str, required_count, final_assigned_count)
 
-            # --- NEU: Batch-Speichern am Ende aller Schleifen ---
-            self._update_progress(95, "Speichere Plan in Datenbank...")
+            # NEU (Regel 2): Optional den Greedy-Plan mit dem Solver-Backend nachoptimieren
+            if solver_requested(self.config):
+                live_shift_counts, live_shift_counts_ratio = self._run_solver(live_shift_counts,
+                                                                              live_shift_counts_ratio)
 
-            success, saved_count_batch, error_msg_batch = save_generation_batch_to_db(
-                self.live_shifts_data,
-                self.year,
-                self.month
-            )
+            # --- KORREKTUR (Regel 2): Nur die Differenz zum geladenen Plan speichern ---
+            # (Unveränderte Schichten, Urlaube und Locks werden nicht erneut geschrieben)
+            plan_diff = compute_plan_diff(self.input.loaded_shifts, self.live_shifts_data, self.year, self.month)
+            print(f"[Generator] Plan-Differenz: {plan_diff.summary()}")
+            # --- ENDE KORREKTUR ---
 
-            if not success:
-                print(f"KRITISCHER FEHLER: Das Speichern des Batch-Plans ist fehlgeschlagen: {error_msg_batch}")
-                if self.completion_callback:
-                    err_msg = f"Fehler beim Batch-Speichern:\n{error_msg_batch}"
-                    self.app.after(100, lambda: self.completion_callback(False, 0, err_msg))
-                return
+            if self.horizon_carry is not None:
+                self.horizon_carry.add_month(self.user_data_map, self.live_user_hours, live_shift_counts_ratio)
 
-                # --- ENDE NEU ---
-
-            self._update_progress(100, "Generierung abgeschlossen.")
             final_hours_list = sorted(self.live_user_hours.items(), key=lambda item: item[1], reverse=True)
-            print("Finale Stunden nach Generierung:", [(uid, f"{h:.1f}") for uid, h in final_hours_list])
-
-            print("Finale Schichtzählungen (T./N./6):")
-            for user_id_int in sorted(self.live_user_hours.keys()):
-                counts = live_shift_counts[user_id_int];
-                print(
-                    f"  User {user_id_int}: T:{counts.get('T.', 0)}, N:{counts.get('N.', 0)}, 6:{counts.get('6', 0)}")
-
-            if self.completion_callback:
-                self.app.after(100, lambda sc=saved_count_batch: self.completion_callback(True, sc, None))
-
+            total_span.finish(changes=len(plan_diff))
+            if _log.debug_enabled:
+                _log.debug("Finale Stunden nach Generierung: %s", [(uid, f"{h:.1f}") for uid, h in final_hours_list])
+                _log.debug("Finale Schichtzählungen (T./N./6):")
+                for user_id_int in sorted(self.live_user_hours.keys()):
+                    counts = live_shift_counts[user_id_int];
+                    _log.debug(f"  User {user_id_int}: T:{counts.get('T.', 0)}, N:{counts.get('N.', 0)}, "
+                               f"6:{counts.get('6', 0)}")
+            return plan_diff
+        except Exception as e:
+            total_span.finish(error=type(e).__name__)
+            raise
+
+    @staticmethod
+    def persist_plan_diff(app, plan_diff, completion_callback, progress_callback=None):
+        """
+        Speichert die PlanDiff in EINER Transaktion und meldet das Ergebnis über
+        app.after an den Tk-Thread. Läuft im Worker-Thread (DB-Zugriff).
+        """
+        if progress_callback: progress_callback(95, "Speichere Plan in Datenbank...")
+        try:
+            with span("generator.save", changes=len(plan_diff)):
+                success, saved_count_batch, error_msg_batch = save_plan_diff_to_db(plan_diff)
         except Exception as e:
-            print(f"Fehler im Generierungs-Thread: {e}");
             traceback.print_exc()
-            if self.completion_callback: error_msg = f"Ein Fehler ist aufgetreten:\n{e}"; self.app.after(100,
-                                                                                                         lambda: self.completion_callback(
-                                                                                                             False, 0,
-                                                                                                             error_msg))
\ No newline at end of file
+            success, saved_count_batch, error_msg_batch = False, 0, str(e)
+
+        if not success:
+            print(f"KRITISCHER FEHLER: Das Speichern des Batch-Plans ist fehlgeschlagen: {error_msg_batch}")
+            if completion_callback:
+                err_msg = f"Fehler beim Batch-Speichern:\n{error_msg_batch}"
+                app.after(100, lambda: completion_callback(False, 0, err_msg))
+            return
+
+        if progress_callback: progress_callback(100, "Generierung abgeschlossen.")
+        if completion_callback:
+            app.after(100, lambda sc=saved_count_batch, pd=plan_diff: completion_callback(True, sc, None, pd))
@@ -8,8 +8,10 @@ import calendar
 
 # --- NEUE IMPORTE (Regel 4) ---
 from .renderer.renderer_styling import RendererStyling
-from .renderer.renderer_printer import RendererPrinter
+# KORREKTUR (Startzeit): RendererPrinter wird erst beim ersten Druck geladen (siehe Property 'printer')
 from .renderer.renderer_draw import RendererDraw
+# NEU (Regel 2): Zeitmessung des Grid-Aufbaus (Leistungsprotokoll)
+from utils.instrumentation import start_span
 
 
 # --- ENDE NEUE IMPORTE ---
@@ -40,6 +42,7 @@ class ShiftPlanRenderer:
         self.year = 0
         self.month = 0
         self.users_to_render = []
+        self.render_span = None  # Laufende Messung (wird nach den Summenzeilen beendet)
 
         # --- NEU (Für Tastatur-Shortcuts) ---
         # Speichert (user_id, day_of_month) der Zelle unter dem Mauszeiger
@@ -48,7 +51,7 @@ class ShiftPlanRenderer:
 
         # --- NEU (Refactoring): Helfer-Klassen instanziieren ---
         self.styling_helper = RendererStyling(self)
-        self.printer = RendererPrinter(self)
+        self._printer = None  # KORREKTUR (Startzeit): Lazy, siehe Property 'printer'
         self.draw_helper = RendererDraw(self)  # Neuer Draw-Helfer
         # --- ENDE NEU ---
 
@@ -66,6 +69,14 @@ class ShiftPlanRenderer:
         self.wunschfrei_data = {}
         self.daily_counts = {}
 
+    @property
+    def printer(self):
+        """Gibt den Druck-Helfer zurück (wird beim ersten Zugriff importiert und erstellt)."""
+        if self._printer is None:
+            from .renderer.renderer_printer import RendererPrinter
+            self._printer = RendererPrinter(self)
+        return self._printer
+
     def set_plan_grid_frame(self, frame):
         self.plan_grid_frame = frame
 
@@ -106,6 +117,8 @@ class ShiftPlanRenderer:
 
         print(f"[Renderer] Baue Grid für {year}-{month:02d}...")
         self.year, self.month = year, month
+        # Misst vom Start bis zu den Summenzeilen (inkl. der Chunks per after())
+        self.render_span = start_span("render.grid", month=f"{year}-{month:02d}", data_ready=data_ready)
 
         # --- NEU (Für Tastatur-Shortcuts) ---
         # Setze Hover-Koordinaten zurück, da das Gitter neu gezeichnet wird
@@ -395,6 +408,39 @@ class ShiftPlanRenderer:
             import traceback
             traceback.print_exc()
 
+    # --- NEU (Regel 2): Nur die Zellen einer PlanDiff neu zeichnen (Undo/Redo, Testmodus) ---
+    def update_cells_for_diff(self, plan_diff, affected_cells=None):
+        """
+        Zeichnet die geänderten Zellen, die Stunden der betroffenen Benutzer, die
+        Tageszähler der betroffenen Tage und die Konfliktmarker (inkl. Nachbarzellen
+        aus 'affected_cells', siehe apply_plan_diff) neu.
+        Gibt False zurück, wenn das Grid einen anderen Monat zeigt oder das
+        Neuzeichnen fehlschlug (der Aufrufer baut das Grid dann komplett neu).
+        """
+        if (self.year, self.month) != (plan_diff.year, plan_diff.month):
+            return False
+        days = {}
+        try:
+            for user_id, date_str, _, _ in plan_diff.iter_changes():
+                date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+                day = date_obj.day if (date_obj.year, date_obj.month) == (self.year, self.month) else 0
+                self.update_cell_display(user_id, day, date_obj)
+                days[day] = date_obj
+            for user_id in plan_diff.affected_user_ids():
+                self.update_user_total_hours(user_id)
+            for day, date_obj in days.items():
+                if day:
+                    self.update_daily_counts_for_day(day, date_obj)
+            if affected_cells:
+                self.update_conflict_markers(affected_cells)
+        except Exception as e:
+            # (Regel 1) Abfangen von TclError, falls Fenster geschlossen wurde
+            if "invalid command name" in str(e):
+                return True
+            print(f"[Renderer] Gezieltes Neuzeichnen fehlgeschlagen ({e}).")
+            return False
+        return True
+
     # --- Druckfunktion (delegiert) ---
 
     def print_shift_plan(self, year, month, month_name):
@@ -4,10 +4,11 @@ from tkinter import ttk, messagebox
 from tkinter.simpledialog import askstring
 from datetime import datetime
 from database.db_reports import (
-    get_all_bug_reports, update_bug_report_status, archive_bug_report,
+    get_bug_report_list, get_bug_report_details, update_bug_report_status, archive_bug_report,
     unarchive_bug_report, append_admin_note, delete_bug_reports,
     update_bug_report_category, SEVERITY_ORDER
 )
+from gui.treeview_model import DiffTreeviewModel
 
 
 class BugReportsTab(ttk.Frame):
@@ -23,6 +24,8 @@ class BugReportsTab(ttk.Frame):
 
         self.reports_data = {}
         self.selected_report_id = None
+        # NEU (Regel 2): Langtexte werden erst bei Auswahl geladen {id: (updated_at, details)}
+        self.details_cache = {}
         # self.auto_refresh_id = None # Veraltet
         self.refresh_interval_ms = 30000
 
@@ -105,19 +108,20 @@ class BugReportsTab(ttk.Frame):
 
         print("[BugReportsTab] Auto-Refresh: Starte Worker...")
         # --- KORREKTUR: 'args=' entfernt ---
-        self.thread_manager.start_worker(
+        self.thread_manager.start_poll_worker(
             self._fetch_reports_data,
-            self._on_auto_refresh_fetched
+            self._on_auto_refresh_fetched,
+            self.show_archived_var.get()
         )
         # ----------------------------------
 
-    def _fetch_reports_data(self):
+    def _fetch_reports_data(self, include_archived=False):
         """
         [LÄUFT IM THREAD]
-        Ruft die blockierende DB-Funktion auf.
+        Ruft die blockierende DB-Funktion auf (nur Listenspalten).
         """
         try:
-            return get_all_bug_reports()
+            return get_bug_report_list(include_archived)
         except Exception as e:
             print(f"[FEHLER] _fetch_reports_data (Thread): {e}")
             return e
@@ -180,6 +184,7 @@ class BugReportsTab(ttk.Frame):
         vsb.grid(row=1, column=1, sticky="ns")
         self.tree.configure(yscrollcommand=vsb.set)
         self.tree.bind("<<TreeviewSelect>>", self.on_report_selected)
+        self.tree_model = DiffTreeviewModel(self.tree)
 
         for name, color in self.category_colors.items():
             tag_name = name.replace(" ", "_").replace("(", "").replace(")", "").lower()
@@ -278,7 +283,8 @@ class BugReportsTab(ttk.Frame):
         print("[BugReportsTab] Manueller Refresh: Starte Worker...")
         self.thread_manager.start_worker(
             self._fetch_reports_data,
-            lambda res, err: self._on_manual_refresh_fetched(res, err, initial_load)
+            lambda res, err: self._on_manual_refresh_fetched(res, err, initial_load),
+            self.show_archived_var.get()
         )
 
     def _on_manual_refresh_fetched(self, result, error, initial_load):
@@ -306,19 +312,15 @@ class BugReportsTab(ttk.Frame):
     def _update_reports_ui(self, all_reports):
         """
         [LÄUFT IM GUI-THREAD]
-        Aktualisiert das Treeview sicher mit den neuen Daten.
+        Gleicht das Treeview differenziell mit den neuen Daten ab (Regel 2):
+        Nur neue, geänderte oder entfernte Zeilen werden angefasst,
+        Auswahl und Scroll-Position bleiben erhalten.
         """
         if not self.winfo_exists() or all_reports is None:
             return
 
         try:
-            selected_ids = self.tree.selection()
-            scroll_pos = self.tree.yview()
-
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            self.reports_data.clear()
-
+            old_reports = self.reports_data
             show_archived = self.show_archived_var.get()
             visible_reports = [r for r in all_reports if show_archived or not r.get('archived')]
             self.reports_data = {r['id']: r for r in all_reports}
@@ -326,7 +328,7 @@ class BugReportsTab(ttk.Frame):
             active_reports = [r for r in visible_reports if r.get('status') != 'Erledigt']
             completed_reports = [r for r in visible_reports if r.get('status') == 'Erledigt']
 
-            def insert_report(report):
+            def build_row(report):
                 user = f"{report.get('vorname', '')} {report.get('name', '')}".strip() or "Unbekannt"
                 try:
                     ts = datetime.strptime(report['timestamp'], '%Y-%m-%d %H:%M:%S').strftime('%d.%m.%Y %H:%M')
@@ -349,39 +351,43 @@ class BugReportsTab(ttk.Frame):
                     elif category and category in self.category_colors:
                         tags.append(category.replace(" ", "_").lower())
 
-                values = (category, user, ts, report.get('title', 'N/A'), status)
-                self.tree.insert("", tk.END, iid=report['id'], values=values, tags=tags)
+                values = (category, user, str(ts), report.get('title', 'N/A'), status)
+                return report['id'], values, tags
 
             active_reports.sort(key=lambda r: SEVERITY_ORDER.get(r.get('category'), 0), reverse=True)
-            for report in active_reports:
-                insert_report(report)
+            rows = [build_row(report) for report in active_reports]
 
             if active_reports and completed_reports:
-                self.tree.insert("", tk.END, iid="separator", values=("", "--- ERLEDIGTE MELDUNGEN ---", "", "", ""),
-                                 tags=('separator',))
+                rows.append(("separator", ("", "--- ERLEDIGTE MELDUNGEN ---", "", "", ""), ('separator',)))
 
             completed_reports.sort(key=lambda r: r['timestamp'], reverse=True)
-            for report in completed_reports:
-                insert_report(report)
-
-            if selected_ids:
-                valid_ids = [sid for sid in selected_ids if self.tree.exists(sid)]
-                if valid_ids:
-                    self.tree.selection_set(valid_ids)
-                    if len(valid_ids) == 1: self.on_report_selected(None)
-                else:
+            rows.extend(build_row(report) for report in completed_reports)
+
+            inserted, changed, removed = self.tree_model.sync(rows)
+            if inserted or changed or removed:
+                print(f"[BugReportsTab] Liste abgeglichen: {len(inserted)} neu, {len(changed)} geändert, "
+                      f"{len(removed)} entfernt.")
+
+            # Veraltete Langtexte verwerfen
+            for report_id in list(self.details_cache):
+                if report_id not in self.reports_data:
+                    del self.details_cache[report_id]
+
+            # Details nur neu anzeigen, wenn sich die ausgewählte Meldung geändert hat
+            if self.selected_report_id is not None:
+                current = self.reports_data.get(self.selected_report_id)
+                previous = old_reports.get(self.selected_report_id)
+                if current is None or not self.tree.exists(str(self.selected_report_id)):
                     self.clear_details()
-            else:
-                self.clear_details()
-
-            self.tree.yview_moveto(scroll_pos[0])
+                elif previous is None or previous.get('updated_at') != current.get('updated_at') \
+                        or str(self.selected_report_id) in changed:
+                    self.on_report_selected(None)
 
         except Exception as e:
             print(f"[FEHLER] _update_reports_ui: {e}")
             self.clear_details()
 
     def on_report_selected(self, event):
-        # (Unverändert)
         selection = self.tree.selection()
         if "separator" in selection:
             self.clear_details()
@@ -407,26 +413,11 @@ class BugReportsTab(ttk.Frame):
             return
 
         self.title_var.set(report.get('title', 'Kein Titel'))
-        description = report.get('description') or ''
-        self.description_text.config(state="normal")
-        self.description_text.delete("1.0", tk.END)
-        self.description_text.insert("1.0", description)
-        self.description_text.config(state="disabled")
         self.category_combobox_admin.config(state="readonly")
         self.category_combobox_admin.set(report.get('category', ''))
         self.status_combobox.config(state="readonly")
         self.status_combobox.set(report.get('status', ''))
 
-        admin_notes = report.get('admin_notes') or ''
-        user_notes = report.get('user_notes') or ''
-        full_notes = ""
-        if admin_notes: full_notes += f"--- ADMIN NOTIZEN ---\n{admin_notes}\n\n"
-        if user_notes: full_notes += f"--- USER FEEDBACK ---\n{user_notes}"
-        self.notes_text.config(state="normal")
-        self.notes_text.delete("1.0", tk.END)
-        self.notes_text.insert("1.0", full_notes.strip())
-        self.notes_text.config(state="disabled")
-
         self.add_note_button.config(state="normal")
         self.archive_button.config(state="normal")
         self.archive_button.config(text="Dearchivieren" if report.get('archived') else "Archivieren")
@@ -437,6 +428,51 @@ class BugReportsTab(ttk.Frame):
             self.re_request_feedback_button.pack(side="left", expand=True, fill="x", padx=(0, 5))
             self.close_bug_button.pack(side="left", expand=True, fill="x", padx=(5, 0))
 
+        # --- NEU (Regel 2): Langtexte aus dem Cache oder im Hintergrund laden ---
+        cached = self.details_cache.get(self.selected_report_id)
+        if cached and cached[0] == report.get('updated_at'):
+            self._show_report_texts(cached[1])
+        else:
+            self._show_report_texts(None)
+            self.thread_manager.start_worker(
+                get_bug_report_details,
+                lambda res, err, rid=self.selected_report_id, stamp=report.get('updated_at'):
+                self._on_details_fetched(rid, stamp, res, err),
+                self.selected_report_id
+            )
+
+    def _on_details_fetched(self, report_id, stamp, details, error):
+        """ [GUI-Thread] Zeigt die nachgeladenen Langtexte an (falls noch ausgewählt). """
+        if not self.winfo_exists():
+            return
+        if error or isinstance(details, Exception) or details is None:
+            print(f"[BugReportsTab] Details für Report {report_id} nicht ladbar: {error or details}")
+            return
+        self.details_cache[report_id] = (stamp, details)
+        if self.selected_report_id == report_id:
+            self._show_report_texts(details)
+
+    def _show_report_texts(self, details):
+        """ Füllt Beschreibung und Notizen (None = wird geladen). """
+        if details is None:
+            description, full_notes = "Wird geladen...", ""
+        else:
+            description = details.get('description') or ''
+            admin_notes = details.get('admin_notes') or ''
+            user_notes = details.get('user_notes') or ''
+            full_notes = ""
+            if admin_notes: full_notes += f"--- ADMIN NOTIZEN ---\n{admin_notes}\n\n"
+            if user_notes: full_notes += f"--- USER FEEDBACK ---\n{user_notes}"
+
+        self.description_text.config(state="normal")
+        self.description_text.delete("1.0", tk.END)
+        self.description_text.insert("1.0", description)
+        self.description_text.config(state="disabled")
+        self.notes_text.config(state="normal")
+        self.notes_text.delete("1.0", tk.END)
+        self.notes_text.insert("1.0", full_notes.strip())
+        self.notes_text.config(state="disabled")
+
     def clear_details(self):
         # (Unverändert)
         self.selected_report_id = None
@@ -107,7 +107,7 @@ class ChatTab(ttk.Frame):
         selected_user_id_at_start = self.selected_user_id
 
         # --- KORREKTUR: 'args=' entfernt ---
-        self.thread_manager.start_worker(
+        self.thread_manager.start_poll_worker(
             self._fetch_chat_data,
             self._on_chat_data_fetched,
             self.current_user_id,
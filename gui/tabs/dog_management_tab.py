@@ -8,7 +8,9 @@ from PIL import Image, ImageTk
 import io
 
 # --- NEU (Regel 1 & 2): Import der neuen DB-Funktionen ---
-from database.db_dogs import get_all_dogs, delete_dog, get_dog_details
+from database.db_dogs import get_all_dogs, delete_dog, get_dog_details, get_dog_image
+# --- NEU (Regel 2): LRU-Cache für dekodierte Vorschaubilder ---
+from ..dog_image_cache import dog_thumbnail_cache
 
 # KORREKTUR: Importieren des korrekten Edit-Windows
 from ..dog_edit_window import DogEditWindow
@@ -29,6 +31,9 @@ class DogManagementTab(ttk.Frame):
         # --- NEU (Regel 1): Referenzen für Detailansicht ---
         self.selected_dog_id = None
         self.image_preview = None  # Referenz für Bild-Label
+        self.thumb_image = None  # Dekodiertes Vorschaubild (PIL) aus dem Cache
+        self.has_image = False
+        self.full_image_preview = None  # Referenz für das Vollbild-Fenster
         self.detail_widgets = {}
         self.detail_vars = {}
         # --- ENDE NEU ---
@@ -107,7 +112,12 @@ class DogManagementTab(ttk.Frame):
         self.image_label = ttk.Label(self.details_frame, text="Bitte einen Hund auswählen",
                                      style="TLabel", relief="solid", anchor="center",
                                      font=("Segoe UI", 12))
-        self.image_label.pack(fill="x", expand=False, pady=(0, 10), ipady=100)
+        self.image_label.pack(fill="x", expand=False, pady=(0, 5), ipady=100)
+
+        # --- NEU (Regel 2): Original-Bild nur auf Wunsch laden ---
+        self.full_image_button = ttk.Button(self.details_frame, text="Bild in voller Größe öffnen",
+                                            command=self._open_full_image, state="disabled")
+        self.full_image_button.pack(anchor="e", pady=(0, 10))
 
         # Info-Frame
         info_frame = ttk.Frame(self.details_frame, padding=10)
@@ -213,25 +223,37 @@ class DogManagementTab(ttk.Frame):
             self._clear_details_view()
 
     def _load_dog_details_threaded(self, dog_id):
-        """(NEU) Lädt das Bild und die Details im Hintergrund (Regel 2)."""
+        """(NEU) Lädt das Vorschaubild und die Details im Hintergrund (Regel 2)."""
         try:
-            # Ruft die DB-Funktion auf, die den BLOB holt
-            full_dog_data = get_dog_details(dog_id)
+            # --- KORREKTUR (Regel 2): Nur Vorschaubild laden; bekannter Hash spart die Übertragung ---
+            full_dog_data = get_dog_details(dog_id, known_image_hash=dog_thumbnail_cache.known_hash(dog_id))
 
             if full_dog_data:
+                thumb_image = None
+                image_hash = full_dog_data.get('image_hash')
+                try:
+                    thumb_image = (dog_thumbnail_cache.get(dog_id, image_hash)
+                                   or dog_thumbnail_cache.put_bytes(dog_id, image_hash,
+                                                                    full_dog_data.get('image_thumb')))
+                except Exception as e:
+                    print(f"Fehler beim Dekodieren des Vorschaubilds: {e}")
+
                 # UI-Update im Main-Thread
-                self.after(0, self._display_dog_details, full_dog_data)
+                self.after(0, self._display_dog_details, full_dog_data, thumb_image)
             else:
                 self.after(0, self._clear_details_view)
         except Exception as e:
             print(f"Fehler beim Laden der Hundedetails: {e}")
             self.after(0, self._clear_details_view)
 
-    def _display_dog_details(self, dog_data):
+    def _display_dog_details(self, dog_data, thumb_image=None):
         """(NEU) Füllt die rechte Detailansicht mit Daten (Regel 4)."""
+        if dog_data.get('id') != self.selected_dog_id:
+            return  # Inzwischen wurde ein anderer Hund ausgewählt
 
-        # 1. Bild anzeigen
-        self.image_blob = dog_data.get('image_blob', None)
+        # 1. Vorschaubild anzeigen
+        self.thumb_image = thumb_image
+        self.has_image = bool(dog_data.get('has_image'))
         self._display_image()  # Zeigt das Bild oder "Kein Bild"
 
         # 2. Text-Infos füllen
@@ -255,34 +277,74 @@ class DogManagementTab(ttk.Frame):
             var.set(value)
 
     def _display_image(self):
-        """(NEU) Zeigt das Bild im self.image_blob im Label an."""
-        if not self.image_blob:
+        """(NEU) Zeigt das Vorschaubild (self.thumb_image) im Label an."""
+        self.full_image_button.config(state="normal" if self.has_image else "disabled")
+        if not self.has_image:
             self.image_label.config(image=None, text="Kein Bild vorhanden")
             self.image_preview = None
             return
+        if self.thumb_image is None:
+            self.image_label.config(image=None, text="Keine Vorschau verfügbar")
+            self.image_preview = None
+            return
 
         try:
-            image_data = io.BytesIO(self.image_blob)
-            img = Image.open(image_data)
-
-            # Bild skalieren, um in den Frame zu passen (Breite 300)
-            base_width = 300
-            w_percent = (base_width / float(img.size[0]))
-            h_size = int((float(img.size[1]) * float(w_percent)))
-            img = img.resize((base_width, h_size), Image.Resampling.LANCZOS)
-
-            self.image_preview = ImageTk.PhotoImage(img)
+            # --- KORREKTUR (Regel 2): Vorschaubild ist bereits verkleinert und dekodiert ---
+            self.image_preview = ImageTk.PhotoImage(self.thumb_image)
             self.image_label.config(image=self.image_preview, text="")
         except Exception as e:
             print(f"Fehler beim Anzeigen des Bilds: {e}")
             self.image_label.config(image=None, text="Bild-Vorschau fehlgeschlagen")
             self.image_preview = None
 
+    def _open_full_image(self):
+        """(NEU) Lädt das Original-Bild (volle Auflösung) und zeigt es in einem eigenen Fenster (Regel 2)."""
+        dog_id = self.selected_dog_id
+        if not dog_id or not self.has_image:
+            return
+        self.full_image_button.config(state="disabled", text="Lade Bild...")
+
+        def _load():
+            try:
+                image_blob = get_dog_image(dog_id)
+            except Exception as e:
+                print(f"Fehler beim Laden des Original-Bilds: {e}")
+                image_blob = None
+            self.after(0, self._show_full_image, dog_id, image_blob)
+
+        threading.Thread(target=_load, daemon=True).start()
+
+    def _show_full_image(self, dog_id, image_blob):
+        """(NEU) Zeigt das Original-Bild, verkleinert auf die Bildschirmgröße (Main-Thread)."""
+        self.full_image_button.config(text="Bild in voller Größe öffnen",
+                                      state="normal" if self.has_image else "disabled")
+        if not image_blob:
+            messagebox.showerror("Fehler", "Das Bild konnte nicht geladen werden.", parent=self)
+            return
+
+        try:
+            img = Image.open(io.BytesIO(image_blob))
+            max_size = (int(self.winfo_screenwidth() * 0.9), int(self.winfo_screenheight() * 0.85))
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)  # Nur verkleinern, nie vergrößern
+
+            dog_name = next((d.get('name') for d in self.all_dogs_data if d['id'] == dog_id), dog_id)
+            window = tk.Toplevel(self)
+            window.title(f"Diensthund: {dog_name}")
+            window.transient(self.winfo_toplevel())
+            self.full_image_preview = ImageTk.PhotoImage(img)
+            ttk.Label(window, image=self.full_image_preview).pack(padx=5, pady=5)
+        except Exception as e:
+            print(f"Fehler beim Anzeigen des Original-Bilds: {e}")
+            messagebox.showerror("Fehler", f"Das Bild konnte nicht angezeigt werden:\n{e}", parent=self)
+
     def _clear_details_view(self, loading=False):
-        """(NEU) Setzt die Detailansicht zurück."""
-        self.selected_dog_id = None
-        self.image_blob = None
+        """(NEU) Setzt die Detailansicht zurück (beim Laden bleibt die Auswahl erhalten)."""
+        if not loading:
+            self.selected_dog_id = None
+        self.thumb_image = None
+        self.has_image = False
         self.image_preview = None
+        self.full_image_button.config(state="disabled")
 
         if loading:
             self.image_label.config(image=None, text="Lade Details...")
@@ -374,6 +436,7 @@ class DogManagementTab(ttk.Frame):
                 success = delete_dog(self.selected_dog_id)
 
                 if success:
+                    dog_thumbnail_cache.invalidate(self.selected_dog_id)
                     messagebox.showinfo("Erfolg", f"Hund '{dog_name}' wurde gelöscht.", parent=self)
                     self.on_dog_saved()  # Lädt die Daten neu
                 else:
@@ -6,6 +6,7 @@ from datetime import datetime
 from database.db_requests import get_pending_wunschfrei_requests, update_wunschfrei_status
 from database.db_shifts import save_shift_entry
 from ..dialogs.rejection_reason_dialog import RejectionReasonDialog
+from ..criticality_index import notify_users_changed  # NEU (Regel 2): Engpass-Index nachführen
 
 
 class RequestsTab(ttk.Frame):
@@ -149,6 +150,7 @@ class RequestsTab(ttk.Frame):
             if request_details:
                 user_id = request_details['user_id']
                 date_str = request_details['request_date']
+                notify_users_changed(self.app, [user_id])
                 shift = 'WF' if request_details['requested_shift'] == 'WF' else request_details['requested_shift']
 
                 save_shift = 'X' if shift == 'WF' else shift
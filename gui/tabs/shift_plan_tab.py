@@ -23,6 +23,9 @@ from datetime import date, timedelta, datetime
 import calendar
 import threading
 
+from utils.threading_utils import PRIORITY_VISIBLE
+from utils.progress import ProgressChannel
+
 # Importiere die Helfer-Module
 from gui.request_lock_manager import RequestLockManager
 from gui.shift_plan_data_manager import ShiftPlanDataManager
@@ -38,6 +41,11 @@ from .tab_components.shift_plan_events import ShiftPlanEvents
 # --- ENDE NEUE IMPORTE ---
 
 
+# NEU (Regel 2): Schlüssel der Ladeaufgabe für den sichtbaren Monat im ThreadManager.
+# Ein neuer Ladeauftrag ersetzt den alten (schnelles Blättern).
+VISIBLE_MONTH_LOAD_KEY = "shift_plan.visible_month"
+
+
 class ShiftPlanTab(ttk.Frame):
     """
     Haupt-Frame des Dienstplan-Tabs.
@@ -55,6 +63,7 @@ class ShiftPlanTab(ttk.Frame):
     def __init__(self, master, app):  # 'app' ist MainAdminWindow/MainUserWindow
         super().__init__(master)
         self.app = app  # app ist MainAdminWindow/MainUserWindow
+        self._progress_channel = None  # NEU (Regel 2): Fortschrittskanal des laufenden Vorgangs
 
         # --- 1. Bootloader und DataManager initialisieren ---
         bootloader_app = self.app.app
@@ -130,32 +139,72 @@ class ShiftPlanTab(ttk.Frame):
 
         self.update_lock_status()
 
+        # NEU (Regel 2): Testmodus gilt nur für den geladenen Monat. Vor einem
+        # (Neu-)Laden oder Monatswechsel werden die Teständerungen In-Memory verworfen.
+        sandbox = self.data_manager.sandbox
+        if sandbox is not None and not sandbox.committing and \
+                (not data_ready or (year, month) != (sandbox.year, sandbox.month)):
+            change_count = self.data_manager.sandbox_change_count()
+            self.action_handler.discard_sandbox(ask=False)
+            print(f"[ShiftPlanTab] Testmodus beim Laden verworfen ({change_count} Änderung(en)).")
+            if change_count:
+                messagebox.showinfo("Testmodus beendet",
+                                    f"Der Testmodus wurde beendet, {change_count} nicht übernommene Änderung(en) "
+                                    "wurden verworfen.", parent=self)
+
         # Altes Gitter leeren
         for widget in self.ui.plan_grid_frame.winfo_children():
             widget.destroy()
         if self.renderer:
             self.renderer.grid_widgets = {'cells': {}, 'user_totals': {}, 'daily_counts': {}}
 
+        thread_manager = getattr(self.app, 'thread_manager', None)
+
         if data_ready:
             # Fall 1: Daten sind bereits geladen (z.B. durch Preloader)
             print(f"[ShiftPlanTab] Starte sofortiges Rendering für {year}-{month} (data_ready=True).")
+            # Ein noch laufender Ladeauftrag (anderer Monat) ist damit überholt
+            if thread_manager:
+                thread_manager.cancel_key(VISIBLE_MONTH_LOAD_KEY)
             # Stelle sicher, dass der Ladebalken weg ist (falls er noch da war)
             self.hide_progress_widgets()
             self._render_grid(year, month)
         else:
             # Fall 2: Daten müssen aktiv geladen werden (Standard)
             # (Zeigt Ladebalken an)
-            self.show_progress_widgets(text="Daten werden geladen...")
+            channel = self.show_progress_widgets(text="Daten werden geladen...", operation="month_load")
 
             print(f"[ShiftPlanTab] Starte Lade-Thread für {year}-{month} (data_ready=False)...")
-            threading.Thread(target=self._load_data_in_thread, args=(year, month), daemon=True).start()
+            if thread_manager:
+                # KORREKTUR (Regel 2): Über den ThreadManager; ältere, noch wartende
+                # oder laufende Ladeaufträge für den sichtbaren Monat werden überholt.
+                task = thread_manager.submit(self._load_data_in_thread, args=(year, month),
+                                             kwargs={'reporter': channel.reporter}, priority=PRIORITY_VISIBLE,
+                                             key=VISIBLE_MONTH_LOAD_KEY, supersede=True, pass_token=True)
+                # NEU (Regel 2): "Laden abbrechen" bricht den Ladeauftrag ab
+                channel.reporter.link(task)
+            else:
+                # (Ohne ThreadManager dient der Reporter selbst als Abbruch-Marke)
+                threading.Thread(target=self._load_data_in_thread, args=(year, month),
+                                 kwargs={'cancel_token': channel.reporter, 'reporter': channel.reporter},
+                                 daemon=True).start()
+            self.enable_progress_cancel(text="Laden abbrechen")
 
-    def _load_data_in_thread(self, year, month):
+    def _load_data_in_thread(self, year, month, cancel_token=None, reporter=None):
         """Worker-Thread zum Laden der Daten (Regel 2: Latenz vermeiden)."""
         error_message = None
         try:
-            # _safe_update_progress wird als Callback für den Ladebalken übergeben
-            success = self.data_manager.load_and_process_data(year, month, self._safe_update_progress)
+            # Der Reporter des Fortschrittskanals wird als Callback für den Ladebalken übergeben
+            success = self.data_manager.load_and_process_data(year, month, reporter or self._safe_update_progress,
+                                                              cancel_token=cancel_token)
+            if cancel_token and cancel_token.cancelled:
+                if reporter is not None and reporter.cancelled:
+                    # Vom Benutzer abgebrochen (nicht von einem anderen Monat überholt)
+                    self.after(0, self._on_load_cancelled, reporter, year, month)
+                else:
+                    # Inzwischen wurde ein anderer Monat angefordert: nicht mehr zeichnen
+                    print(f"[ShiftPlanTab] Ladeauftrag {year}-{month} überholt, Zeichnen entfällt.")
+                return
             if success:
                 # Zurück zum UI-Thread, um das Gitter zu zeichnen
                 self.after(1, lambda: self._render_grid(year, month))
@@ -165,9 +214,21 @@ class ShiftPlanTab(ttk.Frame):
             print(f"FEHLER beim Laden der Daten im Thread: {e}")
             error_message = f"Fehler beim Laden der Daten:\n{e}"
             self.after(1, lambda msg=error_message: messagebox.showerror("Fehler", msg, parent=self))
+            # (Kanal zuerst schließen, sonst überschreibt die nächste Anzeige den Hinweis)
+            self.after(1, lambda: self.finish_progress(False, reporter=reporter))
             self.after(1, lambda: self.ui.status_label.config(
                 text="Laden fehlgeschlagen!") if self.ui.status_label and self.ui.status_label.winfo_exists() else None)
 
+    def _on_load_cancelled(self, reporter, year, month):
+        """ (Tk-Thread) Laden vom Benutzer abgebrochen: Hinweis statt Gitter. """
+        if not self.finish_progress(False, reporter=reporter):
+            return  # Inzwischen läuft ein anderer Vorgang
+        print(f"[ShiftPlanTab] Laden von {year}-{month} abgebrochen.")
+        if self.ui.status_label and self.ui.status_label.winfo_exists():
+            self.ui.status_label.config(text="Laden abgebrochen.")
+        if self.ui.progress_cancel_button and self.ui.progress_cancel_button.winfo_exists():
+            self.ui.progress_cancel_button.pack_forget()
+
     def _render_grid(self, year, month):
         """Rendert das Gitter, nachdem die Daten geladen wurden."""
         if not self.renderer:
@@ -176,6 +237,8 @@ class ShiftPlanTab(ttk.Frame):
 
         # Status auf "Zeichnen" aktualisieren
         self._safe_update_progress(100, "Zeichne Gitter...")
+        if self._progress_channel is not None:
+            self._progress_channel.flush()
         self.update_idletasks()
 
         # Starte den eigentlichen Zeichenvorgang im Renderer
@@ -191,6 +254,7 @@ class ShiftPlanTab(ttk.Frame):
         Wird vom Renderer aufgerufen, NACHDEM das Gitter gezeichnet wurde.
         Versteckt den Ladebalken und konfiguriert die Scrollregion.
         """
+        self.finish_progress(True)
         self.hide_progress_widgets()
 
         if self.ui.inner_frame.winfo_exists() and self.ui.canvas.winfo_exists():
@@ -199,8 +263,18 @@ class ShiftPlanTab(ttk.Frame):
 
     # --- UI-Status (Ladebalken & Sperren) ---
 
-    def show_progress_widgets(self, text="Starte Vorgang..."):
-        """Zeigt die Lade-Widgets an (aufgerufen von Events oder build_grid)."""
+    def show_progress_widgets(self, text="Starte Vorgang...", operation=None):
+        """
+        Zeigt die Lade-Widgets an (aufgerufen von Events oder build_grid).
+
+        NEU (Regel 2): Öffnet einen Fortschrittskanal (utils/progress.py) und
+        gibt ihn zurück. Worker melden über channel.reporter bzw.
+        _safe_update_progress; 'operation' benennt den Vorgang für die
+        Restzeit-Schätzung (z.B. "month_load", "generation").
+        """
+        # Ein noch offener Kanal gehört zu einem abgelösten Vorgang (kein Verlauf speichern)
+        self.finish_progress(False)
+
         # (Wir rufen die UI-Methode auf, um die Widgets zu erstellen/neu zu erstellen)
         self.ui._create_progress_widgets()
 
@@ -212,8 +286,80 @@ class ShiftPlanTab(ttk.Frame):
         self.ui.status_label.config(text=text)
         self.update_idletasks()
 
+        self._progress_channel = ProgressChannel(self, operation, self._apply_progress_update).start()
+        self._progress_channel.reporter(0, text)
+        return self._progress_channel
+
+    @property
+    def progress_reporter(self):
+        """ Reporter des laufenden Vorgangs (für Worker) oder None. """
+        channel = self._progress_channel
+        return channel.reporter if channel is not None and channel.active else None
+
+    def enable_progress_cancel(self, on_cancel=None, text="Abbrechen"):
+        """
+        Zeigt unter dem Ladebalken einen Abbrechen-Knopf für den laufenden
+        Vorgang. 'on_cancel' wird zusätzlich zur Abbruch-Marke des Reporters
+        ausgelöst (z.B. GeneratorProcessRunner.cancel).
+        """
+        channel = self._progress_channel
+        if channel is None or not channel.active:
+            return
+        if on_cancel is not None:
+            channel.on_cancel = on_cancel
+        if self.ui.progress_frame and self.ui.progress_frame.winfo_exists():
+            self.ui.progress_cancel_button = ttk.Button(self.ui.progress_frame, text=text,
+                                                        command=self.cancel_progress)
+            self.ui.progress_cancel_button.pack(pady=10)
+
+    def cancel_progress(self):
+        """ (Tk-Thread) Abbruch des laufenden Vorgangs anfordern. """
+        if self._progress_channel is not None:
+            self._progress_channel.cancel()
+        if self.ui.progress_cancel_button and self.ui.progress_cancel_button.winfo_exists():
+            self.ui.progress_cancel_button.config(state="disabled")
+
+    def finish_progress(self, success=True, reporter=None):
+        """
+        Schließt den Fortschrittskanal; bei Erfolg zählt der Lauf für künftige
+        Restzeiten. Mit 'reporter' nur, wenn der Kanal noch zu diesem Vorgang
+        gehört. Gibt zurück, ob ein Kanal geschlossen wurde.
+        """
+        channel = self._progress_channel
+        if channel is None or (reporter is not None and channel.reporter is not reporter):
+            return False
+        self._progress_channel = None
+        channel.finish(success)
+        return True
+
+    def update_sandbox_status(self):
+        """ NEU (Regel 2): Zeigt im Fußbereich Testmodus-Status und Übernehmen/Verwerfen an. """
+        ui = self.ui
+        if not ui.sandbox_start_button or not ui.sandbox_start_button.winfo_exists():
+            return
+        sandbox = self.data_manager.sandbox
+        if sandbox is None:
+            ui.sandbox_status_label.pack_forget()
+            ui.sandbox_commit_button.pack_forget()
+            ui.sandbox_discard_button.pack_forget()
+            ui.sandbox_start_button.pack(side="left", padx=5)
+            return
+        text = f"TESTMODUS: {self.data_manager.sandbox_change_count()} Änderung(en)"
+        if sandbox.committing:
+            text += " - wird gespeichert..."
+        ui.sandbox_status_label.config(text=text)
+        state = "disabled" if sandbox.committing else "normal"
+        ui.sandbox_commit_button.config(state=state)
+        ui.sandbox_discard_button.config(state=state)
+        if not ui.sandbox_status_label.winfo_manager():
+            ui.sandbox_start_button.pack_forget()
+            ui.sandbox_status_label.pack(side="left", padx=5)
+            ui.sandbox_commit_button.pack(side="left", padx=5)
+            ui.sandbox_discard_button.pack(side="left", padx=5)
+
     def hide_progress_widgets(self):
         """Versteckt die Lade-Widgets (aufgerufen nach dem Rendern)."""
+        self.finish_progress(False)
         if self.ui.progress_frame and self.ui.progress_frame.winfo_exists():
             self.ui.progress_frame.grid_forget()
             if self.ui.plan_grid_frame.winfo_exists():
@@ -221,8 +367,20 @@ class ShiftPlanTab(ttk.Frame):
                 self.ui.plan_grid_frame.grid_columnconfigure(0, weight=0)
 
     def _safe_update_progress(self, value, text):
-        """Thread-sichere Methode zur Aktualisierung des Ladebalkens."""
-        self.after(0, lambda v=value, t=text: self._update_progress(v, t))
+        """
+        Thread-sichere Methode zur Aktualisierung des Ladebalkens.
+        KORREKTUR (Regel 2): Meldungen laufen über den Fortschrittskanal und
+        werden mit fester Bildrate angezeigt (statt ein after(0) je Meldung).
+        """
+        reporter = self.progress_reporter
+        if reporter is not None:
+            reporter(value, text)
+        else:
+            self.after(0, lambda v=value, t=text: self._update_progress(v, t))
+
+    def _apply_progress_update(self, update):
+        """ (Tk-Thread) Zeigt einen ProgressUpdate des Kanals an (Anteil + Text mit Restzeit). """
+        self._update_progress(update.percent, update.display_text())
 
     def _update_progress(self, step_value, step_text):
         """Aktualisiert die Lade-Widgets im UI-Thread."""
@@ -253,35 +411,73 @@ class ShiftPlanTab(ttk.Frame):
 
     # --- Callback vom Generator (wird von ShiftPlanEvents aufgerufen) ---
 
-    def _on_generation_complete(self, success, save_count, error_message):
+    def _on_generation_complete(self, success, save_count, error_message, plan_diff=None):
         """
         Callback, der ausgeführt wird, nachdem der Generator-Thread
         abgeschlossen ist.
+
+        NEU (Regel 2): Liefert der Generator eine PlanDiff, werden die Caches
+        des DataManagers direkt daraus aktualisiert und das Grid ohne
+        DB-Reload neu gezeichnet. Bei der Mehrmonats-Generierung ist
+        'plan_diff' eine Liste (eine PlanDiff je Monat).
         """
         year = self.app.current_display_date.year
         month = self.app.current_display_date.month
+        plan_diffs = plan_diff if isinstance(plan_diff, list) else ([plan_diff] if plan_diff is not None else [])
 
-        # Ladebalken ausblenden
+        # Ladebalken ausblenden (erfolgreiche Läufe zählen für die Restzeit-Schätzung)
+        self.finish_progress(success)
         self.hide_progress_widgets()
 
+        # --- NEU: Generator-Lauf als EINEN Undo-Schritt (je Monat) protokollieren ---
+        if success and hasattr(self.data_manager, 'plan_journal'):
+            for month_diff in plan_diffs:
+                self.data_manager.plan_journal.record_diff(
+                    f"Plan-Generierung {month_diff.month:02d}/{month_diff.year}", month_diff)
+        # --- ENDE NEU ---
+
+        # --- NEU (Regel 2): Caches aus der PlanDiff patchen statt Reload ---
+        patched = False
+        if success and len(plan_diffs) > 1:
+            # Mehrmonats-Generierung: die Monate hängen über die Vor-/Folgemonats-Daten
+            # zusammen, daher alle betroffenen Monate aus dem P5-Cache verwerfen (neu laden)
+            for month_diff in plan_diffs:
+                if (month_diff.year, month_diff.month) != (year, month) \
+                        and hasattr(self.data_manager, 'invalidate_month_cache'):
+                    self.data_manager.invalidate_month_cache(month_diff.year, month_diff.month)
+        elif success and plan_diffs and (plan_diffs[0].year, plan_diffs[0].month) == (year, month) \
+                and hasattr(self, 'data_manager') and hasattr(self.data_manager, 'apply_plan_diff'):
+            try:
+                patched = self.data_manager.apply_plan_diff(plan_diffs[0]) is not None
+            except Exception as e:
+                print(f"[FEHLER] PlanDiff konnte nicht eingespielt werden: {e}. Lade Monat neu.")
+                patched = False
+        # --- ENDE NEU ---
+
         # --- KORREKTUR (Problem 2): P5-Cache invalidieren ---
-        if hasattr(self, 'data_manager') and hasattr(self.data_manager, 'invalidate_month_cache'):
-            print(f"[ShiftPlanTab] Invalidiere DM-Cache für {year}-{month} nach Generierung.")
-            self.data_manager.invalidate_month_cache(year, month)
-        else:
-            print("[WARNUNG] DataManager oder invalidate_month_cache nicht gefunden. Cache nicht invalidiert.")
+        if not patched:
+            if hasattr(self, 'data_manager') and hasattr(self.data_manager, 'invalidate_month_cache'):
+                print(f"[ShiftPlanTab] Invalidiere DM-Cache für {year}-{month} nach Generierung.")
+                self.data_manager.invalidate_month_cache(year, month)
+            else:
+                print("[WARNUNG] DataManager oder invalidate_month_cache nicht gefunden. Cache nicht invalidiert.")
         # --- ENDE KORREKTUR ---
 
         if success:
+            if len(plan_diffs) > 1:
+                details = "".join(f"\n{month_diff.month:02d}/{month_diff.year}: {month_diff.summary()}"
+                                  for month_diff in plan_diffs)
+            else:
+                details = f"\n({plan_diffs[0].summary()})" if plan_diffs else ""
             messagebox.showinfo("Erfolg",
-                                f"Plan-Generierung abgeschlossen.\n{save_count} Dienste wurden eingetragen.",
+                                f"Plan-Generierung abgeschlossen.\n{save_count} Dienste wurden eingetragen.{details}",
                                 parent=self)
         else:
             messagebox.showerror("Fehler bei Generierung", error_message, parent=self)
 
-        # Plan in jedem Fall neu laden, um Ergebnisse (oder Fehlerzustand) anzuzeigen
-        # (Startet den asynchronen Lader mit Ladebalken)
-        self.build_shift_plan_grid(year, month, data_ready=False)
+        # Plan neu zeichnen: aus den gepatchten Caches (schnell) oder
+        # asynchron neu laden (Fehlerfall / Fallback, mit Ladebalken)
+        self.build_shift_plan_grid(year, month, data_ready=patched)
 
     # --- KORRIGIERT (Regel 2): Asynchrones Refresh ---
 
@@ -13,18 +13,25 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from datetime import date, timedelta, datetime, time
+from datetime import date, timedelta
 import calendar
 import threading
+import traceback
 
 # Importiere die Helfer-Module
-from database.db_users import get_ordered_users_for_schedule
 from gui.request_lock_manager import RequestLockManager
 from database.db_shifts import get_ordered_shift_abbrevs  # Bleibt für andere Funktionen (z.B. Generator)
 from ...dialogs.generator_settings_window import \
     GeneratorSettingsWindow
 # --- Import des Generators ---
-from gui.shift_plan_generator import ShiftPlanGenerator
+# KORREKTUR (Startzeit): Der Generator (inkl. Scoring/Runden/Vorplanung) wird erst beim
+# ersten Klick auf "Generieren" importiert (Regel 2).
+from utils.lazy_import import LazyClassRef
+
+ShiftPlanGenerator = LazyClassRef("gui.shift_plan_generator", "ShiftPlanGenerator")
+# NEU (Regel 2): Generierung im eigenen Prozess (lädt den Generator selbst erst im Prozess)
+from gui.generator.generator_process import GeneratorJob, GeneratorProcessRunner, use_process_mode
+from utils.threading_utils import PRIORITY_INTERACTIVE, PRIORITY_VISIBLE
 
 
 class ShiftPlanEvents:
@@ -49,6 +56,9 @@ class ShiftPlanEvents:
         # self.tab.data_manager
         # self.tab.renderer
         # self.tab.action_handler
+        self._generation_runner = None  # NEU (Regel 2): Laufender Generator-Prozess
+        self._horizon_preparing = False  # NEU (Regel 2): Mehrmonats-Generierung lädt gerade ihre Monate
+        self._generation_sandbox = None  # NEU (Regel 2): Testmodus, in den der laufende Generator-Lauf schreibt
 
     # --- UI-Interaktionen (Buttons & Klicks) ---
 
@@ -74,7 +84,7 @@ class ShiftPlanEvents:
         year = self.tab.app.current_display_date.year
         month = self.tab.app.current_display_date.month
         month_str = self.tab.ui.month_label_var.get()
-        msg1 = f"Möchten Sie wirklich **ALLE** planbaren Schichteinträge für\n\n{month_str}\n\nlöschen?\n\nDiese Aktion kann nicht rückgängig gemacht werden!"
+        msg1 = f"Möchten Sie wirklich **ALLE** planbaren Schichteinträge für\n\n{month_str}\n\nlöschen?\n\nDie Löschung kann nur in dieser Sitzung (Strg+Z) rückgängig gemacht werden!"
         if not messagebox.askyesno("WARNUNG: Schichtplan löschen", msg1, icon='warning', parent=self.tab):
             return
         prompt = f"Um den Löschvorgang für {month_str} zu bestätigen, geben Sie bitte 'LÖSCHEN' in das Feld ein und klicken Sie OK."
@@ -293,10 +303,42 @@ class ShiftPlanEvents:
                 target_shift_abbrev
             )
 
+    # --- NEU: Rückgängig / Wiederholen ---
+
+    def _on_undo(self, event=None):
+        """Macht die letzte Planänderung rückgängig (Strg+Z)."""
+        self.tab.action_handler.undo_last_change()
+        return "break"
+
+    def _on_redo(self, event=None):
+        """Wiederholt die zuletzt rückgängig gemachte Planänderung (Strg+Y)."""
+        self.tab.action_handler.redo_last_change()
+        return "break"
+
+    # --- NEU (Regel 2): Testmodus ---
+
+    def _on_sandbox_start(self):
+        """Startet den Testmodus (Änderungen bleiben bis zum Übernehmen im Speicher)."""
+        self.tab.action_handler.start_sandbox()
+
+    def _on_sandbox_commit(self):
+        """Speichert alle Änderungen des Testmodus in einem Schritt."""
+        if self._is_generation_busy():
+            messagebox.showinfo("Generierung läuft", "Bitte das Ende der Generierung abwarten.", parent=self.tab)
+            return
+        self.tab.action_handler.commit_sandbox()
+
+    def _on_sandbox_discard(self):
+        """Verwirft den Testmodus (nur In-Memory, keine DB-Zugriffe)."""
+        self.tab.action_handler.discard_sandbox()
+
     # --- Plan-Generator ---
 
     def _on_generate_plan(self):
         """Startet den Schichtplan-Generator."""
+        if self._is_generation_busy():
+            messagebox.showinfo("Generierung läuft", "Es läuft bereits eine Plan-Generierung.", parent=self.tab)
+            return
         year = self.tab.app.current_display_date.year
         month = self.tab.app.current_display_date.month
         month_str = self.tab.ui.month_label_var.get()
@@ -309,40 +351,29 @@ class ShiftPlanEvents:
                "Bestehende Einträge (auch Urlaub, Wunschfrei etc.) werden NICHT überschrieben.\n"
                "Hundekonflikte, Urlaube, Ruhezeiten und Mindestbesetzung werden berücksichtigt.\n\n"
                "Fortfahren?")
+        # NEU (Regel 2): Im Testmodus wird das Ergebnis nur in den Testmodus eingespielt (kein Speichern)
+        self._generation_sandbox = self.tab.data_manager.sandbox
+        if self._generation_sandbox is not None:
+            msg = msg.replace("Fortfahren?", "TESTMODUS: Das Ergebnis wird erst beim Übernehmen gespeichert.\n\n"
+                                             "Fortfahren?")
         if not messagebox.askyesno("Schichtplan generieren", msg, parent=self.tab): return
 
         # UI für Ladeanzeige vorbereiten (über Haupt-Tab)
-        self.tab.show_progress_widgets()
+        self.tab.show_progress_widgets(operation="generation")
 
         try:
-            # Daten für Generator sammeln
-            vacation_requests = self.tab.data_manager.processed_vacations
-            wunschfrei_requests = self.tab.data_manager.wunschfrei_data
-            current_shifts = self.tab.data_manager.shift_schedule_data
-            locked_shifts = self.tab.data_manager.locked_shifts_cache
-            live_shifts_data = {uid: day_data.copy() for uid, day_data in current_shifts.items()}
-            first_day_of_target_month = date(year, month, 1)
-            date_for_user_filter = datetime.combine(first_day_of_target_month, time(0, 0, 0))
-            all_users = get_ordered_users_for_schedule(for_date=date_for_user_filter)
-            if not all_users:
+            # --- KORREKTUR (Regel 2): Eingabe-Snapshot direkt aus den Monats-Caches ---
+            # (Keine erneute Benutzer-Abfrage, keine Kopie jedes Tages-Dicts hier)
+            generator_cls = ShiftPlanGenerator.resolve()
+            generator_input = generator_cls.build_input(self.tab.app.app, self.tab.data_manager, year, month)
+            if not generator_input.users:
                 messagebox.showerror("Fehler", f"Keine aktiven Benutzer für die Planung im {month_str} gefunden.",
                                      parent=self.tab)
                 self.tab.hide_progress_widgets()
                 return
-            user_data_map = {user['id']: user for user in all_users}
-            self.tab.data_manager.user_data_map = user_data_map
-
-            holidays_in_month = set()
-            if hasattr(self.tab.app.app, 'holiday_manager'):
-                year_holidays = self.tab.app.app.holiday_manager.holidays.get(str(year), {})
-                for date_str, holiday_name in year_holidays.items():
-                    try:
-                        h_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                        if h_date.year == year and h_date.month == month: holidays_in_month.add(h_date)
-                    except ValueError:
-                        print(f"[WARNUNG] Ungültiges Feiertagsdatum ignoriert: {date_str}")
-
-        except AttributeError as ae:
+            # --- ENDE KORREKTUR ---
+
+        except (AttributeError, ValueError) as ae:
             messagebox.showerror("Fehler",
                                  f"Benötigte Plandaten nicht gefunden:\n{ae}\nBitte warten Sie, bis der Plan vollständig geladen ist, oder laden Sie ihn neu.",
                                  parent=self.tab)
@@ -353,20 +384,199 @@ class ShiftPlanEvents:
             self.tab.hide_progress_widgets()
             return
 
-        generator = ShiftPlanGenerator(
+        # --- NEU (Regel 2): Standardmäßig im eigenen Prozess (UI bleibt bedienbar) ---
+        if use_process_mode():
+            try:
+                self._start_generation_process(generator_input)
+                return
+            except Exception as e:
+                print(f"[Generator] Prozess konnte nicht gestartet werden ({e}). Nutze Worker-Thread.")
+                self._generation_runner = None
+        # --- ENDE NEU ---
+
+        generator = generator_cls(
             app=self.tab.app.app,  # Bootloader
             data_manager=self.tab.data_manager,
-            year=year, month=month, all_users=all_users, user_data_map=user_data_map,
-            vacation_requests=vacation_requests, wunschfrei_requests=wunschfrei_requests,
-            live_shifts_data=live_shifts_data,
-            locked_shifts_data=locked_shifts,
-            holidays_in_month=holidays_in_month,
+            generator_input=generator_input,
             # (Callbacks zeigen auf Methoden im Haupt-Tab)
             progress_callback=self.tab._safe_update_progress,
             completion_callback=self.tab._on_generation_complete
         )
+        # Die Berechnung läuft (wie der normale Generator-Lauf) absichtlich in einem
+        # eigenen Thread: sie dauert oft Minuten und würde sonst einen Worker des
+        # ThreadManagers blockieren, den Speichern und Laden brauchen.
+        if self._generation_sandbox is not None:
+            threading.Thread(target=self._compute_for_sandbox, args=(generator, self._generation_sandbox),
+                             daemon=True).start()
+            return
         threading.Thread(target=generator.run_generation, daemon=True).start()
 
+    def _compute_for_sandbox(self, generator, sandbox):
+        """ (Worker-Thread, Thread-Modus) Berechnet die PlanDiff ohne zu speichern (Testmodus). """
+        try:
+            plan_diff = generator.compute_plan()
+        except Exception as e:
+            traceback.print_exc()
+            error_msg = f"Ein Fehler ist aufgetreten:\n{e}"
+            self.tab.after(0, lambda: self._on_sandbox_generation_failed(sandbox, error_msg))
+            return
+        self.tab.after(0, lambda: self._apply_generation_to_sandbox(sandbox, plan_diff))
+
+    def _on_sandbox_generation_failed(self, sandbox, error_msg):
+        """ (Tk-Thread) Fehler im Testmodus: melden, Testmodus unverändert lassen (kein Neuladen). """
+        self._generation_sandbox = None
+        self.tab.finish_progress(False)
+        self.tab.hide_progress_widgets()
+        messagebox.showerror("Fehler bei Generierung", error_msg, parent=self.tab)
+        self.tab.build_shift_plan_grid(sandbox.year, sandbox.month, data_ready=True)
+
+    def _apply_generation_to_sandbox(self, sandbox, plan_diff):
+        """ (Tk-Thread) Spielt ein Generator-Ergebnis in den Testmodus ein und zeichnet den Monat neu. """
+        self._generation_sandbox = None
+        self.tab.finish_progress(True)
+        self.tab.hide_progress_widgets()
+        if self.tab.action_handler.sandbox_handler.apply_generated_diff(sandbox, plan_diff):
+            self.tab.build_shift_plan_grid(plan_diff.year, plan_diff.month, data_ready=True)
+        self.tab.update_sandbox_status()
+
+    def _is_generation_busy(self):
+        return self._horizon_preparing or bool(self._generation_runner and self._generation_runner.is_running)
+
+    def _start_generation_process(self, generator_input):
+        """ Startet die Berechnung im Generator-Prozess (Fortschritt/Ergebnis kommen per after). """
+        self._start_job_process(GeneratorJob.from_app(self.tab.app.app, self.tab.data_manager, generator_input))
+
+    def _start_job_process(self, job):
+        """ Startet einen GeneratorJob/HorizonJob im Generator-Prozess (inkl. Abbrechen-Knopf). """
+        # KORREKTUR (Regel 2): Fortschritt über den Fortschrittskanal des Tabs
+        self._generation_runner = GeneratorProcessRunner(self.tab, job, self.tab._safe_update_progress,
+                                                         self._on_generation_process_finished)
+        self._generation_runner.start()
+
+        # Abbrechen-Knopf unter dem Ladebalken; der Kanal leitet den Abbruch an den Prozess weiter
+        self.tab.enable_progress_cancel(on_cancel=self._generation_runner.cancel, text="Generierung abbrechen")
+
+    def _on_generation_process_finished(self, status, payload):
+        """ (Tk-Thread) Ergebnis des Generator-Prozesses: PlanDiff(s) speichern oder Fehler melden. """
+        job = self._generation_runner.job if self._generation_runner else None
+        self._generation_runner = None
+        sandbox, self._generation_sandbox = self._generation_sandbox, None
+        if status == "done" and sandbox is not None:
+            # Testmodus: nur In-Memory einspielen, nicht speichern
+            self._apply_generation_to_sandbox(sandbox, payload)
+        elif status == "done" and job is not None:
+            # Speichern (DB) wie im Thread-Modus, aber ohne die Berechnung
+            # (GeneratorJob: eine PlanDiff, HorizonJob: alle Monate in einer Transaktion)
+            # KORREKTUR (Regel 2): Über den ThreadManager mit höchster Priorität statt eigenem Thread
+            self.tab.app.thread_manager.submit(
+                job.persist,
+                args=(self.tab.app.app, payload, self.tab._on_generation_complete,
+                      self.tab._safe_update_progress),
+                priority=PRIORITY_INTERACTIVE,
+                key="generation_persist"
+            )
+        elif status == "cancelled":
+            print("[Generator] Generierung abgebrochen. Plan bleibt unverändert.")
+            self.tab.hide_progress_widgets()
+            if sandbox is not None:
+                # Testmodus bleibt erhalten (Neuladen würde ihn verwerfen)
+                self.tab.build_shift_plan_grid(sandbox.year, sandbox.month, data_ready=True)
+                return
+            self.tab.build_shift_plan_grid(self.tab.app.current_display_date.year,
+                                           self.tab.app.current_display_date.month)
+        elif sandbox is not None:
+            self._on_sandbox_generation_failed(sandbox, f"Ein Fehler ist aufgetreten:\n{payload}")
+        else:
+            self.tab._on_generation_complete(False, 0, f"Ein Fehler ist aufgetreten:\n{payload}")
+
+    # --- NEU (Regel 2): Mehrmonats-Generierung (z.B. Quartal) ---
+
+    def _on_generate_horizon(self):
+        """Generiert mehrere Monate ab dem angezeigten Monat in einem Lauf (siehe generator_horizon.py)."""
+        from gui.generator.generator_horizon import HORIZON_DEFAULT_MONTHS, HORIZON_MAX_MONTHS, horizon_months
+
+        if self._is_generation_busy():
+            messagebox.showinfo("Generierung läuft", "Es läuft bereits eine Plan-Generierung.", parent=self.tab)
+            return
+        if self.tab.data_manager.in_sandbox:
+            messagebox.showinfo("Testmodus aktiv",
+                                "Die Mehrmonats-Generierung ist im Testmodus nicht möglich (nur der angezeigte "
+                                "Monat).\nBitte den Testmodus zuerst übernehmen oder verwerfen.", parent=self.tab)
+            return
+        year = self.tab.app.current_display_date.year
+        month = self.tab.app.current_display_date.month
+        month_str = self.tab.ui.month_label_var.get()
+        month_count = simpledialog.askinteger(
+            "Mehrmonats-Generierung",
+            f"Wie viele Monate ab {month_str} sollen gemeinsam geplant werden?\n"
+            f"(Stunden und Fairness werden über alle Monate ausgeglichen)",
+            initialvalue=HORIZON_DEFAULT_MONTHS, minvalue=2, maxvalue=HORIZON_MAX_MONTHS, parent=self.tab)
+        if not month_count:
+            return
+        months = horizon_months(year, month, month_count)
+        months_str = ", ".join(f"{m:02d}/{y}" for y, m in months)
+
+        locked = [f"{m:02d}/{y}" for y, m in months if RequestLockManager.is_month_locked(y, m)]
+        if locked:
+            messagebox.showwarning("Gesperrt",
+                                   f"Folgende Monate sind für Anträge gesperrt: {', '.join(locked)}\n"
+                                   "Eine automatische Generierung ist nicht möglich, bitte erst entsperren.",
+                                   parent=self.tab)
+            return
+        msg = (f"Dies generiert automatisch 'T.', 'N.' und '6' Dienste für {months_str}.\n\n"
+               "Bestehende Einträge (auch Urlaub, Wunschfrei etc.) werden NICHT überschrieben.\n"
+               "Ruhezeiten gelten über die Monatsgrenzen, Stunden werden über alle Monate ausgeglichen.\n"
+               "Alle Monate werden gemeinsam gespeichert.\n\n"
+               "Fortfahren?")
+        if not messagebox.askyesno("Mehrere Monate generieren", msg, parent=self.tab): return
+
+        self.tab.show_progress_widgets("Lade Monate für die Mehrmonats-Generierung...",
+                                       operation=f"generation_horizon_{month_count}")
+        self._horizon_preparing = True
+        # Fehlende Monate kommen aus der DB: Vorbereitung im ThreadManager (wie das Laden des Monats)
+        self.tab.app.thread_manager.submit(self._prepare_horizon_job, args=(months,),
+                                           priority=PRIORITY_VISIBLE, key="horizon_prepare")
+
+    def _prepare_horizon_job(self, months):
+        """ (ThreadManager) Lädt die Monate und baut den HorizonJob. """
+        from gui.generator.generator_horizon import HorizonJob
+        try:
+            job = HorizonJob.from_data_manager(self.tab.app.app, self.tab.data_manager, months,
+                                               progress_callback=self.tab._safe_update_progress)
+        except Exception as e:
+            traceback.print_exc()
+            error_msg = f"Fehler beim Vorbereiten der Generierung:\n{e}"
+            self.tab.after(0, lambda: self._on_horizon_prepare_failed(error_msg))
+            return
+        self.tab.after(0, lambda: self._start_horizon_generation(job))
+
+    def _on_horizon_prepare_failed(self, error_msg):
+        self._horizon_preparing = False
+        self.tab.hide_progress_widgets()
+        messagebox.showerror("Fehler", error_msg, parent=self.tab)
+
+    def _start_horizon_generation(self, job):
+        """ (Tk-Thread) Startet die Berechnung: Generator-Prozess oder (Fallback) Worker-Thread. """
+        self._horizon_preparing = False
+        if not any(generator_input.users for generator_input in job.generator_inputs):
+            self.tab.hide_progress_widgets()
+            messagebox.showerror("Fehler", "Keine aktiven Benutzer für die Planung gefunden.", parent=self.tab)
+            return
+        if use_process_mode():
+            try:
+                self._start_job_process(job)
+                return
+            except Exception as e:
+                print(f"[Generator] Prozess konnte nicht gestartet werden ({e}). Nutze Worker-Thread.")
+                self._generation_runner = None
+        # Der Mehrmonats-Lauf bleibt absichtlich in einem eigenen Thread: er dauert
+        # Minuten und würde sonst einen Worker des ThreadManagers blockieren.
+        threading.Thread(target=job.run,
+                         args=(self.tab.app.app, self.tab._safe_update_progress, self.tab._on_generation_complete),
+                         daemon=True).start()
+
+    # --- ENDE NEU ---
+
     # --- Monatsauswahl-Dialog (komplexe UI-Logik, bleibt hier) ---
 
     def _show_month_chooser_dialog(self):
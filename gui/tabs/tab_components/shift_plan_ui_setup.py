@@ -34,6 +34,13 @@ class ShiftPlanUISetup:
         self.progress_frame = None
         self.progress_bar = None
         self.status_label = None
+        self.progress_cancel_button = None  # NEU (Regel 2): Abbrechen-Knopf des laufenden Vorgangs
+
+        # NEU (Regel 2): Testmodus (Was-wäre-wenn)
+        self.sandbox_start_button = None
+        self.sandbox_status_label = None
+        self.sandbox_commit_button = None
+        self.sandbox_discard_button = None
 
     def setup_ui(self, callbacks):
         """
@@ -66,11 +73,16 @@ class ShiftPlanUISetup:
         # (Regel 4: Commands zeigen auf die callback-Instanz)
         ttk.Button(left_nav_frame, text="< Voriger Monat", command=callbacks.show_previous_month).pack(side="left")
         ttk.Button(left_nav_frame, text="📄 Drucken", command=callbacks.print_shift_plan).pack(side="left", padx=(20, 5))
+        ttk.Button(left_nav_frame, text="↶", width=3, command=callbacks._on_undo).pack(side="left", padx=(5, 0))
+        ttk.Button(left_nav_frame, text="↷", width=3, command=callbacks._on_redo).pack(side="left", padx=(0, 5))
         ttk.Button(left_nav_frame, text="Schichtplan Löschen !!!", command=callbacks._on_delete_month,
                    style="Delete.TButton").pack(side="left", padx=5)
         ttk.Separator(left_nav_frame, orient='vertical').pack(side='left', fill='y', padx=(10, 5))
         ttk.Button(left_nav_frame, text="Schichtplan generieren", command=callbacks._on_generate_plan,
                    style="Generate.TButton").pack(side="left", padx=5)
+        # NEU (Regel 2): Mehrere Monate (z.B. Quartal) gemeinsam generieren
+        ttk.Button(left_nav_frame, text="Mehrere Monate generieren", command=callbacks._on_generate_horizon,
+                   style="Generate.TButton").pack(side="left", padx=5)
         ttk.Button(left_nav_frame, text="Planungsassistent-Einstellungen", command=callbacks._open_generator_settings,
                    style="SettingsWarn.TButton").pack(side="left", padx=5)
         ttk.Button(left_nav_frame, text="Alle Sicherungen aufheben", command=callbacks._on_unlock_all_shifts,
@@ -130,6 +142,11 @@ class ShiftPlanUISetup:
 
         # --- Tastatur-Shortcuts (Regel 4: Bindings hier, Logik im Callback-Handler) ---
         self.canvas.bind("<Key>", callbacks._on_key_press)
+        # NEU: Rückgängig / Wiederholen
+        for sequence in ("<Control-z>", "<Control-Z>"):
+            self.canvas.bind(sequence, callbacks._on_undo)
+        for sequence in ("<Control-y>", "<Control-Y>"):
+            self.canvas.bind(sequence, callbacks._on_redo)
         # Fokus setzen, damit das Canvas Tasten-Events empfängt
         self.canvas.bind("<Enter>", lambda e: self.canvas.focus_set())
 
@@ -143,6 +160,17 @@ class ShiftPlanUISetup:
                                                                                                        padx=5)
         ttk.Button(check_frame, text="Leeren", command=callbacks.clear_understaffing_results).pack(side="left", padx=5)
 
+        # NEU (Regel 2): Testmodus - Änderungen und Generator-Läufe nur im Speicher, dann übernehmen/verwerfen
+        sandbox_frame = ttk.Frame(footer_frame)
+        sandbox_frame.pack(side="left", padx=(20, 0))
+        self.sandbox_start_button = ttk.Button(sandbox_frame, text="Testmodus starten",
+                                               command=callbacks._on_sandbox_start)
+        self.sandbox_start_button.pack(side="left", padx=5)
+        self.sandbox_status_label = ttk.Label(sandbox_frame, text="", foreground="#B8860B",
+                                              font=("Segoe UI", 10, "bold"))
+        self.sandbox_commit_button = ttk.Button(sandbox_frame, text="Übernehmen", command=callbacks._on_sandbox_commit)
+        self.sandbox_discard_button = ttk.Button(sandbox_frame, text="Verwerfen", command=callbacks._on_sandbox_discard)
+
         self.lock_button = ttk.Button(footer_frame, text="", command=callbacks.toggle_month_lock)
         self.lock_button.pack(side="right", padx=5)
 
@@ -160,6 +188,7 @@ class ShiftPlanUISetup:
         # WICHTIG: Das Progress-Frame wird im plan_grid_frame erstellt,
         # da es das Gitter während des Ladens ersetzt.
         self.progress_frame = ttk.Frame(self.plan_grid_frame)
+        self.progress_cancel_button = None
 
         self.status_label = ttk.Label(self.progress_frame, text="", font=("Segoe UI", 12))
         self.status_label.pack(pady=(20, 5))
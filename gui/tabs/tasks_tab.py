@@ -4,11 +4,12 @@ from tkinter import ttk, messagebox
 from tkinter.simpledialog import askstring
 from datetime import datetime
 from database.db_tasks import (
-    get_all_tasks, update_task_status, archive_task,
+    get_task_list, get_task_details, update_task_status, archive_task,
     unarchive_task, append_task_note, delete_tasks,
     update_task_category, update_task_priority, create_task,
     TASK_PRIORITY_ORDER, TASK_CATEGORIES, TASK_STATUS_VALUES
 )
+from gui.treeview_model import DiffTreeviewModel
 
 
 class _CreateTaskDialog(tk.Toplevel):
@@ -88,6 +89,8 @@ class TasksTab(ttk.Frame):
 
         self.tasks_data = {}
         self.selected_task_id = None
+        # NEU (Regel 2): Langtexte werden erst bei Auswahl geladen {id: (updated_at, details)}
+        self.details_cache = {}
         self.refresh_interval_ms = 60000
 
         self.categories = TASK_CATEGORIES
@@ -163,19 +166,20 @@ class TasksTab(ttk.Frame):
 
         print("[TasksTab] Auto-Refresh: Starte Worker...")
         # --- KORREKTUR: 'args=' entfernt ---
-        self.thread_manager.start_worker(
+        self.thread_manager.start_poll_worker(
             self._fetch_tasks_data,
-            self._on_auto_refresh_fetched
+            self._on_auto_refresh_fetched,
+            self.show_archived_var.get()
         )
         # ----------------------------------
 
-    def _fetch_tasks_data(self):
+    def _fetch_tasks_data(self, include_archived=False):
         """
         [LÄUFT IM THREAD]
-        Ruft die blockierende DB-Funktion auf.
+        Ruft die blockierende DB-Funktion auf (nur Listenspalten).
         """
         try:
-            return get_all_tasks()
+            return get_task_list(include_archived)
         except Exception as e:
             print(f"[FEHLER] _fetch_tasks_data (Thread): {e}")
             return e
@@ -242,6 +246,7 @@ class TasksTab(ttk.Frame):
         vsb.grid(row=1, column=1, sticky="ns")
         self.tree.configure(yscrollcommand=vsb.set)
         self.tree.bind("<<TreeviewSelect>>", self.on_task_selected)
+        self.tree_model = DiffTreeviewModel(self.tree)
 
         for name, color in self.priority_colors.items():
             tag_name = name.replace(" ", "_").replace("(", "").replace(")", "").lower()
@@ -323,7 +328,8 @@ class TasksTab(ttk.Frame):
         self.thread_manager.start_worker(
             self._fetch_tasks_data,
             # Wir nutzen lambda, um 'initial_load' an den Callback zu übergeben
-            lambda res, err: self._on_manual_refresh_fetched(res, err, initial_load)
+            lambda res, err: self._on_manual_refresh_fetched(res, err, initial_load),
+            self.show_archived_var.get()
         )
         # ----------------------------------
 
@@ -349,19 +355,15 @@ class TasksTab(ttk.Frame):
     def _update_tasks_ui(self, all_tasks):
         """
         [LÄUFT IM GUI-THREAD]
-        Aktualisiert das Treeview sicher mit den neuen Daten.
+        Gleicht das Treeview differenziell mit den neuen Daten ab (Regel 2):
+        Nur neue, geänderte oder entfernte Zeilen werden angefasst,
+        Auswahl und Scroll-Position bleiben erhalten.
         """
         if not self.winfo_exists() or all_tasks is None:
             return
 
         try:
-            selected_ids = self.tree.selection()
-            scroll_pos = self.tree.yview()
-
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            self.tasks_data.clear()
-
+            old_tasks = self.tasks_data
             show_archived = self.show_archived_var.get()
 
             visible_tasks = [r for r in all_tasks if show_archived or not r.get('archived')]
@@ -370,7 +372,7 @@ class TasksTab(ttk.Frame):
             active_tasks = [r for r in visible_tasks if r.get('status') != 'Erledigt']
             completed_tasks = [r for r in visible_tasks if r.get('status') == 'Erledigt']
 
-            def insert_task(task):
+            def build_row(task):
                 user = f"{task.get('vorname', '')} {task.get('name', '')}".strip() or "Unbekannt"
                 try:
                     ts = datetime.strptime(task['timestamp'], '%Y-%m-%d %H:%M:%S').strftime('%d.%m.%Y %H:%M')
@@ -389,38 +391,42 @@ class TasksTab(ttk.Frame):
                 elif priority and priority in self.priority_colors:
                     tags.append(priority.replace(" ", "_").lower())
 
-                values = (task.get('category', 'N/A'), priority, user, ts, task.get('title', 'N/A'), status)
-                self.tree.insert("", tk.END, iid=task['id'], values=values, tags=tags)
+                values = (task.get('category', 'N/A'), priority, user, str(ts), task.get('title', 'N/A'), status)
+                return task['id'], values, tags
 
-            for task in active_tasks:
-                insert_task(task)
+            rows = [build_row(task) for task in active_tasks]
 
             if active_tasks and completed_tasks:
-                self.tree.insert("", tk.END, iid="separator", values=("", "", "--- ERLEDIGTE AUFGABEN ---", "", "", ""),
-                                 tags=('separator',))
-
-            for task in completed_tasks:
-                insert_task(task)
-
-            if selected_ids:
-                valid_ids = [sid for sid in selected_ids if self.tree.exists(sid)]
-                if valid_ids:
-                    self.tree.selection_set(valid_ids)
-                    if len(valid_ids) == 1:
-                        self.on_task_selected(None)
-                else:
-                    self.clear_details()
-            else:
-                self.clear_details()
+                rows.append(("separator", ("", "", "--- ERLEDIGTE AUFGABEN ---", "", "", ""), ('separator',)))
 
-            self.tree.yview_moveto(scroll_pos[0])
+            rows.extend(build_row(task) for task in completed_tasks)
+
+            inserted, changed, removed = self.tree_model.sync(rows)
+            if inserted or changed or removed:
+                print(f"[TasksTab] Liste abgeglichen: {len(inserted)} neu, {len(changed)} geändert, "
+                      f"{len(removed)} entfernt.")
+
+            # Veraltete Langtexte verwerfen
+            for task_id in list(self.details_cache):
+                if task_id not in self.tasks_data:
+                    del self.details_cache[task_id]
+
+            # Details nur neu anzeigen, wenn sich die ausgewählte Aufgabe geändert hat
+            if self.selected_task_id is not None:
+                current = self.tasks_data.get(self.selected_task_id)
+                previous = old_tasks.get(self.selected_task_id)
+                if current is None or not self.tree.exists(str(self.selected_task_id)):
+                    self.clear_details()
+                elif previous is None or previous.get('updated_at') != current.get('updated_at') \
+                        or str(self.selected_task_id) in changed:
+                    self.on_task_selected(None)
 
         except Exception as e:
             print(f"[FEHLER] _update_tasks_ui: {e}")
             self.clear_details()
 
     def on_task_selected(self, event):
-        """[GUI-Thread] Zeigt Details für die Auswahl an (keine DB-Abfrage)."""
+        """[GUI-Thread] Zeigt Details für die Auswahl an (Langtexte werden bei Bedarf nachgeladen)."""
         selection = self.tree.selection()
         if "separator" in selection:
             self.clear_details()
@@ -441,11 +447,6 @@ class TasksTab(ttk.Frame):
             return
 
         self.title_var.set(task.get('title', 'Kein Titel'))
-        description = task.get('description') or ''
-        self.description_text.config(state="normal")
-        self.description_text.delete("1.0", tk.END)
-        self.description_text.insert("1.0", description)
-        self.description_text.config(state="disabled")
 
         self.category_combobox_admin.config(state="readonly")
         self.category_combobox_admin.set(task.get('category', ''))
@@ -456,16 +457,51 @@ class TasksTab(ttk.Frame):
         self.status_combobox.config(state="readonly")
         self.status_combobox.set(task.get('status', ''))
 
-        admin_notes = task.get('admin_notes') or ''
+        self.add_note_button.config(state="normal")
+        self.archive_button.config(state="normal")
+        self.archive_button.config(text="Dearchivieren" if task.get('archived') else "Archivieren")
+
+        # --- NEU (Regel 2): Langtexte aus dem Cache oder im Hintergrund laden ---
+        cached = self.details_cache.get(self.selected_task_id)
+        if cached and cached[0] == task.get('updated_at'):
+            self._show_task_texts(cached[1])
+        else:
+            self._show_task_texts(None)
+            self.thread_manager.start_worker(
+                get_task_details,
+                lambda res, err, tid=self.selected_task_id, stamp=task.get('updated_at'):
+                self._on_details_fetched(tid, stamp, res, err),
+                self.selected_task_id
+            )
+
+    def _on_details_fetched(self, task_id, stamp, details, error):
+        """ [GUI-Thread] Zeigt die nachgeladenen Langtexte an (falls noch ausgewählt). """
+        if not self.winfo_exists():
+            return
+        if error or isinstance(details, Exception) or details is None:
+            print(f"[TasksTab] Details für Aufgabe {task_id} nicht ladbar: {error or details}")
+            return
+        self.details_cache[task_id] = (stamp, details)
+        if self.selected_task_id == task_id:
+            self._show_task_texts(details)
+
+    def _show_task_texts(self, details):
+        """ Füllt Beschreibung und Notizen (None = wird geladen). """
+        if details is None:
+            description, admin_notes = "Wird geladen...", ""
+        else:
+            description = details.get('description') or ''
+            admin_notes = details.get('admin_notes') or ''
+
+        self.description_text.config(state="normal")
+        self.description_text.delete("1.0", tk.END)
+        self.description_text.insert("1.0", description)
+        self.description_text.config(state="disabled")
         self.notes_text.config(state="normal")
         self.notes_text.delete("1.0", tk.END)
         self.notes_text.insert("1.0", admin_notes.strip())
         self.notes_text.config(state="disabled")
 
-        self.add_note_button.config(state="normal")
-        self.archive_button.config(state="normal")
-        self.archive_button.config(text="Dearchivieren" if task.get('archived') else "Archivieren")
-
     def clear_details(self):
         """[GUI-Thread] Setzt die Detailansicht zurück."""
         self.selected_task_id = None
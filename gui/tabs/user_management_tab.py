@@ -11,6 +11,7 @@ from database.db_users import (
 from database.db_admin import admin_reset_password  # create_user_by_admin wird nicht direkt hier gebraucht
 from database.db_core import save_config_json, load_config_json
 from ..user_edit_window import UserEditWindow
+from ..criticality_index import notify_users_changed  # NEU (Regel 2): Engpass-Index nachführen
 
 # --- NEUE IMPORTE FÜR ROLLENVERWALTUNG ---
 from ..dialogs.role_management_dialog import RoleManagementDialog
@@ -598,6 +599,7 @@ class UserManagementTab(ttk.Frame):
             if messagebox.askyesno("Freigabe", f"'{name}' freischalten?", parent=self):
                 ok, msg = approve_user(user_id, self.current_user['id'])
                 if ok:
+                    notify_users_changed(self.admin_window, [user_id])
                     messagebox.showinfo("OK", msg, parent=self)
                     # --- KORREKTUR: AttributeError (Regel 1) ---
                     self.refresh_data()
@@ -653,6 +655,7 @@ class UserManagementTab(ttk.Frame):
             # Führe die Archivierung durch (entweder mit None für sofort oder mit dem gewählten Datum)
             success, message = archive_user(user_id, self.current_user['id'], archive_date=archive_date)
             if success:
+                notify_users_changed(self.admin_window, [user_id])
                 messagebox.showinfo("Erfolg", message, parent=self)
                 clear_user_order_cache()
                 # --- KORREKTUR: AttributeError (Regel 1) ---
@@ -673,6 +676,7 @@ class UserManagementTab(ttk.Frame):
             if messagebox.askyesno("Reaktivieren", f"'{name}' reaktivieren?", parent=self):
                 ok, msg = unarchive_user(user_id, self.current_user['id'])
                 if ok:
+                    notify_users_changed(self.admin_window, [user_id])
                     messagebox.showinfo("OK", msg, parent=self)
                     clear_user_order_cache()
                     # --- KORREKTUR: AttributeError (Regel 1) ---
@@ -690,6 +694,7 @@ class UserManagementTab(ttk.Frame):
             if messagebox.askyesno("Löschen", f"'{name}' wirklich löschen?", icon='warning', parent=self):
                 ok, msg = delete_user(user_id, self.current_user['id'])
                 if ok:
+                    notify_users_changed(self.admin_window, [user_id])
                     messagebox.showinfo("OK", msg, parent=self)
                     clear_user_order_cache()
                     # --- KORREKTUR: AttributeError (Regel 1) ---
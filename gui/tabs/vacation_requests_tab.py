@@ -10,6 +10,9 @@ from database.db_requests import (
     archive_vacation_request,
     delete_vacation_requests
 )
+from gui.dialogs.progress_dialog import ProgressDialog
+from gui.criticality_index import notify_users_changed
+from utils.threading_utils import PRIORITY_INTERACTIVE
 
 
 class VacationRequestsTab(ttk.Frame):
@@ -24,6 +27,7 @@ class VacationRequestsTab(ttk.Frame):
         super().__init__(master)
         self.app = app
         self.admin_id = self.app.user_data['id']
+        self._request_user_ids = {}  # NEU (Regel 2): Antrag -> Mitarbeiter (für den Engpass-Index)
 
         # initial_data_count (aus dem Cache) wird hier nicht aktiv
         # genutzt, aber die Annahme behebt den TypeError beim Laden.
@@ -82,6 +86,7 @@ class VacationRequestsTab(ttk.Frame):
 
         try:
             requests = get_all_vacation_requests_for_admin()
+            self._request_user_ids = {str(req['id']): req.get('user_id') for req in requests}
             for req in requests:
                 start_date = datetime.strptime(req['start_date'], '%Y-%m-%d').strftime('%d.%m.%Y')
                 end_date = datetime.strptime(req['end_date'], '%Y-%m-%d').strftime('%d.%m.%Y')
@@ -96,6 +101,10 @@ class VacationRequestsTab(ttk.Frame):
         except Exception as e:
             messagebox.showerror("Fehler Laden", f"Urlaubsanträge laden fehlgeschlagen:\n{e}", parent=self)
 
+    def _notify_criticality_index(self, request_ids):
+        """ NEU (Regel 2): Engpass-Index für die betroffenen Mitarbeiter nachführen (Hintergrund). """
+        notify_users_changed(self.app, [self._request_user_ids.get(str(req_id)) for req_id in request_ids])
+
     def get_selected_request_ids(self):
         selected_items = self.tree.selection()
         if not selected_items:
@@ -108,14 +117,50 @@ class VacationRequestsTab(ttk.Frame):
         if not selected_ids: return
 
         if messagebox.askyesno("Bestätigen", f"{len(selected_ids)} Antrag/Anträge genehmigen und im Plan eintragen?"):
-            for req_id in selected_ids:
-                approve_vacation_request(req_id, self.admin_id)
-            self.refresh_data()
+            # --- NEU (Regel 2): Genehmigung im ThreadManager mit Fortschritt und Abbruch ---
+            # (Jeder Antrag ist eine eigene Transaktion; ein Abbruch wirkt zwischen zwei Anträgen)
+            dialog = ProgressDialog(self, "Urlaubsanträge genehmigen", "vacation_approve",
+                                    text=f"Genehmige {len(selected_ids)} Antrag/Anträge...")
+            task = self.app.thread_manager.submit(self._task_approve, args=(selected_ids, dialog),
+                                                  priority=PRIORITY_INTERACTIVE)
+            dialog.link_task(task, lambda: self._on_approve_complete(dialog, selected_ids, 0, []))
+
+    def _task_approve(self, request_ids, dialog):
+        """ (Worker-Thread) Genehmigt die Anträge nacheinander und meldet den Fortschritt. """
+        reporter = dialog.reporter
+        approved, errors = 0, []
+        for index, req_id in enumerate(request_ids):
+            if reporter.cancelled:
+                break
+            reporter.step(index, len(request_ids), f"Genehmige Antrag {index + 1} von {len(request_ids)}...")
+            try:
+                success, message = approve_vacation_request(req_id, self.admin_id)
+            except Exception as e:
+                success, message = False, str(e)
+            if success:
+                approved += 1
+            else:
+                errors.append(f"Antrag {req_id}: {message}")
+        reporter.step(len(request_ids), len(request_ids), "Fertig.")
+        self.after(0, self._on_approve_complete, dialog, request_ids, approved, errors)
+
+    def _on_approve_complete(self, dialog, request_ids, approved, errors):
+        """ (Tk-Thread) Schließt den Fortschritt, meldet Fehler/Abbruch und lädt neu. """
+        total = len(request_ids)
+        cancelled = dialog.reporter.cancelled
+        dialog.close(success=not cancelled and not errors)
+        if cancelled:
+            messagebox.showinfo("Abgebrochen", f"Abgebrochen: {approved} von {total} Antrag/Anträgen genehmigt.",
+                                parent=self)
+        if errors:
+            messagebox.showwarning("Teilweise fehlgeschlagen", "\n".join(errors[:10]), parent=self)
+        self._notify_criticality_index(request_ids)
+        self.refresh_data()
 
-            # --- INNOVATION (Regel 1 & 4): Tab-Manager für Refresh nutzen ---
-            if hasattr(self.app, 'tab_manager'):
-                self.app.tab_manager.refresh_specific_tab("Schichtplan")
-            # --- ENDE INNOVATION ---
+        # --- INNOVATION (Regel 1 & 4): Tab-Manager für Refresh nutzen ---
+        if hasattr(self.app, 'tab_manager'):
+            self.app.tab_manager.refresh_specific_tab("Schichtplan")
+        # --- ENDE INNOVATION ---
 
     def reject_selected(self):
         selected_ids = self.get_selected_request_ids()
@@ -123,6 +168,7 @@ class VacationRequestsTab(ttk.Frame):
 
         for req_id in selected_ids:
             update_vacation_request_status(req_id, 'Abgelehnt')
+        self._notify_criticality_index(selected_ids)
         self.refresh_data()
 
         # --- INNOVATION (Regel 1 & 4): Tab-Manager für Refresh nutzen ---
@@ -138,6 +184,7 @@ class VacationRequestsTab(ttk.Frame):
                                f"{len(selected_ids)} genehmigte(n) Antrag/Anträge stornieren und aus dem Plan entfernen?"):
             for req_id in selected_ids:
                 cancel_vacation_request(req_id, self.admin_id)
+            self._notify_criticality_index(selected_ids)
             self.refresh_data()
 
             # --- INNOVATION (Regel 1 & 4): Tab-Manager für Refresh nutzen ---
@@ -151,6 +198,7 @@ class VacationRequestsTab(ttk.Frame):
 
         for req_id in selected_ids:
             archive_vacation_request(req_id, self.admin_id)
+        self._notify_criticality_index(selected_ids)
         self.refresh_data()
 
     def delete_selected_archived_requests(self):
@@ -6,6 +6,7 @@ from datetime import datetime
 from database.db_manager import (
     get_pending_wunschfrei_requests, update_wunschfrei_status, save_shift_entry
 )
+from ..criticality_index import notify_users_changed  # NEU (Regel 2): Engpass-Index nachführen
 
 
 class WunschfreiTab(ttk.Frame):
@@ -72,6 +73,8 @@ class WunschfreiTab(ttk.Frame):
         if not success_status:
             messagebox.showerror("Fehler", f"Status konnte nicht aktualisiert werden: {msg_status}", parent=self.app)
             return
+        if approve:
+            notify_users_changed(self.app, [user_id])
 
         shift_plan_tab = self.app.tab_frames.get("Schichtplan")
         if approve and shift_plan_tab:
@@ -0,0 +1,65 @@
+# gui/treeview_model.py
+# NEU: Differenzielles Treeview-Modell (Regel 2)
+#
+# Statt bei jedem Auto-Refresh alle Zeilen zu löschen und neu einzufügen,
+# merkt sich das Modell pro Zeile (iid) einen Inhalts-Hash. sync() fasst
+# nur neue, geänderte oder entfernte Zeilen an; die Reihenfolge wird nur
+# korrigiert, wenn sie sich tatsächlich geändert hat. Auswahl und
+# Scroll-Position bleiben dadurch automatisch erhalten.
+
+
+class DiffTreeviewModel:
+    """
+    Hält ein ttk.Treeview (nur Top-Level-Zeilen) synchron mit einer
+    geordneten Liste von Zeilen (iid, values, tags).
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._row_hashes = {}  # {iid: hash(values, tags)}
+
+    def sync(self, rows):
+        """
+        Gleicht das Treeview mit 'rows' ab: [(iid, values, tags), ...] in Anzeige-Reihenfolge.
+        Gibt (eingefügt, geändert, entfernt) als Mengen von iids zurück.
+        """
+        wanted_order = []
+        wanted = {}
+        for iid, values, tags in rows:
+            iid = str(iid)
+            wanted_order.append(iid)
+            wanted[iid] = (tuple(values), tuple(tags))
+
+        # 1. Entfernte Zeilen
+        removed = set(self._row_hashes) - set(wanted)
+        for iid in removed:
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+            del self._row_hashes[iid]
+
+        # 2. Neue und geänderte Zeilen
+        inserted, changed = set(), set()
+        for iid in wanted_order:
+            values, tags = wanted[iid]
+            row_hash = hash((values, tags))
+            old_hash = self._row_hashes.get(iid)
+            if old_hash is None or not self.tree.exists(iid):
+                self.tree.insert("", "end", iid=iid, values=values, tags=tags)
+                inserted.add(iid)
+            elif old_hash != row_hash:
+                self.tree.item(iid, values=values, tags=tags)
+                changed.add(iid)
+            self._row_hashes[iid] = row_hash
+
+        # 3. Reihenfolge nur korrigieren, wenn sie abweicht
+        if list(self.tree.get_children("")) != wanted_order:
+            for index, iid in enumerate(wanted_order):
+                self.tree.move(iid, "", index)
+
+        return inserted, changed, removed
+
+    def clear(self):
+        """ Entfernt alle Zeilen und vergisst die Hashes. """
+        for iid in self.tree.get_children(""):
+            self.tree.delete(iid)
+        self._row_hashes.clear()
@@ -0,0 +1,192 @@
+# gui/warm_start_cache.py
+# NEU: Persistenter Warm-Start-Cache für Stammdaten (Regel 2: Performance)
+#
+# Beim Start werden Schichtarten, Rollen, Besetzungsregeln, Feiertage,
+# Sondertermine und die Benutzerliste aus einem lokalen Snapshot im
+# Benutzerprofil geladen, BEVOR die DB-Verbindung steht. Sobald die DB
+# bereit ist, werden nur die Versions-Stempel abgefragt und ausschließlich
+# die veralteten Bereiche neu geladen.
+#
+# Der Snapshot ist rein ein Cache: Jeder Fehler (fehlende Datei, kaputter
+# Inhalt, andere Format-Version, andere Datenbank) führt dazu, dass er
+# verworfen wird und der normale Kaltstart greift (Regel 1).
+
+import os
+import sys
+import pickle
+import zlib
+from datetime import datetime
+
+from database import db_config_manager
+from database import db_shift_types
+from database import db_connection
+from database.db_version_stamps import get_reference_version_stamps, CONFIG_STAMP_PREFIX
+
+# Bei Änderungen an der Struktur des Snapshots erhöhen (alte Snapshots werden verworfen)
+FORMAT_VERSION = 1
+CACHE_DIR_NAME = "DHFPlaner"
+CACHE_FILE_NAME = "warm_start_cache.bin"
+
+
+class WarmStartCache:
+    """
+    Verwaltet den lokalen Stammdaten-Snapshot (statisch aufgerufen,
+    analog zu HolidayManager/EventManager).
+
+    Aufbau des Snapshots:
+        {'format_version': int, 'db_identity': str, 'written_at': str,
+         'stamps': {bereich: stempel}, 'sections': {bereich: daten}}
+    Bereiche: 'shift_types', 'users' und 'config:<KEY>'.
+    """
+
+    TABLE_SECTIONS = ('shift_types', 'users')
+
+    @staticmethod
+    def _get_cache_path():
+        """ Ermittelt den Pfad zur Cache-Datei im Benutzerprofil. """
+        if sys.platform.startswith('win'):
+            base_dir = os.environ.get('LOCALAPPDATA') or os.environ.get('APPDATA') or os.path.expanduser('~')
+        else:
+            base_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(base_dir, CACHE_DIR_NAME, CACHE_FILE_NAME)
+
+    @staticmethod
+    def _get_db_identity():
+        """ Kennung der Ziel-Datenbank, damit ein Snapshot nie für eine andere DB verwendet wird. """
+        config = db_connection.DB_CONFIG or {}
+        return f"{config.get('host', '')}:{config.get('port', '')}/{config.get('database', '')}"
+
+    @staticmethod
+    def section_names(config_keys):
+        """ Alle Bereichsnamen (Tabellen + Config-Keys). """
+        return list(WarmStartCache.TABLE_SECTIONS) + [CONFIG_STAMP_PREFIX + key for key in config_keys]
+
+    # --- Laden / Speichern ---
+
+    @staticmethod
+    def load():
+        """
+        Lädt den Snapshot von der Festplatte.
+        Gibt None zurück, wenn keiner vorhanden oder er unbrauchbar ist.
+        """
+        path = WarmStartCache._get_cache_path()
+        if not os.path.exists(path):
+            print("[WarmStart] Kein lokaler Snapshot vorhanden (Kaltstart).")
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                snapshot = pickle.loads(zlib.decompress(f.read()))
+
+            if not isinstance(snapshot, dict) or snapshot.get('format_version') != FORMAT_VERSION:
+                print("[WarmStart] Snapshot hat veraltete Format-Version. Wird verworfen.")
+                WarmStartCache.discard()
+                return None
+
+            if snapshot.get('db_identity') != WarmStartCache._get_db_identity():
+                print("[WarmStart] Snapshot gehört zu einer anderen Datenbank. Wird verworfen.")
+                WarmStartCache.discard()
+                return None
+
+            print(f"[WarmStart] Snapshot vom {snapshot.get('written_at')} geladen "
+                  f"({len(snapshot.get('sections', {}))} Bereiche).")
+            return snapshot
+
+        except Exception as e:
+            # (Regel 1) Kaputte Datei darf den Start nie verhindern
+            print(f"[WarmStart] Snapshot konnte nicht gelesen werden ({e}). Wird verworfen.")
+            WarmStartCache.discard()
+            return None
+
+    @staticmethod
+    def save(sections, stamps):
+        """
+        Schreibt den Snapshot atomar (temporäre Datei + Umbenennen).
+        Bereiche ohne gültigen Stempel werden nicht gespeichert.
+        """
+        path = WarmStartCache._get_cache_path()
+        snapshot = {
+            'format_version': FORMAT_VERSION,
+            'db_identity': WarmStartCache._get_db_identity(),
+            'written_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'stamps': {},
+            'sections': {},
+        }
+        for name, data in sections.items():
+            stamp = stamps.get(name)
+            if stamp is None or data is None:
+                continue
+            snapshot['stamps'][name] = stamp
+            snapshot['sections'][name] = data
+
+        tmp_path = path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)))
+            os.replace(tmp_path, path)
+            print(f"[WarmStart] Snapshot gespeichert ({len(snapshot['sections'])} Bereiche).")
+        except Exception as e:
+            print(f"[WarmStart] Snapshot konnte nicht gespeichert werden: {e}")
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def discard():
+        """ Löscht den Snapshot (z.B. bei Format-Wechsel oder Fehler). """
+        try:
+            path = WarmStartCache._get_cache_path()
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            print(f"[WarmStart] Snapshot konnte nicht gelöscht werden: {e}")
+
+    # --- Anwenden / Validieren ---
+
+    @staticmethod
+    def prime_caches(snapshot):
+        """
+        Füllt die Modul-Caches (Schichtarten, Config-Keys) mit den Snapshot-Daten,
+        damit die normalen Ladefunktionen ohne DB-Zugriff antworten.
+        """
+        sections = snapshot.get('sections', {})
+        if sections.get('shift_types'):
+            db_shift_types.prime_shift_types_cache(sections['shift_types'])
+        for name, data in sections.items():
+            if name.startswith(CONFIG_STAMP_PREFIX):
+                db_config_manager.prime_config_cache(name[len(CONFIG_STAMP_PREFIX):], data)
+
+    @staticmethod
+    def fetch_stale_sections(snapshot, config_keys):
+        """
+        Fragt die aktuellen Versions-Stempel ab und vergleicht sie mit dem Snapshot.
+        Gibt (stale_sections, stamps) zurück. Ohne Snapshot oder bei DB-Fehler
+        gelten alle Bereiche als veraltet.
+        """
+        all_sections = WarmStartCache.section_names(config_keys)
+        stamps = get_reference_version_stamps(config_keys)
+        if stamps is None:
+            return set(all_sections), {}
+        if snapshot is None:
+            return set(all_sections), stamps
+
+        cached_stamps = snapshot.get('stamps', {})
+        stale = set()
+        for name in all_sections:
+            current = stamps.get(name)
+            if current is None or cached_stamps.get(name) != current or name not in snapshot.get('sections', {}):
+                stale.add(name)
+        return stale, stamps
+
+    @staticmethod
+    def invalidate_sections(stale_sections):
+        """ Leert die Modul-Caches der veralteten Bereiche, damit sie neu aus der DB geladen werden. """
+        if 'shift_types' in stale_sections:
+            db_shift_types.clear_shift_types_cache()
+            db_shift_types.clear_shift_order_cache()
+        for name in stale_sections:
+            if name.startswith(CONFIG_STAMP_PREFIX):
+                db_config_manager.clear_config_cache(name[len(CONFIG_STAMP_PREFIX):])
@@ -22,9 +22,18 @@ try:
 except Exception as e:
     print(f"[DEBUG] Konnte Arbeitsverzeichnis nicht ändern: {e}")
 
+# --- NEU (Startzeit): Import-Profiler (DHF_IMPORT_PROFILE=1 oder --import-profile) ---
+# Muss VOR allen Anwendungs-Importen installiert werden, um sie messen zu können.
+from utils.import_profiler import ImportProfiler
+
+if ImportProfiler.is_requested():
+    ImportProfiler.install()
+# --- ENDE NEU ---
+
 # --- NEUE IMPORTE ---
 from gui.splash_screen import SplashScreen
-from boot_loader import Application
+# KORREKTUR (Startzeit): 'boot_loader' (und damit alle DB-/GUI-Module) wird erst
+# importiert, NACHDEM der Splash-Screen gezeichnet ist (siehe main()).
 
 # --------------------
 
@@ -69,6 +78,11 @@ def main():
         #    WICHTIG: Wir übergeben 'root' an die Application-Klasse.
         #    Die __init__ von Application muss angepasst werden, um 'root'
         #    entgegenzunehmen und darf NICHTS langsames tun (kein Preloading).
+        # --- KORREKTUR (Startzeit): Verzögerter Import, der Splash ist bereits sichtbar ---
+        from boot_loader import Application
+        ImportProfiler.report("Import-Profil bis Application")
+        # --- ENDE KORREKTUR ---
+
         print("[DEBUG] main.py: Erstelle Application(root)...")
         app = Application(root)
         print("[DEBUG] main.py: Application-Instanz erstellt.")
@@ -104,6 +118,7 @@ def main():
             # (Der Boot-Loader startet jetzt die Übergangs-Animation)
             app.show_login_window()
             print("[DEBUG] main.py: Login-Fenster angezeigt (Übergang initiiert).")
+            ImportProfiler.report("Import-Profil bis Login (inkl. Preload-Thread)")
 
         # 7. Starte den Timer
         #    Nach 3000ms wird show_app_after_delay() im Haupt-Thread
@@ -135,4 +150,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # NEU (Regel 2): Nötig für den Generator-Prozess in der PyInstaller-Version
+    import multiprocessing
+
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
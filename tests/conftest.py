@@ -0,0 +1,149 @@
+# tests/conftest.py
+# Gemeinsame Testdaten für die Äquivalenz-Tests der Generator-Bausteine.
+#
+# gui.shift_plan_generator ist ohne db_config.json nicht importierbar (database.db_core),
+# daher baut SyntheticGenerator nur die Attribute nach, die Regel-Engine, Helfer,
+# Scoring und FeasibilityIndex vom Generator lesen - mit demselben Aufbau wie
+# ShiftPlanGenerator._build_rules. Die Pläne sind zufällig, aber reproduzierbar (Seed).
+
+import os
+import random
+import sys
+from datetime import date
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from gui.generator.generator_benchmark import SYNTHETIC_SHIFT_TYPES  # noqa: E402
+from gui.generator.generator_config import GeneratorConfig  # noqa: E402
+from gui.generator.generator_feasibility import FeasibilityIndex  # noqa: E402
+from gui.generator.generator_helpers import GeneratorHelpers  # noqa: E402
+from gui.generator.generator_scoring import GeneratorScoring  # noqa: E402
+from gui.rule_engine import (MonthGrid, RuleEngine, FREE_SHIFTS, VACATION, WUNSCHFREI, OCCUPIED,  # noqa: E402
+                             NIGHT_REST, NIGHT_FREE_DAY, EXCLUSION, MAX_CONSECUTIVE, MANDATORY_REST, MAX_HOURS,
+                             shift_minutes, user_dogs_from, work_shift_indicators)
+
+SHIFTS_TO_PLAN = ("6", "T.", "N.")  # wie gui.shift_plan_generator.SHIFTS_TO_PLAN
+PLAN_ENTRIES = [None] * 5 + ['T.', 'T.', 'N.', 'N.', '6', 'X', 'FREI', 'U', 'QA', 'S']
+
+
+class _ConfigSource:
+    def __init__(self, generator_config):
+        self.generator_config = generator_config
+
+    def get_generator_config(self):
+        return self.generator_config
+
+
+class SyntheticGenerator:
+    """ Schlanker Ersatz für ShiftPlanGenerator (nur der Zustand, den die Bausteine lesen). """
+
+    # Kürzere Ketten als im Betrieb (8), damit Max-Consecutive und Ruhezeit oft greifen
+    HARD_MAX_CONSECUTIVE_SHIFTS = 4
+    MAX_MONTHLY_HOURS = 150.0
+
+    def __init__(self, seed, year=2025, month=3, user_count=12):
+        rnd = random.Random(seed)
+        self.year = year
+        self.month = month
+        first_day = date(year, month, 1)
+        self.days_in_month = (date(year + month // 12, month % 12 + 1, 1) - first_day).days
+        prefix = f"{year:04d}-{month:02d}-"
+        user_ids = range(1, user_count + 1)
+
+        self.all_users = [{'id': uid, 'diensthund': rnd.choice(['---', '---', 'Hund 1', 'Hund 2'])}
+                          for uid in user_ids]
+        self.live_shifts_data = {}
+        self.vacation_requests = {}
+        self.wunschfrei_requests = {}
+        for uid in user_ids:
+            shifts = {}
+            for day in range(1, self.days_in_month + 1):
+                entry = rnd.choice(PLAN_ENTRIES)
+                if entry is not None:
+                    shifts[f"{prefix}{day:02d}"] = entry
+            self.live_shifts_data[str(uid)] = shifts
+            if rnd.random() < 0.3:
+                start = rnd.randint(1, self.days_in_month - 4)
+                self.vacation_requests[str(uid)] = {date(year, month, day): 'Genehmigt' for day in range(start, start + 4)}
+            if rnd.random() < 0.5:
+                self.wunschfrei_requests[str(uid)] = {
+                    f"{prefix}{rnd.randint(1, self.days_in_month):02d}": ('Genehmigt', rnd.choice(['', 'T.', 'N.']),
+                                                                         'user')}
+
+        previous_days = (first_day - date(year - (month == 1), (month - 2) % 12 + 1, 1)).days
+        previous_prefix = f"{year - (month == 1):04d}-{(month - 2) % 12 + 1:02d}-"
+        self.previous_month_shifts = {
+            str(uid): {f"{previous_prefix}{day:02d}": rnd.choice(PLAN_ENTRIES[4:])
+                       for day in range(previous_days - 9, previous_days + 1) if rnd.random() < 0.8}
+            for uid in user_ids}
+
+        self.config = GeneratorConfig(_ConfigSource({
+            'mandatory_rest_days_after_max_shifts': 2,
+            'user_preferences': {str(uid): {'shift_exclusions': [rnd.choice(['N.', '6'])],
+                                            'max_monthly_hours': rnd.choice([None, 96.0]),
+                                            'min_monthly_hours': rnd.choice([None, 60.0, 120.0]),
+                                            'ratio_preference_scale': rnd.choice([20, 50, 80])}
+                                 for uid in user_ids if rnd.random() < 0.5},
+            'preferred_partners_prioritized': [{'id_a': 1, 'id_b': 2, 'priority': 1},
+                                               {'id_a': 1, 'id_b': 5, 'priority': 2}],
+            'avoid_partners_prioritized': [{'id_a': 3, 'id_b': 4, 'priority': 1},
+                                           {'id_a': 3, 'id_b': 6, 'priority': 3}],
+        }))
+        self.user_preferences = self.config.user_preferences
+        for uid in user_ids:
+            self.user_preferences[str(uid)]  # Alle Mitarbeiter anlegen (wie der Generator beim Laden)
+        self.mandatory_rest_days = self.config.mandatory_rest_days
+        self.partner_priority_map = self.config.partner_priority_map
+        self.avoid_priority_map = self.config.avoid_priority_map
+        self.AVOID_PARTNER_PENALTY_SCORE = self.config.AVOID_PARTNER_PENALTY_SCORE
+        self.fairness_threshold_hours = self.config.fairness_threshold_hours
+        self.min_hours_fairness_threshold = self.config.min_hours_fairness_threshold
+        self.min_hours_score_multiplier = self.config.min_hours_score_multiplier
+        self.fairness_score_multiplier = self.config.fairness_score_multiplier
+        self.isolation_score_multiplier = self.config.isolation_score_multiplier
+
+        self.shifts_to_plan = list(SHIFTS_TO_PLAN)
+        self.shift_hours = {abbrev: float(data.get('hours', 0.0)) for abbrev, data in SYNTHETIC_SHIFT_TYPES.items()}
+        self.free_shifts_indicators = set(FREE_SHIFTS)
+        self.live_user_hours = {uid: sum(self.shift_hours.get(shift, 0.0)
+                                         for shift in self.live_shifts_data[str(uid)].values())
+                                for uid in user_ids}
+
+        self.rule_grid = MonthGrid(year, month, self.live_shifts_data, self.previous_month_shifts, {},
+                                   user_dogs=user_dogs_from(self.all_users),
+                                   work_indicators=work_shift_indicators(SYNTHETIC_SHIFT_TYPES))
+        self.rules = RuleEngine(
+            self.rule_grid, shift_times=shift_minutes(SYNTHETIC_SHIFT_TYPES),
+            user_preferences=self.user_preferences, vacations=self.vacation_requests,
+            wunschfrei=self.wunschfrei_requests, hours=self.live_user_hours, shift_hours=self.shift_hours,
+            max_monthly_hours=self.MAX_MONTHLY_HOURS, hard_max_consecutive=self.HARD_MAX_CONSECUTIVE_SHIFTS,
+            mandatory_rest_days=self.mandatory_rest_days)
+        self.hard_rules = self.rules.compile(VACATION, WUNSCHFREI, OCCUPIED, NIGHT_REST, NIGHT_FREE_DAY, EXCLUSION,
+                                             MAX_CONSECUTIVE, MANDATORY_REST, MAX_HOURS)
+
+        self.helpers = GeneratorHelpers(self)
+        self.scoring = GeneratorScoring(self)
+        self.feasibility = FeasibilityIndex(self)
+
+    def date_str(self, day):
+        return f"{self.year:04d}-{self.month:02d}-{day:02d}"
+
+    def record_assignment(self, user_id_str, date_str, shift_abbrev):
+        """ Wie ShiftPlanGenerator.record_assignment (live_shifts_data + MonthGrid). """
+        self.live_shifts_data.setdefault(user_id_str, {})[date_str] = shift_abbrev
+        self.rule_grid.set_shift(user_id_str, int(date_str[-2:]), shift_abbrev)
+
+    def free_cells(self):
+        """ (uid_str, tag) aller leeren oder freien Tage im Monat - die Kandidaten der Runden. """
+        return [(user_id_str, day) for user_id_str in self.rule_grid.user_ids()
+                for day in range(1, self.days_in_month + 1)
+                if not self.rule_grid.duty(user_id_str, day)]
+
+
+@pytest.fixture(params=[1, 2, 3])
+def synthetic_generator(request):
+    return SyntheticGenerator(request.param)
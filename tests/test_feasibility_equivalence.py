@@ -0,0 +1,44 @@
+# tests/test_feasibility_equivalence.py
+# FeasibilityIndex (generator_feasibility.py): Die Konfliktzählung über die
+# Tages-Arrays muss für jeden Kandidaten, Tag und jede geplante Schicht
+# dasselbe Ergebnis liefern wie die Referenz-Prüfung
+# GeneratorScoring._calculate_future_conflicts_reference - auch nachdem das
+# MonthGrid inkrementell (record_assignment) fortgeschrieben wurde.
+
+import random
+from datetime import date
+
+
+def _assert_index_matches_reference(gen):
+    scoring = gen.scoring
+    lookahead = scoring.CONFLICT_LOOKAHEAD_DAYS
+    checked = 0
+    for user_id_str, day in gen.free_cells():
+        current_date = date(gen.year, gen.month, day)
+        for shift in gen.shifts_to_plan:
+            expected = scoring._calculate_future_conflicts_reference(user_id_str, current_date, shift)
+            actual = gen.feasibility.count_future_conflicts(user_id_str, day, shift, lookahead)
+            assert actual == expected, (user_id_str, day, shift)
+            checked += 1
+    assert checked > 0
+
+
+def test_index_matches_reference(synthetic_generator):
+    _assert_index_matches_reference(synthetic_generator)
+
+
+def test_index_matches_reference_after_assignments(synthetic_generator):
+    gen = synthetic_generator
+    rnd = random.Random(gen.days_in_month)
+    for user_id_str, day in rnd.sample(gen.free_cells(), 40):
+        gen.record_assignment(user_id_str, gen.date_str(day), rnd.choice(gen.shifts_to_plan))
+    _assert_index_matches_reference(gen)
+
+
+def test_reference_leaves_grid_unchanged(synthetic_generator):
+    gen = synthetic_generator
+    grid = gen.rule_grid
+    before = {user_id_str: list(grid.row(user_id_str).shifts) for user_id_str in grid.user_ids()}
+    user_id_str, day = gen.free_cells()[0]
+    gen.scoring._calculate_future_conflicts_reference(user_id_str, date(gen.year, gen.month, day), "N.")
+    assert {user_id_str: list(grid.row(user_id_str).shifts) for user_id_str in grid.user_ids()} == before
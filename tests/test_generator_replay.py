@@ -0,0 +1,46 @@
+# tests/test_generator_replay.py
+# Entscheidungsprotokoll (generator_decision_log.py): Ein abgelegtes Protokoll
+# muss beim Nachspielen unabhängig vom Hash-Seed identisch sein, sonst taugt
+# es nicht als Regressionstest.
+#
+# Benötigt die Laufzeitumgebung des Generators (mysql-connector und eine
+# eingerichtete db_config.json, da gui.shift_plan_generator database.db_core importiert).
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytest.importorskip("mysql.connector")
+if not os.path.exists(os.path.join(REPO_DIR, "db_config.json")):
+    pytest.skip("db_config.json fehlt (Generator-Module nicht importierbar)", allow_module_level=True)
+
+RECORD_SCRIPT = """
+import sys
+from gui.generator.generator_benchmark import synthetic_job
+from gui.generator.generator_decision_log import DecisionLog
+
+job = synthetic_job(int(sys.argv[2]))
+log = DecisionLog(job)
+job.compute(None, decision_log=log)
+log.save(sys.argv[1])
+"""
+
+
+def _run(args, hash_seed):
+    env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    return subprocess.run([sys.executable] + args, cwd=REPO_DIR, env=env, capture_output=True, text=True)
+
+
+@pytest.mark.parametrize("job_seed", [1, 2, 3])
+def test_replay_is_independent_of_hash_seed(tmp_path, job_seed):
+    path = str(tmp_path / f"synthetic_{job_seed}.dhflog")
+    recorded = _run(["-c", RECORD_SCRIPT, path, str(job_seed)], hash_seed=1)
+    assert recorded.returncode == 0, recorded.stderr
+
+    for hash_seed in (2, 3):
+        replayed = _run(["-m", "gui.generator.generator_replay", path, "--slowest", "0"], hash_seed)
+        assert replayed.returncode == 0, replayed.stdout + replayed.stderr
@@ -0,0 +1,143 @@
+# tests/test_rule_engine_equivalence.py
+# Regel-Engine (gui/rule_engine.py): Die kompilierten harten Regeln müssen
+# dieselben Entscheidungen treffen wie die frühere Prüfung des Generators
+# (Rückwärts-Suche über Datums-Strings, hier als _DateWalkRules nachgebaut),
+# und die inkrementell gepflegten Konflikt-Zellen des ViolationManagers
+# müssen einer vollen Prüfung auf einem frisch gebauten MonthGrid entsprechen.
+
+import random
+from datetime import date, timedelta
+
+from gui.rule_engine import MonthGrid, RuleEngine, NIGHT_REST, DOG_OVERLAP, user_dogs_from
+
+CHECKED_SHIFTS = ("6", "T.", "N.", "QA", "S")
+WORK_INDICATORS = {'T.', 'N.', '6', '24', 'QA', 'S'}
+
+
+class _DateWalkRules:
+    """ Frühere Fassung von GeneratorScoring._check_rule_violation_at_date samt Helfern. """
+
+    def __init__(self, gen):
+        self.gen = gen
+
+    def raw(self, user_id_str, date_obj):
+        date_str = date_obj.strftime('%Y-%m-%d')
+        if date_obj.month != self.gen.month:
+            return self.gen.previous_month_shifts.get(user_id_str, {}).get(date_str)
+        return self.gen.live_shifts_data.get(user_id_str, {}).get(date_str)
+
+    def duty(self, user_id_str, date_obj):
+        shift = self.raw(user_id_str, date_obj)
+        return shift if shift and shift not in self.gen.free_shifts_indicators else ""
+
+    def consecutive(self, user_id_str, date_obj):
+        count = 0
+        check_date = date_obj - timedelta(days=1)
+        while True:
+            shift = self.raw(user_id_str, check_date)
+            if not (shift and shift in WORK_INDICATORS):
+                return count
+            count += 1
+            check_date -= timedelta(days=1)
+
+    def mandatory_rest_ok(self, user_id_str, date_obj):
+        gen = self.gen
+        free_days = 0
+        check_date = date_obj - timedelta(days=1)
+        while self.raw(user_id_str, check_date) in gen.free_shifts_indicators:
+            free_days += 1
+            check_date -= timedelta(days=1)
+            if free_days > gen.HARD_MAX_CONSECUTIVE_SHIFTS + gen.mandatory_rest_days:
+                return True
+        if free_days == 0:
+            return True
+        if self.consecutive(user_id_str, check_date + timedelta(days=1)) >= gen.HARD_MAX_CONSECUTIVE_SHIFTS:
+            return free_days >= gen.mandatory_rest_days
+        return True
+
+    def violated(self, user_id_str, check_date, check_shift):
+        gen = self.gen
+        date_str = check_date.strftime('%Y-%m-%d')
+        if gen.vacation_requests.get(user_id_str, {}).get(check_date) in ['Approved', 'Genehmigt']:
+            return True
+        wf_entry = gen.wunschfrei_requests.get(user_id_str, {}).get(date_str)
+        if isinstance(wf_entry, tuple) and len(wf_entry) >= 2 and wf_entry[0] in ['Approved', 'Genehmigt',
+                                                                                  'Akzeptiert']:
+            if wf_entry[1] == "" or wf_entry[1] == check_shift:
+                return True
+        if self.duty(user_id_str, check_date):
+            return True
+
+        user_pref = gen.user_preferences[user_id_str]
+        prev_date = check_date - timedelta(days=1)
+        prev_shift = self.duty(user_id_str, prev_date)
+        if prev_shift == "N." and check_shift in ["T.", "6", "QA", "S"]:
+            return True
+        if (check_shift == "T." and self.raw(user_id_str, prev_date) in gen.free_shifts_indicators
+                and self.duty(user_id_str, check_date - timedelta(days=2)) == "N."):
+            return True
+        if check_shift in user_pref.get('shift_exclusions', []):
+            return True
+        consecutive_days = self.consecutive(user_id_str, check_date)
+        if consecutive_days >= gen.HARD_MAX_CONSECUTIVE_SHIFTS:
+            return True
+        if gen.mandatory_rest_days > 0 and consecutive_days == 0 and not self.mandatory_rest_ok(user_id_str,
+                                                                                               check_date):
+            return True
+        max_hours_override = user_pref.get('max_monthly_hours')
+        max_hours = max_hours_override if max_hours_override is not None else gen.MAX_MONTHLY_HOURS
+        current_hours = gen.live_user_hours.get(int(user_id_str), 0.0)
+        return current_hours + gen.shift_hours.get(check_shift, 0.0) > max_hours
+
+
+def _assert_hard_rules_match(gen):
+    reference = _DateWalkRules(gen)
+    for user_id_str in gen.rule_grid.user_ids():
+        for day in range(1, gen.days_in_month + 1):
+            check_date = date(gen.year, gen.month, day)
+            for shift in CHECKED_SHIFTS:
+                expected = reference.violated(user_id_str, check_date, shift)
+                actual = gen.hard_rules.first_violation(user_id_str, day, shift) is not None
+                assert actual == expected, (user_id_str, day, shift)
+
+
+def test_hard_rules_match_date_walk(synthetic_generator):
+    _assert_hard_rules_match(synthetic_generator)
+
+
+def test_hard_rules_match_date_walk_after_assignments(synthetic_generator):
+    gen = synthetic_generator
+    rnd = random.Random(gen.days_in_month)
+    for user_id_str, day in rnd.sample(gen.free_cells(), 40):
+        gen.record_assignment(user_id_str, gen.date_str(day), rnd.choice(gen.shifts_to_plan + ["X"]))
+    _assert_hard_rules_match(gen)
+
+
+def _plan_rule_cells(gen):
+    """ Volle Prüfung wie ViolationManager.update_violation_set (frisches Grid). """
+    grid = MonthGrid(gen.year, gen.month, gen.live_shifts_data, gen.previous_month_shifts, {},
+                     user_dogs=user_dogs_from(gen.all_users), work_indicators=gen.rule_grid.work_indicators)
+    engine = RuleEngine(grid, shift_times=gen.rules.shift_times)
+    return engine.violation_cells(engine.compile(NIGHT_REST, DOG_OVERLAP))
+
+
+def test_incremental_violations_match_full_scan(synthetic_generator):
+    gen = synthetic_generator
+    engine = gen.rules
+    plan_rules = engine.compile(NIGHT_REST, DOG_OVERLAP)
+    cells = engine.violation_cells(plan_rules)
+    assert cells == _plan_rule_cells(gen)
+
+    # Wie ViolationManager.update_violations_incrementally: nur die betroffenen Zellen neu bewerten
+    rnd = random.Random(gen.days_in_month)
+    user_ids = gen.rule_grid.user_ids()
+    for _ in range(60):
+        user_id_str = rnd.choice(user_ids)
+        day = rnd.randint(1, gen.days_in_month)
+        gen.record_assignment(user_id_str, gen.date_str(day), rnd.choice(["T.", "N.", "6", "QA", "X", ""]))
+        for cell in engine.cells_affected_by(plan_rules, user_id_str, day):
+            if engine.cell_in_violation(plan_rules, *cell):
+                cells.add(cell)
+            else:
+                cells.discard(cell)
+    assert cells == _plan_rule_cells(gen)
@@ -0,0 +1,93 @@
+# tests/test_scoring_equivalence.py
+# GeneratorScoring.rank_candidates: Die gebündelte Bewertung eines Slots muss
+# dieselben Teil-Scores und dieselbe Rangfolge liefern wie der frühere Weg der
+# Runde 1 - calculate_scores je Kandidat (Lookahead über die Referenz-Prüfung,
+# ohne FeasibilityIndex) und anschließendes Sortieren mit dem Schlüssel aus
+# generator_rounds.
+
+import random
+from collections import defaultdict
+from datetime import date
+
+from gui.generator.generator_decision_log import SCORE_KEYS
+
+
+def _round_1_sort_key(shift_abbrev):
+    """ Sortierschlüssel, wie er vor rank_candidates in run_fair_assignment_round stand. """
+    return lambda x: (
+        x.get('avoid_score', 0),
+        x.get('partner_score', 1000),
+        x.get('future_conflict_score', 0),
+        -x.get('min_hours_score', 0),
+        -x.get('fairness_score', 0),
+        x.get('ratio_pref_score', 0),
+        x.get('isolation_score', 0),
+        0 if x['prev_shift'] == shift_abbrev else 1,
+        -x['hours']
+    )
+
+
+def _candidates(gen, day, rnd):
+    """
+    Kandidaten-Dicts wie in GeneratorRounds.run_fair_assignment_round (Schritt 1.1).
+    Gefiltert wird nur auf freie Tage, damit jeder Slot genug Kandidaten zum Sortieren hat.
+    """
+    grid = gen.rule_grid
+    candidates = []
+    for user in gen.all_users:
+        user_id_str = str(user['id'])
+        if grid.duty(user_id_str, day):
+            continue
+        hours = gen.live_user_hours.get(user['id'], 0.0)
+        one_day_ago_free = grid.is_free(user_id_str, day - 1)
+        next_free = grid.is_free(user_id_str, day + 1)
+        candidates.append({
+            'id': user['id'], 'id_str': user_id_str, 'dog': user['diensthund'], 'hours': hours,
+            'balance_hours': hours + rnd.choice([0.0, 0.0, -24.0, 12.0]),
+            'prev_shift': grid.duty(user_id_str, day - 1),
+            'is_isolated': (one_day_ago_free and grid.is_free(user_id_str, day - 2) and next_free) or
+                           (one_day_ago_free and next_free and grid.is_free(user_id_str, day + 2)),
+            'user_pref': gen.user_preferences[user_id_str]})
+    return candidates
+
+
+def test_rank_candidates_matches_per_candidate_scoring(synthetic_generator):
+    gen = synthetic_generator
+    scoring = gen.scoring
+    rnd = random.Random(gen.days_in_month)
+    user_ids = [user['id'] for user in gen.all_users]
+    live_shift_counts_ratio = defaultdict(lambda: {'T_OR_6': 0, 'N_DOT': 0})
+    for user_id in user_ids:
+        live_shift_counts_ratio[user_id] = {'T_OR_6': rnd.randint(0, 8), 'N_DOT': rnd.randint(0, 8)}
+
+    slots = 0
+    for day in range(1, gen.days_in_month + 1):
+        current_date = date(gen.year, gen.month, day)
+        for shift_abbrev in gen.shifts_to_plan:
+            candidates = _candidates(gen, day, rnd)
+            if not candidates:
+                continue
+            average_hours = sum(c['balance_hours'] for c in candidates) / len(candidates)
+            available_ids = {c['id'] for c in candidates}
+            assignments_today_by_shift = defaultdict(set)
+            assignments_today_by_shift[shift_abbrev].update(rnd.sample(user_ids, 3))
+            args = (average_hours, available_ids, shift_abbrev, live_shift_counts_ratio, assignments_today_by_shift,
+                    current_date, gen.days_in_month)
+
+            ranked = scoring.rank_candidates([dict(c) for c in candidates], *args)
+
+            index, gen.feasibility = gen.feasibility, None  # Skalarer Weg: Lookahead über die Referenz
+            try:
+                expected = [dict(c) for c in candidates]
+                for candidate in expected:
+                    candidate.update(scoring.calculate_scores(candidate, *args))
+            finally:
+                gen.feasibility = index
+            expected.sort(key=_round_1_sort_key(shift_abbrev))
+
+            assert [c['id'] for c in ranked] == [c['id'] for c in expected], (day, shift_abbrev)
+            assert [[c[key] for key in SCORE_KEYS] for c in ranked] == \
+                   [[c[key] for key in SCORE_KEYS] for c in expected], (day, shift_abbrev)
+            assert scoring.packed_scores(ranked) == scoring.packed_scores(expected)
+            slots += 1
+    assert slots > 0
@@ -0,0 +1,155 @@
+# utils/import_profiler.py
+# NEU: Eingebauter Import-Profiler (Startzeit-Analyse, Regel 2)
+#
+# Aktivierung (auch in der PyInstaller-EXE):
+#   DHF_IMPORT_PROFILE=1            (Umgebungsvariable)
+#   DHF-Planer.exe --import-profile (Kommandozeilen-Argument)
+#
+# Misst für jedes Modul die Ausführungszeit beim ersten Import, getrennt in
+# "gesamt" (inkl. Untermodule) und "selbst" (ohne die von ihm ausgelösten
+# Importe). report() gibt die teuersten Module seit dem letzten Bericht aus.
+
+import os
+import sys
+import threading
+import time
+
+ENV_VAR = "DHF_IMPORT_PROFILE"
+CLI_FLAG = "--import-profile"
+
+
+class _TimedLoader:
+    """ Hüllt einen Loader ein und misst die Dauer von exec_module(). """
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._leave(module.__name__, time.perf_counter() - start)
+
+    def __getattr__(self, item):
+        # Alle anderen Loader-Funktionen (get_data, get_resource_reader, ...) durchreichen
+        return getattr(self._loader, item)
+
+
+class _TimingFinder:
+    """
+    Meta-Path-Finder, der die Suche an die übrigen Finder delegiert und
+    deren Loader durch _TimedLoader ersetzt.
+    """
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimedLoader(spec.loader, self._profiler)
+            return spec
+        return None
+
+
+class ImportProfiler:
+    """
+    Sammelt Import-Zeiten pro Modul (statisch aufgerufen, ein Profiler pro Prozess).
+    """
+
+    _finder = None
+    _lock = threading.Lock()
+    _local = threading.local()
+    _records = []  # Liste von (modulname, gesamt_s, selbst_s)
+    _reported_until = 0
+    _installed_at = None
+
+    @staticmethod
+    def is_requested():
+        """ Prüft, ob der Profiler per Umgebungsvariable oder Argument angefordert wurde. """
+        return os.environ.get(ENV_VAR, "").lower() in ("1", "true", "yes") or CLI_FLAG in sys.argv
+
+    @staticmethod
+    def is_active():
+        return ImportProfiler._finder is not None
+
+    @staticmethod
+    def install():
+        """ Hängt den Profiler vor alle anderen Finder in sys.meta_path. """
+        if ImportProfiler._finder is not None:
+            return
+        ImportProfiler._finder = _TimingFinder(ImportProfiler)
+        ImportProfiler._installed_at = time.perf_counter()
+        sys.meta_path.insert(0, ImportProfiler._finder)
+        print("[ImportProfiler] Aktiv. Import-Zeiten werden gemessen.")
+
+    @staticmethod
+    def uninstall():
+        if ImportProfiler._finder is not None:
+            try:
+                sys.meta_path.remove(ImportProfiler._finder)
+            except ValueError:
+                pass
+            ImportProfiler._finder = None
+
+    # --- Interne Zeitmessung (pro Thread verschachtelt) ---
+
+    @staticmethod
+    def _stack():
+        stack = getattr(ImportProfiler._local, 'child_times', None)
+        if stack is None:
+            stack = []
+            ImportProfiler._local.child_times = stack
+        return stack
+
+    @staticmethod
+    def _enter():
+        ImportProfiler._stack().append(0.0)
+
+    @staticmethod
+    def _leave(module_name, elapsed):
+        stack = ImportProfiler._stack()
+        children = stack.pop() if stack else 0.0
+        if stack:
+            stack[-1] += elapsed
+        with ImportProfiler._lock:
+            ImportProfiler._records.append((module_name, elapsed, max(0.0, elapsed - children)))
+
+    # --- Auswertung ---
+
+    @staticmethod
+    def report(title="Import-Profil", top_n=25):
+        """
+        Gibt die teuersten Module (nach Eigenzeit) seit dem letzten Bericht aus.
+        """
+        if ImportProfiler._finder is None:
+            return
+        with ImportProfiler._lock:
+            records = ImportProfiler._records[ImportProfiler._reported_until:]
+            ImportProfiler._reported_until = len(ImportProfiler._records)
+
+        if not records:
+            print(f"[ImportProfiler] {title}: keine neuen Importe.")
+            return
+
+        total_self = sum(r[2] for r in records)
+        since_start = time.perf_counter() - ImportProfiler._installed_at
+        print(f"[ImportProfiler] === {title}: {len(records)} Module, "
+              f"{total_self * 1000:.0f} ms Import-Zeit (seit Aktivierung: {since_start:.2f}s) ===")
+        print(f"[ImportProfiler] {'selbst ms':>10} {'gesamt ms':>10}  Modul")
+        for name, elapsed, self_time in sorted(records, key=lambda r: r[2], reverse=True)[:top_n]:
+            print(f"[ImportProfiler] {self_time * 1000:10.1f} {elapsed * 1000:10.1f}  {name}")
@@ -0,0 +1,269 @@
+# utils/instrumentation.py
+# NEU: Zentrale Instrumentierung (Logger pro Subsystem + Zeitmessung, Regel 2)
+#
+# 1. Logger mit Stufen pro Subsystem ("violations", "generator", ...).
+#    Deaktivierte Stufen kosten nur einen Attribut-Check; in heißen Schleifen:
+#        if _log.debug_enabled: _log.debug("...%s", teuer())
+#    Konfiguration (auch in der PyInstaller-EXE):
+#        DHF_LOG_LEVEL=INFO                          (global)
+#        DHF_LOG_LEVEL=WARNING,violations=DEBUG      (global + pro Subsystem)
+#        DHF-Planer.exe --debug-log                  (alles auf DEBUG)
+#
+# 2. span("name") misst die Dauer benannter Abschnitte (Batch-Load,
+#    Konfliktprüfung, Totals, Rendern, Generator-Runden) und legt sie in
+#    einem Ringpuffer im Speicher ab. Admins sehen/exportieren die Werte
+#    über "Einstellungen -> Leistungsprotokoll".
+
+import csv
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+ENV_VAR = "DHF_LOG_LEVEL"
+CLI_FLAG = "--debug-log"
+SPANS_ENV_VAR = "DHF_SPANS"  # "0" schaltet die Zeitmessung ab
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+_LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNUNG", ERROR: "FEHLER"}
+_LEVELS_BY_NAME = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "WARNUNG": WARNING,
+                   "ERROR": ERROR, "FEHLER": ERROR}
+
+# Maximale Anzahl gespeicherter Messungen (älteste fallen heraus)
+SPAN_BUFFER_SIZE = 5000
+
+
+def _parse_level(value, default):
+    value = (value or "").strip().upper()
+    if value.isdigit():
+        return int(value)
+    return _LEVELS_BY_NAME.get(value, default)
+
+
+def _read_level_config():
+    """ Liest (globale Stufe, {subsystem: stufe}) aus Umgebungsvariable/Argument. """
+    default_level = INFO
+    overrides = {}
+    for part in os.environ.get(ENV_VAR, "").split(","):
+        if not part.strip():
+            continue
+        if "=" in part:
+            name, level = part.split("=", 1)
+            overrides[name.strip()] = _parse_level(level, INFO)
+        else:
+            default_level = _parse_level(part, INFO)
+    if CLI_FLAG in sys.argv:
+        default_level = DEBUG
+    return default_level, overrides
+
+
+class SubsystemLogger:
+    """
+    Logger für ein Subsystem. Ausgabe wie bisher per print ("[name] text"),
+    aber nur, wenn die Stufe aktiv ist. Formatierung (msg % args) passiert
+    erst nach dem Stufen-Check.
+    """
+
+    __slots__ = ('name', 'level', 'debug_enabled', 'info_enabled')
+
+    def __init__(self, name, level):
+        self.name = name
+        self.set_level(level)
+
+    def set_level(self, level):
+        self.level = level
+        self.debug_enabled = level <= DEBUG
+        self.info_enabled = level <= INFO
+
+    def is_enabled_for(self, level):
+        return level >= self.level
+
+    def debug(self, msg, *args):
+        if self.debug_enabled:
+            self._emit(DEBUG, msg, args)
+
+    def info(self, msg, *args):
+        if self.info_enabled:
+            self._emit(INFO, msg, args)
+
+    def warning(self, msg, *args):
+        if self.level <= WARNING:
+            self._emit(WARNING, msg, args)
+
+    def error(self, msg, *args):
+        if self.level <= ERROR:
+            self._emit(ERROR, msg, args)
+
+    def _emit(self, level, msg, args):
+        text = msg % args if args else msg
+        if level >= WARNING:
+            print(f"[{_LEVEL_NAMES[level]}] [{self.name}] {text}")
+        else:
+            print(f"[{self.name}] {text}")
+
+
+class Instrumentation:
+    """
+    Verwaltet die Logger und den Ringpuffer der Zeitmessungen
+    (statisch aufgerufen, eine Instanz pro Prozess).
+    """
+
+    _lock = threading.Lock()
+    _default_level, _level_overrides = _read_level_config()
+    _loggers = {}
+
+    spans_enabled = os.environ.get(SPANS_ENV_VAR, "1").lower() not in ("0", "false", "no")
+    # Einträge: (zeitstempel_epoch, name, dauer_ms, thread_name, attrs_dict)
+    _spans = deque(maxlen=SPAN_BUFFER_SIZE)
+
+    # --- Logger ---
+
+    @staticmethod
+    def get_logger(name):
+        logger = Instrumentation._loggers.get(name)
+        if logger is None:
+            with Instrumentation._lock:
+                logger = Instrumentation._loggers.get(name)
+                if logger is None:
+                    level = Instrumentation._level_overrides.get(name, Instrumentation._default_level)
+                    logger = SubsystemLogger(name, level)
+                    Instrumentation._loggers[name] = logger
+        return logger
+
+    @staticmethod
+    def set_level(level, subsystem=None):
+        """ Setzt die Stufe global (subsystem=None) oder für ein Subsystem zur Laufzeit. """
+        level = _parse_level(level, INFO) if isinstance(level, str) else level
+        with Instrumentation._lock:
+            if subsystem is None:
+                Instrumentation._default_level = level
+                Instrumentation._level_overrides.clear()
+                for logger in Instrumentation._loggers.values():
+                    logger.set_level(level)
+            else:
+                Instrumentation._level_overrides[subsystem] = level
+                if subsystem in Instrumentation._loggers:
+                    Instrumentation._loggers[subsystem].set_level(level)
+
+    # --- Zeitmessungen ---
+
+    @staticmethod
+    def record_span(name, duration_s, **attrs):
+        """ Legt eine fertige Messung im Ringpuffer ab (deque.append ist thread-sicher). """
+        if Instrumentation.spans_enabled:
+            Instrumentation._spans.append(
+                (time.time(), name, duration_s * 1000.0, threading.current_thread().name, attrs))
+
+    @staticmethod
+    def get_spans(name_prefix=None):
+        """ Kopie der gespeicherten Messungen (älteste zuerst), optional gefiltert. """
+        spans = list(Instrumentation._spans)
+        if name_prefix:
+            spans = [s for s in spans if s[1].startswith(name_prefix)]
+        return spans
+
+    @staticmethod
+    def clear_spans():
+        Instrumentation._spans.clear()
+
+    @staticmethod
+    def summarize_spans():
+        """
+        Statistik pro Abschnitt: [{'name', 'count', 'avg_ms', 'p50_ms', 'p95_ms', 'max_ms', 'last_ms'}],
+        sortiert nach Gesamtzeit (absteigend).
+        """
+        durations = {}
+        for _, name, duration_ms, _, _ in Instrumentation.get_spans():
+            durations.setdefault(name, []).append(duration_ms)
+
+        summary = []
+        for name, values in durations.items():
+            ordered = sorted(values)
+            count = len(ordered)
+            summary.append({
+                'name': name,
+                'count': count,
+                'avg_ms': sum(ordered) / count,
+                'p50_ms': ordered[(count - 1) // 2],
+                'p95_ms': ordered[min(count - 1, int(count * 0.95))],
+                'max_ms': ordered[-1],
+                'last_ms': values[-1],
+                'total_ms': sum(ordered),
+            })
+        summary.sort(key=lambda row: row['total_ms'], reverse=True)
+        return summary
+
+    @staticmethod
+    def export_spans_csv(file_path, reporter=None):
+        """
+        Schreibt alle gespeicherten Messungen als CSV (Semikolon, für Excel). Gibt die Anzahl zurück.
+        Optional mit ProgressReporter (utils/progress.py): Fortschritt je 500 Zeilen.
+        """
+        spans = Instrumentation.get_spans()
+        with open(file_path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(["Zeitpunkt", "Abschnitt", "Dauer (ms)", "Thread", "Details"])
+            for index, (timestamp, name, duration_ms, thread_name, attrs) in enumerate(spans):
+                if reporter is not None and index % 500 == 0:
+                    reporter.step(index, len(spans), f"Exportiere Messung {index + 1} von {len(spans)}...")
+                writer.writerow([
+                    datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+                    name,
+                    f"{duration_ms:.2f}".replace(".", ","),
+                    thread_name,
+                    ", ".join(f"{k}={v}" for k, v in attrs.items()),
+                ])
+        return len(spans)
+
+
+class _OpenSpan:
+    """ Laufende Messung für Abschnitte, die nicht in einen with-Block passen (z.B. Rendern in Chunks). """
+
+    __slots__ = ('name', 'attrs', '_start', '_finished')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self._start = time.perf_counter()
+        self._finished = False
+
+    def finish(self, **extra_attrs):
+        """ Beendet die Messung (mehrfacher Aufruf wird ignoriert). Gibt die Dauer in Sekunden zurück. """
+        if self._finished:
+            return 0.0
+        self._finished = True
+        duration = time.perf_counter() - self._start
+        if extra_attrs:
+            self.attrs.update(extra_attrs)
+        Instrumentation.record_span(self.name, duration, **self.attrs)
+        return duration
+
+
+def get_logger(name):
+    """ Gibt den (gemeinsamen) Logger für ein Subsystem zurück. """
+    return Instrumentation.get_logger(name)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Misst die Dauer des with-Blocks und legt sie im Ringpuffer ab:
+        with span("dm.batch_load", month="2025-11"):
+            ...
+    """
+    if not Instrumentation.spans_enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        Instrumentation.record_span(name, time.perf_counter() - start, **attrs)
+
+
+def start_span(name, **attrs):
+    """ Startet eine Messung, die später mit .finish() beendet wird. """
+    return _OpenSpan(name, attrs)
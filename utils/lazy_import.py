@@ -0,0 +1,48 @@
+# utils/lazy_import.py
+# NEU: Verzögertes Laden schwerer Module (Startzeit-Optimierung, Regel 2)
+#
+# Fenster-, Tab- und Dialogklassen werden erst beim ersten Gebrauch
+# importiert. Eine LazyClassRef kann überall dort stehen, wo bisher die
+# Klasse selbst stand (Mappings wie window_class_map / tab_definitions):
+#   - Aufruf  -> importiert das Modul und instanziiert die Klasse
+#   - __name__ -> Klassenname, OHNE das Modul zu laden
+
+import importlib
+
+
+class LazyClassRef:
+    """
+    Platzhalter für eine Klasse, deren Modul erst beim ersten Zugriff importiert wird.
+    """
+
+    def __init__(self, module_path, class_name):
+        self.module_path = module_path
+        self.class_name = class_name
+        self.__name__ = class_name
+        self._resolved = None
+
+    def resolve(self):
+        """ Importiert das Modul (einmalig) und gibt die echte Klasse zurück. """
+        if self._resolved is None:
+            module = importlib.import_module(self.module_path)
+            self._resolved = getattr(module, self.class_name)
+        return self._resolved
+
+    def try_resolve(self):
+        """ Wie resolve(), gibt aber bei Import-Fehlern None zurück (Regel 1). """
+        try:
+            return self.resolve()
+        except (ImportError, AttributeError) as e:
+            print(f"[WARNUNG] {self.module_path}.{self.class_name} konnte nicht geladen werden: {e}")
+            return None
+
+    @property
+    def is_loaded(self):
+        return self._resolved is not None
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        state = "geladen" if self.is_loaded else "nicht geladen"
+        return f"<LazyClassRef {self.module_path}.{self.class_name} ({state})>"
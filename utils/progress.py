@@ -0,0 +1,381 @@
+# utils/progress.py
+# NEU (Regel 2): Gemeinsamer Fortschrittskanal für lange Vorgänge
+#
+# Bisher meldete jeder Vorgang seinen Fortschritt selbst: der Monats-Lader und
+# der Generator-Thread per after(0) bei JEDEM Schritt (hunderte Tk-Events pro
+# Sekunde), Löschen/Export/Urlaubsgenehmigung gar nicht. Hier gibt es einen
+# Kanal für alle:
+#   - ProgressReporter (Worker-Seite, thread-sicher, kein Tk-Zugriff): nimmt
+#     Meldungen entgegen und merkt sich nur die NEUESTE
+#   - ProgressChannel (Tk-Seite): holt die neueste Meldung mit fester
+#     Bildrate (FRAME_INTERVAL_MS) ab und zeigt sie an
+#   - Struktur: Abschnitt (stage), Anteil 0..1, Text und Restzeit - geschätzt
+#     aus dem Verlauf früherer Läufe desselben Vorgangs (ProgressHistory)
+#   - Abbruch: ProgressChannel.cancel() setzt eine Marke, die der Worker über
+#     reporter.cancelled / raise_if_cancelled() abfragt (bzw. on_cancel)
+#
+# Bildrate optional per Umgebungsvariable DHF_PROGRESS_FPS (Standard 10).
+
+import json
+import os
+import sys
+import threading
+import time
+
+from utils.threading_utils import TaskCancelled
+from utils.instrumentation import get_logger
+
+_log = get_logger("progress")
+
+FPS_ENV_VAR = "DHF_PROGRESS_FPS"
+DEFAULT_FPS = 10
+HISTORY_DIR_NAME = "DHFPlaner"
+HISTORY_FILE_NAME = "progress_history.json"
+HISTORY_CURVE_POINTS = 40  # Stützstellen je gespeichertem Verlauf
+ETA_MIN_ELAPSED_S = 0.5  # Vorher keine Restzeit anzeigen (zu unsicher)
+ETA_MIN_FRACTION = 0.05  # Lineare Schätzung (ohne Verlauf) erst ab 5 %
+ETA_REFRESH_S = 1.0  # Restzeit auch ohne neue Meldung einmal pro Sekunde auffrischen
+
+
+def frame_interval_ms():
+    """ Abstand zwischen zwei Anzeige-Aktualisierungen in ms. """
+    try:
+        fps = int(os.environ.get(FPS_ENV_VAR, DEFAULT_FPS))
+    except ValueError:
+        fps = DEFAULT_FPS
+    return max(20, 1000 // max(1, fps))
+
+
+class ProgressUpdate:
+    """ Ein angezeigter Fortschrittsstand (Schnappschuss für die Tk-Seite). """
+
+    __slots__ = ('operation', 'stage', 'fraction', 'text', 'elapsed_s', 'eta_s', 'cancel_requested')
+
+    def __init__(self, operation, stage, fraction, text, elapsed_s, eta_s, cancel_requested):
+        self.operation = operation
+        self.stage = stage
+        self.fraction = fraction
+        self.text = text
+        self.elapsed_s = elapsed_s
+        self.eta_s = eta_s
+        self.cancel_requested = cancel_requested
+
+    @property
+    def percent(self):
+        return self.fraction * 100.0
+
+    def display_text(self):
+        """ Text mit Restzeit (falls geschätzt), z.B. 'Speichere... (noch ca. 12 s)'. """
+        if self.cancel_requested:
+            return "Wird abgebrochen..."
+        if self.eta_s is None:
+            return self.text
+        if self.eta_s >= 90:
+            return f"{self.text} (noch ca. {self.eta_s / 60:.0f} min)"
+        return f"{self.text} (noch ca. {max(1, round(self.eta_s))} s)"
+
+
+class ProgressHistory:
+    """
+    Verlauf früherer Läufe je Vorgang (statisch aufgerufen, analog zu
+    WarmStartCache). Gespeichert wird pro Vorgang die Kurve
+    [(anteil, sekunden), ...] des letzten erfolgreichen Laufs.
+    """
+
+    _lock = threading.Lock()
+    _curves = None  # {vorgang: {'total_s': float, 'curve': [[anteil, sekunden], ...]}}
+
+    @staticmethod
+    def _get_history_path():
+        """ Gleicher Ordner wie der Stammdaten-Snapshot (gui/warm_start_cache.py). """
+        if sys.platform.startswith('win'):
+            base_dir = os.environ.get('LOCALAPPDATA') or os.environ.get('APPDATA') or os.path.expanduser('~')
+        else:
+            base_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(base_dir, HISTORY_DIR_NAME, HISTORY_FILE_NAME)
+
+    @staticmethod
+    def _load():
+        """ Lädt den Verlauf einmal pro Sitzung (Aufrufer hält _lock). """
+        if ProgressHistory._curves is not None:
+            return ProgressHistory._curves
+        ProgressHistory._curves = {}
+        path = ProgressHistory._get_history_path()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    ProgressHistory._curves = data
+            except (OSError, ValueError) as e:
+                _log.info("Fortschritts-Verlauf unlesbar, wird neu angelegt: %s", e)
+        return ProgressHistory._curves
+
+    @staticmethod
+    def get(operation):
+        with ProgressHistory._lock:
+            return ProgressHistory._load().get(operation)
+
+    @staticmethod
+    def record(operation, samples, total_s):
+        """
+        Speichert den Verlauf eines erfolgreichen Laufs. 'samples' ist die
+        Liste [(anteil, sekunden)] in Meldereihenfolge; sie wird auf
+        HISTORY_CURVE_POINTS monotone Stützstellen verdichtet.
+        """
+        if not operation or total_s <= 0:
+            return
+        curve = []
+        last_fraction = -1.0
+        for fraction, seconds in samples:
+            if fraction > last_fraction:
+                curve.append([round(fraction, 4), round(seconds, 3)])
+                last_fraction = fraction
+        if len(curve) > HISTORY_CURVE_POINTS:
+            step = len(curve) / HISTORY_CURVE_POINTS
+            curve = [curve[int(i * step)] for i in range(HISTORY_CURVE_POINTS)]
+        with ProgressHistory._lock:
+            curves = ProgressHistory._load()
+            curves[operation] = {'total_s': round(total_s, 3), 'curve': curve}
+            path = ProgressHistory._get_history_path()
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(curves, f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                _log.info("Fortschritts-Verlauf konnte nicht gespeichert werden: %s", e)
+
+    @staticmethod
+    def estimate_remaining(operation, fraction, elapsed_s):
+        """
+        Restzeit in Sekunden oder None.
+        Mit Verlauf: Zeitpunkt des Anteils im letzten Lauf, skaliert mit dem
+        Tempo des aktuellen Laufs. Ohne (brauchbaren) Verlauf: lineare
+        Hochrechnung ab ETA_MIN_FRACTION.
+        """
+        if elapsed_s < ETA_MIN_ELAPSED_S or fraction >= 1.0:
+            return None
+        entry = ProgressHistory.get(operation) if operation else None
+        if entry:
+            total_s = entry.get('total_s') or 0.0
+            past_s = _interpolate(entry.get('curve') or [], fraction)
+            if past_s is not None and past_s >= ETA_MIN_ELAPSED_S:
+                return max(0.0, (total_s - past_s) * elapsed_s / past_s)
+            if past_s is not None and total_s > elapsed_s:
+                # Vorgänge ohne Zwischenschritte (z.B. ein DB-Aufruf): letzte Dauer als Maßstab
+                return total_s - elapsed_s
+        if fraction >= ETA_MIN_FRACTION:
+            return elapsed_s * (1.0 - fraction) / fraction
+        return None
+
+
+def _interpolate(curve, fraction):
+    """ Sekunden bei 'fraction' auf der Kurve [(anteil, sekunden)] (linear), None bei leerer Kurve. """
+    if not curve:
+        return None
+    previous_fraction, previous_seconds = 0.0, 0.0
+    for point_fraction, point_seconds in curve:
+        if point_fraction >= fraction:
+            span = point_fraction - previous_fraction
+            if span <= 0:
+                return point_seconds
+            return previous_seconds + (point_seconds - previous_seconds) * (fraction - previous_fraction) / span
+        previous_fraction, previous_seconds = point_fraction, point_seconds
+    return previous_seconds
+
+
+class ProgressReporter:
+    """
+    Worker-Seite des Kanals. Darf aus jedem Thread aufgerufen werden und
+    berührt kein Tk-Widget; es wird nur der neueste Stand gemerkt.
+
+        reporter(wert_0_100, text)         bisherige Callback-Signatur (progress_callback)
+        reporter.update(anteil, text)      Anteil 0..1
+        reporter.stage(name, start, end)   Abschnitt: folgende Meldungen werden auf [start, end] skaliert
+        reporter.step(fertig, gesamt, text)
+        reporter.cancelled / raise_if_cancelled()
+    """
+
+    def __init__(self, operation=None):
+        self.operation = operation
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self._linked_tokens = []
+        self._started_at = time.monotonic()
+        self._fraction = 0.0
+        self._text = ""
+        self._stage = None
+        self._stage_range = (0.0, 1.0)
+        self._version = 0
+        self._samples = []
+
+    def __call__(self, value, text=None):
+        self.update((value or 0) / 100.0, text)
+
+    def update(self, fraction, text=None):
+        start, end = self._stage_range
+        fraction = start + (end - start) * min(max(float(fraction), 0.0), 1.0)
+        with self._lock:
+            # Der Balken läuft nie zurück (z.B. bei erneuten Teil-Meldungen)
+            if fraction > self._fraction:
+                self._fraction = fraction
+                self._samples.append((fraction, time.monotonic() - self._started_at))
+            if text is not None:
+                self._text = text
+            self._version += 1
+
+    def stage(self, name, start=None, end=None, text=None):
+        """ Beginnt einen Abschnitt; ohne start/end bleibt die Skalierung unverändert. """
+        with self._lock:
+            self._stage = name
+            if start is not None and end is not None:
+                self._stage_range = (float(start), float(end))
+        self.update(0.0, text if text is not None else name)
+
+    def step(self, done, total, text=None):
+        self.update(done / total if total else 1.0, text)
+
+    # --- Abbruch (Tk -> Worker) ---
+
+    def cancel(self):
+        self._cancel_event.set()
+        for token in list(self._linked_tokens):
+            token.cancel()
+
+    def link(self, token):
+        """ Verknüpft eine CancelToken/ScheduledTask: cancel() bricht auch sie ab. """
+        if token is not None:
+            self._linked_tokens.append(token)
+            if self._cancel_event.is_set():
+                token.cancel()
+        return token
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    # --- Abholen (Tk-Seite) ---
+
+    def poll(self, last_version=None):
+        """ (version, anteil, text, stage) oder None, wenn seit 'last_version' nichts Neues kam. """
+        with self._lock:
+            if self._version == last_version:
+                return None
+            return self._version, self._fraction, self._text, self._stage
+
+    def elapsed(self):
+        return time.monotonic() - self._started_at
+
+    def samples(self):
+        with self._lock:
+            return list(self._samples)
+
+
+class ProgressChannel:
+    """
+    Tk-Seite des Kanals: zeigt den neuesten Stand des Reporters mit fester
+    Bildrate an (ein after()-Takt statt eines Events pro Meldung).
+
+        on_update(ProgressUpdate)   wird im Tk-Thread aufgerufen
+        on_cancel()                 optional, z.B. GeneratorProcessRunner.cancel
+
+    finish(success=True) speichert den Verlauf für künftige Restzeit-Schätzungen.
+    """
+
+    def __init__(self, widget, operation, on_update, on_cancel=None, interval_ms=None):
+        self.widget = widget
+        self.operation = operation
+        self.on_update = on_update
+        self.on_cancel = on_cancel
+        self.interval_ms = interval_ms or frame_interval_ms()
+        self.reporter = ProgressReporter(operation)
+        self._last_version = -1
+        self._after_id = None
+        self._closed = False
+        self._cancel_shown = False
+        self._last_shown_at = 0.0
+
+    @property
+    def cancellable(self):
+        return self.on_cancel is not None
+
+    @property
+    def active(self):
+        return not self._closed
+
+    def start(self):
+        self._tick()
+        return self
+
+    def cancel(self):
+        """ (Tk-Thread) Abbruch anfordern: Marke für den Worker + on_cancel. """
+        if self._closed or self.reporter.cancelled:
+            return
+        self.reporter.cancel()
+        if self.on_cancel:
+            try:
+                self.on_cancel()
+            except Exception as e:
+                print(f"[Fortschritt] Abbruch von '{self.operation}' fehlgeschlagen: {e}")
+        self._tick(reschedule=False)
+
+    def finish(self, success=True):
+        """ Beendet den Takt; bei Erfolg wird der Verlauf des Laufs gespeichert. """
+        if self._closed:
+            return
+        self._closed = True
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        if success and not self.reporter.cancelled:
+            ProgressHistory.record(self.operation, self.reporter.samples() + [(1.0, self.reporter.elapsed())],
+                                   self.reporter.elapsed())
+
+    def snapshot(self, force=False):
+        """
+        Aktueller Stand als ProgressUpdate. None, wenn sich seit der letzten
+        Anzeige nichts geändert hat (die Restzeit wird trotzdem einmal pro
+        Sekunde aufgefrischt) und nicht 'force'.
+        """
+        now = time.monotonic()
+        changed = self.reporter.poll(self._last_version) is not None \
+            or self.reporter.cancelled != self._cancel_shown
+        if not (force or changed or now - self._last_shown_at >= ETA_REFRESH_S):
+            return None
+        version, fraction, text, stage = self.reporter.poll(None)
+        self._last_version = version
+        self._cancel_shown = self.reporter.cancelled
+        self._last_shown_at = now
+        elapsed_s = self.reporter.elapsed()
+        return ProgressUpdate(self.operation, stage, fraction, text, elapsed_s,
+                              ProgressHistory.estimate_remaining(self.operation, fraction, elapsed_s),
+                              self.reporter.cancelled)
+
+    def flush(self):
+        """ (Tk-Thread) Zeigt den neuesten Stand sofort an (z.B. vor einem blockierenden Schritt). """
+        self._tick(reschedule=False)
+
+    def _tick(self, reschedule=True):
+        if self._closed:
+            return
+        update = self.snapshot()
+        if update is not None:
+            try:
+                self.on_update(update)
+            except Exception as e:
+                print(f"[Fortschritt] Anzeige von '{self.operation}' fehlgeschlagen: {e}")
+        if reschedule:
+            try:
+                self._after_id = self.widget.after(self.interval_ms, self._tick)
+            except Exception:
+                # Widget zerstört (z.B. Fenster geschlossen): Takt endet
+                self._closed = True
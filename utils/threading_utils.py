@@ -1,60 +1,171 @@
 # utils/threading_utils.py
 import threading
-from queue import Queue, Empty, LifoQueue  # LifoQueue hinzugefügt
 import time
+import itertools
+from contextlib import nullcontext
+
+# --- NEU (Regel 2): Prioritätsklassen des ThreadManagers ---
+# Kleinere Zahl = wichtiger. Innerhalb einer Klasse gilt die Reihenfolge des Eintreffens.
+PRIORITY_INTERACTIVE = 0  # Speichern, Sperren, Benutzer-Aktionen
+PRIORITY_VISIBLE = 1  # Laden des sichtbaren Monats / Tabs, Konfliktprüfung
+PRIORITY_PRELOAD = 2  # Vorladen (N+1, Tab-UIs)
+PRIORITY_POLL = 3  # Periodische Abfragen (Benachrichtigungen, Auto-Refresh)
+
+# Höchstens so viele Worker gleichzeitig pro Hintergrund-Klasse. Zusammen
+# bleiben damit immer Worker für PRIORITY_INTERACTIVE/VISIBLE frei.
+BACKGROUND_LIMITS = {PRIORITY_PRELOAD: 1, PRIORITY_POLL: 2}
+
+
+class TaskCancelled(Exception):
+    """ Wird von CancelToken.raise_if_cancelled() geworfen, wenn eine Aufgabe überholt wurde. """
+
+
+class CancelToken:
+    """
+    Abbruch-Marke einer Aufgabe. Lange Aufgaben prüfen sie an sinnvollen
+    Stellen (z.B. zwischen Ladeschritten) und brechen dann ab.
+    """
+
+    __slots__ = ('_event',)
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise TaskCancelled()
+
+    def wait(self, timeout):
+        """ Schläft bis zu 'timeout' Sekunden, wacht bei Abbruch sofort auf. Gibt 'cancelled' zurück. """
+        return self._event.wait(timeout)
+
+
+class ScheduledTask:
+    """ Eine eingeplante Aufgabe (Rückgabewert von ThreadManager.submit). """
+
+    __slots__ = ('target_func', 'callbacks', 'args', 'kwargs', 'priority', 'seq', 'key', 'token', 'started')
+
+    def __init__(self, target_func, callback, args, kwargs, priority, seq, key):
+        self.target_func = target_func
+        self.callbacks = [callback] if callback else []
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.seq = seq
+        self.key = key
+        self.token = CancelToken()
+        # True, sobald ein Worker die Aufgabe übernommen hat (dann läuft target_func
+        # auf jeden Fall; vorher abgebrochene Aufgaben laufen nie)
+        self.started = False
+
+    def cancel(self):
+        self.token.cancel()
+
+    @property
+    def cancelled(self):
+        return self.token.cancelled
 
 
 class ThreadManager:
     """
     Verwaltet einen Pool von Worker-Threads, um GUI-Blockaden zu verhindern.
     Verwendet einen GUI-Callback, um Ergebnisse sicher zurückzugeben.
-    (DIESE KLASSE BLEIBT UNVERÄNDERT)
+
+    KORREKTUR (Regel 2): Statt einer FIFO-Queue plant der Manager nach
+    Prioritätsklassen (Speichern > sichtbarer Monat > Vorladen > Polling).
+    Aufgaben mit gleichem 'key' werden zusammengefasst (ein zweites
+    Einreihen ist ein No-Op) und laufen nie parallel; mit supersede=True
+    ersetzt eine neue Aufgabe die alten (wartende fallen weg, laufende
+    bekommen ihr CancelToken gesetzt).
     """
 
-    def __init__(self, root, max_workers=5):
+    def __init__(self, root, max_workers=5, background_context=None):
+        """
+        Args:
+            root: Tk-Widget für die Callbacks (root.after).
+            max_workers (int): Feste Anzahl Worker-Threads.
+            background_context (callable): Optionaler Kontextmanager-Faktor für
+                Vorlade-/Polling-Aufgaben (z.B. der Hintergrund-DB-Pool).
+        """
         self.root = root
-        self.task_queue = Queue()
         self.max_workers = max_workers
+        self.background_context = background_context
         self.workers = []
         self.running = True
+
+        self._cond = threading.Condition()
+        self._pending = []  # ScheduledTask, Auswahl nach (priority, seq)
+        self._running_tasks = []
+        self._seq = itertools.count()
         self._start_workers()
 
     def _start_workers(self):
         for i in range(self.max_workers):
-            worker = threading.Thread(target=self._worker_loop, daemon=True)
+            worker = threading.Thread(target=self._worker_loop, daemon=True, name=f"ThreadManager-{i}")
             worker.start()
             self.workers.append(worker)
 
-    def _worker_loop(self):
-        while self.running:
-            try:
-                # Warte auf eine Aufgabe
-                target_func, callback, args, kwargs = self.task_queue.get(timeout=1)
-                if not self.running:
-                    break
+    # --- Einplanen ---
 
-                try:
-                    # Führe die Aufgabe aus
-                    result = target_func(*args, **kwargs)
-                    error = None
-                except Exception as e:
-                    result = None
-                    error = e
+    def submit(self, target_func, callback=None, args=(), kwargs=None, priority=PRIORITY_INTERACTIVE,
+               key=None, supersede=False, pass_token=False):
+        """
+        Plant eine Aufgabe ein und gibt den ScheduledTask zurück.
 
-                # Sende das Ergebnis an den GUI-Thread
-                if callback:
-                    self.root.after(0, callback, result, error)
+        Args:
+            target_func (callable): Die Funktion, die im Thread ausgeführt werden soll.
+            callback (callable): Wird im GUI-Thread mit (result, error) aufgerufen
+                (nicht bei abgebrochenen Aufgaben).
+            priority (int): Eine der PRIORITY_*-Klassen.
+            key: Optionaler Schlüssel zum Zusammenfassen (z.B. ("preload", 2025, 11)).
+                Wartet bereits eine Aufgabe mit diesem Schlüssel, wird KEINE neue
+                eingereiht: die wartende Aufgabe (mit ihrer Funktion und ihren
+                Argumenten) wird zurückgegeben und 'callback' zusätzlich an sie
+                gehängt, d.h. er erhält deren Ergebnis.
+            supersede (bool): Ältere Aufgaben mit gleichem Schlüssel abbrechen.
+            pass_token (bool): target_func bekommt cancel_token=... übergeben.
+        """
+        kwargs = dict(kwargs or {})
+        with self._cond:
+            if not self.running:
+                print("[ThreadManager] Hinzufügen von Task abgelehnt, Manager stoppt.")
+                return None
 
-                self.task_queue.task_done()
+            if key is not None:
+                if supersede:
+                    for task in self._running_tasks:
+                        if task.key == key:
+                            task.cancel()
+                    superseded = [task for task in self._pending if task.key == key]
+                    for task in superseded:
+                        task.cancel()
+                        self._pending.remove(task)
+                else:
+                    for task in self._pending:
+                        if task.key == key and not task.cancelled:
+                            # Zusammenfassen: bereits wartende Aufgabe ggf. höher einstufen
+                            task.priority = min(task.priority, priority)
+                            if callback and callback not in task.callbacks:
+                                task.callbacks.append(callback)
+                            return task
 
-            except Empty:
-                continue
-            except Exception as e:
-                print(f"[ThreadManager] Kritischer Fehler im Worker-Loop: {e}")
+            task = ScheduledTask(target_func, callback, args, kwargs, priority, next(self._seq), key)
+            if pass_token:
+                task.kwargs['cancel_token'] = task.token
+            self._pending.append(task)
+            self._cond.notify()
+        return task
 
     def start_worker(self, target_func, callback, *args, **kwargs):
         """
-        Fügt eine neue Aufgabe zur Queue hinzu.
+        Fügt eine neue (interaktive) Aufgabe hinzu.
 
         Args:
             target_func (callable): Die Funktion, die im Thread ausgeführt werden soll.
@@ -62,109 +173,117 @@ class ThreadManager:
             *args: Argumente für target_func.
             **kwargs: Keyword-Argumente für target_func.
         """
-        if not self.running:
-            print("[ThreadManager] Hinzufügen von Task abgelehnt, Manager stoppt.")
-            return
-
         print(f"[ThreadManager] Füge Task hinzu: {target_func.__name__}")
-        self.task_queue.put((target_func, callback, args, kwargs))
+        return self.submit(target_func, callback, args, kwargs)
 
-    def stop(self):
-        """Signalisiert allen Workern, sich zu beenden."""
-        print("[ThreadManager] Stoppe alle Worker...")
-        self.running = False
-        # Leere die Queue, um blockierte Threads zu lösen
-        while not self.task_queue.empty():
-            try:
-                self.task_queue.get_nowait()
-                self.task_queue.task_done()
-            except Empty:
-                break
-
-        # Warte auf das Beenden der Threads (optional, da daemon=True)
-        # for worker in self.workers:
-        #     worker.join(timeout=1)
-        print("[ThreadManager] Gestoppt.")
-
-
-# --- NEU: Fehlende Klassen für den PreloadingManager (behebt ImportError) ---
-
-class Task:
-    """
-    Kapselt eine Zielfunktion und ihre Argumente für den ThreadPool.
-    """
-
-    def __init__(self, target_func, *args, **kwargs):
-        self.target_func = target_func
-        self.args = args
-        self.kwargs = kwargs
+    def start_poll_worker(self, target_func, callback, *args):
+        """
+        Wie start_worker, aber als periodische Abfrage (PRIORITY_POLL).
+        Wartet dieselbe Abfrage (Funktion + Argumente) noch, wird nicht erneut eingereiht.
+        """
+        return self.submit(target_func, callback, args, priority=PRIORITY_POLL, key=("poll", target_func, args))
 
-    def run(self):
-        """Führt die Task aus und fängt Fehler ab."""
-        try:
-            self.target_func(*self.args, **self.kwargs)
-        except Exception as e:
-            print(f"[Task] Fehler bei Ausführung von {self.target_func.__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+    def cancel_key(self, key):
+        """ Bricht alle wartenden und laufenden Aufgaben mit diesem Schlüssel ab. """
+        with self._cond:
+            for task in self._pending + self._running_tasks:
+                if task.key == key:
+                    task.cancel()
+            self._pending = [task for task in self._pending if task.key != key]
 
+    # --- Worker ---
 
-class ThreadPool:
-    """
-    Ein dedizierter Thread-Pool für den PreloadingManager.
-    Nutzt max_workers=1 (Standard), um DB-Anfragen zu serialisieren (Regel 2).
-    Nutzt eine LIFO-Queue, damit P4 (Blättern) Vorrang vor P2/P3 (Tab-Laden) hat.
-    """
+    def _pick_task_locked(self):
+        """ Wählt die wichtigste startbare Aufgabe (Schlüssel frei, Klassen-Limit nicht erreicht). """
+        running_keys = {task.key for task in self._running_tasks if task.key is not None}
+        running_per_class = {}
+        for task in self._running_tasks:
+            running_per_class[task.priority] = running_per_class.get(task.priority, 0) + 1
 
-    def __init__(self, max_workers=1, thread_name_prefix="PreloadWorker"):
-        self.max_workers = max_workers
-        # LIFO (Last-In, First-Out) priorisiert die neuesten Aufgaben (P4).
-        self.task_queue = LifoQueue()
-        self.workers = []
-        self.running = False
-        self.thread_name_prefix = thread_name_prefix
+        # Noch wartende, inzwischen abgebrochene Aufgaben (z.B. über reporter.link) verwerfen
+        self._pending = [task for task in self._pending if not task.cancelled]
 
-    def start(self):
-        """Startet die Worker-Threads."""
-        if self.running:
-            return
-        self.running = True
-        for i in range(self.max_workers):
-            worker = threading.Thread(target=self._worker_loop, daemon=True)
-            worker.name = f"{self.thread_name_prefix}-{i}"
-            worker.start()
-            self.workers.append(worker)
+        best = None
+        for task in self._pending:
+            if task.key is not None and task.key in running_keys:
+                continue
+            limit = BACKGROUND_LIMITS.get(task.priority)
+            if limit is not None and running_per_class.get(task.priority, 0) >= limit:
+                continue
+            if best is None or (task.priority, task.seq) < (best.priority, best.seq):
+                best = task
+        if best is not None:
+            self._pending.remove(best)
+            self._running_tasks.append(best)
+            best.started = True
+        return best
 
     def _worker_loop(self):
-        """Die Hauptschleife für jeden Worker-Thread."""
-        while self.running:
-            try:
-                # Warte auf eine Task
-                task = self.task_queue.get(timeout=1)
-                if task:
-                    task.run()
-                    self.task_queue.task_done()
-            except Empty:
-                if not self.running:
+        while True:
+            with self._cond:
+                task = None
+                while self.running:
+                    task = self._pick_task_locked()
+                    if task is not None:
+                        break
+                    self._cond.wait()
+                if task is None:
                     break
+
+            result, error = None, None
+            try:
+                # (Abbruch nach dem Start prüft die Aufgabe selbst über ihre Marke)
+                context = self.background_context() \
+                    if self.background_context and task.priority >= PRIORITY_PRELOAD else nullcontext()
+                with context:
+                    result = task.target_func(*task.args, **task.kwargs)
+            except TaskCancelled:
+                task.cancel()
             except Exception as e:
-                print(f"[ThreadPool {threading.current_thread().name}] Fehler: {e}")
+                error = e
+            finally:
+                with self._cond:
+                    self._running_tasks.remove(task)
+                    # Gesperrte Schlüssel/Klassen sind wieder frei
+                    self._cond.notify_all()
 
-    def add_task(self, task: Task):
-        """Fügt eine Task zur LIFO-Queue hinzu."""
-        if self.running:
-            self.task_queue.put(task)
+            # Sende das Ergebnis an den GUI-Thread (überholte Aufgaben still verwerfen)
+            if not task.cancelled and self.running:
+                for callback in task.callbacks:
+                    try:
+                        self.root.after(0, callback, result, error)
+                    except Exception as e:
+                        print(f"[ThreadManager] Callback konnte nicht eingeplant werden: {e}")
+
+    def has_interactive_work(self):
+        """ True, solange interaktive Aufgaben (z.B. Speichern) warten oder laufen. """
+        with self._cond:
+            return any(task.priority == PRIORITY_INTERACTIVE for task in self._pending + self._running_tasks)
+
+    def get_stats(self):
+        """ Wartende/laufende Aufgaben pro Prioritätsklasse. """
+        with self._cond:
+            pending = {}
+            for task in self._pending:
+                pending[task.priority] = pending.get(task.priority, 0) + 1
+            running = {}
+            for task in self._running_tasks:
+                running[task.priority] = running.get(task.priority, 0) + 1
+        return {'pending': pending, 'running': running}
 
     def stop(self):
-        """Stoppt alle Worker-Threads."""
-        self.running = False
-        # Leere Queue, um Worker zu beenden
-        while not self.task_queue.empty():
-            try:
-                self.task_queue.get_nowait()
-                self.task_queue.task_done()
-            except Empty:
-                break
-        print(f"[ThreadPool {self.thread_name_prefix}] Gestoppt.")
+        """Signalisiert allen Workern, sich zu beenden."""
+        print("[ThreadManager] Stoppe alle Worker...")
+        with self._cond:
+            self.running = False
+            # Wartende verwerfen, laufende um Abbruch bitten
+            for task in self._pending + self._running_tasks:
+                task.cancel()
+            self._pending.clear()
+            self._cond.notify_all()
+
+        # Warte auf das Beenden der Threads (optional, da daemon=True)
+        # for worker in self.workers:
+        #     worker.join(timeout=1)
+        print("[ThreadManager] Gestoppt.")
 
-# --- ENDE NEU ---
\ No newline at end of file